@@ -12,6 +12,8 @@ import time
 from pathlib import Path
 import os
 
+from models.preview_index import get_preview_index
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -460,53 +462,13 @@ class Backend(QObject):
     def _find_pattern_preview(self, fileName):
         """Find the preview image for a pattern"""
         try:
-            # Extract just the filename from the path (remove any directory prefixes)
-            clean_filename = fileName.split('/')[-1]  # Get last part of path
-            logger.debug(f"Original fileName: {fileName}, clean filename: {clean_filename}")
-
-            # Check multiple possible locations for patterns directory
-            # Use relative paths that work across different environments
-            possible_dirs = [
-                Path("../patterns"),  # One level up (for when running from touch subdirectory)
-                Path("patterns"),     # Same level (for when running from main directory)
-                Path(__file__).parent.parent / "patterns"  # Dynamic path relative to backend.py
-            ]
-
-            for patterns_dir in possible_dirs:
-                cache_dir = patterns_dir / "cached_images"
-                if cache_dir.exists():
-                    logger.debug(f"Searching for preview in cache directory: {cache_dir}")
-
-                    # Extensions to try - PNG first for better kiosk compatibility
-                    extensions = [".png", ".webp", ".jpg", ".jpeg"]
-
-                    # Filenames to try - with and without .thr suffix
-                    base_name = clean_filename.replace(".thr", "")
-                    filenames_to_try = [clean_filename, base_name]
-
-                    # Try direct path in cache_dir first (fastest)
-                    for filename in filenames_to_try:
-                        for ext in extensions:
-                            preview_file = cache_dir / (filename + ext)
-                            if preview_file.exists():
-                                logger.info(f"Found preview (direct): {preview_file}")
-                                return str(preview_file.absolute())
-
-                    # If not found directly, search recursively through subdirectories
-                    logger.debug(f"Searching recursively in {cache_dir}...")
-                    for filename in filenames_to_try:
-                        for ext in extensions:
-                            target_name = filename + ext
-                            # Use rglob to search recursively
-                            matches = list(cache_dir.rglob(target_name))
-                            if matches:
-                                # Return the first match found
-                                preview_file = matches[0]
-                                logger.info(f"Found preview (recursive): {preview_file}")
-                                return str(preview_file.absolute())
-
-            logger.error("No preview image found")
-            return ""
+            # Resolved from the shared index (scanned off the UI thread, kept current by a file watcher)
+            preview_path = get_preview_index().find_preview(fileName)
+            if preview_path:
+                logger.debug(f"Found preview: {preview_path}")
+            else:
+                logger.error("No preview image found")
+            return preview_path
         except Exception as e:
             logger.error(f"Exception finding preview: {e}")
             return ""
@@ -1680,18 +1642,17 @@ class Backend(QObject):
 
     @Slot()
     def refreshPatterns(self):
-        """Refresh pattern cache - converts new WebPs to PNG and rescans patterns"""
+        """Refresh pattern cache - rescans patterns and queues missing thumbnails"""
         logger.debug("Refreshing patterns...")
         asyncio.create_task(self._refresh_patterns())
 
     async def _refresh_patterns(self):
         """Async implementation of pattern refresh"""
         try:
-            from png_cache_manager import PngCacheManager
-            cache_manager = PngCacheManager()
-            success = await cache_manager.ensure_png_cache_available()
+            # The index rescans off the UI thread; thumbnails are queued when it finishes
+            get_preview_index().rescan()
 
-            message = "Patterns refreshed" if success else "Refreshed with warnings"
+            message = "Patterns refreshed"
             logger.info(f"Pattern refresh completed: {message}")
             self.patternsRefreshCompleted.emit(True, message)
         except Exception as e:
@@ -14,7 +14,8 @@ from dotenv import load_dotenv
 from backend import Backend
 from models.pattern_model import PatternModel
 from models.playlist_model import PlaylistModel
-from png_cache_manager import ensure_png_cache_startup
+from models.preview_index import get_preview_index
+from thumbnail_cache import PROVIDER_ID, ThumbnailProvider, get_thumbnail_cache
 
 # Load environment variables from .env file if it exists
 load_dotenv(Path(__file__).parent / ".env")
@@ -74,16 +75,16 @@ async def startup_tasks():
     """Run async startup tasks"""
     logger.info("🚀 Starting dune-weaver-touch async initialization...")
     
-    # Ensure PNG cache is available for all WebP previews
+    # Fill in card thumbnails missing from older caches, behind whatever is on screen
     try:
-        logger.info("🎨 Checking PNG preview cache...")
-        png_cache_success = await ensure_png_cache_startup()
-        if png_cache_success:
-            logger.info("✅ PNG cache check completed successfully")
-        else:
-            logger.warning("⚠️ PNG cache check completed with warnings")
+        preview_index = get_preview_index()
+        thumbnail_cache = get_thumbnail_cache()
+        preview_index.updated.connect(thumbnail_cache.warm)
+        if preview_index.ready:
+            thumbnail_cache.warm()
+        logger.info("🎨 Thumbnail cache ready")
     except Exception as e:
-        logger.error(f"❌ PNG cache check failed: {e}")
+        logger.error(f"❌ Thumbnail cache setup failed: {e}")
     
     logger.info("✨ dune-weaver-touch startup tasks completed")
 
@@ -119,6 +120,8 @@ def main():
     
     # Load QML
     engine = QQmlApplicationEngine()
+    # Pattern cards load thumbnails asynchronously from image://thumbnails/<name>
+    engine.addImageProvider(PROVIDER_ID, ThumbnailProvider(get_thumbnail_cache()))
 
     # Set rotation flag for Pi 5 (display needs 180° rotation via QML)
     # This applies regardless of Qt backend (eglfs or linuxfb)
@@ -164,6 +167,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("🛑 KeyboardInterrupt received, shutting down...")
     finally:
+        get_thumbnail_cache().shutdown()
         loop.close()
 
     return 0
@@ -1,101 +1,119 @@
-from PySide6.QtCore import QAbstractListModel, Qt, Slot
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, Slot
 from PySide6.QtQml import QmlElement
-from pathlib import Path
+from models.preview_index import get_preview_index, normalize_name
+from thumbnail_cache import thumbnail_url
 
 QML_IMPORT_NAME = "DuneWeaver"
 QML_IMPORT_MAJOR_VERSION = 1
 
 @QmlElement
 class PatternModel(QAbstractListModel):
-    """Model for pattern list with direct file system access"""
-    
+    """Model for pattern list backed by the shared pattern/preview index"""
+
     NameRole = Qt.UserRole + 1
     PathRole = Qt.UserRole + 2
     PreviewRole = Qt.UserRole + 3
-    
+    ThumbnailRole = Qt.UserRole + 4
+
     def __init__(self):
         super().__init__()
         self._patterns = []
         self._filtered_patterns = []
-        # Look for patterns in the parent directory (main dune-weaver folder)
-        self.patterns_dir = Path("../patterns")
-        self.cache_dir = Path("../patterns/cached_images")
-        self.refresh()
-    
+        self._search = ""
+        # The index scans the patterns directory in the background and rescans on changes
+        self._index = get_preview_index()
+        self.patterns_dir = self._index.patterns_dir
+        self.cache_dir = self._index.cache_dir
+        self._index.updated.connect(self._on_index_updated)
+        if self._index.ready:
+            self._on_index_updated()
+
     def roleNames(self):
         return {
             self.NameRole: b"name",
-            self.PathRole: b"path", 
-            self.PreviewRole: b"preview"
+            self.PathRole: b"path",
+            self.PreviewRole: b"preview",
+            self.ThumbnailRole: b"thumbnail"
         }
-    
+
     def rowCount(self, parent=None):
         return len(self._filtered_patterns)
-    
+
     def data(self, index, role):
         if not index.isValid() or index.row() >= len(self._filtered_patterns):
             return None
-        
+
         pattern = self._filtered_patterns[index.row()]
-        
+
         if role == self.NameRole:
             return pattern["name"]
         elif role == self.PathRole:
             return pattern["path"]
         elif role == self.PreviewRole:
-            # For patterns in subdirectories, check both flattened and hierarchical cache structures
-            pattern_name = pattern["name"]
-            
-            # Try PNG format for kiosk compatibility
-            # First try hierarchical structure (preserving subdirectories)
-            preview_path_hierarchical = self.cache_dir / f"{pattern_name}.png"
-            if preview_path_hierarchical.exists():
-                return str(preview_path_hierarchical.absolute())
-            
-            # Then try flattened structure (replace / with _)
-            preview_name_flat = pattern_name.replace("/", "_").replace("\\", "_")
-            preview_path_flat = self.cache_dir / f"{preview_name_flat}.png"
-            if preview_path_flat.exists():
-                return str(preview_path_flat.absolute())
-            
-            # Fallback to WebP if PNG not found (for existing caches)
-            preview_path_hierarchical_webp = self.cache_dir / f"{pattern_name}.webp"
-            if preview_path_hierarchical_webp.exists():
-                return str(preview_path_hierarchical_webp.absolute())
-            
-            preview_path_flat_webp = self.cache_dir / f"{preview_name_flat}.webp"
-            if preview_path_flat_webp.exists():
-                return str(preview_path_flat_webp.absolute())
-            
-            return ""
-        
+            return self._index.preview_for(pattern["name"])
+        elif role == self.ThumbnailRole:
+            # Card-sized image, decoded off the UI thread by the thumbnail provider
+            return thumbnail_url(pattern["name"]) if self._index.preview_for(pattern["name"]) else ""
+
         return None
-    
+
     @Slot()
     def refresh(self):
-        print(f"Loading patterns from: {self.patterns_dir.absolute()}")
-        self.beginResetModel()
-        patterns = []
-        for file_path in self.patterns_dir.rglob("*.thr"):
-            relative = file_path.relative_to(self.patterns_dir)
-            patterns.append({
-                "name": str(relative),
-                "path": str(file_path)
-            })
-        self._patterns = sorted(patterns, key=lambda x: x["name"])
-        self._filtered_patterns = self._patterns.copy()
-        print(f"Loaded {len(self._patterns)} patterns")
-        self.endResetModel()
-    
+        """Rescan the patterns directory in the background; rows update when it finishes"""
+        self._index.rescan()
+
+    def _on_index_updated(self):
+        self._patterns = self._index.patterns
+        self._apply_filter(self._matching(self._patterns, self._search))
+        # Previews may have appeared or changed for rows that stayed
+        if self._filtered_patterns:
+            self.dataChanged.emit(self.index(0), self.index(len(self._filtered_patterns) - 1), [self.PreviewRole, self.ThumbnailRole])
+
     @Slot(str)
     def filter(self, search_text):
-        self.beginResetModel()
-        if not search_text:
-            self._filtered_patterns = self._patterns.copy()
+        search = normalize_name(search_text or "")
+        if search == self._search:
+            return
+        # A longer query can only narrow the current matches, so search those instead of everything
+        if self._search and self._search in search:
+            candidates = self._filtered_patterns
         else:
-            search_lower = search_text.lower()
-            self._filtered_patterns = [
-                p for p in self._patterns 
-                if search_lower in p["name"].lower()
-            ]
-        self.endResetModel()
\ No newline at end of file
+            candidates = self._patterns
+        self._search = search
+        self._apply_filter(self._matching(candidates, search))
+
+    @staticmethod
+    def _matching(patterns, search):
+        if not search:
+            return list(patterns)
+        return [p for p in patterns if search in p["search"]]
+
+    def _apply_filter(self, new_rows):
+        """Move the visible rows to new_rows with row remove/insert signals instead of a reset
+
+        Both lists are sorted by name, so one merge pass finds each run of rows to drop or add.
+        """
+        current = self._filtered_patterns
+        row = 0
+        j = 0
+        while row < len(current) or j < len(new_rows):
+            if row < len(current) and j < len(new_rows) and current[row]["name"] == new_rows[j]["name"]:
+                current[row] = new_rows[j]
+                row += 1
+                j += 1
+            elif j >= len(new_rows) or (row < len(current) and current[row]["name"] < new_rows[j]["name"]):
+                end = row
+                while end < len(current) and (j >= len(new_rows) or current[end]["name"] < new_rows[j]["name"]):
+                    end += 1
+                self.beginRemoveRows(QModelIndex(), row, end - 1)
+                del current[row:end]
+                self.endRemoveRows()
+            else:
+                end = j
+                while end < len(new_rows) and (row >= len(current) or new_rows[end]["name"] < current[row]["name"]):
+                    end += 1
+                self.beginInsertRows(QModelIndex(), row, row + end - j - 1)
+                current[row:row] = new_rows[j:end]
+                self.endInsertRows()
+                row += end - j
+                j = end
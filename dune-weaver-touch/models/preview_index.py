@@ -0,0 +1,211 @@
+"""Pattern and preview index for the touch interface
+
+Scans the patterns directory and its preview cache once, in a background thread,
+and resolves every pattern to its preview image up front. Lookups from the
+model and backend are then plain dict reads instead of Path.exists()/rglob calls
+on the UI thread. QFileSystemWatcher keeps the index current: any change in a
+watched directory schedules a (debounced) rescan.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+
+logger = logging.getLogger(__name__)
+
+# Preview formats in order of preference - PNG first for kiosk compatibility
+PREVIEW_EXTENSIONS = (".png", ".webp", ".jpg", ".jpeg")
+RESCAN_DELAY_MS = 500
+
+
+def find_patterns_dir() -> Path:
+    """Locate the main dune-weaver patterns directory"""
+    candidates = [
+        Path("../patterns"),  # One level up (for when running from touch subdirectory)
+        Path("patterns"),     # Same level (for when running from main directory)
+        Path(__file__).parent.parent.parent / "patterns"  # Relative to this module
+    ]
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return candidates[0]
+
+
+def normalize_name(name: str) -> str:
+    """Search key for a pattern name"""
+    return name.casefold()
+
+
+def _walk(root: Path):
+    """Yield (relative posix path, absolute path) for every file below root"""
+    stack = [(str(root), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relative = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, relative + "/"))
+                    elif entry.is_file():
+                        yield relative, entry.path
+        except OSError as e:
+            logger.debug(f"Cannot scan {directory}: {e}")
+
+
+def _list_dirs(root: Path):
+    """All directories below root (including root), for the file watcher"""
+    dirs = [str(root)]
+    for directory, subdirs, _ in os.walk(root):
+        dirs.extend(os.path.join(directory, d) for d in subdirs)
+    return dirs
+
+
+def scan(patterns_dir: Path, cache_dir: Path):
+    """
+    Build the index. Returns (patterns, previews, by_basename, watch_dirs):
+    patterns is a name-sorted list of {"name", "path", "search"} dicts, previews maps
+    pattern name -> preview path and by_basename maps an image stem -> preview path.
+    """
+    # Cached image stem (relative, without image extension) -> (priority, absolute path)
+    images = {}
+    by_basename = {}
+    if cache_dir.exists():
+        for relative, path in _walk(cache_dir):
+            stem, ext = os.path.splitext(relative)
+            ext = ext.lower()
+            if ext not in PREVIEW_EXTENSIONS:
+                continue
+            priority = PREVIEW_EXTENSIONS.index(ext)
+            path = os.path.abspath(path)
+            if stem not in images or priority < images[stem][0]:
+                images[stem] = (priority, path)
+            # Files directly in the cache directory win over ones in subdirectories
+            rank = ("/" in stem, priority)
+            basename = stem.rsplit("/", 1)[-1]
+            if basename not in by_basename or rank < by_basename[basename][0]:
+                by_basename[basename] = (rank, path)
+
+    patterns = []
+    previews = {}
+    if patterns_dir.exists():
+        cache_prefix = cache_dir.name + "/"
+        for relative, path in _walk(patterns_dir):
+            if not relative.endswith(".thr") or relative.startswith(cache_prefix):
+                continue
+            name = relative.replace("/", os.sep)
+            patterns.append({"name": name, "path": path, "search": normalize_name(name)})
+            # Hierarchical cache layout first, then the flattened one (/ -> _)
+            for stem in (relative, relative.replace("/", "_")):
+                if stem in images:
+                    previews[name] = images[stem][1]
+                    break
+    patterns.sort(key=lambda p: p["name"])
+
+    watch_dirs = []
+    for root in (patterns_dir, cache_dir):
+        if root.exists():
+            watch_dirs.extend(_list_dirs(root))
+
+    return patterns, previews, {k: v[1] for k, v in by_basename.items()}, watch_dirs
+
+
+class PreviewIndex(QObject):
+    """Shared pattern/preview index, rebuilt off the UI thread"""
+
+    # Emitted on the UI thread after every completed scan
+    updated = Signal()
+    _scanFinished = Signal(object)
+
+    def __init__(self, patterns_dir: Path = None):
+        super().__init__()
+        self.patterns_dir = patterns_dir or find_patterns_dir()
+        self.cache_dir = self.patterns_dir / "cached_images"
+        self.patterns = []
+        self._previews = {}
+        self._by_basename = {}
+        self.ready = False
+
+        self._scan_lock = threading.Lock()
+        self._scan_running = False
+        self._scan_again = False
+        self._scanFinished.connect(self._on_scan_finished)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._schedule_rescan)
+        self._rescan_timer = QTimer(self)
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(RESCAN_DELAY_MS)
+        self._rescan_timer.timeout.connect(self.rescan)
+
+    def rescan(self):
+        """Start a background scan; a request made mid-scan runs once it finishes"""
+        with self._scan_lock:
+            if self._scan_running:
+                self._scan_again = True
+                return
+            self._scan_running = True
+        threading.Thread(target=self._scan_worker, daemon=True).start()
+
+    def _scan_worker(self):
+        while True:
+            try:
+                result = scan(self.patterns_dir, self.cache_dir)
+            except Exception as e:
+                logger.error(f"Pattern index scan failed: {e}")
+                result = None
+            if result is not None:
+                self._scanFinished.emit(result)  # Queued to the UI thread
+            with self._scan_lock:
+                if not self._scan_again:
+                    self._scan_running = False
+                    return
+                self._scan_again = False
+
+    def _on_scan_finished(self, result):
+        self.patterns, self._previews, self._by_basename, watch_dirs = result
+        self.ready = True
+
+        watched = set(self._watcher.directories())
+        wanted = set(watch_dirs)
+        if watched - wanted:
+            self._watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self._watcher.addPaths(list(wanted - watched))
+
+        logger.info(f"Pattern index: {len(self.patterns)} patterns, {len(self._previews)} previews")
+        self.updated.emit()
+
+    def _schedule_rescan(self, _path=None):
+        # Restart the timer so a burst of file events triggers one scan
+        self._rescan_timer.start()
+
+    def preview_for(self, name: str) -> str:
+        """Preview for a pattern name relative to the patterns directory, or ''"""
+        return self._previews.get(name, "")
+
+    def find_preview(self, file_name: str) -> str:
+        """Preview for a pattern given by name or path, falling back to a match by file name anywhere in the cache"""
+        name = file_name.replace("\\", "/")
+        preview = self._previews.get(name.replace("/", os.sep))
+        if preview:
+            return preview
+        clean_filename = name.split("/")[-1]
+        for basename in (clean_filename, clean_filename.replace(".thr", "")):
+            if basename in self._by_basename:
+                return self._by_basename[basename]
+        return ""
+
+
+_instance = None
+
+
+def get_preview_index() -> PreviewIndex:
+    """Shared index, created and first scanned on first use (call from the UI thread)"""
+    global _instance
+    if _instance is None:
+        _instance = PreviewIndex()
+        _instance.rescan()
+    return _instance
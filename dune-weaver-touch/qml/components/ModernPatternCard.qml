@@ -5,7 +5,8 @@ import "." as Components
 
 Rectangle {
     property string name: ""
-    property alias preview: previewImage.source
+    property string preview: ""
+    property string thumbnail: ""
 
     // Clean up the pattern name for display
     property string cleanName: {
@@ -60,7 +61,9 @@ Rectangle {
                 id: previewImage
                 anchors.fill: parent
                 fillMode: Image.PreserveAspectFit
-                source: preview ? "file:///" + preview : ""
+                // Card-sized thumbnail from the async provider, full preview as a fallback
+                source: thumbnail ? thumbnail : (preview ? "file:///" + preview : "")
+                asynchronous: true
                 smooth: true
                 
                 // Loading animation
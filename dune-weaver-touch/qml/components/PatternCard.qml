@@ -3,7 +3,8 @@ import QtQuick.Controls 2.15
 
 Rectangle {
     property alias name: nameLabel.text
-    property alias preview: previewImage.source
+    property string preview: ""
+    property string thumbnail: ""
     
     signal clicked()
     
@@ -21,7 +22,8 @@ Rectangle {
             width: parent.width
             height: parent.height - nameLabel.height - 10
             fillMode: Image.PreserveAspectFit
-            source: preview ? "file:///" + preview : ""
+            source: thumbnail ? thumbnail : (preview ? "file:///" + preview : "")
+            asynchronous: true
             
             Rectangle {
                 anchors.fill: parent
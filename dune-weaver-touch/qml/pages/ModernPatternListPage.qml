@@ -25,12 +25,18 @@ Page {
         }
     }
 
-    // Update pattern count when model resets (rowCount() is not reactive)
+    // Update pattern count when rows change (rowCount() is not reactive)
     Connections {
         target: patternModel
         function onModelReset() {
             patternCount = patternModel.rowCount()
         }
+        function onRowsInserted() {
+            patternCount = patternModel.rowCount()
+        }
+        function onRowsRemoved() {
+            patternCount = patternModel.rowCount()
+        }
     }
 
     Rectangle {
@@ -300,6 +306,7 @@ Page {
                 height: gridView.cellHeight - 10
                 name: model.name
                 preview: model.preview
+                thumbnail: model.thumbnail
                 
                 onClicked: {
                     if (stackView && backend) {
@@ -44,6 +44,7 @@ Page {
             height: gridView.cellHeight - 10
             name: model.name
             preview: model.preview
+            thumbnail: model.thumbnail
             
             onClicked: {
                 stackView.push("PatternDetailPage.qml", {
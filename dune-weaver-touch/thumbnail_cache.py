@@ -0,0 +1,250 @@
+"""Thumbnail cache for dune-weaver-touch
+
+Pattern cards show display-sized PNG thumbnails instead of the full 512 px
+previews. The main app writes them to patterns/cached_thumbnails when it renders
+a preview; any that are missing (older caches, or previews added some other way)
+are made here on demand from the cached preview in a small process pool.
+Requests for rows being shown are served before the background fill.
+
+QML loads thumbnails through an async image provider ("image://thumbnails/<name>"),
+so neither decoding nor conversion ever runs on the UI thread.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from urllib.parse import quote, unquote
+from PySide6.QtCore import QRunnable, QThreadPool
+from PySide6.QtGui import QImage
+from PySide6.QtQuick import QQuickAsyncImageProvider, QQuickImageResponse, QQuickTextureFactory
+from models.preview_index import get_preview_index
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 192  # Card image area on the 800x480 panel
+THUMBNAIL_DIR_NAME = "cached_thumbnails"
+PROVIDER_ID = "thumbnails"
+VISIBLE_PRIORITY = 0
+BACKGROUND_PRIORITY = 1
+
+
+def make_thumbnail(source: str, dest: str, size: int = THUMBNAIL_SIZE) -> str:
+    """Write a size x size (max) PNG thumbnail of source to dest. Runs in a worker process."""
+    from PIL import Image
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    temp = dest + ".tmp"
+    with Image.open(source) as img:
+        img = img.convert("RGBA")
+        img.thumbnail((size, size), Image.Resampling.LANCZOS)
+        # Fast compression: these are tiny and decode time matters more than bytes
+        img.save(temp, "PNG", compress_level=1)
+    os.replace(temp, dest)  # Readers never see a half-written file
+    return dest
+
+
+def thumbnail_url(name: str) -> str:
+    """QML image source for a pattern's thumbnail"""
+    return f"image://{PROVIDER_ID}/{quote(name)}"
+
+
+class ThumbnailCache:
+    """Resolves pattern thumbnails, converting missing ones in a bounded process pool"""
+
+    def __init__(self, index, max_workers: int = 2):
+        self._index = index
+        self.thumbnail_dir = Path(index.patterns_dir) / THUMBNAIL_DIR_NAME
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._queue = []    # heap of (priority, seq, name)
+        self._jobs = {}     # name -> {"source", "priority", "callbacks", "background", "running"}
+        self._running = 0
+        self._seq = itertools.count()
+
+    def thumbnail_path(self, name: str) -> Path:
+        return self.thumbnail_dir / f"{name}.png"
+
+    def request(self, name: str, callback, priority: int = VISIBLE_PRIORITY):
+        """Call callback(path) once the thumbnail exists, or callback("") if it cannot be made.
+
+        Runs the callback immediately when the thumbnail is already on disk; otherwise it
+        is called from a pool thread when the conversion finishes.
+        """
+        path = self.thumbnail_path(name)
+        if path.exists():
+            callback(str(path))
+            return
+        source = self._index.preview_for(name)
+        if not source:
+            callback("")
+            return
+        self._enqueue(name, source, priority, callback)
+
+    def cancel(self, name: str, callback):
+        """Drop a pending request (e.g. the row scrolled out of view before its turn)"""
+        with self._lock:
+            job = self._jobs.get(name)
+            if job is None or callback not in job["callbacks"]:
+                return
+            job["callbacks"].remove(callback)
+            if not job["callbacks"] and not job["background"] and not job["running"]:
+                del self._jobs[name]  # Its heap entry is skipped when popped
+
+    def warm(self):
+        """Queue every missing thumbnail behind the visible requests (scans in a thread)"""
+        patterns = list(self._index.patterns)
+
+        def _scan():
+            missing = [p["name"] for p in patterns
+                       if self._index.preview_for(p["name"]) and not self.thumbnail_path(p["name"]).exists()]
+            if missing:
+                logger.info(f"Queueing {len(missing)} missing thumbnails")
+            for name in missing:
+                self._enqueue(name, self._index.preview_for(name), BACKGROUND_PRIORITY, None)
+
+        threading.Thread(target=_scan, daemon=True).start()
+
+    def shutdown(self):
+        with self._lock:
+            self._queue.clear()
+            self._jobs.clear()
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _enqueue(self, name, source, priority, callback):
+        with self._lock:
+            job = self._jobs.get(name)
+            if job is None:
+                job = {"source": source, "priority": priority, "callbacks": [],
+                       "background": False, "running": False}
+                self._jobs[name] = job
+                heapq.heappush(self._queue, (priority, next(self._seq), name))
+            elif priority < job["priority"] and not job["running"]:
+                # Promote: the older heap entry is skipped once this one has run
+                job["priority"] = priority
+                heapq.heappush(self._queue, (priority, next(self._seq), name))
+            if callback is not None:
+                job["callbacks"].append(callback)
+            else:
+                job["background"] = True
+        self._pump()
+
+    def _pump(self):
+        with self._lock:
+            while self._running < self.max_workers and self._queue:
+                priority, _, name = heapq.heappop(self._queue)
+                job = self._jobs.get(name)
+                if job is None or job["running"] or priority != job["priority"]:
+                    continue
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                job["running"] = True
+                self._running += 1
+                future = self._executor.submit(make_thumbnail, job["source"], str(self.thumbnail_path(name)))
+                future.add_done_callback(lambda f, name=name: self._finished(name, f))
+
+    def _finished(self, name, future):
+        broken = False
+        try:
+            path = future.result()
+        except Exception as e:
+            logger.error(f"Thumbnail failed for {name}: {e}")
+            path = ""
+            broken = isinstance(e, BrokenProcessPool)
+        with self._lock:
+            self._running -= 1
+            if broken:
+                self._executor = None  # A worker died; start a fresh pool for the next job
+            job = self._jobs.pop(name, None)
+        for callback in (job["callbacks"] if job else []):
+            try:
+                callback(path)
+            except Exception as e:
+                logger.error(f"Thumbnail callback failed for {name}: {e}")
+        self._pump()
+
+
+class _LoadImage(QRunnable):
+    """Decode a thumbnail on the Qt thread pool"""
+
+    def __init__(self, response, path):
+        super().__init__()
+        self._response = response
+        self._path = path
+
+    def run(self):
+        self._response.deliver(self._path)
+
+
+class ThumbnailResponse(QQuickImageResponse):
+    """One pending thumbnail for QML; finishes once the image is decoded"""
+
+    def __init__(self, cache: ThumbnailCache, name: str):
+        super().__init__()
+        self._cache = cache
+        self._name = name
+        self._image = QImage()
+        self._error = ""
+        self._done = False
+        self._lock = threading.Lock()
+        cache.request(name, self._on_thumbnail)
+
+    def _on_thumbnail(self, path):
+        if not path:
+            self.deliver("")
+            return
+        QThreadPool.globalInstance().start(_LoadImage(self, path))
+
+    def deliver(self, path):
+        image = QImage(path) if path else QImage()
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        self._image = image
+        if image.isNull():
+            self._error = f"No thumbnail for {self._name}"
+        self.finished.emit()  # QQuickImageResponse allows emitting from any thread
+
+    def textureFactory(self):
+        return QQuickTextureFactory.textureFactoryForImage(self._image)
+
+    def errorString(self):
+        return self._error
+
+    def cancel(self):
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        self._cache.cancel(self._name, self._on_thumbnail)
+        self.finished.emit()
+
+
+class ThumbnailProvider(QQuickAsyncImageProvider):
+    """Serves image://thumbnails/<pattern name> from the thumbnail cache"""
+
+    def __init__(self, cache: ThumbnailCache):
+        super().__init__()
+        self._cache = cache
+
+    def requestImageResponse(self, image_id, requested_size):
+        return ThumbnailResponse(self._cache, unquote(image_id))
+
+
+_instance = None
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Shared cache over the shared pattern/preview index"""
+    global _instance
+    if _instance is None:
+        _instance = ThumbnailCache(get_preview_index())
+    return _instance
@@ -11,6 +11,7 @@ import {
   DialogTitle,
 } from '@/components/ui/dialog'
 import { apiClient } from '@/lib/apiClient'
+import { fetchCoordinates } from '@/lib/coordinates'
 import { useStatusStore } from '@/stores/useStatusStore'
 import type { StatusData } from '@/stores/useStatusStore'
 import {
@@ -496,11 +497,9 @@ export function NowPlayingBar({ isLogsOpen = false, logsDrawerHeight = 256, isVi
     lastFileRef.current = currentFile
     lastDrawnIndexRef.current = -1
 
-    apiClient.post<{ coordinates?: Coordinate[] }>('/get_theta_rho_coordinates', { file_name: currentFile })
-      .then((data) => {
-        if (data.coordinates && Array.isArray(data.coordinates)) {
-          setCoordinates(data.coordinates)
-        }
+    fetchCoordinates(currentFile)
+      .then((coords) => {
+        setCoordinates(coords)
       })
       .catch((err) => {
         console.error('Failed to fetch coordinates:', err)
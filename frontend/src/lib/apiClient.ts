@@ -96,6 +96,20 @@ class ApiClient {
     return JSON.parse(text) as T
   }
 
+  /**
+   * GET request returning the raw response body (for binary endpoints).
+   */
+  async getBinary(endpoint: string, signal?: AbortSignal): Promise<ArrayBuffer> {
+    const response = await fetch(this.buildUrl(endpoint), { signal })
+
+    if (!response.ok) {
+      const errorText = await response.text()
+      throw new Error(`HTTP ${response.status}: ${errorText}`)
+    }
+
+    return response.arrayBuffer()
+  }
+
   /**
    * GET request
    */
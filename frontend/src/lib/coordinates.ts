@@ -0,0 +1,87 @@
+/**
+ * Binary pattern coordinates for animated previews.
+ *
+ * /api/coordinates serves theta/rho as fixed-width binary records at several
+ * levels of detail (layout documented in modules/core/coordinate_codec.py), so a
+ * coarse preview can be drawn before the full pattern has downloaded.
+ */
+import { apiClient } from './apiClient'
+
+export type Coordinate = [number, number]
+
+const HEADER_SIZE = 28
+const ENCODING_FLOAT32 = 0
+const THETA_SCALE = 10000
+const RHO_SCALE = 30000
+
+export const LOD_COARSE = 0
+export const LOD_FULL = 2
+
+/**
+ * Decode a coordinate buffer into [theta, rho] pairs.
+ */
+export function decodeCoordinates(buffer: ArrayBuffer): Coordinate[] {
+  const view = new DataView(buffer)
+  const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3))
+  if (magic !== 'DWC1') {
+    throw new Error('Invalid coordinate data')
+  }
+
+  const encoding = view.getUint8(5)
+  const count = view.getUint32(8, true)
+  const coordinates: Coordinate[] = new Array(count)
+
+  if (encoding === ENCODING_FLOAT32) {
+    for (let i = 0, offset = HEADER_SIZE; i < count; i++, offset += 8) {
+      coordinates[i] = [view.getFloat32(offset, true), view.getFloat32(offset + 4, true)]
+    }
+    return coordinates
+  }
+
+  // Quantized int16 deltas from the first point stored in the header
+  let theta = view.getInt32(16, true)
+  let rho = view.getInt32(20, true)
+  for (let i = 0, offset = HEADER_SIZE; i < count; i++, offset += 4) {
+    theta += view.getInt16(offset, true)
+    rho += view.getInt16(offset + 2, true)
+    coordinates[i] = [theta / THETA_SCALE, rho / RHO_SCALE]
+  }
+  return coordinates
+}
+
+/**
+ * Fetch one level of detail of a pattern's coordinates.
+ */
+export async function fetchCoordinates(
+  filePath: string,
+  lod: number = LOD_FULL,
+  signal?: AbortSignal
+): Promise<Coordinate[]> {
+  const path = filePath.split('/').map(encodeURIComponent).join('/')
+  const buffer = await apiClient.getBinary(`/api/coordinates/${path}?lod=${lod}`, signal)
+  return decodeCoordinates(buffer)
+}
+
+/**
+ * Fetch the coarse level and the full pattern in parallel.
+ * onUpdate gets the coarse points first (unless the full set wins the race), then the full set.
+ */
+export async function fetchCoordinatesProgressive(
+  filePath: string,
+  onUpdate: (coordinates: Coordinate[]) => void,
+  signal?: AbortSignal
+): Promise<Coordinate[]> {
+  let complete = false
+  fetchCoordinates(filePath, LOD_COARSE, signal)
+    .then((coarse) => {
+      if (!complete) onUpdate(coarse)
+    })
+    .catch(() => {
+      // The full request reports errors
+    })
+
+  const full = await fetchCoordinates(filePath, LOD_FULL, signal)
+  complete = true
+  onUpdate(full)
+  return full
+}
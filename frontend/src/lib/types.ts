@@ -21,11 +21,12 @@ export interface Playlist {
 }
 
 export type SortOption = 'name' | 'date' | 'size' | 'favorites' | 'plays' | 'last_played'
-export type PreExecution = 'none' | 'adaptive' | 'clear_from_in' | 'clear_from_out' | 'clear_sideway'
+export type PreExecution = 'none' | 'adaptive' | 'smart' | 'clear_from_in' | 'clear_from_out' | 'clear_sideway'
 export type RunMode = 'single' | 'indefinite'
 
 export const preExecutionOptions: { value: PreExecution; label: string; description: string }[] = [
   { value: 'adaptive', label: 'Adaptive', description: 'Automatically picks the best clear direction based on where the ball is' },
+  { value: 'smart', label: 'Smart', description: 'Skips or shortens the clear when the next pattern redraws the same area' },
   { value: 'clear_from_in', label: 'From Center', description: 'Spirals outward from the center to erase the current pattern' },
   { value: 'clear_from_out', label: 'From Perimeter', description: 'Spirals inward from the edge to erase the current pattern' },
   { value: 'clear_sideway', label: 'Sideways', description: 'Sweeps side-to-side across the sand to erase the current pattern' },
@@ -9,6 +9,7 @@ import {
 } from '@/lib/previewCache'
 import { fuzzyMatch } from '@/lib/utils'
 import { apiClient } from '@/lib/apiClient'
+import { fetchCoordinatesProgressive } from '@/lib/coordinates'
 import { useOnBackendConnected } from '@/hooks/useBackendConnection'
 import { Button } from '@/components/ui/button'
 import { Input } from '@/components/ui/input'
@@ -49,7 +50,7 @@ interface PreviewData {
 type Coordinate = [number, number]
 
 type SortOption = 'name' | 'date' | 'size' | 'favorites' | 'plays' | 'last_played'
-type PreExecution = 'none' | 'adaptive' | 'clear_from_in' | 'clear_from_out' | 'clear_sideway'
+type PreExecution = 'none' | 'adaptive' | 'smart' | 'clear_from_in' | 'clear_from_out' | 'clear_sideway'
 
 // Context for lazy loading previews
 interface PreviewContextType {
@@ -346,8 +347,11 @@ export function BrowsePage() {
   const fetchCoordinates = async (filePath: string) => {
     setIsLoadingCoordinates(true)
     try {
-      const data = await apiClient.post<{ coordinates?: Coordinate[] }>('/get_theta_rho_coordinates', { file_name: filePath })
-      setCoordinates(data.coordinates || [])
+      // Coarse level of detail first so the animation can start, then the full pattern
+      await fetchCoordinatesProgressive(filePath, (coords) => {
+        setCoordinates(coords)
+        setIsLoadingCoordinates(false)
+      })
     } catch (error) {
       console.error('Error fetching coordinates:', error)
       toast.error('Failed to load pattern coordinates')
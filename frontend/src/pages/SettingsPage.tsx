@@ -1949,6 +1949,7 @@ export function SettingsPage() {
                       <SelectContent>
                         <SelectItem value="none">None</SelectItem>
                         <SelectItem value="adaptive">Adaptive</SelectItem>
+                        <SelectItem value="smart">Smart</SelectItem>
                         <SelectItem value="clear_from_in">Clear From Center</SelectItem>
                         <SelectItem value="clear_from_out">Clear From Perimeter</SelectItem>
                         <SelectItem value="clear_sideway">Clear Sideways</SelectItem>
@@ -128,6 +128,24 @@ export const handlers = [
     })
   }),
 
+  http.get('/api/coordinates/*', () => {
+    // Binary coordinates as float32 records (layout in src/lib/coordinates.ts)
+    const count = 50
+    const buffer = new ArrayBuffer(28 + count * 8)
+    const view = new DataView(buffer)
+    'DWC1'.split('').forEach((c, i) => view.setUint8(i, c.charCodeAt(0)))
+    view.setUint8(4, 1)
+    view.setUint32(8, count, true)
+    view.setUint32(12, count, true)
+    for (let i = 0; i < count; i++) {
+      view.setFloat32(28 + i * 8, i * 0.126, true)
+      view.setFloat32(32 + i * 8, 0.5 + Math.sin(i * 0.2) * 0.3, true)
+    }
+    return HttpResponse.arrayBuffer(buffer, {
+      headers: { 'Content-Type': 'application/octet-stream' },
+    })
+  }),
+
   http.post('/run_theta_rho', async ({ request }) => {
     const body = await request.json() as { file_name?: string; file?: string; pre_execution?: string }
     const file = body.file_name || body.file
@@ -144,7 +162,12 @@ export const handlers = [
   }),
 
   http.post('/upload_theta_rho', async () => {
-    return HttpResponse.json({ success: true, path: 'patterns/custom/uploaded.thr' })
+    return HttpResponse.json({
+      success: true,
+      file: 'custom_patterns/uploaded.thr',
+      job_id: 'upload-job-1',
+      stats: { points: 100 },
+    })
   }),
 
   http.get('/api/pattern_history_all', () => {
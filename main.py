@@ -1,5 +1,9 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect, Request
-from fastapi.responses import JSONResponse, FileResponse
+# Imported first so the startup profiler can time every other import
+from modules.core import startup_profile
+startup_profile.install()
+
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect, Request
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
@@ -8,7 +12,7 @@ from typing import List, Optional
 import os
 import logging
 from datetime import datetime
-from modules.connection import connection_manager
+from modules.connection import connection_manager, reconnect
 from modules.core import pattern_manager
 from modules.core.pattern_manager import parse_theta_rho_file, THETA_RHO_DIR
 from modules.core import playlist_manager
@@ -21,7 +25,13 @@ from contextlib import asynccontextmanager
 from modules.led.led_interface import LEDInterface
 from modules.screen.screen_controller import ScreenController
 from modules.led.idle_timeout_manager import idle_timeout_manager
-from modules.core.cache_manager import get_cache_path, generate_image_preview, get_pattern_metadata
+from modules.core.cache_manager import get_cache_path, get_pattern_metadata
+from modules.core.cache_jobs import cache_jobs
+from modules.core.coordinate_codec import coordinate_cache, parse_byte_range, ENCODINGS, LOD_FULL
+from modules.core.position_stream import stream_positions, DEFAULT_RATE as DEFAULT_POSITION_RATE
+from modules.core.upload_pipeline import UploadError, receive_pattern, run_preview_job, sanitize_filename, upload_jobs
+from modules.core.pattern_import import IMPORT_DIR, pack_name, receive_archive, run_import_job
+from modules.core import checkpoint, clear_generator, clear_policy, fleet, playlist_optimizer, realtime, tables
 from modules.core.version_manager import version_manager
 from modules.core.log_handler import init_memory_handler, get_memory_handler
 from modules.wifi.router import router as wifi_router, captive_portal_router
@@ -31,6 +41,8 @@ import hashlib
 import time
 import subprocess
 
+startup_profile.mark("imported")
+
 # Get log level from environment variable, default to INFO
 log_level_str = os.getenv('LOG_LEVEL', 'INFO').upper()
 log_level = getattr(logging, log_level_str, logging.INFO)
@@ -104,7 +116,8 @@ async def lifespan(app: FastAPI):
         """Connect to device and perform homing in background."""
         try:
             # Connect without homing first (fast)
-            await asyncio.to_thread(connection_manager.connect_device, False)
+            with startup_profile.phase("connect", background=True):
+                await asyncio.to_thread(connection_manager.connect_device, False)
 
             # If connected, perform homing in background (unless disabled)
             if state.conn and state.conn.is_connected():
@@ -114,7 +127,8 @@ async def lifespan(app: FastAPI):
                     logger.info("Device connected, starting homing in background...")
                     state.is_homing = True
                     try:
-                        success = await asyncio.to_thread(connection_manager.home)
+                        with startup_profile.phase("homing", background=True):
+                            success = await asyncio.to_thread(connection_manager.home)
                         if not success:
                             logger.warning("Background homing failed or was skipped")
                             # If sensor homing failed, close connection and wait for user action
@@ -128,8 +142,14 @@ async def lifespan(app: FastAPI):
                         state.is_homing = False
                         logger.info("Background homing completed")
 
-                # After homing (or skip), check for auto_play mode
-                if state.auto_play_enabled and state.auto_play_playlist:
+                # After homing (or skip), resume an interrupted run or check for auto_play mode
+                interrupted = checkpoint.pending()
+                if interrupted and not state.auto_play_enabled:
+                    logger.info("An interrupted run can be resumed with POST /api/checkpoint/resume")
+                if interrupted and state.auto_play_enabled:
+                    logger.info("Auto-play enabled, resuming the run interrupted by the restart")
+                    await playlist_manager.resume_interrupted(interrupted)
+                elif state.auto_play_enabled and state.auto_play_playlist:
                     logger.info(f"Homing complete, checking auto_play playlist: {state.auto_play_playlist}")
                     try:
                         playlist_exists = playlist_manager.get_playlist(state.auto_play_playlist) is not None
@@ -151,92 +171,130 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"Failed to auto-connect to serial port: {str(e)}")
 
-    # Start connection/homing in background - doesn't block server startup
-    asyncio.create_task(connect_and_home())
+    def init_led_controller() -> bool:
+        """Initialize the LED controller from saved configuration (runs in a worker thread).
 
-    # Initialize LED controller based on saved configuration
-    try:
-        # Auto-detect provider for backward compatibility with existing installations
-        if not state.led_provider or state.led_provider == "none":
-            if state.wled_ip:
-                state.led_provider = "wled"
-                logger.info("Auto-detected WLED provider from existing configuration")
-
-        # Initialize the appropriate controller
-        if state.led_provider == "wled" and state.wled_ip:
-            state.led_controller = LEDInterface("wled", state.wled_ip)
-            logger.info(f"LED controller initialized: WLED at {state.wled_ip}")
-        elif state.led_provider == "dw_leds":
-            state.led_controller = LEDInterface(
-                "dw_leds",
-                num_leds=state.dw_led_num_leds,
-                gpio_pin=state.dw_led_gpio_pin,
-                pixel_order=state.dw_led_pixel_order,
-                brightness=state.dw_led_brightness / 100.0,
-                speed=state.dw_led_speed,
-                intensity=state.dw_led_intensity
-            )
-            logger.info(f"LED controller initialized: DW LEDs ({state.dw_led_num_leds} LEDs on GPIO{state.dw_led_gpio_pin}, pixel order: {state.dw_led_pixel_order})")
-
-            # Initialize hardware and start idle effect (matches behavior of /set_led_config)
-            status = state.led_controller.check_status()
-            if status.get("connected", False):
-                if state.led_automation_enabled:
-                    state.led_controller.effect_idle(state.dw_led_idle_effect)
-                    _start_idle_led_timeout()
-                    logger.info("DW LEDs hardware initialized and idle effect started")
+        Returns True when the idle effect was started, so the caller can start the idle timeout.
+        """
+        idle_started = False
+        try:
+            # Auto-detect provider for backward compatibility with existing installations
+            if not state.led_provider or state.led_provider == "none":
+                if state.wled_ip:
+                    state.led_provider = "wled"
+                    logger.info("Auto-detected WLED provider from existing configuration")
+
+            # Initialize the appropriate controller
+            if state.led_provider == "wled" and state.wled_ip:
+                state.led_controller = LEDInterface("wled", state.wled_ip)
+                logger.info(f"LED controller initialized: WLED at {state.wled_ip}")
+            elif state.led_provider == "dw_leds":
+                state.led_controller = LEDInterface(
+                    "dw_leds",
+                    num_leds=state.dw_led_num_leds,
+                    gpio_pin=state.dw_led_gpio_pin,
+                    pixel_order=state.dw_led_pixel_order,
+                    brightness=state.dw_led_brightness / 100.0,
+                    speed=state.dw_led_speed,
+                    intensity=state.dw_led_intensity
+                )
+                logger.info(f"LED controller initialized: DW LEDs ({state.dw_led_num_leds} LEDs on GPIO{state.dw_led_gpio_pin}, pixel order: {state.dw_led_pixel_order})")
+
+                # Initialize hardware and start idle effect (matches behavior of /set_led_config)
+                status = state.led_controller.check_status()
+                if status.get("connected", False):
+                    if state.led_automation_enabled:
+                        state.led_controller.effect_idle(state.dw_led_idle_effect)
+                        logger.info("DW LEDs hardware initialized and idle effect started")
+                        idle_started = True
+                    else:
+                        logger.info("DW LEDs hardware initialized (manual mode, no auto-effect)")
                 else:
-                    logger.info("DW LEDs hardware initialized (manual mode, no auto-effect)")
+                    error_msg = status.get("error", "Unknown error")
+                    logger.warning(f"DW LED hardware initialization failed: {error_msg}")
             else:
-                error_msg = status.get("error", "Unknown error")
-                logger.warning(f"DW LED hardware initialization failed: {error_msg}")
-        else:
+                state.led_controller = None
+                logger.info("LED controller not configured")
+
+            # Save if provider was auto-detected
+            if state.led_provider and state.wled_ip:
+                state.save()
+        except Exception as e:
+            logger.warning(f"Failed to initialize LED controller: {str(e)}")
             state.led_controller = None
-            logger.info("LED controller not configured")
+        return idle_started
 
-        # Save if provider was auto-detected
-        if state.led_provider and state.wled_ip:
-            state.save()
-    except Exception as e:
-        logger.warning(f"Failed to initialize LED controller: {str(e)}")
-        state.led_controller = None
+    def init_screen_controller():
+        """Initialize screen controller for LCD backlight control (runs in a worker thread)."""
+        try:
+            state.screen_controller = ScreenController()
+            if state.screen_controller.available:
+                logger.info("Screen controller initialized (backlight control available)")
+            else:
+                logger.info("Screen controller initialized (no backlight device found)")
+        except Exception as e:
+            logger.warning(f"Failed to initialize screen controller: {e}")
+            state.screen_controller = None
 
-    # Initialize screen controller for LCD backlight control
-    try:
-        state.screen_controller = ScreenController()
-        if state.screen_controller.available:
-            logger.info("Screen controller initialized (backlight control available)")
-        else:
-            logger.info("Screen controller initialized (no backlight device found)")
-    except Exception as e:
-        logger.warning(f"Failed to initialize screen controller: {e}")
-        state.screen_controller = None
+    async def init_hardware():
+        """Bring up LEDs, the serial connection, the screen and MQTT once HTTP is being served."""
+        with startup_profile.phase("led", background=True):
+            if await asyncio.to_thread(init_led_controller):
+                _start_idle_led_timeout()
 
-    # Note: auto_play is now handled in connect_and_home() after homing completes
+        # Connect after the LED controller exists so the connected effect is shown.
+        # Connection/homing runs on its own - homing can take minutes
+        # Note: auto_play is now handled in connect_and_home() after homing completes
+        asyncio.create_task(connect_and_home())
+
+        # Extra tables attached to this Pi connect and home alongside, each as itself
+        for engine in tables.all_tables()[1:]:
+            tables.create_task(engine, connect_and_home())
+
+        with startup_profile.phase("screen", background=True):
+            await asyncio.to_thread(init_screen_controller)
+
+        # The MQTT handler binds to the running event loop, so it is created on the loop thread
+        with startup_profile.phase("mqtt", background=True):
+            try:
+                mqtt.init_mqtt()
+            except Exception as e:
+                logger.warning(f"Failed to initialize MQTT: {str(e)}")
 
-    try:
-        mqtt.init_mqtt()
-    except Exception as e:
-        logger.warning(f"Failed to initialize MQTT: {str(e)}")
-    
     # Schedule cache generation check for later (non-blocking startup)
     async def delayed_cache_check():
         """Check and generate cache in background."""
-        try:
-            logger.info("Starting cache check...")
+        with startup_profile.phase("cache_check", background=True):
+            try:
+                logger.info("Starting cache check...")
 
-            from modules.core.cache_manager import is_cache_generation_needed_async, generate_cache_background
+                from modules.core.cache_manager import is_cache_generation_needed_async, generate_cache_background
 
-            if await is_cache_generation_needed_async():
-                logger.info("Cache generation needed, starting background task...")
-                asyncio.create_task(generate_cache_background())  # Don't await - run in background
-            else:
-                logger.info("Cache is up to date, skipping generation")
-        except Exception as e:
-            logger.warning(f"Failed during cache generation: {str(e)}")
+                # Finish work queued before the last shutdown first
+                await cache_jobs.restore()
+
+                if await is_cache_generation_needed_async():
+                    logger.info("Cache generation needed, starting background task...")
+                    asyncio.create_task(generate_cache_background())  # Don't await - run in background
+                else:
+                    logger.info("Cache is up to date, skipping generation")
+            except Exception as e:
+                logger.warning(f"Failed during cache generation: {str(e)}")
+
+    # A run interrupted by the last shutdown is offered (or resumed by auto_play) once homed
+    tables.load()
+    for engine in tables.all_tables():
+        with tables.use(engine):
+            checkpoint.load()
+
+    # Hardware init and the cache check run in background - they don't block server startup
+    background_startup = [asyncio.create_task(init_hardware()), asyncio.create_task(delayed_cache_check())]
 
-    # Start cache check in background immediately
-    asyncio.create_task(delayed_cache_check())
+    async def finish_startup_profile():
+        await asyncio.gather(*background_startup, return_exceptions=True)
+        startup_profile.finish()
+
+    asyncio.create_task(finish_startup_profile())
 
     # Start idle timeout monitor
     async def idle_timeout_monitor():
@@ -345,10 +403,19 @@ async def lifespan(app: FastAPI):
 
     asyncio.create_task(still_sands_led_monitor())
 
+    # Startup is done: pin the web server off the motion cores and freeze long-lived objects
+    with startup_profile.phase("realtime"):
+        realtime.apply()
+
+    startup_profile.ready()
     yield  # This separates startup from shutdown code
 
     # Shutdown
     logger.info("Shutting down Dune Weaver application...")
+    await cache_jobs.stop()
+    await fleet.close()
+    for engine in tables.all_tables()[1:]:
+        await stop_table(engine)
 
 app = FastAPI(lifespan=lifespan)
 
@@ -363,6 +430,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Serve /tables/{table_id}/<route> as <route> for a table driven by this server (see tables.py)
+app.add_middleware(tables.TableRouteMiddleware)
+
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -418,6 +488,16 @@ class PlaylistRequest(BaseModel):
     clear_pattern: Optional[str] = None
     run_mode: str = "single"
     shuffle: bool = False
+    optimize_order: bool = False  # Order patterns to minimize transition time
+
+class OptimizePlaylistRequest(BaseModel):
+    playlist_name: str
+    clear_pattern: Optional[str] = None
+    run_mode: str = "single"  # loop/indefinite also count the transition back to the first pattern
+    apply: bool = False  # Save the optimized order to the playlist
+
+class ResumeCheckpointRequest(BaseModel):
+    home: bool = True  # Home before travelling to the checkpoint; only skip if the table is known to be homed
 
 class PlaylistRunRequest(BaseModel):
     playlist_name: str
@@ -472,6 +552,10 @@ class PatternSettingsUpdate(BaseModel):
     clear_pattern_speed: Optional[int] = None
     custom_clear_from_in: Optional[str] = None
     custom_clear_from_out: Optional[str] = None
+    generated_clears: Optional[bool] = None
+    clear_ball_diameter_mm: Optional[float] = None  # 0 to use the table type's default
+    clear_table_radius_mm: Optional[float] = None  # 0 to use the table type's default
+    clear_ring_overlap: Optional[float] = None
 
 class AutoPlaySettingsUpdate(BaseModel):
     enabled: Optional[bool] = None
@@ -488,6 +572,14 @@ class ScheduledPauseSettingsUpdate(BaseModel):
     timezone: Optional[str] = None  # IANA timezone (e.g., "America/New_York") or None for system default
     time_slots: Optional[List[TimeSlot]] = None
 
+class RealtimeSettingsUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    policy: Optional[str] = None  # "fifo", "rr" or "nice"
+    priority: Optional[int] = None  # 1-99
+    motion_cpu: Optional[int] = None  # -1 clears the pinning
+    led_cpu: Optional[int] = None  # -1 clears the pinning
+    reset_stats: bool = False  # Clear the recorded send-loop timings
+
 class HomingSettingsUpdate(BaseModel):
     mode: Optional[int] = None
     angular_offset_degrees: Optional[float] = None
@@ -551,12 +643,16 @@ class SettingsUpdate(BaseModel):
     security: Optional[SecuritySettingsUpdate] = None
 
 # Store active WebSocket connections
-active_status_connections = set()
 active_cache_progress_connections = set()
 
+def status_connections() -> set:
+    """Status WebSocket connections of the current table."""
+    return tables.local("status_connections", set)
+
 @app.websocket("/ws/status")
 async def websocket_status_endpoint(websocket: WebSocket):
     await websocket.accept()
+    active_status_connections = status_connections()
     active_status_connections.add(websocket)
     try:
         while True:
@@ -583,8 +679,30 @@ async def websocket_status_endpoint(websocket: WebSocket):
         except RuntimeError:
             pass
 
+@app.websocket("/ws/position")
+async def websocket_position_endpoint(websocket: WebSocket, rate: float = DEFAULT_POSITION_RATE, format: str = "json"):
+    """Stream the live ball position (index, theta, rho, timestamp) at rate Hz.
+
+    format is "json" (minimal text frames) or "binary"; see modules/core/position_stream.py.
+    """
+    await websocket.accept()
+    try:
+        await stream_positions(websocket, rate=rate, binary=(format == "binary"),
+                               channel=tables.current().position_channel)
+    except WebSocketDisconnect:
+        pass
+    except RuntimeError as e:
+        if "close message has been sent" not in str(e):
+            raise
+    finally:
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
 async def broadcast_status_update(status: dict):
-    """Broadcast status update to all connected clients."""
+    """Broadcast status update to all clients connected to the current table."""
+    active_status_connections = status_connections()
     disconnected = set()
     for websocket in active_status_connections:
         try:
@@ -707,6 +825,15 @@ async def clear_logs():
     return {"status": "ok", "message": "Logs cleared"}
 
 
+@app.get("/api/startup-profile", tags=["logs"])
+async def get_startup_profile():
+    """
+    Where startup time went: milestones (imports done, HTTP ready, background init
+    complete), wall time per startup phase, and the slowest module imports.
+    """
+    return startup_profile.report()
+
+
 # FastAPI routes - Redirect old frontend routes to new React frontend on port 80
 def get_redirect_response(request: Request):
     """Return redirect page pointing users to the new frontend."""
@@ -744,7 +871,12 @@ async def get_all_settings():
         "patterns": {
             "clear_pattern_speed": state.clear_pattern_speed,
             "custom_clear_from_in": state.custom_clear_from_in,
-            "custom_clear_from_out": state.custom_clear_from_out
+            "custom_clear_from_out": state.custom_clear_from_out,
+            "generated_clears": state.generated_clears,
+            "clear_ball_diameter_mm": state.clear_ball_diameter_mm,
+            "clear_table_radius_mm": state.clear_table_radius_mm,
+            "clear_ring_overlap": state.clear_ring_overlap,
+            "clear_ring_spacing": round(clear_generator.ring_spacing(), 4)
         },
         "auto_play": {
             "enabled": state.auto_play_enabled,
@@ -917,6 +1049,20 @@ async def update_settings(settings_update: SettingsUpdate):
             state.custom_clear_from_in = p.custom_clear_from_in or None
         if p.custom_clear_from_out is not None:
             state.custom_clear_from_out = p.custom_clear_from_out or None
+        if p.generated_clears is not None:
+            state.generated_clears = p.generated_clears
+        if p.clear_ball_diameter_mm is not None:
+            if p.clear_ball_diameter_mm < 0:
+                raise HTTPException(status_code=400, detail="clear_ball_diameter_mm must be positive, or 0 for the default")
+            state.clear_ball_diameter_mm = p.clear_ball_diameter_mm or None
+        if p.clear_table_radius_mm is not None:
+            if p.clear_table_radius_mm < 0:
+                raise HTTPException(status_code=400, detail="clear_table_radius_mm must be positive, or 0 for the default")
+            state.clear_table_radius_mm = p.clear_table_radius_mm or None
+        if p.clear_ring_overlap is not None:
+            if not 0 <= p.clear_ring_overlap < 1:
+                raise HTTPException(status_code=400, detail="clear_ring_overlap must be at least 0 and below 1")
+            state.clear_ring_overlap = p.clear_ring_overlap
         updated_categories.append("patterns")
 
     # Auto-play settings
@@ -1106,6 +1252,39 @@ async def update_settings(settings_update: SettingsUpdate):
         "led_reinit_needed": led_reinit_needed
     }
 
+@app.get("/api/motion/realtime", tags=["settings"])
+async def get_realtime_mode():
+    """Real-time motion mode settings, what was applied to each thread, and send-loop
+    timings measured with the mode off and on."""
+    return realtime.status()
+
+@app.post("/api/motion/realtime", tags=["settings"])
+async def update_realtime_mode(request: RealtimeSettingsUpdate):
+    """Change the real-time motion mode; applied immediately to the running threads."""
+    if request.policy is not None:
+        if request.policy not in ("fifo", "rr", "nice"):
+            raise HTTPException(status_code=400, detail="policy must be fifo, rr or nice")
+        state.realtime_policy = request.policy
+    if request.priority is not None:
+        if not 1 <= request.priority <= 99:
+            raise HTTPException(status_code=400, detail="priority must be between 1 and 99")
+        state.realtime_priority = request.priority
+    for field in ("motion_cpu", "led_cpu"):
+        cpu = getattr(request, field)
+        if cpu is not None:
+            if cpu >= (os.cpu_count() or 1):
+                raise HTTPException(status_code=400, detail=f"{field} must be below {os.cpu_count()}")
+            setattr(state, f"realtime_{field}", cpu if cpu >= 0 else None)
+    if request.enabled is not None:
+        state.realtime_enabled = request.enabled
+    if request.reset_stats:
+        realtime.send_loop.clear()
+
+    state.save()
+    realtime.apply()
+    logger.info(f"Real-time motion mode {'enabled' if state.realtime_enabled else 'disabled'}")
+    return realtime.status()
+
 @app.post("/api/security/verify", tags=["settings"])
 async def verify_security_password(request: SecurityVerifyRequest):
     """Verify a security password against the stored hash."""
@@ -1132,6 +1311,17 @@ class KnownTableAdd(BaseModel):
 class KnownTableUpdate(BaseModel):
     name: Optional[str] = None
 
+class LocalTableAdd(BaseModel):
+    port: str  # Serial port of the table's controller
+    name: str
+
+class FleetCommandRequest(BaseModel):
+    command: str  # run_pattern, run_playlist, pause, resume, stop, skip, speed or led_scene
+    params: dict = {}  # Body of the per-table request, or the LED scene
+    tables: Optional[List[str]] = None  # Table IDs; all known tables if omitted
+    include_self: bool = True
+    timeout: float = fleet.REQUEST_TIMEOUT
+
 @app.get("/api/table-info", tags=["multi-table"])
 async def get_table_info():
     """
@@ -1206,6 +1396,7 @@ async def add_known_table(table: KnownTableAdd):
 
     state.known_tables.append(new_table)
     state.save()
+    fleet.tables_changed()
     logger.info(f"Added known table: {table.name} ({table.url})")
 
     return {"success": True, "table": new_table}
@@ -1222,6 +1413,7 @@ async def remove_known_table(table_id: str):
         raise HTTPException(status_code=404, detail="Table not found")
 
     state.save()
+    fleet.tables_changed()
     logger.info(f"Removed known table: {table_id}")
 
     return {"success": True}
@@ -1236,11 +1428,113 @@ async def update_known_table(table_id: str, update: KnownTableUpdate):
             if update.name is not None:
                 table["name"] = update.name.strip()
             state.save()
+            fleet.tables_changed()
             logger.info(f"Updated known table {table_id}: name={update.name}")
             return {"success": True, "table": table}
 
     raise HTTPException(status_code=404, detail="Table not found")
 
+async def stop_table(engine: tables.TableEngine):
+    """Stop whatever a local table is doing and release its serial port."""
+    with tables.use(engine):
+        if state.conn and state.conn.is_connected():
+            await pattern_manager.stop_actions()
+            await asyncio.to_thread(state.conn.close)
+        else:
+            await playlist_manager.cancel_current_playlist()
+        pattern_manager.get_motion_controller().stop()
+        state.conn = None
+        state.is_connected = False
+
+@app.get("/api/tables", tags=["multi-table"])
+async def list_local_tables():
+    """
+    Tables driven by this server.
+
+    The default table answers on the usual routes; each table also answers on
+    every route under its prefix, e.g. /tables/{id}/run_theta_rho.
+    """
+    return {"tables": [engine.summary() for engine in tables.all_tables()]}
+
+@app.post("/api/tables", tags=["multi-table"])
+async def add_local_table(table: LocalTableAdd):
+    """
+    Drive another table from this server, on its own serial port.
+
+    The new table starts from a copy of this table's settings, then connects and homes.
+    """
+    try:
+        engine = tables.add(table.port, table.name.strip() or "Dune Weaver")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    tables.create_task(engine, asyncio.to_thread(connection_manager.connect_device, True))
+    return {"success": True, "table": engine.summary()}
+
+@app.delete("/api/tables/{table_id}", tags=["multi-table"])
+async def remove_local_table(table_id: str):
+    """
+    Stop driving a table added with POST /api/tables and forget its settings.
+    """
+    engine = tables.get(table_id)
+    if engine is None or engine.is_default:
+        raise HTTPException(status_code=404, detail="Table not found")
+    await stop_table(engine)
+    tables.remove(engine.id)
+    return {"success": True}
+
+@app.get("/api/tables/cpu", tags=["multi-table"])
+async def local_tables_cpu(window: float = 2.0):
+    """
+    CPU used per table over `window` seconds, and how many tables this server can drive.
+
+    Measure while the tables are drawing; the estimate charges all process CPU to them.
+    """
+    return await tables.cpu_report(min(max(window, 0.5), 30.0))
+
+@app.post("/api/fleet/command", tags=["multi-table"])
+async def fleet_command(request: FleetCommandRequest, http_request: Request):
+    """
+    Send a command to several tables at once.
+
+    Requests go out concurrently over pooled connections; the response has a
+    result per table, so one unreachable table does not fail the others.
+    """
+    self_url = str(http_request.base_url) if request.include_self else None
+    try:
+        return await fleet.command(request.command, request.params, request.tables, self_url, request.timeout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/fleet/status", tags=["multi-table"])
+async def fleet_status():
+    """
+    Latest status of every table in the fleet.
+
+    The first call starts watching the tables, so their status fills in shortly after.
+    """
+    fleet.sync_watchers()
+    return fleet.snapshot()
+
+@app.websocket("/ws/fleet/status")
+async def websocket_fleet_status_endpoint(websocket: WebSocket):
+    """Every table's status in one stream: a fleet_snapshot, then per-table fleet_delta messages."""
+    await websocket.accept()
+    queue = fleet.subscribe()
+    try:
+        while True:
+            await websocket.send_json(await queue.get())
+    except WebSocketDisconnect:
+        pass
+    except RuntimeError as e:
+        if "close message has been sent" not in str(e):
+            raise
+    finally:
+        fleet.unsubscribe(queue)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
 # ============================================================================
 # Individual Settings Endpoints (Deprecated - use /api/settings instead)
 # ============================================================================
@@ -1757,55 +2051,112 @@ async def list_theta_rho_files_with_metadata():
     return files_with_metadata
 
 @app.post("/upload_theta_rho")
-async def upload_theta_rho(file: UploadFile = File(...)):
-    """Upload a theta-rho file."""
+async def upload_theta_rho(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    """Upload a theta-rho file.
+
+    The upload is streamed to disk and validated line by line, then moved into
+    custom_patterns. The response returns as soon as the file is in place, with
+    cleaning stats and a job_id; the preview is rendered in the background and its
+    progress is available from /api/upload-jobs/{job_id} and /ws/upload-jobs.
+    """
     try:
-        # Save the file
-        # Ensure custom_patterns directory exists
+        filename = sanitize_filename(file.filename)
         custom_patterns_dir = os.path.join(pattern_manager.THETA_RHO_DIR, "custom_patterns")
-        os.makedirs(custom_patterns_dir, exist_ok=True)
-        
-        # Use forward slashes for internal path representation to maintain consistency
-        file_path_in_patterns_dir = f"custom_patterns/{file.filename}"
-        full_file_path = os.path.join(pattern_manager.THETA_RHO_DIR, file_path_in_patterns_dir)
-        
-        # Save the uploaded file with proper encoding for Windows compatibility
-        file_content = await file.read()
-        try:
-            # First try to decode as UTF-8 and re-encode to ensure proper encoding
-            text_content = file_content.decode('utf-8')
-            with open(full_file_path, "w", encoding='utf-8') as f:
-                f.write(text_content)
-        except UnicodeDecodeError:
-            # If UTF-8 decoding fails, save as binary (fallback)
-            with open(full_file_path, "wb") as f:
-                f.write(file_content)
-        
-        logger.info(f"File {file.filename} saved successfully")
-        
-        # Generate image preview for the new file with retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"Generating preview for {file_path_in_patterns_dir} (attempt {attempt + 1}/{max_retries})")
-                success = await generate_image_preview(file_path_in_patterns_dir)
-                if success:
-                    logger.info(f"Preview generated successfully for {file_path_in_patterns_dir}")
-                    break
-                else:
-                    logger.warning(f"Preview generation failed for {file_path_in_patterns_dir} (attempt {attempt + 1})")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(0.5)  # Small delay before retry
-            except Exception as e:
-                logger.error(f"Error generating preview for {file_path_in_patterns_dir} (attempt {attempt + 1}): {str(e)}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(0.5)  # Small delay before retry
-        
-        return {"success": True, "message": f"File {file.filename} uploaded successfully"}
+        validator = await receive_pattern(file, custom_patterns_dir, filename)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Error uploading file: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    # Use forward slashes for internal path representation to maintain consistency
+    file_path_in_patterns_dir = f"custom_patterns/{filename}"
+    logger.info(f"File {filename} saved successfully ({validator.stats['points']} points)")
+    pattern_manager.notify_catalog_changed()
+
+    job = upload_jobs.create(file_path_in_patterns_dir, validator.stats)
+    background_tasks.add_task(run_preview_job, job, validator)
+    return {
+        "success": True,
+        "message": f"File {filename} uploaded successfully",
+        "file": file_path_in_patterns_dir,
+        "job_id": job["id"],
+        "stats": validator.stats
+    }
+
+@app.post("/api/import_patterns")
+async def import_patterns(background_tasks: BackgroundTasks, file: UploadFile = File(...), folder: Optional[str] = Form(None)):
+    """Import a pattern pack (zip or tar archive) into custom_patterns/<folder>.
+
+    The archive is streamed to disk and imported in the background; files already in
+    the library are skipped by content. Follow the returned job_id on /ws/upload-jobs;
+    the finished job carries a result per file. The same import is available from the
+    command line: python -m modules.core.pattern_import PACK.
+    """
+    try:
+        folder = sanitize_filename(folder) if folder else pack_name(sanitize_filename(file.filename))
+        archive_path = await receive_archive(file, os.path.join(pattern_manager.THETA_RHO_DIR, IMPORT_DIR))
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error receiving pattern pack: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    job = upload_jobs.create(f"{IMPORT_DIR}/{folder}", {})
+    background_tasks.add_task(run_import_job, job, archive_path, folder)
+    return {"success": True, "message": f"Importing {file.filename}", "folder": job["file"], "job_id": job["id"]}
+
+@app.get("/api/upload-jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    """Status of an upload's background preview job."""
+    job = upload_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return job
+
+@app.websocket("/ws/upload-jobs")
+async def websocket_upload_jobs_endpoint(websocket: WebSocket, job_id: Optional[str] = None):
+    """Push upload job updates: the current jobs on connect, then every change.
+
+    Pass job_id to follow a single upload.
+    """
+    await websocket.accept()
+    queue = upload_jobs.subscribe()
+
+    async def send_updates():
+        for job in upload_jobs.list():
+            if job_id is None or job["id"] == job_id:
+                await websocket.send_json({"type": "upload_job", "data": job})
+        while True:
+            job = await queue.get()
+            if job_id is None or job["id"] == job_id:
+                await websocket.send_json({"type": "upload_job", "data": job})
+
+    async def until_disconnect():
+        # Updates may be rare; reading the socket notices a client leaving right away
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    sender = asyncio.create_task(send_updates())
+    receiver = asyncio.create_task(until_disconnect())
+    try:
+        done, _ = await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    except RuntimeError as e:
+        if "close message has been sent" not in str(e):
+            raise
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        upload_jobs.unsubscribe(queue)
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass
+
 @app.post("/get_theta_rho_coordinates")
 async def get_theta_rho_coordinates(request: GetCoordinatesRequest):
     """Get theta-rho coordinates for animated preview."""
@@ -1850,6 +2201,72 @@ async def get_theta_rho_coordinates(request: GetCoordinatesRequest):
         logger.error(f"Error getting coordinates for {request.file_name}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+COORDINATES_CHUNK_SIZE = 64 * 1024
+
+@app.get("/api/coordinates/{pattern_name:path}", tags=["patterns"])
+async def get_pattern_coordinates_binary(pattern_name: str, request: Request, lod: int = LOD_FULL, encoding: str = "delta16"):
+    """Binary theta-rho coordinates for animated previews.
+
+    lod picks a precomputed level of detail (0 = 2k points, 1 = 20k, 2 = full) so the
+    frontend can draw a coarse preview first and refine it. encoding is "delta16"
+    (quantized int16 deltas) or "float32"; see modules/core/coordinate_codec.py for the layout.
+    Responses are gzipped when the client accepts it and streamed in chunks; a Range
+    request gets the matching bytes of the uncompressed body.
+    """
+    if encoding not in ENCODINGS:
+        raise HTTPException(status_code=400, detail=f"Unknown encoding {encoding}")
+    if not 0 <= lod <= LOD_FULL:
+        raise HTTPException(status_code=400, detail=f"lod must be between 0 and {LOD_FULL}")
+
+    file_name = normalize_file_path(pattern_name)
+    file_path = os.path.join(THETA_RHO_DIR, file_name)
+    if not os.path.realpath(file_path).startswith(os.path.realpath(THETA_RHO_DIR) + os.sep):
+        raise HTTPException(status_code=400, detail="Invalid pattern path")
+
+    def _load():
+        # Reuse the coordinates already parsed for playback instead of re-parsing large files
+        current_file = state.current_playing_file
+        if current_file and state._current_coordinates and normalize_file_path(current_file) == file_name:
+            return state._current_coordinates
+        return parse_theta_rho_file(file_path)
+
+    pattern = await asyncio.to_thread(coordinate_cache.get, file_path, _load)
+    if pattern is None:
+        raise HTTPException(status_code=404, detail=f"No coordinates for {file_name}")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding, Range",
+        "X-Total-Points": str(pattern.total),
+        "X-Lod-Levels": ",".join(str(n) for n in pattern.levels)
+    }
+
+    range_header = request.headers.get("range")
+    if range_header:
+        data = await asyncio.to_thread(pattern.get, lod, ENCODINGS[encoding])
+        byte_range = parse_byte_range(range_header, len(data))
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{len(data)}"
+            return Response(status_code=416, headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return Response(content=data[start:end + 1], status_code=206,
+                        media_type="application/octet-stream", headers=headers)
+
+    compressed = "gzip" in request.headers.get("accept-encoding", "").lower()
+    data = await asyncio.to_thread(pattern.get, lod, ENCODINGS[encoding], compressed)
+    if compressed:
+        headers["Content-Encoding"] = "gzip"
+    headers["Content-Length"] = str(len(data))
+
+    async def _chunks():
+        view = memoryview(data)
+        for offset in range(0, len(data), COORDINATES_CHUNK_SIZE):
+            yield bytes(view[offset:offset + COORDINATES_CHUNK_SIZE])
+
+    return StreamingResponse(_chunks(), media_type="application/octet-stream", headers=headers)
+
 @app.post("/run_theta_rho")
 async def run_theta_rho(request: ThetaRhoRequest, background_tasks: BackgroundTasks):
     if not request.file_name:
@@ -1909,6 +2326,43 @@ async def run_theta_rho(request: ThetaRhoRequest, background_tasks: BackgroundTa
         logger.error(f'Failed to run theta-rho file {request.file_name}: {str(e)}')
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/checkpoint", tags=["patterns"])
+async def get_checkpoint():
+    """The run interrupted by the last restart, if any, with where it stopped."""
+    return {"pending": checkpoint.summary()}
+
+@app.post("/api/checkpoint/resume", tags=["patterns"])
+async def resume_checkpoint(request: ResumeCheckpointRequest = ResumeCheckpointRequest()):
+    """Home, travel to where the interrupted run stopped and continue drawing from there."""
+    interrupted = checkpoint.pending()
+    if interrupted is None:
+        raise HTTPException(status_code=404, detail="No interrupted run to resume")
+    if not (state.conn.is_connected() if state.conn else False):
+        raise HTTPException(status_code=400, detail="Connection not established")
+    check_homing_in_progress()
+    if pattern_manager.get_pattern_lock().locked():
+        raise HTTPException(status_code=409, detail="A pattern is running")
+
+    if request.home:
+        state.is_homing = True
+        try:
+            success = await asyncio.to_thread(connection_manager.home)
+        finally:
+            state.is_homing = False
+        if not success:
+            raise HTTPException(status_code=500, detail="Homing failed, not resuming")
+
+    success, message = await playlist_manager.resume_interrupted(interrupted)
+    if not success:
+        raise HTTPException(status_code=409, detail=message)
+    return {"success": True, "message": message}
+
+@app.delete("/api/checkpoint", tags=["patterns"])
+async def discard_checkpoint():
+    """Forget the interrupted run instead of resuming it."""
+    checkpoint.discard()
+    return {"success": True}
+
 @app.post("/stop_execution")
 async def stop_execution():
     if not (state.conn.is_connected() if state.conn else False):
@@ -1946,13 +2400,14 @@ async def force_stop():
         pass
 
     # Stop motion controller and clear its queue
-    if pattern_manager.motion_controller.running:
-        pattern_manager.motion_controller.command_queue.put(
+    motion_controller = pattern_manager.get_motion_controller()
+    if motion_controller.running:
+        motion_controller.command_queue.put(
             pattern_manager.MotionCommand('stop')
         )
 
     # Force release pattern lock by recreating it
-    pattern_manager.pattern_lock = None  # Will be recreated on next use
+    tables.current().pattern_lock = None  # Will be recreated on next use
 
     logger.info("Force stop completed - all pattern state cleared")
     return {"success": True, "message": "Force stop completed"}
@@ -2017,6 +2472,7 @@ async def send_home():
         try:
             # Run homing with 15 second timeout
             success = await asyncio.to_thread(connection_manager.home)
+            clear_policy.forget()
             if not success:
                 logger.error("Homing failed or timed out")
                 raise HTTPException(status_code=500, detail="Homing failed or timed out after 15 seconds")
@@ -2141,6 +2597,7 @@ async def delete_theta_rho_file(request: DeleteFileRequest):
         # Delete the pattern file asynchronously
         await asyncio.to_thread(os.remove, file_path)
         logger.info(f"Successfully deleted theta-rho file: {request.file_name}")
+        pattern_manager.notify_catalog_changed()
         
         # Clean up cached preview image and metadata asynchronously
         from modules.core.cache_manager import delete_pattern_cache
@@ -2170,6 +2627,7 @@ async def move_to_center():
         logger.info("Moving device to center position")
         await pattern_manager.reset_theta()
         await pattern_manager.move_polar(0, 0)
+        clear_policy.forget()
 
         # Wait for machine to reach idle before returning
         idle = await connection_manager.check_idle_async(timeout=60)
@@ -2198,6 +2656,7 @@ async def move_to_perimeter():
         logger.info("Moving device to perimeter position")
         await pattern_manager.reset_theta()
         await pattern_manager.move_polar(0, 1)
+        clear_policy.forget()
 
         # Wait for machine to reach idle before returning
         idle = await connection_manager.check_idle_async(timeout=60)
@@ -2235,8 +2694,8 @@ async def preview_thr(request: DeleteFileRequest):
         cache_exists = await asyncio.to_thread(os.path.exists, cache_path)
         if not cache_exists:
             logger.info(f"Cache miss for {request.file_name}. Generating preview...")
-            # Attempt to generate the preview if it's missing
-            success = await generate_image_preview(normalized_file_name)
+            # Attempt to generate the preview if it's missing (ahead of background cache work)
+            success = await cache_jobs.request(normalized_file_name)
             cache_exists_after = await asyncio.to_thread(os.path.exists, cache_path)
             if not success or not cache_exists_after:
                 logger.error(f"Failed to generate or find preview for {request.file_name} after attempting generation.")
@@ -2386,6 +2845,7 @@ async def send_coordinate(request: CoordinateRequest):
     try:
         logger.debug(f"Sending coordinate: theta={request.theta}, rho={request.rho}")
         await pattern_manager.move_polar(request.theta, request.rho)
+        clear_policy.forget()
 
         # Wait for machine to reach idle before returning
         idle = await connection_manager.check_idle_async(timeout=60)
@@ -2412,9 +2872,15 @@ async def serial_status():
     return {
         "connected": connected,
         "port": port,
-        "preferred_port": state.preferred_port
+        "preferred_port": state.preferred_port,
+        "reconnecting": reconnect.current_outage() is not None
     }
 
+@app.get("/api/connection/outages")
+async def connection_outages():
+    """Recent connection drops during execution and how each was recovered."""
+    return {"current": reconnect.current_outage(), "outages": reconnect.outages()}
+
 @app.get("/api/preferred-port", deprecated=True, tags=["settings-deprecated"])
 async def get_preferred_port():
     """Get the currently configured preferred port for auto-connect."""
@@ -2538,6 +3004,34 @@ async def add_to_playlist(request: AddToPlaylistRequest):
         raise HTTPException(status_code=404, detail="Playlist not found")
     return {"success": True}
 
+class RemoveFromPlaylistRequest(BaseModel):
+    playlist_name: str
+    index: int
+
+@app.post("/remove_from_playlist")
+async def remove_from_playlist(request: RemoveFromPlaylistRequest):
+    success = playlist_manager.remove_from_playlist(request.playlist_name, request.index)
+    if not success:
+        raise HTTPException(status_code=404, detail="Playlist or index not found")
+    return {"success": True}
+
+class MoveInPlaylistRequest(BaseModel):
+    playlist_name: str
+    from_index: int
+    to_index: int
+
+@app.post("/move_in_playlist")
+async def move_in_playlist(request: MoveInPlaylistRequest):
+    success = playlist_manager.move_in_playlist(request.playlist_name, request.from_index, request.to_index)
+    if not success:
+        raise HTTPException(status_code=404, detail="Playlist or index not found")
+    return {"success": True}
+
+@app.get("/playlists_version")
+async def playlists_version():
+    """Return version counters so clients can skip refetching unchanged playlists."""
+    return playlist_manager.get_playlists_version()
+
 @app.post("/run_playlist")
 async def run_playlist_endpoint(request: PlaylistRequest):
     """Run a playlist with specified parameters."""
@@ -2557,7 +3051,8 @@ async def run_playlist_endpoint(request: PlaylistRequest):
             pause_time=request.pause_time,
             clear_pattern=request.clear_pattern,
             run_mode=request.run_mode,
-            shuffle=request.shuffle
+            shuffle=request.shuffle,
+            optimize_order=request.optimize_order
         )
         if not success:
             raise HTTPException(status_code=409, detail=message)
@@ -2567,6 +3062,33 @@ async def run_playlist_endpoint(request: PlaylistRequest):
         logger.error(f"Error running playlist: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/playlists/optimize", tags=["patterns"])
+async def optimize_playlist_order(request: OptimizePlaylistRequest):
+    """Order a playlist to minimize transition time between patterns.
+
+    Returns the proposed order and the estimated table time saved per cycle;
+    with apply=true the order is saved to the playlist.
+    """
+    playlist = playlist_manager.get_playlist(request.playlist_name)
+    if playlist is None:
+        raise HTTPException(status_code=404, detail=f"Playlist '{request.playlist_name}' not found")
+
+    from modules.core import cache_manager
+    cache_data = await asyncio.to_thread(cache_manager.load_metadata_cache)
+    names = {os.path.join(pattern_manager.THETA_RHO_DIR, name): name for name in playlist["files"]}
+    ordered, report = await asyncio.to_thread(
+        playlist_optimizer.optimize,
+        [os.path.join(pattern_manager.THETA_RHO_DIR, name) for name in playlist["files"]],
+        request.clear_pattern,
+        cache_data,
+        state.current_rho or 0.0,
+        request.run_mode in ("indefinite", "loop")
+    )
+    files = [names[path] for path in ordered]
+    if request.apply:
+        playlist_manager.modify_playlist(request.playlist_name, files)
+    return {"playlist_name": request.playlist_name, "files": files, "applied": request.apply, "report": report}
+
 @app.post("/set_speed")
 async def set_speed(request: SpeedRequest):
     try:
@@ -2769,7 +3291,7 @@ async def skip_pattern():
     # proactively advance state. Otherwise, let the running task handle it
     # to avoid race conditions with the task's index management.
     from modules.core import playlist_manager
-    task = playlist_manager._current_playlist_task
+    task = playlist_manager.current_playlist_task()
     task_not_running = task is None or task.done()
 
     if task_not_running and state.current_playlist_index is not None:
@@ -3281,6 +3803,16 @@ async def get_mqtt_config():
         "is_mock": handler.__class__.__name__ == 'MockMQTTHandler'
     }
 
+@app.get("/api/mqtt-discovery")
+async def get_mqtt_discovery():
+    """Report Home Assistant discovery payload sizes against the configured budget."""
+    from modules.mqtt import get_mqtt_handler
+    handler = get_mqtt_handler()
+
+    if not hasattr(handler, 'get_discovery_stats'):
+        return {"enabled": False, "max_bytes": None, "total_bytes": 0, "payloads": {}}
+    return {"enabled": handler.is_enabled, **handler.get_discovery_stats()}
+
 @app.post("/api/mqtt-config", deprecated=True, tags=["settings-deprecated"])
 async def set_mqtt_config(request: dict):
     """DEPRECATED: Use PATCH /api/settings instead. Update MQTT configuration. Requires restart to take effect."""
@@ -3457,7 +3989,7 @@ async def preview_thr_batch(request: dict):
                 cache_exists = await asyncio.to_thread(os.path.exists, cache_path)
                 if not cache_exists:
                     logger.info(f"Cache miss for {file_name}. Generating preview...")
-                    success = await generate_image_preview(normalized_file_name)
+                    success = await cache_jobs.request(normalized_file_name)
                     cache_exists_after = await asyncio.to_thread(os.path.exists, cache_path)
                     if not success or not cache_exists_after:
                         logger.error(f"Failed to generate or find preview for {file_name}")
@@ -3958,14 +4490,18 @@ def signal_handler(signum, frame):
         if state.led_controller:
             state.led_controller.set_power(0)
 
-        # Stop pattern manager motion controller
-        pattern_manager.motion_controller.stop()
+        for engine in tables.all_tables():
+            with tables.use(engine):
+                # Stop pattern manager motion controller
+                pattern_manager.get_motion_controller().stop()
 
-        # Set stop flags to halt any running patterns
-        state.stop_requested = True
-        state.pause_requested = False
+                # Set stop flags to halt any running patterns
+                state.stop_requested = True
+                state.pause_requested = False
 
-        state.save()
+                # Record exactly where drawing stopped so the run can resume after restart
+                checkpoint.flush()
+                state.save()
         logger.info("Cleanup completed")
     except Exception as e:
         logger.error(f"Error during cleanup: {str(e)}")
@@ -4243,4 +4779,4 @@ def entrypoint():
     uvicorn.run(app, host="0.0.0.0", port=8080, workers=1)  # Set workers to 1 to avoid multiple signal handlers
 
 if __name__ == "__main__":
-    entrypoint()
\ No newline at end of file
+    entrypoint()
@@ -6,9 +6,11 @@ import serial
 import serial.tools.list_ports
 import websocket
 import asyncio
+import contextvars
 import os
 
 from modules.core.state import state
+from modules.core import tables
 from modules.led.led_interface import LEDInterface
 from modules.led.idle_timeout_manager import idle_timeout_manager
 
@@ -286,7 +288,8 @@ def connect_device(homing=True):
     if state.led_controller:
         state.led_controller.effect_loading()
 
-    ports = list_serial_ports()
+    # Ports driven by other tables in this process are never auto-selected
+    ports = tables.usable_ports(list_serial_ports())
 
     # Check auto-connect mode: "__auto__" or None = auto, "__none__" = disabled, else specific port
     if state.preferred_port == "__none__":
@@ -1097,6 +1100,7 @@ def home(timeout=120):
                     # Set position like crash homing does
                     state.current_theta = 0
                     state.current_rho = 0
+                    tables.current().position_channel.publish(state.current_theta, state.current_rho)
                     logger.info("Crash homing fallback completed - theta=0, rho=0")
 
                 elif not state.homed_x and not state.homed_y:
@@ -1137,6 +1141,7 @@ def home(timeout=120):
                 offset_radians = math.radians(state.angular_homing_offset_degrees)
                 state.current_theta = offset_radians
                 state.current_rho = 0
+                tables.current().position_channel.publish(state.current_theta, state.current_rho)
 
                 logger.info(f"Sensor homing completed - theta set to {state.angular_homing_offset_degrees}° ({offset_radians:.3f} rad), rho=0")
 
@@ -1176,6 +1181,7 @@ def home(timeout=120):
                 # Crash homing just sets theta and rho to 0 (no x0 y0 command)
                 state.current_theta = 0
                 state.current_rho = 0
+                tables.current().position_channel.publish(state.current_theta, state.current_rho)
 
                 logger.info("Crash homing completed - theta=0, rho=0")
 
@@ -1202,7 +1208,7 @@ def home(timeout=120):
             homing_complete.set()
 
     # Start homing in a separate thread
-    homing_thread = threading.Thread(target=home_internal)
+    homing_thread = threading.Thread(target=contextvars.copy_context().run, args=(home_internal,))
     homing_thread.daemon = True
     homing_thread.start()
 
@@ -0,0 +1,186 @@
+"""
+Transparent reconnect after a dropped serial or WebSocket connection.
+
+A USB hiccup (Errno 6 / "Device not configured", EIO) or a WiFi drop used to
+end the whole run. The motion thread now calls recover() instead. recover()
+reopens the same port or URL with exponential backoff (BACKOFF_BASE doubling
+up to BACKOFF_MAX, at most MAX_ATTEMPTS tries). It then unlocks an alarm, waits
+for the controller to go Idle, and reads its position from a status report.
+
+The motion thread sends one move at a time and waits for its 'ok', so at most
+one move is unacknowledged during an outage:
+
+    ACKNOWLEDGED  the controller reports the move's target: it finished while
+                  the 'ok' was lost, so nothing is resent
+    RESYNCED      anything else (the move never arrived, or the controller reset
+                  and lost its coordinates). Its reported position is adopted
+                  as the position of the last acknowledged move, and the caller
+                  resends the move from there. A controller that reset mid-move
+                  has lost the part already drawn, so the ball can end up off by
+                  that much until the next homing
+
+Each outage is logged as it starts, on each attempt and when it ends, and the
+last few are kept for GET /api/connection/outages.
+"""
+import logging
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+import serial
+import websocket
+
+from modules.connection import connection_manager
+from modules.core.state import state
+
+logger = logging.getLogger(__name__)
+
+ACKNOWLEDGED = "acknowledged"
+RESYNCED = "resynced"
+
+MAX_ATTEMPTS = 10
+BACKOFF_BASE = 1.0  # Seconds before the first attempt; doubles each time
+BACKOFF_MAX = 30.0
+IDLE_TIMEOUT = 120.0  # A move already in the controller's planner may still be running
+POSITION_TOLERANCE = 0.05  # mm; the move is sent with 2 decimals
+OUTAGE_HISTORY = 20
+
+_DISCONNECT_MESSAGES = ("Device not configured", "Errno 6", "Errno 5", "Input/output error",
+                        "device disconnected", "Connection is already closed", "socket is already closed")
+
+_outages = deque(maxlen=OUTAGE_HISTORY)
+_current: Optional[dict] = None
+
+
+def is_connection_lost(error: Exception) -> bool:
+    """True for errors meaning the link itself went away, not a bad reply."""
+    if isinstance(error, (serial.SerialException, websocket.WebSocketConnectionClosedException,
+                          ConnectionError, BrokenPipeError)):
+        return True
+    return any(message in str(error) for message in _DISCONNECT_MESSAGES)
+
+
+def _open(conn):
+    """A new connection of the same kind to the same port or URL."""
+    if isinstance(conn, connection_manager.WebSocketConnection):
+        return connection_manager.WebSocketConnection(conn.url, timeout=conn.timeout)
+    if not isinstance(conn, connection_manager.SerialConnection):
+        return connection_manager.SerialConnection(state.port)
+    # Wait for the device to re-enumerate rather than letting serial.Serial fail on a missing node
+    if conn.port not in connection_manager.list_serial_ports():
+        raise serial.SerialException(f"{conn.port} is not present")
+    return connection_manager.SerialConnection(conn.port, conn.baudrate, conn.timeout)
+
+
+def _close_quietly(conn):
+    try:
+        if hasattr(conn, "ser"):
+            conn.ser.close()
+        elif getattr(conn, "ws", None):
+            conn.ws.close()
+    except Exception:
+        pass
+
+
+def _idle_position(conn) -> Optional[Tuple[float, float]]:
+    """Wait for the controller to stop moving and return its position."""
+    deadline = time.monotonic() + IDLE_TIMEOUT
+    while time.monotonic() < deadline:
+        if state.stop_requested:
+            return None
+        conn.send("?\n")
+        response = conn.readline()
+        if not response or "<" not in response:
+            time.sleep(0.1)
+            continue
+        if "Alarm" in response:
+            logger.warning(f"Controller in alarm after reconnect ({response}), unlocking")
+            conn.send("$X\n")
+            time.sleep(0.5)
+        elif "Hold" in response:
+            conn.send("~\n")
+            time.sleep(0.3)
+        elif "Idle" in response:
+            return connection_manager.parse_machine_position(response)
+        else:
+            time.sleep(0.2)
+    return None
+
+
+def recover(error: Exception, target: Tuple[float, float]) -> Optional[str]:
+    """Reconnect after error and re-sync with the controller.
+
+    target is the machine position of the unacknowledged move. Returns
+    ACKNOWLEDGED or RESYNCED, or None when the outage could not be recovered
+    (attempts exhausted or stop requested); state.conn is then None.
+    """
+    global _current
+    conn = state.conn
+    link = getattr(conn, "url", None) or getattr(conn, "port", None) or state.port
+    _current = {"started": time.time(), "link": link, "error": str(error), "attempts": 0,
+                "recovered": False, "outcome": None, "duration": None}
+    _outages.append(_current)
+    logger.error(f"Connection to {link} lost ({error}); reconnecting, up to {MAX_ATTEMPTS} attempts")
+
+    state.conn = None
+    state.is_connected = False
+    _close_quietly(conn)
+
+    outcome = None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        if state.stop_requested:
+            logger.info("Stop requested, giving up reconnecting")
+            break
+        time.sleep(min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+        _current["attempts"] = attempt
+        try:
+            new_conn = _open(conn)
+        except Exception as e:
+            logger.warning(f"Reconnect attempt {attempt}/{MAX_ATTEMPTS} to {link} failed: {e}")
+            continue
+        try:
+            if hasattr(new_conn, "reset_input_buffer"):
+                new_conn.reset_input_buffer()  # Replies to commands sent before the drop
+            position = _idle_position(new_conn)
+        except Exception as e:
+            logger.warning(f"Reconnect attempt {attempt}/{MAX_ATTEMPTS}: no status from {link}: {e}")
+            _close_quietly(new_conn)
+            continue
+        if position is None:
+            logger.warning(f"Reconnect attempt {attempt}/{MAX_ATTEMPTS}: {link} did not report an idle position")
+            _close_quietly(new_conn)
+            continue
+
+        state.conn = new_conn
+        state.is_connected = True
+        if abs(position[0] - target[0]) <= POSITION_TOLERANCE and abs(position[1] - target[1]) <= POSITION_TOLERANCE:
+            outcome = ACKNOWLEDGED
+        else:
+            # Controller coordinates are the reference; theta/rho still describe where the ball is
+            logger.info(f"Re-syncing position: controller reports {position}, "
+                        f"last acknowledged ({state.machine_x:.2f}, {state.machine_y:.2f})")
+            state.machine_x, state.machine_y = position
+            outcome = RESYNCED
+        break
+
+    _current.update(recovered=outcome is not None, outcome=outcome,
+                    duration=round(time.time() - _current["started"], 1))
+    if outcome:
+        action = "in-flight move had completed" if outcome == ACKNOWLEDGED else "resending the in-flight move"
+        logger.warning(f"Connection to {link} restored after {_current['duration']}s "
+                       f"({_current['attempts']} attempts); {action}")
+    else:
+        logger.error(f"Could not restore connection to {link} after {_current['attempts']} attempts "
+                     f"({_current['duration']}s); stopping")
+    _current = None
+    return outcome
+
+
+def outages() -> list:
+    """Recent outages, newest last."""
+    return list(_outages)
+
+
+def current_outage() -> Optional[dict]:
+    """The outage being recovered right now, if any."""
+    return dict(_current) if _current else None
@@ -0,0 +1,295 @@
+"""
+Prioritized queue for background cache work (pattern metadata and preview images).
+
+Startup cache generation, library-wide preview passes and on-demand misses from
+/preview_thr_batch all go through this one queue instead of competing for CPU
+and SD-card bandwidth:
+
+    PRIORITY_VISIBLE   previews a client is waiting for
+    PRIORITY_PLAYLIST  the next few patterns of the running playlist
+    PRIORITY_LIBRARY   the rest of the library
+
+Each file is queued at most once; asking again at a higher priority moves it up.
+While any table's motion thread is drawing, playlist and library work waits and
+requested previews are spaced MOTION_THROTTLE apart, since extra asyncio load during a
+pattern causes serial corruption on Pi 3B+. Pending files are saved to QUEUE_FILE,
+so a pass interrupted by a restart resumes where it left off.
+
+Queue depth and throughput are published as cache_progress["queue"], which
+/ws/cache-progress sends to clients.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUE_FILE = "cache_jobs.json"  # In the root directory, next to metadata_cache.json
+
+PRIORITY_VISIBLE = 0
+PRIORITY_PLAYLIST = 1
+PRIORITY_LIBRARY = 2
+PRIORITY_NAMES = {PRIORITY_VISIBLE: "visible", PRIORITY_PLAYLIST: "playlist", PRIORITY_LIBRARY: "library"}
+
+WORKERS = 2
+MOTION_THROTTLE = 0.5  # Seconds between requested previews while a pattern is drawing
+IDLE_POLL = 1.0  # How often deferred work rechecks the motion thread
+SAVE_INTERVAL = 5.0
+THROUGHPUT_WINDOW = 60.0
+PLAYLIST_LOOKAHEAD = 3
+
+
+def pattern_key(file_path: str) -> str:
+    """Pattern path relative to the patterns directory, with forward slashes"""
+    from modules.core.pattern_manager import THETA_RHO_DIR
+
+    file_path = file_path.replace('\\', '/')
+    root = THETA_RHO_DIR.replace('\\', '/').rstrip('/') + '/'
+    if file_path.startswith(root):
+        return file_path[len(root):]
+    return file_path
+
+
+def motion_busy() -> bool:
+    """True while the motion thread of any table is executing moves"""
+    from modules.core import tables
+    return any(engine.motion_controller and engine.motion_controller.is_busy() for engine in tables.all_tables())
+
+
+class CacheJobQueue:
+    """Deduplicated priority queue of pattern files whose cache needs generating."""
+
+    def __init__(self, queue_file: str = QUEUE_FILE):
+        self.queue_file = queue_file
+        self._heap: List[tuple] = []  # (priority, seq, file); stale entries are skipped on pop
+        self._pending: Dict[str, int] = {}
+        self._running: set = set()
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._counter = itertools.count()
+        self._completed: deque = deque()
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_save = 0.0
+        self._dirty = False
+        self.processed = 0
+        self.failed = 0
+        self.paused = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def idle(self) -> bool:
+        return not self._pending and not self._running
+
+    def enqueue(self, files: Iterable[str], priority: int = PRIORITY_LIBRARY) -> int:
+        """Queue files (or move them up to priority). Returns how many were added or raised."""
+        changed = 0
+        for file_path in files:
+            key = pattern_key(file_path)
+            if key in self._running or self._pending.get(key, priority + 1) <= priority:
+                continue
+            self._pending[key] = priority
+            heapq.heappush(self._heap, (priority, next(self._counter), key))
+            changed += 1
+        if changed:
+            self._dirty = True
+            self._start_workers()
+            self._wakeup.set()
+            self._publish()
+        return changed
+
+    async def request(self, file_path: str, priority: int = PRIORITY_VISIBLE) -> bool:
+        """Queue a file and wait for its cache to be generated. Returns success."""
+        key = pattern_key(file_path)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, []).append(future)
+        self.enqueue([key], priority)
+        return await future
+
+    async def join(self, on_progress=None):
+        """Wait until the queue is drained; on_progress(depth) is called about once a second."""
+        while not self.idle:
+            if on_progress:
+                on_progress(self.depth)
+            await asyncio.sleep(IDLE_POLL)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        while self._completed and now - self._completed[0] > THROUGHPUT_WINDOW:
+            self._completed.popleft()
+        by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority in self._pending.values():
+            by_priority[PRIORITY_NAMES[priority]] += 1
+        return {
+            "depth": len(self._pending),
+            "by_priority": by_priority,
+            "running": sorted(self._running),
+            "paused": self.paused,
+            "processed": self.processed,
+            "failed": self.failed,
+            "per_minute": round(len(self._completed) * 60.0 / THROUGHPUT_WINDOW, 1)
+        }
+
+    def _publish(self):
+        from modules.core.cache_manager import cache_progress
+        cache_progress["queue"] = self.stats()
+
+    def _start_workers(self):
+        loop = asyncio.get_running_loop()
+        if self._workers and self._workers[0].get_loop() is loop and not any(w.done() for w in self._workers):
+            return
+        # First use, or the previous loop is gone (tests, restarts of the app in one process).
+        # The queue is shared, so workers run as the default table whichever table enqueued first.
+        from modules.core import tables
+        self._wakeup = asyncio.Event()
+        self._running.clear()
+        default = tables.get(tables.DEFAULT_ID)
+        self._workers = [tables.create_task(default, self._work()) for _ in range(WORKERS)]
+
+    def _peek(self) -> Optional[int]:
+        while self._heap:
+            priority, _, key = self._heap[0]
+            if self._pending.get(key) == priority:
+                return priority
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop(self) -> Optional[str]:
+        if self._peek() is None:
+            return None
+        _, _, key = heapq.heappop(self._heap)
+        del self._pending[key]
+        self._dirty = True
+        return key
+
+    async def _wait(self, timeout: Optional[float] = None):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _work(self):
+        from modules.core import cache_manager
+
+        while True:
+            priority = self._peek()
+            if priority is None:
+                await self._save()
+                await self._wait()
+                continue
+
+            if motion_busy():
+                if priority > PRIORITY_VISIBLE:
+                    if not self.paused:
+                        self.paused = True
+                        self._publish()
+                    await self._wait(IDLE_POLL)  # A visible request wakes us early
+                    continue
+                await asyncio.sleep(MOTION_THROTTLE)
+            if self.paused:
+                self.paused = False
+                self._publish()
+
+            key = self._pop()
+            if key is None:
+                continue
+            self._running.add(key)
+            self._publish()
+            try:
+                success = await cache_manager.generate_image_preview(key)
+            except Exception as e:
+                logger.error(f"Cache job for {key} failed: {str(e)}")
+                success = False
+            finally:
+                self._running.discard(key)
+
+            self.processed += 1
+            if not success:
+                self.failed += 1
+            self._completed.append(time.monotonic())
+            for future in self._waiters.pop(key, []):
+                if not future.done():
+                    future.set_result(success)
+            self._publish()
+            if time.monotonic() - self._last_save > SAVE_INTERVAL:
+                await self._save()
+
+    def _snapshot(self) -> dict:
+        return {"version": 1, "pending": dict(self._pending)}
+
+    def _write(self, snapshot: dict):
+        if not snapshot["pending"]:
+            if os.path.exists(self.queue_file):
+                os.remove(self.queue_file)
+            return
+        temp_path = self.queue_file + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, self.queue_file)
+
+    async def _save(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._last_save = time.monotonic()
+        try:
+            await asyncio.to_thread(self._write, self._snapshot())
+        except Exception as e:
+            logger.warning(f"Failed to save cache job queue: {str(e)}")
+
+    async def stop(self):
+        """Stop the workers and save pending jobs for the next run (shutdown)."""
+        # Cancelling a worker drops its job from _running, so note the jobs in flight first
+        interrupted = set(self._running)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for key in interrupted:
+            self._pending.setdefault(key, PRIORITY_LIBRARY)  # Interrupted jobs run again next time
+        self._running.clear()
+        self._dirty = True
+        await self._save()
+
+    async def restore(self) -> int:
+        """Re-queue jobs saved by a previous run. Returns how many were restored."""
+        from modules.core.pattern_manager import THETA_RHO_DIR
+
+        def _load():
+            if not os.path.exists(self.queue_file):
+                return {}
+            with open(self.queue_file) as f:
+                pending = json.load(f).get("pending", {})
+            return {key: priority for key, priority in pending.items()
+                    if priority in PRIORITY_NAMES and os.path.exists(os.path.join(THETA_RHO_DIR, key))}
+
+        try:
+            pending = await asyncio.to_thread(_load)
+        except Exception as e:
+            logger.warning(f"Failed to restore cache job queue: {str(e)}")
+            return 0
+        for priority in sorted(set(pending.values())):
+            self.enqueue([key for key, p in pending.items() if p == priority], priority)
+        if pending:
+            logger.info(f"Resumed {len(pending)} cache jobs from the previous run")
+        return len(pending)
+
+
+# Global queue used by the cache manager and the preview endpoints
+cache_jobs = CacheJobQueue()
+
+
+def queue_upcoming(playlist: List[str], index: int):
+    """Queue the next few playlist patterns ahead of the rest of the library."""
+    upcoming = playlist[index + 1:index + 1 + PLAYLIST_LOOKAHEAD]
+    if upcoming:
+        cache_jobs.enqueue(upcoming, PRIORITY_PLAYLIST)
@@ -32,6 +32,7 @@ def _get_metadata_cache_lock() -> asyncio.Lock:
 
 # Constants
 CACHE_DIR = os.path.join(THETA_RHO_DIR, "cached_images")
+THUMBNAIL_DIR = os.path.join(THETA_RHO_DIR, "cached_thumbnails")  # Card-sized PNGs for the touch kiosk
 METADATA_CACHE_FILE = "metadata_cache.json"  # Now in root directory
 
 # Cache schema version - increment when structure changes
@@ -236,14 +237,51 @@ def get_cache_path(pattern_file):
     safe_name = filename.replace('\\', '_')
     return os.path.join(cache_dir, f"{safe_name}.webp")
 
+def get_thumbnail_path(pattern_file):
+    """Get the kiosk thumbnail path for a pattern file (mirrors the pattern's subdirectories)."""
+    pattern_file = pattern_file.replace('\\', '/')
+    return os.path.join(THUMBNAIL_DIR, *f"{pattern_file}.png".split('/'))
+
+def write_thumbnail(pattern_file, image_content):
+    """Write the kiosk thumbnail for a pattern from its rendered preview bytes."""
+    from modules.core.preview import generate_thumbnail
+
+    thumbnail_path = get_thumbnail_path(pattern_file)
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+    temp_path = thumbnail_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(generate_thumbnail(image_content))
+    os.replace(temp_path, thumbnail_path)  # The kiosk never sees a partial file
+
+def write_preview(pattern_file, image_content):
+    """Write a rendered preview to the image cache, along with its kiosk thumbnail."""
+    cache_path = get_cache_path(pattern_file)
+    with open(cache_path, 'wb') as f:
+        f.write(image_content)
+    
+    try:
+        os.chmod(cache_path, 0o644)  # More conservative permissions
+    except (OSError, PermissionError) as e:
+        # Log as debug instead of error since this is not critical
+        logger.debug(f"Could not set cache file permissions for {pattern_file}: {str(e)}")
+    
+    # Kiosk thumbnail from the same render, so the touch app never converts previews itself
+    try:
+        write_thumbnail(pattern_file, image_content)
+    except Exception as e:
+        logger.warning(f"Failed to write thumbnail for {pattern_file}: {str(e)}")
+
 def delete_pattern_cache(pattern_file):
     """Delete cached preview image and metadata for a pattern file."""
     try:
-        # Remove cached image
+        # Remove cached image and its thumbnail
         cache_path = get_cache_path(pattern_file)
         if os.path.exists(cache_path):
             os.remove(cache_path)
             logger.info(f"Deleted cached image: {cache_path}")
+        thumbnail_path = get_thumbnail_path(pattern_file)
+        if os.path.exists(thumbnail_path):
+            os.remove(thumbnail_path)
         
         # Remove from metadata cache
         metadata_cache = load_metadata_cache()
@@ -387,32 +425,45 @@ async def get_pattern_metadata_async(pattern_file):
     return None
 
 async def cache_pattern_metadata(pattern_file, first_coord, last_coord, total_coords):
-    """Cache metadata for a pattern file.
+    """Cache metadata for a pattern file."""
+    await cache_patterns_metadata({
+        pattern_file: {
+            'first_coordinate': first_coord,
+            'last_coordinate': last_coord,
+            'total_coordinates': total_coords
+        }
+    })
+
+async def cache_patterns_metadata(entries):
+    """Cache metadata for several pattern files with one read and one write of the cache file.
 
+    entries maps pattern_file to {'first_coordinate', 'last_coordinate', 'total_coordinates'}.
     Uses asyncio.Lock to prevent race conditions when multiple concurrent tasks
     (from asyncio.gather) try to read-modify-write the cache file simultaneously.
     """
+    if not entries:
+        return
     async with _get_metadata_cache_lock():
         try:
             cache_data = await asyncio.to_thread(load_metadata_cache)
             data_section = cache_data.get('data', {})
-            pattern_path = os.path.join(THETA_RHO_DIR, pattern_file)
-            file_mtime = await asyncio.to_thread(os.path.getmtime, pattern_path)
-
-            data_section[pattern_file] = {
-                'mtime': file_mtime,
-                'metadata': {
-                    'first_coordinate': first_coord,
-                    'last_coordinate': last_coord,
-                    'total_coordinates': total_coords
+            for pattern_file, metadata in entries.items():
+                pattern_path = os.path.join(THETA_RHO_DIR, pattern_file)
+                try:
+                    file_mtime = await asyncio.to_thread(os.path.getmtime, pattern_path)
+                except OSError as e:
+                    logger.warning(f"Failed to cache metadata for {pattern_file}: {str(e)}")
+                    continue
+                data_section[pattern_file] = {
+                    'mtime': file_mtime,
+                    'metadata': metadata
                 }
-            }
 
             cache_data['data'] = data_section
             await asyncio.to_thread(save_metadata_cache, cache_data)
-            logger.debug(f"Cached metadata for {pattern_file}")
+            logger.debug(f"Cached metadata for {len(entries)} pattern(s)")
         except Exception as e:
-            logger.warning(f"Failed to cache metadata for {pattern_file}: {str(e)}")
+            logger.warning(f"Failed to cache metadata for {len(entries)} pattern(s): {str(e)}")
 
 def needs_cache(pattern_file):
     """Check if a pattern file needs its cache generated."""
@@ -487,6 +538,8 @@ async def generate_image_preview(pattern_file):
         cache_path = get_cache_path(pattern_file)
         if os.path.exists(cache_path):
             logger.debug(f"Skipping image generation for {pattern_file} - already cached")
+            if not os.path.exists(get_thumbnail_path(pattern_file)):
+                await _write_thumbnail_from_cache(pattern_file, cache_path)
             return True
             
         # Generate the image
@@ -500,14 +553,7 @@ async def generate_image_preview(pattern_file):
         # Ensure cache directory exists
         ensure_cache_dir()
         
-        with open(cache_path, 'wb') as f:
-            f.write(image_content)
-        
-        try:
-            os.chmod(cache_path, 0o644)  # More conservative permissions
-        except (OSError, PermissionError) as e:
-            # Log as debug instead of error since this is not critical
-            logger.debug(f"Could not set cache file permissions for {pattern_file}: {str(e)}")
+        await asyncio.to_thread(write_preview, pattern_file, image_content)
         
         logger.debug(f"Successfully generated preview for {pattern_file}")
         return True
@@ -515,8 +561,22 @@ async def generate_image_preview(pattern_file):
         logger.error(f"Failed to generate image for {pattern_file}: {str(e)}")
         return False
 
+async def _write_thumbnail_from_cache(pattern_file, cache_path):
+    """Backfill a missing kiosk thumbnail from an existing cached preview."""
+    def _backfill():
+        with open(cache_path, 'rb') as f:
+            write_thumbnail(pattern_file, f.read())
+    try:
+        await asyncio.to_thread(_backfill)
+    except Exception as e:
+        logger.warning(f"Failed to write thumbnail for {pattern_file}: {str(e)}")
+
 async def generate_all_image_previews():
-    """Generate image previews for missing patterns using set difference."""
+    """Generate image previews (and metadata) for missing patterns using set difference.
+
+    The work goes through the cache job queue at library priority, so it waits while
+    a pattern is drawing and yields to previews a client is waiting for.
+    """
     global cache_progress
     
     try:
@@ -540,9 +600,12 @@ async def generate_all_image_previews():
         
         cached_patterns = await asyncio.to_thread(_find_cached_patterns)
         
-        # Step 3: Calculate delta (patterns missing image cache)
+        # Step 3: Calculate delta (patterns missing image or metadata cache)
+        # Generating a preview also fills in missing metadata, so one pass covers both
         pattern_set = set(pattern_files)
-        patterns_to_cache = list(pattern_set - cached_patterns)
+        metadata_cache = await load_metadata_cache_async()
+        metadata_keys = set(metadata_cache.get('data', {}).keys())
+        patterns_to_cache = sorted((pattern_set - cached_patterns) | (pattern_set - metadata_keys))
         total_files = len(patterns_to_cache)
         skipped_files = len(pattern_files) - total_files
         
@@ -561,24 +624,20 @@ async def generate_all_image_previews():
         
         logger.info(f"Generating image cache for {total_files} uncached .thr patterns ({skipped_files} already cached)...")
         
-        batch_size = 5
-        successful = 0
-        for i in range(0, total_files, batch_size):
-            batch = patterns_to_cache[i:i + batch_size]
-            tasks = [generate_image_preview(file) for file in batch]
-            results = await asyncio.gather(*tasks)
-            successful += sum(1 for r in results if r)
-            
-            # Update progress
-            cache_progress["processed_files"] = min(i + batch_size, total_files)
-            if i < total_files:
-                cache_progress["current_file"] = patterns_to_cache[min(i + batch_size - 1, total_files - 1)]
-            
-            # Log progress
-            progress = min(i + batch_size, total_files)
-            logger.info(f"Image cache generation progress: {progress}/{total_files} files processed")
+        from modules.core.cache_jobs import cache_jobs, PRIORITY_LIBRARY
+        failed_before = cache_jobs.failed
+        cache_jobs.enqueue(patterns_to_cache, PRIORITY_LIBRARY)
         
-        logger.info(f"Image cache generation completed: {successful}/{total_files} patterns cached successfully, {skipped_files} patterns skipped (already cached)")
+        def _update_progress(depth):
+            cache_progress["processed_files"] = max(0, total_files - depth)
+            running = cache_progress.get("queue", {}).get("running")
+            cache_progress["current_file"] = running[0] if running else ""
+        
+        await cache_jobs.join(_update_progress)
+        cache_progress["processed_files"] = total_files
+        
+        failed = cache_jobs.failed - failed_before
+        logger.info(f"Image cache generation completed: {total_files - failed}/{total_files} patterns cached successfully, {skipped_files} patterns skipped (already cached)")
         
     except Exception as e:
         logger.error(f"Error during image cache generation: {str(e)}")
@@ -675,16 +734,17 @@ async def generate_metadata_cache():
         raise
 
 async def rebuild_cache():
-    """Rebuild the entire cache for all pattern files."""
+    """Rebuild the entire cache for all pattern files.
+
+    Every file goes through the cache job queue at library priority, so the rebuild
+    waits while a pattern is drawing; a preview also fills in missing metadata.
+    """
+    from modules.core.cache_jobs import cache_jobs, PRIORITY_LIBRARY
     logger.info("Starting cache rebuild...")
     
     # Ensure cache directory exists
     ensure_cache_dir()
     
-    # First generate metadata cache for all files
-    await generate_metadata_cache()
-    
-    # Then generate image previews
     pattern_files = [f for f in list_theta_rho_files() if f.endswith('.thr')]
     total_files = len(pattern_files)
     
@@ -692,21 +752,17 @@ async def rebuild_cache():
         logger.info("No pattern files found to cache")
         return
         
-    logger.info(f"Generating image previews for {total_files} pattern files...")
+    logger.info(f"Generating metadata and image previews for {total_files} pattern files...")
+    
+    failed_before = cache_jobs.failed
+    cache_jobs.enqueue(pattern_files, PRIORITY_LIBRARY)
     
-    # Process in batches
-    batch_size = 5
-    successful = 0
-    for i in range(0, total_files, batch_size):
-        batch = pattern_files[i:i + batch_size]
-        tasks = [generate_image_preview(file) for file in batch]
-        results = await asyncio.gather(*tasks)
-        successful += sum(1 for r in results if r)
-        
-        # Log progress
-        progress = min(i + batch_size, total_files)
-        logger.info(f"Image preview generation progress: {progress}/{total_files} files processed")
+    def _log_progress(depth):
+        logger.info(f"Image preview generation progress: {total_files - depth}/{total_files} files processed")
     
+    await cache_jobs.join(_log_progress)
+    
+    successful = total_files - (cache_jobs.failed - failed_before)
     logger.info(f"Cache rebuild completed: {successful}/{total_files} patterns cached successfully")
 
 async def generate_cache_background():
@@ -723,10 +779,7 @@ async def generate_cache_background():
             "error": None
         })
         
-        # First generate metadata cache
-        await generate_metadata_cache()
-        
-        # Then generate image previews
+        # Metadata and image previews in one pass through the cache job queue
         await generate_all_image_previews()
         
         # Mark as complete
@@ -0,0 +1,283 @@
+"""
+Crash-safe execution checkpoints and resume after restart.
+
+While patterns run, a small append-only journal (CHECKPOINT_FILE) records where
+the table is. Each pattern, clear or main, starts the journal afresh with a
+start record holding:
+
+    the pattern path and a hash of its content, whether it is a clear, the
+    coordinate count, and the run it belongs to (the run_theta_rho_files
+    options, the current file order and the playlist index).
+
+After that come lean progress records. Each holds the last coordinate index
+sent, theta/rho and machine X/Y. They are written at most every
+CHECKPOINT_INTERVAL seconds and fsynced, so a power cut loses at most that much
+drawing. A complete record marks a main pattern as finished, so a crash during
+the pause that follows resumes with the next pattern. When the run ends normally
+or is stopped, the journal is removed. Each table keeps its own journal; extra
+tables write theirs to their table directory (see tables.py).
+
+On boot, load() reads what is left. The interrupted run is offered through
+/api/checkpoint, or resumed straight away when auto_play is enabled. A resume
+homes the table and restarts run_theta_rho_files at the recorded playlist index.
+The first move of the resumed pattern travels to the checkpoint coordinate, and
+drawing continues from that segment. If the pattern file changed since, its hash
+no longer matches and the pattern is drawn from the start.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from modules.core import clear_generator, tables
+from modules.core.state import state
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = os.path.join(os.getcwd(), "checkpoint.jsonl")
+CHECKPOINT_INTERVAL = 5.0  # Seconds between progress records
+COMPACT_AFTER = 500  # Progress records before the journal is rewritten to its last entry
+
+
+class Checkpoint(NamedTuple):
+    pattern: str
+    pattern_hash: str
+    clearing: bool
+    index: int  # Last coordinate sent
+    total: int
+    theta: float
+    rho: float
+    machine_x: float
+    machine_y: float
+    completed: bool  # The main pattern finished; resume with the next one
+    files: List[str]
+    playlist_name: Optional[str]
+    playlist_index: int
+    pause_time: float
+    clear_pattern: Optional[str]
+    run_mode: str
+    shuffle: bool
+    optimize_order: bool
+    time: float
+
+
+_lock = threading.Lock()
+
+
+class _Journal:
+    """Checkpoint state of one table."""
+
+    def __init__(self):
+        self.run: dict = {}  # Options of the current run_theta_rho_files call
+        self.start: Optional[dict] = None  # Start record of the pattern now running
+        self.latest: Optional[dict] = None  # Most recent progress, written or not
+        self.last_write = 0.0
+        self.records = 0
+        self.pending: Optional[Checkpoint] = None
+
+
+def _journal() -> _Journal:
+    return tables.local("checkpoint", _Journal)
+
+
+def _path() -> str:
+    engine = tables.current()
+    if engine.is_default:
+        return CHECKPOINT_FILE
+    return os.path.join(tables.TABLES_DIR, engine.id, "checkpoint.jsonl")
+
+
+def content_hash(file_path: str) -> str:
+    """Hash of a pattern's content; generated clears are identified by their parameters."""
+    if clear_generator.is_generated(file_path):
+        return hashlib.sha1(os.path.basename(file_path).encode()).hexdigest()
+    digest = hashlib.sha1()
+    try:
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+    except OSError:
+        return ""
+    return digest.hexdigest()
+
+
+def _append(records: List[dict], rewrite: bool = False):
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    path = _path()
+    if rewrite:
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    else:
+        with open(path, "a") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def begin_run(files: List[str], pause_time: float = 0, clear_pattern: Optional[str] = None, run_mode: str = "single",
+              shuffle: bool = False, optimize_order: bool = False):
+    """A run_theta_rho_files call started; an older interrupted run is no longer offered."""
+    journal = _journal()
+    journal.run = dict(files=list(files), playlist_name=state.current_playlist_name, playlist_index=0,
+                       pause_time=pause_time, clear_pattern=clear_pattern, run_mode=run_mode or "single",
+                       shuffle=shuffle, optimize_order=optimize_order)
+    journal.pending = None
+
+
+def set_position(files: List[str], playlist_index: int):
+    """The run moved on to files[playlist_index] (files may have been reordered)."""
+    _journal().run.update(files=list(files), playlist_index=playlist_index)
+
+
+def begin(file_path: str, clearing: bool, total: int):
+    """A pattern started executing. Blocking: call from a worker thread."""
+    journal = _journal()
+    record = {"type": "start", "pattern": file_path, "hash": content_hash(file_path), "clearing": clearing,
+              "total": total, "time": time.time(), **journal.run}
+    with _lock:
+        journal.start, journal.latest, journal.records = record, None, 0
+        journal.last_write = time.monotonic()
+        try:
+            _append([record], rewrite=True)
+        except OSError as e:
+            logger.warning(f"Could not write execution checkpoint: {e}")
+
+
+def progress(index: int, theta: float, rho: float) -> bool:
+    """Note the last coordinate sent. True when a checkpoint is due; then call flush() off the event loop."""
+    journal = _journal()
+    journal.latest = {"type": "progress", "index": index, "theta": theta, "rho": rho,
+                      "x": state.machine_x, "y": state.machine_y, "time": time.time()}
+    return journal.start is not None and time.monotonic() - journal.last_write >= CHECKPOINT_INTERVAL
+
+
+def flush():
+    """Write the latest progress now."""
+    journal = _journal()
+    with _lock:
+        if journal.start is None or journal.latest is None:
+            return
+        journal.last_write = time.monotonic()
+        journal.records += 1
+        try:
+            if journal.records > COMPACT_AFTER:
+                _append([journal.start, journal.latest], rewrite=True)
+                journal.records = 1
+            else:
+                _append([journal.latest])
+        except OSError as e:
+            logger.warning(f"Could not write execution checkpoint: {e}")
+
+
+def complete():
+    """The running main pattern finished."""
+    journal = _journal()
+    with _lock:
+        if journal.start is None or journal.start["clearing"]:
+            return
+        try:
+            _append([{"type": "complete", "time": time.time()}])
+        except OSError as e:
+            logger.warning(f"Could not write execution checkpoint: {e}")
+
+
+def finish():
+    """The run ended normally or was stopped: nothing to resume."""
+    journal = _journal()
+    with _lock:
+        journal.run, journal.start, journal.latest, journal.pending = {}, None, None, None
+        try:
+            os.remove(_path())
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove execution checkpoint: {e}")
+
+
+def discard():
+    """Drop an interrupted run without resuming it."""
+    journal = _journal()
+    journal.pending = None
+    if journal.start is None:
+        finish()
+
+
+def load() -> Optional[Checkpoint]:
+    """Read the journal left by the previous process."""
+    try:
+        with open(_path()) as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        logger.warning(f"Could not read execution checkpoint: {e}")
+        return None
+
+    start, latest, completed = None, None, False
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # A torn final line from the crash
+        if record.get("type") == "start":
+            start, latest, completed = record, None, False
+        elif record.get("type") == "progress":
+            latest = record
+        elif record.get("type") == "complete":
+            completed = True
+    if not start:
+        return None
+
+    latest = latest or {"index": 0, "theta": 0.0, "rho": 0.0, "x": 0.0, "y": 0.0, "time": start["time"]}
+    pending_run = Checkpoint(
+        pattern=start["pattern"], pattern_hash=start["hash"], clearing=start["clearing"],
+        index=latest["index"], total=start["total"], theta=latest["theta"], rho=latest["rho"],
+        machine_x=latest["x"], machine_y=latest["y"], completed=completed,
+        files=start.get("files") or [start["pattern"]], playlist_name=start.get("playlist_name"),
+        playlist_index=start.get("playlist_index", 0), pause_time=start.get("pause_time", 0),
+        clear_pattern=start.get("clear_pattern"), run_mode=start.get("run_mode", "single"),
+        shuffle=start.get("shuffle", False), optimize_order=start.get("optimize_order", False),
+        time=latest["time"]
+    )
+    _journal().pending = pending_run
+    logger.info(f"Found interrupted run: {summary()}")
+    return pending_run
+
+
+def pending() -> Optional[Checkpoint]:
+    return _journal().pending
+
+
+def start_index(checkpoint: Checkpoint, file_path: str) -> int:
+    """Coordinate to resume file_path from, or 0 if the file changed since the checkpoint."""
+    if content_hash(file_path) != checkpoint.pattern_hash:
+        logger.warning(f"{file_path} changed since it was interrupted, drawing it from the start")
+        return 0
+    return checkpoint.index
+
+
+def summary() -> Optional[dict]:
+    """Short description of the interrupted run for status and the API."""
+    checkpoint = _journal().pending
+    if checkpoint is None:
+        return None
+    return {
+        "pattern": os.path.basename(checkpoint.pattern),
+        "clearing": checkpoint.clearing,
+        "completed": checkpoint.completed,
+        "progress": round(100.0 * (checkpoint.index + 1) / checkpoint.total, 1) if checkpoint.total else 0.0,
+        "index": checkpoint.index,
+        "theta": checkpoint.theta,
+        "rho": checkpoint.rho,
+        "playlist": checkpoint.playlist_name,
+        "playlist_index": checkpoint.playlist_index,
+        "playlist_length": len(checkpoint.files),
+        "interrupted_at": checkpoint.time
+    }
@@ -0,0 +1,162 @@
+"""
+Procedural clear patterns, generated from table geometry instead of read from files.
+
+The shipped clears are fixed .thr files per table type, up to 1.7 MB, parsed on
+every run. Here a clear is a small parameter set: a spiral between two rho values
+(in, out, or over a partial band) or a sideways sweep, with ring spacing
+
+    spacing = ball_diameter * (1 - overlap) / table_radius
+
+in rho units, so rings just touch at overlap 0 and overlap trades speed for a more
+thorough clear. Coordinates are computed once per parameter set and memoized.
+
+Generated clears are addressed by virtual paths under GENERATED_DIR that encode
+their parameters (e.g. ./generated_clears/spiral_1.0000_0.0000_0.0303.thr).
+Nothing is written there: parse_theta_rho_file() resolves these paths through
+coordinates(), so the rest of the pipeline (execution, clear speed, run-time
+history, clear_policy) treats them like any other pattern file.
+
+With state.generated_clears enabled, get_clear_pattern_file() returns these in
+place of the shipped files; custom clear patterns still take precedence.
+"""
+import os
+import re
+from functools import lru_cache
+from math import pi
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+
+from modules.core.state import state
+
+# numpy is imported where it is used, keeping it off the server's startup path
+if TYPE_CHECKING:
+    import numpy as np
+
+GENERATED_DIR = "./generated_clears"
+SPIRAL = "spiral"
+SIDEWAYS = "sideways"
+
+STEPS_PER_TURN = 64  # Moves are linear in theta and rho, so spirals need few points
+SIDEWAYS_STEP = 0.01  # Rho-unit length of each move along a sideways stroke
+MIN_SPACING = 0.002
+CACHE_SIZE = 32
+
+DEFAULT_BALL_DIAMETER_MM = 10.0
+# Radii at which a 10 mm ball with no overlap reproduces the ring spacing of the shipped clears
+TABLE_RADIUS_MM = {
+    'dune_weaver': 330.0,
+    'dune_weaver_mini': 200.0,
+    'dune_weaver_mini_pro': 200.0,
+    'dune_weaver_mini_pro_byj': 200.0,
+    'dune_weaver_gold': 200.0,
+    'dune_weaver_pro': 465.0,
+    'dune_weaver_pro_pulley': 465.0,
+}
+
+_PATH_RE = re.compile(r"^(?:(spiral)_(-?\d+\.\d+)_(-?\d+\.\d+)|(sideways))_(\d+\.\d+)\.thr$")
+
+
+class ClearSpec(NamedTuple):
+    kind: str
+    start_rho: float
+    end_rho: float
+    spacing: float
+
+
+def table_geometry() -> Tuple[float, float]:
+    """(ball diameter, table radius) in mm, from settings or the table type's defaults."""
+    table_type = state.table_type_override or state.table_type
+    radius = state.clear_table_radius_mm or TABLE_RADIUS_MM.get(table_type, TABLE_RADIUS_MM['dune_weaver'])
+    return state.clear_ball_diameter_mm or DEFAULT_BALL_DIAMETER_MM, radius
+
+
+def ring_spacing(overlap: Optional[float] = None) -> float:
+    """Rho between neighbouring rings for this table."""
+    ball, radius = table_geometry()
+    if overlap is None:
+        overlap = state.clear_ring_overlap
+    return max(MIN_SPACING, ball * (1.0 - overlap) / radius)
+
+
+def spec(kind: str, start_rho: float = 1.0, end_rho: float = 0.0, spacing: Optional[float] = None) -> ClearSpec:
+    """Normalized parameter set; rounding keeps the memo and run-time history keys stable."""
+    spacing = round(spacing if spacing is not None else ring_spacing(), 4)
+    if kind == SIDEWAYS:
+        return ClearSpec(SIDEWAYS, 1.0, 1.0, spacing)
+    start_rho = round(min(1.0, max(0.0, start_rho)), 4)
+    end_rho = round(min(1.0, max(0.0, end_rho)), 4)
+    return ClearSpec(SPIRAL, start_rho, end_rho, spacing)
+
+
+def path_for(clear: ClearSpec) -> str:
+    if clear.kind == SIDEWAYS:
+        name = f"sideways_{clear.spacing:.4f}.thr"
+    else:
+        name = f"spiral_{clear.start_rho:.4f}_{clear.end_rho:.4f}_{clear.spacing:.4f}.thr"
+    return os.path.join(GENERATED_DIR, name)
+
+
+def spec_from_path(file_path: str) -> Optional[ClearSpec]:
+    if os.path.normpath(os.path.dirname(file_path)) != os.path.normpath(GENERATED_DIR):
+        return None
+    match = _PATH_RE.match(os.path.basename(file_path))
+    if not match:
+        return None
+    if match.group(4):
+        return ClearSpec(SIDEWAYS, 1.0, 1.0, float(match.group(5)))
+    return ClearSpec(SPIRAL, float(match.group(2)), float(match.group(3)), float(match.group(5)))
+
+
+def is_generated(file_path: str) -> bool:
+    return spec_from_path(file_path) is not None
+
+
+def clear_path(mode: str, spacing: Optional[float] = None) -> Optional[str]:
+    """Generated equivalent of a shipped clear pattern mode."""
+    if mode == 'clear_from_out':
+        return path_for(spec(SPIRAL, 1.0, 0.0, spacing))
+    if mode == 'clear_from_in':
+        return path_for(spec(SPIRAL, 0.0, 1.0, spacing))
+    if mode == 'clear_sideway':
+        return path_for(spec(SIDEWAYS, spacing=spacing))
+    return None
+
+
+def spiral(start_rho: float, end_rho: float, spacing: float) -> "np.ndarray":
+    """Archimedean spiral from start_rho to end_rho, one ring every `spacing` rho."""
+    import numpy as np
+    turns = max(1.0, abs(end_rho - start_rho) / spacing)
+    fraction = np.linspace(0.0, 1.0, int(np.ceil(turns * STEPS_PER_TURN)) + 1)
+    return np.column_stack((fraction * turns * 2 * pi, start_rho + (end_rho - start_rho) * fraction))
+
+
+def sideways(spacing: float) -> "np.ndarray":
+    """Parallel strokes across the table, joined along the rim."""
+    import numpy as np
+    strokes = []
+    direction = 1.0
+    for y in np.arange(-1.0 + spacing / 2, 1.0, spacing):
+        half = np.sqrt(max(0.0, 1.0 - y * y))
+        count = max(2, int(np.ceil(2 * half / SIDEWAYS_STEP)) + 1)
+        x = np.linspace(-half, half, count) * direction
+        strokes.append(np.column_stack((x, np.full(count, y))))
+        direction = -direction
+    xy = np.concatenate(strokes)
+    # Keep theta continuous so the table never unwinds between points
+    theta = np.unwrap(np.arctan2(xy[:, 1], xy[:, 0]))
+    rho = np.minimum(1.0, np.hypot(xy[:, 0], xy[:, 1]))
+    return np.column_stack((theta, rho))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _generate(clear: ClearSpec) -> Tuple[Tuple[float, float], ...]:
+    import numpy as np
+    points = sideways(clear.spacing) if clear.kind == SIDEWAYS else spiral(clear.start_rho, clear.end_rho, clear.spacing)
+    return tuple(map(tuple, np.round(points, 5).tolist()))
+
+
+def coordinates(file_path: str) -> List[Tuple[float, float]]:
+    """Coordinates for a generated clear path, in parse_theta_rho_file()'s format."""
+    clear = spec_from_path(file_path)
+    if clear is None:
+        return []
+    return list(_generate(clear))
@@ -0,0 +1,203 @@
+"""
+Smart clear selection between patterns (clear mode "smart").
+
+The fixed clear modes run a full-table clear before every pattern, chosen only by
+the next pattern's first rho. The smart mode also looks at what is on the table:
+the band of rho the previous pattern drew in, where the ball is, and where and over
+which band the next pattern draws. It picks one of:
+
+    none        the table is clean and the ball is at the next start, or only a
+                thin ring (SKIP_MAX_WIDTH) is drawn, the next pattern spans it and
+                starts where the ball already is
+    reposition  the table is clean but the ball is elsewhere; the pattern's first
+                move takes it there directly, no clear is run
+    partial     the previous pattern stayed within a band narrow enough that a
+                spiral sweep over just that band is worth it; the sweep comes from
+                clear_generator at the full clear's ring spacing and ends near the
+                next start
+    full        the usual adaptive full-table clear
+
+A next pattern spanning the drawn band does not make a clear unnecessary: most
+patterns reach from rho 0 to 1 yet leave most of the old sand untouched, so they
+would be drawn over it.
+
+What is on the table is tracked here: record_pattern() after a pattern draws,
+record_clear() after a clear runs and forget() when it is unknown (startup,
+manual moves), separately for each table. Each decision is logged with its
+estimated time saved over a full clear.
+"""
+import logging
+import os
+from collections import OrderedDict
+from math import pi
+from typing import NamedTuple, Optional, Tuple
+
+from modules.core import clear_generator, tables
+
+logger = logging.getLogger(__name__)
+
+CLEAR_NONE = "none"
+CLEAR_REPOSITION = "reposition"
+CLEAR_PARTIAL = "partial"
+CLEAR_FULL = "full"
+
+START_TOLERANCE = 0.02  # Rho within which the ball counts as already at the next start
+COVER_MARGIN = 0.02  # Rho by which the next pattern may fall short of the previous band
+SKIP_MAX_WIDTH = 0.1  # A drawn ring at most this wide is redrawn by a pattern spanning it
+PARTIAL_MAX_WIDTH = 0.6  # Wider bands get a full clear
+SECONDS_PER_RHO = 20.0  # Same rough move estimate as the playlist optimizer
+BAND_CACHE_SIZE = 64
+
+
+class PatternBand(NamedTuple):
+    first_theta: float
+    first_rho: float
+    last_rho: float
+    rho_min: float
+    rho_max: float
+
+
+class ClearDecision(NamedTuple):
+    action: str
+    reason: str
+    clear_file: Optional[str]  # Pattern file to run before the next pattern, if any
+    estimated_seconds: float
+    full_seconds: float
+
+    @property
+    def saved_seconds(self) -> float:
+        return max(0.0, self.full_seconds - self.estimated_seconds)
+
+
+_bands: "OrderedDict[tuple, PatternBand]" = OrderedDict()
+
+
+def _table() -> dict:
+    """What is on the current table's sand; band None while known means clean."""
+    return tables.local("clear_policy", lambda: {"known": False, "band": None})
+
+
+def pattern_band(file_path: str) -> Optional[PatternBand]:
+    """Start, end and rho range of a pattern; cached by path and mtime."""
+    from modules.core.pattern_manager import parse_theta_rho_file
+
+    try:
+        key = (file_path, 0.0 if clear_generator.is_generated(file_path) else os.path.getmtime(file_path))
+    except OSError:
+        return None
+    if key in _bands:
+        _bands.move_to_end(key)
+        return _bands[key]
+    coordinates = parse_theta_rho_file(file_path)
+    if not coordinates:
+        return None
+    rhos = [rho for _, rho in coordinates]
+    band = PatternBand(coordinates[0][0], rhos[0], rhos[-1], min(rhos), max(rhos))
+    _bands[key] = band
+    if len(_bands) > BAND_CACHE_SIZE:
+        _bands.popitem(last=False)
+    return band
+
+
+def record_pattern(file_path: str):
+    """A pattern was drawn (fully or partly): the sand it covers is disturbed."""
+    band = pattern_band(file_path)
+    if band is None:
+        forget()
+        return
+    table = _table()
+    previous = table["band"] if table["known"] else None
+    lo, hi = band.rho_min, band.rho_max
+    if previous:
+        lo, hi = min(lo, previous[0]), max(hi, previous[1])
+    table.update(known=True, band=(lo, hi))
+
+
+def record_clear():
+    """A clear ran to completion: the table is clean."""
+    _table().update(known=True, band=None)
+
+
+def forget():
+    """Nothing is known about the table any more (startup, manual drawing, homing)."""
+    _table().update(known=False, band=None)
+
+
+def table_band() -> Tuple[bool, Optional[Tuple[float, float]]]:
+    table = _table()
+    return table["known"], table["band"]
+
+
+def _clear_seconds(clear_file: Optional[str]) -> float:
+    from modules.core import playlist_optimizer
+
+    if not clear_file:
+        return playlist_optimizer.DEFAULT_CLEAR_SECONDS
+    return playlist_optimizer.load_run_times().get(os.path.basename(clear_file), playlist_optimizer.DEFAULT_CLEAR_SECONDS)
+
+
+def sweep_spacing(full_clear_file: Optional[str]) -> float:
+    """Rho between turns of the table's full clear pattern."""
+    generated = clear_generator.spec_from_path(full_clear_file) if full_clear_file else None
+    if generated:
+        return generated.spacing
+    band = pattern_band(full_clear_file) if full_clear_file else None
+    if band is None:
+        return clear_generator.ring_spacing()
+    from modules.core.pattern_manager import parse_theta_rho_file
+
+    thetas = [theta for theta, _ in parse_theta_rho_file(full_clear_file)]
+    turns = abs(thetas[-1] - thetas[0]) / (2 * pi)
+    if turns < 1:
+        return clear_generator.ring_spacing()
+    return max(clear_generator.MIN_SPACING, (band.rho_max - band.rho_min) / turns)
+
+
+def decide(next_file: str, ball_rho: float, cache_data: Optional[dict] = None) -> ClearDecision:
+    """Choose how to clear before next_file and log the decision."""
+    from modules.core.pattern_manager import get_clear_pattern_file
+
+    full_file = get_clear_pattern_file('adaptive', next_file, cache_data) or None
+    full_seconds = _clear_seconds(full_file)
+    known, band = table_band()
+    target = pattern_band(next_file)
+
+    def full(reason):
+        return ClearDecision(CLEAR_FULL, reason, full_file, full_seconds, full_seconds)
+
+    if target is None:
+        decision = full("next pattern could not be read")
+    elif not known:
+        decision = full("table contents unknown")
+    else:
+        move_seconds = SECONDS_PER_RHO * abs(ball_rho - target.first_rho)
+        at_start = abs(ball_rho - target.first_rho) <= START_TOLERANCE
+        if band is None:
+            if at_start:
+                decision = ClearDecision(CLEAR_NONE, "table is clean", None, 0.0, full_seconds)
+            else:
+                decision = ClearDecision(CLEAR_REPOSITION, "table is clean", None, move_seconds, full_seconds)
+        elif (at_start and band[1] - band[0] <= SKIP_MAX_WIDTH
+              and target.rho_min <= band[0] + COVER_MARGIN and target.rho_max >= band[1] - COVER_MARGIN):
+            decision = ClearDecision(CLEAR_NONE, f"next pattern redraws the ring {band[0]:.2f}-{band[1]:.2f}",
+                                     None, 0.0, full_seconds)
+        elif band[1] - band[0] <= PARTIAL_MAX_WIDTH:
+            lo, hi = band
+            # End the sweep at the band edge nearest the next start, so the move after it is short
+            start, end = (hi, lo) if abs(target.first_rho - lo) <= abs(target.first_rho - hi) else (lo, hi)
+            spacing = sweep_spacing(full_file)
+            sweep_file = clear_generator.path_for(clear_generator.spec(clear_generator.SPIRAL, start, end, spacing))
+            # Sweep time scales with the swept area relative to the full table
+            seconds = full_seconds * (hi * hi - lo * lo) + SECONDS_PER_RHO * (abs(ball_rho - start) + abs(end - target.first_rho))
+            if seconds < full_seconds:
+                decision = ClearDecision(CLEAR_PARTIAL, f"previous pattern stayed within {lo:.2f}-{hi:.2f}",
+                                         sweep_file, seconds, full_seconds)
+            else:
+                decision = full(f"sweeping {lo:.2f}-{hi:.2f} would not be faster")
+        else:
+            decision = full(f"previous band {band[0]:.2f}-{band[1]:.2f} is too wide for a partial clear")
+
+    logger.info(f"Clear before {os.path.basename(next_file)}: {decision.action} ({decision.reason}), "
+                f"~{decision.estimated_seconds:.0f}s vs ~{decision.full_seconds:.0f}s full clear, "
+                f"saves ~{decision.saved_seconds:.0f}s")
+    return decision
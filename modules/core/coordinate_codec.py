@@ -0,0 +1,210 @@
+"""
+Compact binary encoding of pattern coordinates for animated previews.
+
+A JSON list of [theta, rho] pairs for a large pattern runs to tens of MB that the
+browser must parse before anything can be drawn. This module serves the same
+points as fixed-width binary records, at several precomputed levels of detail,
+so a client can draw a coarse version almost immediately and refine it.
+
+Layout (little-endian): a 28-byte header followed by `count` records.
+
+    magic     4s   b"DWC1"
+    version   B    1
+    encoding  B    ENCODING_FLOAT32 or ENCODING_DELTA16
+    level     B    index into LOD_LEVELS (LOD_FULL for all points)
+    reserved  B
+    count     I    points in this level
+    total     I    points in the full pattern
+    theta0    i    first point, quantized (DELTA16 only)
+    rho0      i
+    reserved  I
+
+    FLOAT32 records: theta f4, rho f4 (8 bytes)
+    DELTA16 records: dtheta i2, drho i2 (4 bytes), deltas of the quantized values;
+        the first record is always (0, 0). Quantizing before differencing means
+        the decoded positions never drift, however long the pattern.
+
+Records are fixed width, so any byte range past the header maps to whole points.
+"""
+import gzip
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+# numpy is imported where it is used, keeping it off the server's startup path
+if TYPE_CHECKING:
+    import numpy as np
+
+MAGIC = b"DWC1"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBBIIiiI")
+
+ENCODING_FLOAT32 = 0
+ENCODING_DELTA16 = 1
+ENCODINGS = {"float32": ENCODING_FLOAT32, "delta16": ENCODING_DELTA16}
+RECORD_SIZE = {ENCODING_FLOAT32: 8, ENCODING_DELTA16: 4}
+
+# Quantization steps for DELTA16: 0.0001 rad and 1/30000 of the radius
+THETA_SCALE = 10000.0
+RHO_SCALE = 30000.0
+
+# Precomputed levels of detail (point counts); the last level is always the full pattern
+LOD_LEVELS = (2000, 20000)
+LOD_FULL = len(LOD_LEVELS)
+
+CACHE_SIZE = 4  # Patterns whose encodings are kept in memory
+
+
+def downsample(points: "np.ndarray", max_points: int) -> "np.ndarray":
+    """Pick max_points evenly spaced points, always keeping the first and last"""
+    if len(points) <= max_points:
+        return points
+    import numpy as np
+    indices = np.linspace(0, len(points) - 1, max_points).round().astype(np.int64)
+    return points[indices]
+
+
+def encode(points: "np.ndarray", encoding: int, level: int, total: int) -> bytes:
+    """
+    Encode an (N, 2) array of theta/rho as header + records.
+    DELTA16 falls back to FLOAT32 when a step is too large for an int16 delta
+    (the header says which encoding was used).
+    """
+    import numpy as np
+    if encoding == ENCODING_DELTA16 and len(points):
+        quantized = np.empty((len(points), 2), dtype=np.int64)
+        quantized[:, 0] = np.rint(points[:, 0] * THETA_SCALE)
+        quantized[:, 1] = np.rint(points[:, 1] * RHO_SCALE)
+        deltas = np.diff(quantized, axis=0, prepend=quantized[:1])
+        if np.abs(deltas).max() <= 32767:
+            header = HEADER.pack(MAGIC, VERSION, ENCODING_DELTA16, level, 0, len(points), total,
+                                 int(quantized[0, 0]), int(quantized[0, 1]), 0)
+            return header + deltas.astype("<i2").tobytes()
+
+    header = HEADER.pack(MAGIC, VERSION, ENCODING_FLOAT32, level, 0, len(points), total, 0, 0, 0)
+    return header + points.astype("<f4").tobytes()
+
+
+def decode(data: bytes) -> Tuple[int, int, "np.ndarray"]:
+    """Decode a complete buffer. Returns (level, total, (N, 2) float64 array)."""
+    import numpy as np
+    magic, version, encoding, level, _, count, total, theta0, rho0, _ = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a coordinate buffer")
+    body = data[HEADER.size:HEADER.size + count * RECORD_SIZE[encoding]]
+    if encoding == ENCODING_FLOAT32:
+        return level, total, np.frombuffer(body, dtype="<f4").reshape(-1, 2).astype(np.float64)
+    quantized = np.cumsum(np.frombuffer(body, dtype="<i2").reshape(-1, 2).astype(np.int64), axis=0)
+    quantized += (theta0, rho0)
+    return level, total, quantized / (THETA_SCALE, RHO_SCALE)
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header ("bytes=start-end", "bytes=start-" or
+    "bytes=-suffix") against a body of size bytes. Returns inclusive (start, end),
+    or None if the range is malformed or unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return None
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class EncodedPattern:
+    """All levels of detail for one pattern, encoded lazily and memoized"""
+
+    def __init__(self, coordinates: Sequence[Sequence[float]]):
+        import numpy as np
+        self.points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        self.total = len(self.points)
+        self._encoded: Dict[tuple, bytes] = {}
+        self._gzipped: Dict[tuple, bytes] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def levels(self) -> List[int]:
+        """Point count of every level, coarse to full"""
+        return [min(n, self.total) for n in LOD_LEVELS] + [self.total]
+
+    def get(self, level: int, encoding: int, compressed: bool = False) -> bytes:
+        key = (min(max(level, 0), LOD_FULL), encoding)
+        with self._lock:
+            data = self._encoded.get(key)
+            if data is None:
+                max_points = self.total if key[0] == LOD_FULL else LOD_LEVELS[key[0]]
+                data = encode(downsample(self.points, max_points), encoding, key[0], self.total)
+                self._encoded[key] = data
+            if not compressed:
+                return data
+            if key not in self._gzipped:
+                # Level 6 is the sweet spot: deltas compress well, and the result is memoized
+                self._gzipped[key] = gzip.compress(data, compresslevel=6, mtime=0)
+            return self._gzipped[key]
+
+
+class CoordinateCache:
+    """Small LRU of encoded patterns, invalidated when the file changes"""
+
+    def __init__(self, max_entries: int = CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[tuple, EncodedPattern]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(file_path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, file_path: str, loader) -> Optional[EncodedPattern]:
+        """
+        Encoded pattern for file_path; loader() returns its coordinates on a miss.
+        Call from a worker thread: a miss parses the file.
+        """
+        signature = self._signature(file_path)
+        if signature is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry and entry[0] == signature:
+                self._entries.move_to_end(file_path)
+                return entry[1]
+
+        coordinates = loader()
+        if not coordinates:
+            return None
+        pattern = EncodedPattern(coordinates)
+        # Build the coarse level up front so the first request for it is instant
+        pattern.get(0, ENCODING_DELTA16)
+        with self._lock:
+            self._entries[file_path] = (signature, pattern)
+            self._entries.move_to_end(file_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pattern
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global instance used by the coordinates API
+coordinate_cache = CoordinateCache()
@@ -0,0 +1,291 @@
+"""
+Fleet control: drive every known table from this one.
+
+Known tables (/api/known-tables) used to be a plain list for the frontend, which
+then talked to each table on its own. Here the host table keeps one pooled
+aiohttp session for the whole fleet, with keep-alive connections per table, and:
+
+    command()      sends a command to the selected tables concurrently and
+                   returns a result per table. Commands: run_pattern,
+                   run_playlist, pause, resume, stop, skip, speed and
+                   led_scene. A led_scene is a set of DW LED settings applied
+                   in order. Since every request leaves at once over an
+                   already-open connection, tables start together to within
+                   the network latency, e.g. for a synchronized playlist
+                   across a gallery installation.
+
+    subscribe()    merges every table's /ws/status into one stream. The first
+                   message is a fleet_snapshot with each table's full status.
+                   After that, fleet_delta messages carry only the fields of
+                   one table that changed, plus online/offline transitions.
+
+Status watchers hold one WebSocket per table and reconnect with backoff. They
+start the first time the fleet is used and then follow changes to the known
+tables. The host itself is part of the fleet under its own table ID. Its status
+is read in-process, and commands reach it through the URL the caller used.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from modules.core.state import state
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = 10.0  # Seconds per table for a command
+CONNECTIONS_PER_TABLE = 4
+KEEPALIVE = 60.0  # Seconds an idle pooled connection stays open
+HEARTBEAT = 30.0
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 30.0
+SELF_INTERVAL = 1.0  # Matches the idle rate of /ws/status
+QUEUE_SIZE = 256
+
+LED_SCENE = "led_scene"
+COMMANDS = {
+    "run_pattern": "/run_theta_rho",
+    "run_playlist": "/run_playlist",
+    "pause": "/pause_execution",
+    "resume": "/resume_execution",
+    "stop": "/stop_execution",
+    "skip": "/skip_pattern",
+    "speed": "/set_speed",
+}
+
+_session = None
+_watchers: Dict[str, asyncio.Task] = {}
+_tables: Dict[str, dict] = {}  # id -> {"name", "url"} of watched tables
+_statuses: Dict[str, Optional[dict]] = {}
+_online: Dict[str, bool] = {}
+_subscribers = set()
+
+
+def scene_requests(scene: dict) -> List[Tuple[str, dict]]:
+    """DW LED requests for a scene; the effect goes last because setting it powers the strip on."""
+    requests = []
+    if "power" in scene:
+        requests.append(("/api/dw_leds/power", {"state": scene["power"]}))
+    if "brightness" in scene:
+        requests.append(("/api/dw_leds/brightness", {"value": scene["brightness"]}))
+    if "palette_id" in scene:
+        requests.append(("/api/dw_leds/palette", {"palette_id": scene["palette_id"]}))
+    if "color" in scene:
+        requests.append(("/api/dw_leds/color", {"color": scene["color"]}))
+    if "effect_id" in scene:
+        effect = {key: scene[key] for key in ("effect_id", "speed", "intensity") if key in scene}
+        requests.append(("/api/dw_leds/effect", effect))
+    if not requests:
+        raise ValueError("LED scene needs at least one of power, brightness, palette_id, color, effect_id")
+    return requests
+
+
+def requests_for(command: str, params: Optional[dict] = None) -> List[Tuple[str, dict]]:
+    """The (path, body) requests that carry out a fleet command on one table."""
+    params = params or {}
+    if command == LED_SCENE:
+        return scene_requests(params)
+    if command not in COMMANDS:
+        raise ValueError(f"Unknown fleet command '{command}'; expected one of {sorted([*COMMANDS, LED_SCENE])}")
+    return [(COMMANDS[command], params)]
+
+
+def targets(table_ids: Optional[List[str]] = None, self_url: Optional[str] = None) -> List[dict]:
+    """Tables a command goes to: the known tables, plus this one when self_url is given."""
+    tables = [{"id": t.get("id"), "name": t.get("name"), "url": t.get("url")} for t in state.known_tables]
+    if self_url:
+        tables.insert(0, {"id": state.table_id, "name": state.table_name, "url": self_url})
+    if table_ids is None:
+        return tables
+    unknown = set(table_ids) - {t["id"] for t in tables}
+    if unknown:
+        raise ValueError(f"Unknown tables: {', '.join(sorted(unknown))}")
+    return [t for t in tables if t["id"] in table_ids]
+
+
+async def _get_session():
+    global _session
+    if _session is None or _session.closed:
+        import aiohttp  # Slow to import on a Pi; only needed once the fleet is used
+
+        _session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(
+            limit_per_host=CONNECTIONS_PER_TABLE, keepalive_timeout=KEEPALIVE
+        ))
+    return _session
+
+
+async def _send(table: dict, requests: List[Tuple[str, dict]], timeout: float) -> dict:
+    """Run one table's requests in order, stopping at the first failure."""
+    import aiohttp
+
+    started = time.monotonic()
+    result = {"name": table["name"], "ok": True, "status": None, "data": None}
+    try:
+        session = await _get_session()
+        for path, body in requests:
+            async with session.post(table["url"].rstrip("/") + path, json=body,
+                                    timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                try:
+                    data = await response.json(content_type=None)
+                except ValueError:
+                    data = await response.text()
+                result.update(status=response.status, data=data)
+                if response.status >= 400:
+                    detail = data.get("detail", data) if isinstance(data, dict) else data
+                    result.update(ok=False, data=None, error=str(detail))
+                    break
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+        result.update(ok=False, error=str(e) or type(e).__name__)
+    result["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+    return result
+
+
+async def command(command: str, params: Optional[dict] = None, table_ids: Optional[List[str]] = None,
+                  self_url: Optional[str] = None, timeout: float = REQUEST_TIMEOUT) -> dict:
+    """Send a command to the tables concurrently. Raises ValueError for a bad command or table ID."""
+    requests = requests_for(command, params)
+    tables = targets(table_ids, self_url)
+    results = await asyncio.gather(*(_send(table, requests, timeout) for table in tables))
+    by_table = {table["id"]: result for table, result in zip(tables, results)}
+    failed = [table_id for table_id, result in by_table.items() if not result["ok"]]
+    if failed:
+        logger.warning(f"Fleet command {command} failed on {len(failed)}/{len(tables)} tables: {failed}")
+    else:
+        logger.info(f"Fleet command {command} sent to {len(tables)} tables")
+    return {"command": command, "results": by_table, "succeeded": len(tables) - len(failed), "failed": len(failed)}
+
+
+###############################################################################
+# Aggregated status
+###############################################################################
+
+def _delta(old: Optional[dict], new: dict) -> dict:
+    old = old or {}
+    changed = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    changed.update({key: None for key in old if key not in new})
+    return changed
+
+
+def _publish(message: dict):
+    for queue in list(_subscribers):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A slow reader: drop its backlog and let it start over from a snapshot
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(snapshot())
+
+
+def _update(table_id: str, status: dict):
+    if table_id not in _tables:
+        return
+    changed = _delta(_statuses.get(table_id), status)
+    came_online = not _online.get(table_id)
+    _statuses[table_id] = status
+    _online[table_id] = True
+    if changed or came_online:
+        _publish({"type": "fleet_delta", "table_id": table_id, "online": True, "data": changed})
+
+
+def _set_offline(table_id: str):
+    if _online.get(table_id):
+        _online[table_id] = False
+        logger.info(f"Lost status from table {_tables.get(table_id, {}).get('name', table_id)}")
+        _publish({"type": "fleet_delta", "table_id": table_id, "online": False, "data": {}})
+
+
+async def _watch(table_id: str, url: str):
+    """Follow a remote table's /ws/status, reconnecting with backoff."""
+    import aiohttp
+
+    ws_url = url.rstrip("/").replace("https://", "wss://", 1).replace("http://", "ws://", 1) + "/ws/status"
+    backoff = RECONNECT_MIN
+    while True:
+        try:
+            session = await _get_session()
+            async with session.ws_connect(ws_url, heartbeat=HEARTBEAT) as ws:
+                backoff = RECONNECT_MIN
+                async for message in ws:
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    payload = message.json()
+                    if payload.get("type") == "status_update":
+                        _update(table_id, payload["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Status stream from {ws_url} failed: {e}")
+        _set_offline(table_id)
+        await asyncio.sleep(backoff)
+        backoff = min(RECONNECT_MAX, backoff * 2)
+
+
+async def _watch_self():
+    from modules.core import pattern_manager
+
+    while True:
+        _update(state.table_id, pattern_manager.get_status())
+        await asyncio.sleep(SELF_INTERVAL)
+
+
+def sync_watchers():
+    """Start watching the current fleet: this table and every known table."""
+    wanted = {state.table_id: {"name": state.table_name, "url": None}}
+    wanted.update({t.get("id"): {"name": t.get("name"), "url": t.get("url")} for t in state.known_tables})
+    for table_id in [table_id for table_id in _tables if table_id not in wanted or wanted[table_id]["url"] != _tables[table_id]["url"]]:
+        _watchers.pop(table_id).cancel()
+        _tables.pop(table_id)
+        _statuses.pop(table_id, None)
+        _online.pop(table_id, None)
+    for table_id, table in wanted.items():
+        if table_id in _tables:
+            _tables[table_id]["name"] = table["name"]
+        else:
+            _tables[table_id] = table
+            _online[table_id] = False
+            _watchers[table_id] = asyncio.create_task(
+                _watch_self() if table["url"] is None else _watch(table_id, table["url"])
+            )
+
+
+def tables_changed():
+    """Known tables were edited; follow the change if the fleet is being watched."""
+    if _watchers:
+        sync_watchers()
+
+
+def snapshot() -> dict:
+    return {"type": "fleet_snapshot", "tables": {
+        table_id: {"name": table["name"], "url": table["url"], "self": table["url"] is None,
+                   "online": _online.get(table_id, False), "status": _statuses.get(table_id)}
+        for table_id, table in _tables.items()
+    }}
+
+
+def subscribe() -> asyncio.Queue:
+    """Queue of fleet status messages, starting with a snapshot."""
+    sync_watchers()
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    queue.put_nowait(snapshot())
+    _subscribers.add(queue)
+    return queue
+
+
+def unsubscribe(queue: asyncio.Queue):
+    _subscribers.discard(queue)
+
+
+async def close():
+    """Stop the status watchers and close pooled connections."""
+    global _session
+    watchers = list(_watchers.values())
+    for task in watchers:
+        task.cancel()
+    await asyncio.gather(*watchers, return_exceptions=True)
+    for registry in (_watchers, _tables, _statuses, _online):
+        registry.clear()
+    _subscribers.clear()
+    if _session is not None:
+        await _session.close()
+        _session = None
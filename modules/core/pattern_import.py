@@ -0,0 +1,324 @@
+"""
+Bulk import of pattern packs: zip or tar archives, or a directory of .thr files.
+
+Entries are read one at a time straight from the archive (tar in stream mode)
+and only .thr files are kept, so a pack of hundreds of patterns is never
+extracted to disk or memory as a whole. Each file goes to a worker pool that
+validates and normalizes it with the upload pipeline's PatternValidator and
+writes it next to its destination.
+
+The importing thread then drops files whose content is already in the library
+(matched by SHA-256 of either the original or the normalized text, so packs
+imported before dedupe as well as bundled patterns) and moves the rest into
+custom_patterns/<pack>. The metadata cache and the pattern catalog are updated
+once for the whole pack. Previews are left to the cache job queue (cache_jobs)
+at library priority, so rendering them waits while a pattern is drawing.
+
+Usage: python -m modules.core.pattern_import PACK [--folder NAME] [--workers N]
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, Optional, Set, Tuple
+
+from modules.core import cache_manager, pattern_manager
+from modules.core.cache_jobs import PRIORITY_LIBRARY, cache_jobs
+from modules.core.upload_pipeline import CHUNK_SIZE, MAX_UPLOAD_BYTES, PatternValidator, UploadError, UploadJobs, sanitize_filename, upload_jobs
+
+logger = logging.getLogger(__name__)
+
+IMPORT_DIR = "custom_patterns"
+MAX_IMPORT_BYTES = 1024 * 1024 * 1024  # Archive size limit for uploads
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+SKIPPED_DIRS = ("cached_images", "cached_thumbnails")
+ARCHIVE_SUFFIX = re.compile(r"(\.tar)?\.(zip|tar|tgz|tbz2|txz|gz|bz2|xz)$", re.IGNORECASE)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_limited(f, limit: int = MAX_UPLOAD_BYTES) -> Optional[bytes]:
+    data = f.read(limit + 1)
+    return None if len(data) > limit else data
+
+
+def entry_path(name: str) -> Optional[str]:
+    """Safe relative path of a pack member, or None if it is not a pattern to import."""
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or any(part == ".." or part.startswith(".") or part == "__MACOSX" for part in parts):
+        return None
+    if not parts[-1].lower().endswith(".thr"):
+        return None
+    return "/".join(parts)
+
+
+def iter_pack(source: str) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """Yield (relative path, content) for every .thr file in source; content is None if the file is too large."""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if d not in SKIPPED_DIRS)
+            for name in sorted(files):
+                full_path = os.path.join(root, name)
+                path = entry_path(os.path.relpath(full_path, source))
+                if path:
+                    with open(full_path, "rb") as f:
+                        yield path, _read_limited(f)
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                path = entry_path(info.filename)
+                if not path or info.is_dir():
+                    continue
+                if info.file_size > MAX_UPLOAD_BYTES:
+                    yield path, None
+                    continue
+                with archive.open(info) as f:
+                    yield path, _read_limited(f)
+    else:
+        try:
+            archive = tarfile.open(source, "r|*")
+        except (tarfile.TarError, OSError):
+            raise UploadError("Not a zip or tar archive")
+        with archive:
+            for member in archive:
+                path = entry_path(member.name)
+                if not path or not member.isfile():
+                    continue  # Links and devices are never imported
+                if member.size > MAX_UPLOAD_BYTES:
+                    yield path, None
+                    continue
+                yield path, _read_limited(archive.extractfile(member))
+
+
+def pack_name(source: str) -> str:
+    """Default folder for a pack: its file or directory name without archive extensions."""
+    name = ARCHIVE_SUFFIX.sub("", os.path.basename(os.path.normpath(source)))
+    return sanitize_filename(name or "import")
+
+
+def _prepare(data: bytes, temp_dir: str) -> dict:
+    """Worker: validate and normalize one file and write it to temp_dir."""
+    validator = PatternValidator()
+    normalized = validator.feed(data, final=True).encode("utf-8")
+    result = {"stats": validator.stats, "metadata": validator.metadata}
+    if not validator.stats["points"]:
+        return result
+
+    fd, temp_path = tempfile.mkstemp(dir=temp_dir, prefix=".import-", suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(normalized)
+    result["temp_path"] = temp_path
+    result["keys"] = {(len(data), _digest(data)), (len(normalized), _digest(normalized))}
+    return result
+
+
+class ContentIndex:
+    """Content hashes of library patterns, computed lazily for files whose size matches an imported file."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._unhashed: Dict[int, list] = {}
+        self._hashes: Dict[tuple, str] = {}
+        for directory, dirs, files in os.walk(root):
+            dirs[:] = [d for d in dirs if d not in SKIPPED_DIRS]
+            for name in files:
+                if not name.endswith(".thr"):
+                    continue
+                full_path = os.path.join(directory, name)
+                try:
+                    size = os.path.getsize(full_path)
+                except OSError:
+                    continue
+                relative_path = os.path.relpath(full_path, root).replace(os.sep, "/")
+                self._unhashed.setdefault(size, []).append(relative_path)
+
+    def find(self, keys: Set[tuple]) -> Optional[str]:
+        """Library file with the same content as any (size, digest) in keys, or None"""
+        for size, _ in keys:
+            for path in self._unhashed.pop(size, ()):
+                try:
+                    with open(os.path.join(self.root, path), "rb") as f:
+                        self._hashes.setdefault((size, _digest(f.read())), path)
+                except OSError:
+                    pass
+        for key in keys:
+            if key in self._hashes:
+                return self._hashes[key]
+        return None
+
+    def add(self, keys: Set[tuple], path: str):
+        for key in keys:
+            self._hashes.setdefault(key, path)
+
+
+def _free_path(dest_dir: str, path: str) -> str:
+    """path under dest_dir, numbered if a different file already has that name"""
+    stem, ext = os.path.splitext(path)
+    candidate, n = path, 1
+    while os.path.exists(os.path.join(dest_dir, candidate)):
+        n += 1
+        candidate = f"{stem}-{n}{ext}"
+    return candidate
+
+
+def _finish(path: str, result: dict, folder: str, index: ContentIndex, metadata: dict) -> dict:
+    """Move one prepared file into place, or discard it. Returns its per-file result."""
+    temp_path = result.get("temp_path")
+    if not temp_path:
+        return {"file": path, "status": "invalid", "stats": result["stats"]}
+
+    existing = index.find(result["keys"])
+    if existing:
+        os.remove(temp_path)
+        return {"file": path, "status": "duplicate", "existing": existing}
+
+    dest_dir = os.path.dirname(temp_path)
+    relative_path = _free_path(dest_dir, path)
+    full_path = os.path.join(dest_dir, *relative_path.split("/"))
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    os.replace(temp_path, full_path)
+
+    pattern_file = f"{IMPORT_DIR}/{folder}/{relative_path}"
+    index.add(result["keys"], pattern_file)
+    metadata[pattern_file] = result["metadata"]
+    return {"file": path, "status": "imported", "pattern": pattern_file, "stats": result["stats"]}
+
+
+def import_pack(source: str, folder: Optional[str] = None, workers: int = MAX_WORKERS,
+                on_progress: Optional[Callable[[int], None]] = None) -> dict:
+    """
+    Import every .thr file in source (archive or directory) into custom_patterns/<folder>.
+
+    Returns {"folder", "results", "summary", "metadata"}: one result per file with a
+    status of imported, duplicate, invalid, too_large or failed, the count per status,
+    and metadata for the imported files (not yet written to the metadata cache).
+    Blocking; call from a worker thread when running inside the server.
+    """
+    folder = sanitize_filename(folder) if folder else pack_name(source)
+    dest_dir = os.path.join(pattern_manager.THETA_RHO_DIR, IMPORT_DIR, folder)
+    created = not os.path.isdir(dest_dir)
+    os.makedirs(dest_dir, exist_ok=True)
+    index = ContentIndex(pattern_manager.THETA_RHO_DIR)
+    results = []
+    metadata = {}
+
+    def _collect(futures, pending):
+        for future in futures:
+            path = pending.pop(future)
+            try:
+                results.append(_finish(path, future.result(), folder, index, metadata))
+            except Exception as e:
+                logger.error(f"Failed to import {path}: {str(e)}")
+                results.append({"file": path, "status": "failed", "error": str(e)})
+            if on_progress:
+                on_progress(len(results))
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pattern-import") as pool:
+            pending = {}
+            for path, data in iter_pack(source):
+                if data is None:
+                    results.append({"file": path, "status": "too_large"})
+                    continue
+                pending[pool.submit(_prepare, data, dest_dir)] = path
+                # Keep only a couple of files per worker in memory
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    _collect(done, pending)
+            _collect(wait(pending).done, pending)
+    finally:
+        # A corrupt or empty pack leaves no empty folder behind in the library
+        if created and not any(result["status"] == "imported" for result in results):
+            shutil.rmtree(dest_dir, ignore_errors=True)
+
+    summary = Counter(result["status"] for result in results)
+    logger.info(f"Imported pack {folder}: " + ", ".join(f"{count} {status}" for status, count in summary.items()))
+    return {"folder": f"{IMPORT_DIR}/{folder}", "results": results, "summary": dict(summary), "metadata": metadata}
+
+
+async def run_import(source: str, folder: Optional[str] = None, workers: int = MAX_WORKERS,
+                     on_progress: Optional[Callable[[int], None]] = None) -> dict:
+    """Import a pack, record its metadata and catalog change in one batch each and queue its previews."""
+    report = await asyncio.to_thread(import_pack, source, folder, workers, on_progress)
+    await cache_manager.cache_patterns_metadata(report.pop("metadata"))
+    if report["summary"].get("imported"):
+        pattern_manager.notify_catalog_changed()
+        cache_jobs.enqueue([result["pattern"] for result in report["results"] if result["status"] == "imported"],
+                           PRIORITY_LIBRARY)
+    return report
+
+
+async def receive_archive(upload, dest_dir: str) -> str:
+    """Stream an uploaded archive to a hidden temporary file in dest_dir, returns its path."""
+    os.makedirs(dest_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=dest_dir, prefix=".pack-", suffix=".part")
+    received = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload.read(CHUNK_SIZE):
+                received += len(chunk)
+                if received > MAX_IMPORT_BYTES:
+                    raise UploadError(f"Archive is larger than {MAX_IMPORT_BYTES // (1024 * 1024)} MB", status_code=413)
+                await asyncio.to_thread(out.write, chunk)
+        return temp_path
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+async def run_import_job(job: dict, archive_path: str, folder: str, jobs: UploadJobs = upload_jobs):
+    """Background import of an uploaded archive; the job ends with the per-file results."""
+    loop = asyncio.get_running_loop()
+
+    def _progress(processed):
+        loop.call_soon_threadsafe(lambda: jobs.update(job, processed=processed))
+
+    try:
+        jobs.update(job, status="running", stage="import", processed=0)
+        report = await run_import(archive_path, folder, on_progress=_progress)
+        jobs.update(job, status="done", stage="done", progress=100, stats=report["summary"], results=report["results"])
+    except Exception as e:
+        logger.error(f"Pack import into {folder} failed: {str(e)}")
+        jobs.update(job, status="failed", error=str(e))
+    finally:
+        try:
+            os.remove(archive_path)
+        except OSError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a pattern pack (zip/tar archive or directory) into custom_patterns.")
+    parser.add_argument("source", help="Archive or directory containing .thr files")
+    parser.add_argument("--folder", help="Folder under custom_patterns (default: the pack's name)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help=f"Worker threads (default: {MAX_WORKERS})")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    async def _import():
+        report = await run_import(args.source, args.folder, max(1, args.workers))
+        await cache_jobs.join()  # Render the previews before exiting
+        return report
+
+    try:
+        report = asyncio.run(_import())
+    except UploadError as e:
+        parser.exit(1, f"{e}\n")
+    for result in report["results"]:
+        detail = result.get("pattern") or result.get("existing") or result.get("error") or ""
+        print(f"{result['status']:>10}  {result['file']}  {detail}".rstrip())
+    print(f"{report['folder']}: " + ", ".join(f"{count} {status}" for status, count in report["summary"].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 import os
 from zoneinfo import ZoneInfo
+import contextvars
 import threading
 import time
 import random
 import logging
 from datetime import datetime, time as datetime_time
 from tqdm import tqdm
-from modules.connection import connection_manager
+from modules.connection import connection_manager, reconnect
 from modules.core.state import state
+from modules.core import cache_jobs, checkpoint, clear_generator, clear_policy, playlist_optimizer, realtime, tables
 from math import pi, isnan, isinf
 import asyncio
 import json
@@ -196,26 +198,24 @@ def get_pattern_execution_history(pattern_name: str) -> Optional[dict]:
         logger.error(f"Failed to read execution time log: {e}")
         return None
 
-# Asyncio primitives - initialized lazily to avoid event loop issues
-# These must be created in the context of the running event loop
-pause_event: Optional[asyncio.Event] = None
-pattern_lock: Optional[asyncio.Lock] = None
-progress_update_task = None
+# Asyncio primitives (pause event, pattern lock, progress task) live on the current table's
+# engine (see tables.py). They are initialized lazily to avoid event loop issues:
+# they must be created in the context of the running event loop
 
 def get_pause_event() -> asyncio.Event:
-    """Get or create the pause event in the current event loop."""
-    global pause_event
-    if pause_event is None:
-        pause_event = asyncio.Event()
-        pause_event.set()  # Initially not paused
-    return pause_event
+    """Get or create the current table's pause event in the current event loop."""
+    engine = tables.current()
+    if engine.pause_event is None:
+        engine.pause_event = asyncio.Event()
+        engine.pause_event.set()  # Initially not paused
+    return engine.pause_event
 
 def get_pattern_lock() -> asyncio.Lock:
-    """Get or create the pattern lock in the current event loop."""
-    global pattern_lock
-    if pattern_lock is None:
-        pattern_lock = asyncio.Lock()
-    return pattern_lock
+    """Get or create the current table's pattern lock in the current event loop."""
+    engine = tables.current()
+    if engine.pattern_lock is None:
+        engine.pattern_lock = asyncio.Lock()
+    return engine.pattern_lock
 
 # Cache timezone at module level - read once per session (cleared when user changes timezone)
 _cached_timezone = None
@@ -397,6 +397,7 @@ class MotionCommand:
     speed: Optional[float] = None
     callback: Optional[Callable] = None
     future: Optional[asyncio.Future] = None
+    index: Optional[int] = None  # Coordinate index within the running pattern
 
 class MotionControlThread:
     """Dedicated thread for hardware motion control operations."""
@@ -406,14 +407,22 @@ class MotionControlThread:
         self.thread = None
         self.running = False
         self.paused = False
+        self.last_move_time = 0.0
+
+    def is_busy(self, window: float = 2.0) -> bool:
+        """True if moves are queued or one finished within the last window seconds."""
+        if not self.running:
+            return False
+        return not self.command_queue.empty() or time.monotonic() - self.last_move_time < window
 
     def start(self):
-        """Start the motion control thread with elevated priority."""
+        """Start the motion control thread (real-time priority and pinning when enabled, see realtime.py)."""
         if self.thread and self.thread.is_alive():
             return
 
         self.running = True
-        self.thread = threading.Thread(target=self._motion_loop, daemon=True)
+        # Run in the starting table's context so `state` is that table's state
+        self.thread = threading.Thread(target=contextvars.copy_context().run, args=(self._motion_loop,), daemon=True)
         self.thread.start()
         logger.info("Motion control thread started")
 
@@ -433,6 +442,7 @@ class MotionControlThread:
     def _motion_loop(self):
         """Main loop for the motion control thread."""
         logger.info("Motion control thread loop started")
+        realtime.register_thread("motion")
 
         while self.running:
             try:
@@ -479,8 +489,13 @@ class MotionControlThread:
             if not self.running:
                 return
 
+            # Send-loop latency: time from the previous move finishing to this one starting
+            realtime.send_loop.record(time.monotonic() - self.last_move_time)
+
             # Execute the actual motion using sync version
-            self._move_polar_sync(command.theta, command.rho, command.speed)
+            self._move_polar_sync(command.theta, command.rho, command.speed, command.index)
+            self.last_move_time = time.monotonic()
+            realtime.step_gc()
 
             # Signal completion if future provided
             if command.future and not command.future.done():
@@ -495,7 +510,8 @@ class MotionControlThread:
                     command.future.set_exception, e
                 )
 
-    def _move_polar_sync(self, theta: float, rho: float, speed: Optional[float] = None):
+    def _move_polar_sync(self, theta: float, rho: float, speed: Optional[float] = None,
+                         index: Optional[int] = None):
         """Synchronous version of move_polar for use in motion thread."""
         # Check for valid machine position (can be None if homing failed)
         if state.machine_x is None or state.machine_y is None:
@@ -527,23 +543,28 @@ class MotionControlThread:
         else:
             y_increment += offset
 
-        new_x_abs = state.machine_x + x_increment
-        new_y_abs = state.machine_y + y_increment
-
         # Use provided speed or fall back to state.speed
         actual_speed = speed if speed is not None else state.speed
 
-        # Validate coordinates before sending to prevent GRBL error:2
-        if isnan(new_x_abs) or isnan(new_y_abs) or isinf(new_x_abs) or isinf(new_y_abs):
-            logger.error(f"Motion thread: Invalid coordinates detected - X:{new_x_abs}, Y:{new_y_abs}")
-            logger.error(f"  theta:{theta}, rho:{rho}, current_theta:{state.current_theta}, current_rho:{state.current_rho}")
-            logger.error(f"  x_steps_per_mm:{state.x_steps_per_mm}, y_steps_per_mm:{state.y_steps_per_mm}, gear_ratio:{state.gear_ratio}")
-            state.stop_requested = True
-            return
+        while True:
+            new_x_abs = state.machine_x + x_increment
+            new_y_abs = state.machine_y + y_increment
+
+            # Validate coordinates before sending to prevent GRBL error:2
+            if isnan(new_x_abs) or isnan(new_y_abs) or isinf(new_x_abs) or isinf(new_y_abs):
+                logger.error(f"Motion thread: Invalid coordinates detected - X:{new_x_abs}, Y:{new_y_abs}")
+                logger.error(f"  theta:{theta}, rho:{rho}, current_theta:{state.current_theta}, current_rho:{state.current_rho}")
+                logger.error(f"  x_steps_per_mm:{state.x_steps_per_mm}, y_steps_per_mm:{state.y_steps_per_mm}, gear_ratio:{state.gear_ratio}")
+                state.stop_requested = True
+                return
 
-        # Call sync version of send_grbl_coordinates in this thread
-        # Use 2 decimal precision to reduce GRBL parsing overhead
-        self._send_grbl_coordinates_sync(round(new_x_abs, 2), round(new_y_abs, 2), actual_speed)
+            # Call sync version of send_grbl_coordinates in this thread
+            # Use 2 decimal precision to reduce GRBL parsing overhead
+            result = self._send_grbl_coordinates_sync(round(new_x_abs, 2), round(new_y_abs, 2), actual_speed)
+            if result != reconnect.RESYNCED:
+                break
+            # Reconnected and adopted the controller's position: resend the move relative to it
+            logger.info(f"Motion thread: Resending move to theta={theta:.3f}, rho={rho:.3f} after reconnect")
 
         # Update state
         state.current_theta = theta
@@ -551,6 +572,9 @@ class MotionControlThread:
         state.machine_x = new_x_abs
         state.machine_y = new_y_abs
 
+        # Hand the acknowledged position to LED effects without going through state
+        tables.current().position_channel.publish(theta, rho, index=index)
+
     def _send_grbl_coordinates_sync(self, x: float, y: float, speed: int = 600, timeout: int = 2, home: bool = False):
         """Synchronous version of send_grbl_coordinates for motion thread.
 
@@ -559,6 +583,8 @@ class MotionControlThread:
         (120 seconds) to handle slow movements, but prevent indefinite hangs.
 
         Includes retry logic for serial corruption errors (common on Pi 3B+).
+        When the connection drops, reconnects and returns reconnect.RESYNCED if
+        the move has to be resent from the controller's reported position.
         """
         gcode = f"$J=G91 G21 Y{y:.2f} F{speed}" if home else f"G1 X{x:.2f} Y{y:.2f} F{speed}"
         max_wait_time = 120  # Maximum seconds to wait for 'ok' response
@@ -865,6 +891,19 @@ class MotionControlThread:
                 error_str = str(e)
                 logger.warning(f"Motion thread error sending command: {error_str}")
 
+                # Lost link (USB hiccup, WiFi drop): reconnect and re-sync instead of ending the run.
+                # Homing jogs are relative, so they keep failing fast and homing is retried instead.
+                if not home and reconnect.is_connection_lost(e):
+                    outcome = reconnect.recover(e, (x, y))
+                    if outcome == reconnect.ACKNOWLEDGED:
+                        return True
+                    if outcome == reconnect.RESYNCED:
+                        return reconnect.RESYNCED
+                    state.stop_requested = True
+                    state.conn = None
+                    state.is_connected = False
+                    return False
+
                 # Immediately return for device not configured errors
                 if "Device not configured" in error_str or "Errno 6" in error_str:
                     logger.error(f"Motion thread: Device configuration error detected: {error_str}")
@@ -878,27 +917,31 @@ class MotionControlThread:
             logger.warning(f"Motion thread: Retrying {gcode}...")
             time.sleep(0.1)
 
-# Global motion control thread instance
-motion_controller = MotionControlThread()
+def get_motion_controller() -> MotionControlThread:
+    """The current table's motion control thread (one per table, see tables.py)."""
+    engine = tables.current()
+    if engine.motion_controller is None:
+        engine.motion_controller = MotionControlThread()
+    return engine.motion_controller
 
 async def cleanup_pattern_manager():
-    """Clean up pattern manager resources"""
-    global progress_update_task, pattern_lock, pause_event
+    """Clean up the current table's pattern manager resources"""
+    engine = tables.current()
 
     try:
         # Signal stop to allow any running pattern to exit gracefully
         state.stop_requested = True
 
         # Stop motion control thread
-        motion_controller.stop()
+        get_motion_controller().stop()
 
         # Cancel progress update task if running
-        if progress_update_task and not progress_update_task.done():
+        if engine.progress_update_task and not engine.progress_update_task.done():
             try:
-                progress_update_task.cancel()
+                engine.progress_update_task.cancel()
                 # Wait for task to actually cancel
                 try:
-                    await progress_update_task
+                    await engine.progress_update_task
                 except asyncio.CancelledError:
                     pass
             except Exception as e:
@@ -906,7 +949,7 @@ async def cleanup_pattern_manager():
 
         # Clean up pattern lock - wait for it to be released naturally, don't force release
         # Force releasing an asyncio.Lock can corrupt internal state if held by another coroutine
-        current_lock = pattern_lock
+        current_lock = engine.pattern_lock
         if current_lock and current_lock.locked():
             logger.info("Pattern lock is held, waiting for release (max 5s)...")
             try:
@@ -923,7 +966,7 @@ async def cleanup_pattern_manager():
                 logger.error(f"Error waiting for pattern lock: {e}")
 
         # Clean up pause event - wake up any waiting tasks, then create fresh event
-        current_event = pause_event
+        current_event = engine.pause_event
         if current_event:
             try:
                 current_event.set()  # Wake up any waiting tasks
@@ -956,10 +999,24 @@ async def cleanup_pattern_manager():
         logger.error(f"Error during pattern manager cleanup: {e}")
     finally:
         # Reset to fresh instances instead of None to allow continued operation
-        progress_update_task = None
-        pattern_lock = asyncio.Lock()  # Fresh lock instead of None
-        pause_event = asyncio.Event()  # Fresh event instead of None
-        pause_event.set()  # Initially not paused
+        engine.progress_update_task = None
+        engine.pattern_lock = asyncio.Lock()  # Fresh lock instead of None
+        engine.pause_event = asyncio.Event()  # Fresh event instead of None
+        engine.pause_event.set()  # Initially not paused
+
+# Incremented whenever patterns are added or removed, so listeners such as
+# MQTT discovery can refresh without rescanning the patterns directory.
+_catalog_version = 0
+
+def get_catalog_version():
+    """Return the current pattern catalog version."""
+    return _catalog_version
+
+def notify_catalog_changed():
+    """Record that pattern files were added or removed."""
+    global _catalog_version
+    _catalog_version += 1
+    logger.debug(f"Pattern catalog changed (version {_catalog_version})")
 
 def list_theta_rho_files():
     files = []
@@ -982,6 +1039,8 @@ def list_theta_rho_files():
 
 def parse_theta_rho_file(file_path):
     """Parse a theta-rho file and return a list of (theta, rho) pairs."""
+    if clear_generator.is_generated(file_path):
+        return clear_generator.coordinates(file_path)
     coordinates = []
     try:
         logger.debug(f"Parsing theta-rho file: {file_path}")
@@ -1087,6 +1146,8 @@ def get_clear_pattern_file(clear_pattern_mode, path=None, cache_data=None):
 
     # Get patterns for current table type, fallback to standard patterns if type not found
     table_patterns = clear_patterns.get(state.table_type, clear_patterns['dune_weaver'])
+    if state.generated_clears:
+        table_patterns = {mode: clear_generator.clear_path(mode) for mode in ('clear_from_out', 'clear_from_in', 'clear_sideway')}
 
     # Check for custom patterns first
     if state.custom_clear_from_out and clear_pattern_mode in ['clear_from_out', 'adaptive']:
@@ -1164,13 +1225,14 @@ def is_clear_pattern(file_path):
     normalized_clear_patterns = [os.path.normpath(p) for p in clear_patterns]
     
     # Check if the file path matches any clear pattern path
-    return normalized_path in normalized_clear_patterns
+    return normalized_path in normalized_clear_patterns or clear_generator.is_generated(file_path)
 
-async def _execute_pattern_internal(file_path):
+async def _execute_pattern_internal(file_path, start_index=0):
     """Internal function to execute a pattern file. Must be called with lock already held.
 
     Args:
         file_path: Path to the .thr file to execute
+        start_index: Coordinate to start from when resuming an interrupted pattern
 
     Returns:
         True if pattern completed successfully, False if stopped/skipped
@@ -1192,6 +1254,10 @@ async def _execute_pattern_internal(file_path):
             and abs(coordinates[0][0]) < 1e-9 and abs(coordinates[0][1]) < 1e-9
             and abs(coordinates[1][0]) < 1e-9 and abs(coordinates[1][1]) < 1e-9):
         ref_theta = coordinates[2][0]
+    # When resuming, the table was homed: take the shortest way to the resume point
+    start_index = min(start_index, total_coordinates - 1)
+    if start_index:
+        ref_theta = coordinates[start_index][0]
     theta_offset = ref_theta - (ref_theta % (2 * pi))
     if abs(theta_offset) > 1e-9:
         coordinates = [(theta - theta_offset, rho) for theta, rho in coordinates]
@@ -1209,7 +1275,7 @@ async def _execute_pattern_internal(file_path):
         return 1.0 / (rho + 0.15)
 
     coord_weights = [calc_move_weight(rho) for _, rho in coordinates]
-    total_weight = sum(coord_weights)
+    total_weight = sum(coord_weights[start_index:])
 
     # Determine if this is a clearing pattern
     is_clear_file = is_clear_pattern(file_path)
@@ -1237,7 +1303,10 @@ async def _execute_pattern_internal(file_path):
 
     logger.info(f"Starting pattern execution: {file_path}")
     logger.info(f"t: {state.current_theta}, r: {state.current_rho}")
+    if start_index:
+        logger.info(f"Resuming at coordinate {start_index + 1}/{total_coordinates}")
     await reset_theta()
+    await asyncio.to_thread(checkpoint.begin, file_path, state.is_clearing, total_coordinates)
 
     start_time = time.time()
     total_pause_time = 0  # Track total time spent paused (manual + scheduled)
@@ -1253,13 +1322,14 @@ async def _execute_pattern_internal(file_path):
 
     with tqdm(
         total=total_coordinates,
+        initial=start_index,
         unit="coords",
         desc=f"Executing Pattern {file_path}",
         dynamic_ncols=True,
         disable=False,
         mininterval=1.0
-    ) as pbar:
-        for i, coordinate in enumerate(coordinates):
+    ) as pbar, realtime.pattern_gc():
+        for i, coordinate in enumerate(coordinates[start_index:], start_index):
             theta, rho = coordinate
             if state.stop_requested:
                 logger.info("Execution stopped by user")
@@ -1380,7 +1450,9 @@ async def _execute_pattern_internal(file_path):
             else:
                 current_speed = state.speed
 
-            await move_polar(theta, rho, current_speed)
+            await move_polar(theta, rho, current_speed, index=i)
+            if checkpoint.progress(i, theta, rho):
+                await asyncio.to_thread(checkpoint.flush)
 
             # Update progress for all coordinates including the first one
             pbar.update(1)
@@ -1395,7 +1467,7 @@ async def _execute_pattern_internal(file_path):
             active_time = elapsed_time - total_pause_time
 
             # Need minimum samples for stable estimate (at least 100 coords and 10 seconds)
-            if coords_done >= 100 and active_time > 10:
+            if coords_done - start_index >= 100 and active_time > 10:
                 # Rate is time per unit weight (accounts for slower moves near center)
                 current_rate = active_time / completed_weight
 
@@ -1433,7 +1505,8 @@ async def _execute_pattern_internal(file_path):
         speed=effective_speed,
         actual_time=actual_execution_time,
         total_coordinates=total_coordinates,
-        was_completed=was_completed
+        # A resumed run only timed part of the pattern
+        was_completed=was_completed and not start_index
     )
 
     if not state.conn:
@@ -1452,14 +1525,15 @@ async def _execute_pattern_internal(file_path):
     return was_completed
 
 
-async def run_theta_rho_file(file_path, is_playlist=False, clear_pattern=None, cache_data=None):
+async def run_theta_rho_file(file_path, is_playlist=False, clear_pattern=None, cache_data=None, resume=None):
     """Run a theta-rho file with optional pre-execution clear pattern.
 
     Args:
         file_path: Path to the main .thr file to execute
         is_playlist: True if running as part of a playlist
-        clear_pattern: Clear pattern mode ('adaptive', 'clear_from_in', 'clear_from_out', 'none', or None)
+        clear_pattern: Clear pattern mode ('adaptive', 'clear_from_in', 'clear_from_out', 'smart', 'none', or None)
         cache_data: Pre-loaded metadata cache for adaptive clear pattern selection
+        resume: Checkpoint of an interrupted run of this pattern (or of its clear) to continue from
     """
     lock = get_pattern_lock()
     if lock.locked():
@@ -1472,18 +1546,44 @@ async def run_theta_rho_file(file_path, is_playlist=False, clear_pattern=None, c
         state.original_pause_time = None
 
         # Start progress update task only if not part of a playlist
-        global progress_update_task
-        if not is_playlist and not progress_update_task:
-            progress_update_task = asyncio.create_task(broadcast_progress())
-
+        engine = tables.current()
+        if not is_playlist and not engine.progress_update_task:
+            engine.progress_update_task = asyncio.create_task(broadcast_progress())
+        if not is_playlist:
+            # A pattern on its own is a run of one; no older run's options apply to it,
+            # and a resume after its clear is interrupted still draws this pattern
+            await asyncio.to_thread(checkpoint.finish)
+            checkpoint.begin_run([file_path], clear_pattern=clear_pattern)
+
+        main_start = 0
+        if resume is not None:
+            if resume.clearing:
+                # Finish the interrupted clear, then draw the pattern
+                logger.info(f"Resuming pre-execution clear pattern: {resume.pattern}")
+                state.is_clearing = True
+                cleared = await _execute_pattern_internal(
+                    resume.pattern, await asyncio.to_thread(checkpoint.start_index, resume, resume.pattern)
+                )
+                state.is_clearing = False
+                if cleared:
+                    clear_policy.record_clear()
+                state.skip_requested = False
+            else:
+                main_start = await asyncio.to_thread(checkpoint.start_index, resume, file_path)
         # Run clear pattern first if specified
-        if clear_pattern and clear_pattern != 'none':
-            clear_file_path = get_clear_pattern_file(clear_pattern, file_path, cache_data)
+        elif clear_pattern and clear_pattern != 'none':
+            if clear_pattern == 'smart':
+                decision = await asyncio.to_thread(clear_policy.decide, file_path, state.current_rho or 0.0, cache_data)
+                clear_file_path = decision.clear_file
+            else:
+                clear_file_path = get_clear_pattern_file(clear_pattern, file_path, cache_data)
             if clear_file_path:
                 logger.info(f"Running pre-execution clear pattern: {clear_file_path}")
                 state.is_clearing = True
-                await _execute_pattern_internal(clear_file_path)
+                cleared = await _execute_pattern_internal(clear_file_path)
                 state.is_clearing = False
+                if cleared:
+                    clear_policy.record_clear()
                 # Reset skip flag after clear pattern (if user skipped clear, continue to main)
                 state.skip_requested = False
 
@@ -1493,35 +1593,56 @@ async def run_theta_rho_file(file_path, is_playlist=False, clear_pattern=None, c
             if not is_playlist:
                 state.current_playing_file = None
                 state.execution_progress = None
+                await asyncio.to_thread(checkpoint.finish)
             return
 
         # Run the main pattern
-        await _execute_pattern_internal(file_path)
+        if await _execute_pattern_internal(file_path, main_start) and is_playlist:
+            await asyncio.to_thread(checkpoint.complete)
+        await asyncio.to_thread(clear_policy.record_pattern, file_path)
 
         # Only clear state if not part of a playlist
         if not is_playlist:
             state.current_playing_file = None
             state.execution_progress = None
+            await asyncio.to_thread(checkpoint.finish)
             logger.info("Pattern execution completed and state cleared")
             # Only cancel progress update task if not part of a playlist
-            if progress_update_task:
-                progress_update_task.cancel()
+            if engine.progress_update_task:
+                engine.progress_update_task.cancel()
                 try:
-                    await progress_update_task
+                    await engine.progress_update_task
                 except asyncio.CancelledError:
                     pass
-                progress_update_task = None
+                engine.progress_update_task = None
         else:
             logger.info("Pattern execution completed, maintaining state for playlist")
             
 
-async def run_theta_rho_files(file_paths, pause_time=0, clear_pattern=None, run_mode="single", shuffle=False):
+async def run_theta_rho_files(file_paths, pause_time=0, clear_pattern=None, run_mode="single", shuffle=False,
+                              optimize_order=False, resume=None):
     """Run multiple .thr files in sequence with options.
 
     The playlist now stores only main patterns. Clear patterns are executed dynamically
-    before each main pattern based on the clear_pattern option.
+    before each main pattern based on the clear_pattern option. With optimize_order,
+    each cycle is ordered to minimize transition time (see playlist_optimizer); combined
+    with shuffle, each cycle is a random order that avoids long transitions.
+
+    With resume (a checkpoint.Checkpoint), the first cycle keeps the recorded order and
+    continues the interrupted run where it stopped.
     """
     state.stop_requested = False
+    checkpoint.begin_run(file_paths, pause_time, clear_pattern, run_mode, shuffle, optimize_order)
+
+    start_index = 0
+    if resume is not None:
+        start_index = resume.playlist_index
+        if resume.completed:
+            # Interrupted between patterns: continue with the next one
+            start_index += 1
+            resume = None
+        if start_index >= len(file_paths):
+            start_index = 0 if run_mode in ("indefinite", "loop") else len(file_paths)
 
     # Reset LED idle timeout activity time when playlist starts
     import time as time_module
@@ -1535,9 +1656,9 @@ async def run_theta_rho_files(file_paths, pause_time=0, clear_pattern=None, run_
         state.current_playlist_index = 0
 
     # Start progress update task for the playlist
-    global progress_update_task
-    if not progress_update_task:
-        progress_update_task = asyncio.create_task(broadcast_progress())
+    engine = tables.current()
+    if not engine.progress_update_task:
+        engine.progress_update_task = asyncio.create_task(broadcast_progress())
 
     # Store patterns in state only if not already set by caller.
     # The caller (playlist_manager.run_playlist) sets this before creating the task.
@@ -1546,28 +1667,43 @@ async def run_theta_rho_files(file_paths, pause_time=0, clear_pattern=None, run_
 
     try:
         while True:
-            # Shuffle main patterns if requested. Re-shuffle at the start of
-            # every cycle so repeat modes play a fresh order each pass instead
-            # of replaying the first random order forever.
-            if shuffle and state.current_playlist:
-                random.shuffle(state.current_playlist)
-                logger.info("Playlist shuffled")
-
             # Load metadata cache once per playlist iteration (for adaptive clear patterns)
             cache_data = None
-            if clear_pattern and clear_pattern in ['adaptive', 'clear_from_in', 'clear_from_out']:
+            if optimize_order or (clear_pattern and clear_pattern in ['adaptive', 'clear_from_in', 'clear_from_out', 'smart']):
                 from modules.core import cache_manager
                 cache_data = await asyncio.to_thread(cache_manager.load_metadata_cache)
                 logger.info(f"Loaded metadata cache for {len(cache_data.get('data', {}))} patterns")
 
+            # Shuffle main patterns if requested. Re-shuffle at the start of
+            # every cycle so repeat modes play a fresh order each pass instead
+            # of replaying the first random order forever.
+            if start_index or resume is not None:
+                logger.info("Resuming the interrupted cycle in its recorded order")
+            elif optimize_order and state.current_playlist:
+                playlist = list(state.current_playlist)
+                if shuffle:
+                    state.current_playlist = await asyncio.to_thread(
+                        playlist_optimizer.shuffled, playlist, clear_pattern, cache_data, state.current_rho or 0.0
+                    )
+                    logger.info("Playlist shuffled (transition-aware)")
+                else:
+                    state.current_playlist, _ = await asyncio.to_thread(
+                        playlist_optimizer.optimize, playlist, clear_pattern, cache_data, state.current_rho or 0.0,
+                        run_mode in ("indefinite", "loop")
+                    )
+            elif shuffle and state.current_playlist:
+                random.shuffle(state.current_playlist)
+                logger.info("Playlist shuffled")
+
             # Reset pattern counter at the start of the playlist
             state.patterns_since_last_home = 0
 
             # Execute main patterns using index-based access
             # This allows the playlist to be reordered during execution
-            idx = 0
+            idx, start_index = start_index, 0
             while state.current_playlist and idx < len(state.current_playlist):
                 state.current_playlist_index = idx
+                checkpoint.set_position(state.current_playlist, idx)
 
                 if state.stop_requested or not state.current_playlist:
                     logger.info("Execution stopped")
@@ -1575,6 +1711,7 @@ async def run_theta_rho_files(file_paths, pause_time=0, clear_pattern=None, run_
 
                 # Get the pattern at the current index (may have changed due to reordering)
                 file_path = state.current_playlist[idx]
+                cache_jobs.queue_upcoming(state.current_playlist, idx)
                 logger.info(f"Running pattern {idx + 1}/{len(state.current_playlist)}: {file_path}")
 
                 # Clear pause state when starting a new pattern (prevents stale "waiting" UI)
@@ -1586,8 +1723,10 @@ async def run_theta_rho_files(file_paths, pause_time=0, clear_pattern=None, run_
                     file_path,
                     is_playlist=True,
                     clear_pattern=clear_pattern,
-                    cache_data=cache_data
+                    cache_data=cache_data,
+                    resume=resume
                 )
+                resume = None
 
                 # Increment pattern counter (auto-home check happens after pause time)
                 state.patterns_since_last_home += 1
@@ -1731,22 +1870,22 @@ async def run_theta_rho_files(file_paths, pause_time=0, clear_pattern=None, run_
         # Task was cancelled externally (e.g., by TestClient cleanup, or explicit cancellation).
         # Do NOT clear playlist state - preserve what the caller set.
         logger.info("Playlist task was cancelled externally, preserving state")
-        if progress_update_task:
-            progress_update_task.cancel()
+        if engine.progress_update_task:
+            engine.progress_update_task.cancel()
             try:
-                await progress_update_task
+                await engine.progress_update_task
             except asyncio.CancelledError:
                 pass
-            progress_update_task = None
+            engine.progress_update_task = None
         raise  # Re-raise to signal cancellation
     finally:
-        if progress_update_task:
-            progress_update_task.cancel()
+        if engine.progress_update_task:
+            engine.progress_update_task.cancel()
             try:
-                await progress_update_task
+                await engine.progress_update_task
             except asyncio.CancelledError:
                 pass
-            progress_update_task = None
+            engine.progress_update_task = None
 
         # Check if we're exiting due to CancelledError - if so, don't clear state.
         # State should only be cleared when:
@@ -1768,6 +1907,7 @@ async def run_theta_rho_files(file_paths, pause_time=0, clear_pattern=None, run_
 
             # Persist cleared state so server restart won't load stale playlist
             state.save()
+            await asyncio.to_thread(checkpoint.finish)
 
             await start_idle_led_timeout()
 
@@ -1802,9 +1942,9 @@ async def stop_actions(clear_playlist = True, wait_for_lock = True):
                 state.playlist_mode = None
 
                 # Cancel progress update task if we're clearing the playlist
-                global progress_update_task
-                if progress_update_task and not progress_update_task.done():
-                    progress_update_task.cancel()
+                progress_task = tables.current().progress_update_task
+                if progress_task and not progress_task.done():
+                    progress_task.cancel()
 
                 # Cancel the playlist task itself (late import to avoid circular dependency)
                 from modules.core import playlist_manager
@@ -1816,6 +1956,7 @@ async def stop_actions(clear_playlist = True, wait_for_lock = True):
         get_pause_event().set()
 
         # Send stop command to motion thread to clear its queue
+        motion_controller = get_motion_controller()
         if motion_controller.running:
             motion_controller.command_queue.put(MotionCommand('stop'))
 
@@ -1874,7 +2015,7 @@ async def stop_actions(clear_playlist = True, wait_for_lock = True):
             logger.error(f"Error updating machine position on error: {update_err}")
         return False
 
-async def move_polar(theta, rho, speed=None):
+async def move_polar(theta, rho, speed=None, index=None):
     """
     Queue a motion command to be executed in the dedicated motion control thread.
     This makes motion control non-blocking for API endpoints.
@@ -1883,11 +2024,13 @@ async def move_polar(theta, rho, speed=None):
         theta (float): Target theta coordinate
         rho (float): Target rho coordinate
         speed (int, optional): Speed override. If None, uses state.speed
+        index (int, optional): Coordinate index within the running pattern, for position streaming
     """
     # Note: stop_requested is cleared once at pattern start (execute_theta_rho_file line 890)
     # Don't clear it here on every coordinate - causes performance issues with event system
 
     # Ensure motion control thread is running
+    motion_controller = get_motion_controller()
     if not motion_controller.running:
         motion_controller.start()
 
@@ -1901,7 +2044,8 @@ async def move_polar(theta, rho, speed=None):
         theta=theta,
         rho=rho,
         speed=speed,
-        future=future
+        future=future,
+        index=index
     )
 
     motion_controller.command_queue.put(command)
@@ -1986,7 +2130,9 @@ def get_status():
         "current_theta": state.current_theta,
         "current_rho": state.current_rho,
         "firmware_version": state.firmware_version,
-        "table_type": state.table_type_override or state.table_type
+        "table_type": state.table_type_override or state.table_type,
+        "interrupted_run": checkpoint.summary(),
+        "connection_outage": reconnect.current_outage()
     }
     
     # Add playlist information if available
@@ -2,71 +2,167 @@ import json
 import os
 import logging
 import asyncio
+import threading
 from typing import Optional
-from modules.core import pattern_manager
+from modules.core import pattern_manager, tables
 from modules.core.state import state
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Track the current playlist task so we can cancel it properly
-_current_playlist_task: Optional[asyncio.Task] = None
-
 # Global state
 PLAYLISTS_FILE = os.path.join(os.getcwd(), "playlists.json")
 
+# In-memory playlist index. Reads are served from here and the file is only
+# re-parsed when its stat signature changes (hand edits, another process, or
+# tests pointing PLAYLISTS_FILE elsewhere). playlists.json stays the single
+# on-disk store because the touch app reads it directly.
+_playlists_lock = threading.RLock()
+_playlists_index = None
+_playlists_signature = None
+
+# Version counters: the global version increases on every change, and each
+# playlist remembers the global version at which it last changed. Clients can
+# compare versions to skip refetching unchanged playlists.
+_playlists_version = 0
+_playlist_versions = {}
+
 # Ensure the file exists and contains at least an empty JSON object
 if not os.path.isfile(PLAYLISTS_FILE):
     logger.info(f"Creating new playlists file at {PLAYLISTS_FILE}")
     with open(PLAYLISTS_FILE, "w") as f:
         json.dump({}, f, indent=2)
 
-def load_playlists():
-    """Load the entire playlists dictionary from the JSON file."""
+def _file_signature():
+    """Return a cheap signature of the playlists file, or None if it is missing."""
+    try:
+        st = os.stat(PLAYLISTS_FILE)
+    except OSError:
+        return None
+    return (PLAYLISTS_FILE, st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _bump_version(names):
+    """Record a change to the given playlist names."""
+    global _playlists_version
+    _playlists_version += 1
+    for name in names:
+        _playlist_versions[name] = _playlists_version
+
+def _read_playlists_file():
+    """Parse playlists.json from disk."""
     try:
         with open(PLAYLISTS_FILE, "r") as f:
             content = f.read().strip()
-            if not content:
-                logger.warning("Playlists file is empty, returning empty dict")
-                return {}
-            playlists = json.loads(content)
-            logger.debug(f"Loaded {len(playlists)} playlists")
-            return playlists
+    except FileNotFoundError:
+        return {}
+    if not content:
+        logger.warning("Playlists file is empty, returning empty dict")
+        return {}
+    try:
+        playlists = json.loads(content)
     except (json.JSONDecodeError, ValueError) as e:
         logger.error(f"Playlists file is corrupted, resetting to empty: {e}")
-        save_playlists({})
-        return {}
+        return None
+    logger.debug(f"Loaded {len(playlists)} playlists")
+    return playlists
+
+def _get_index():
+    """Return the in-memory playlist index, reloading it if the file changed.
+
+    Must be called with _playlists_lock held.
+    """
+    global _playlists_index, _playlists_signature
+    signature = _file_signature()
+    if _playlists_index is not None and signature == _playlists_signature:
+        return _playlists_index
+
+    playlists = _read_playlists_file()
+    previous = _playlists_index or {}
+    if playlists is None:
+        _playlists_index = {}
+        _persist()
+    else:
+        _playlists_index = playlists
+        _playlists_signature = signature
+
+    changed = [name for name in set(previous) | set(_playlists_index)
+               if previous.get(name) != _playlists_index.get(name)]
+    if changed:
+        _bump_version(changed)
+    for name in set(previous) - set(_playlists_index):
+        _playlist_versions.pop(name, None)
+    return _playlists_index
+
+def _persist():
+    """Atomically write the in-memory index to playlists.json.
+
+    Must be called with _playlists_lock held.
+    """
+    global _playlists_signature
+    tmp_path = f"{PLAYLISTS_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(_playlists_index, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, PLAYLISTS_FILE)
+    _playlists_signature = _file_signature()
+
+def load_playlists():
+    """Load the entire playlists dictionary (a copy of the in-memory index)."""
+    with _playlists_lock:
+        return {name: list(files) for name, files in _get_index().items()}
 
 def save_playlists(playlists_dict):
-    """Save the entire playlists dictionary back to the JSON file."""
+    """Replace all playlists and save them back to the JSON file."""
+    global _playlists_index
     logger.debug(f"Saving {len(playlists_dict)} playlists to file")
-    with open(PLAYLISTS_FILE, "w") as f:
-        json.dump(playlists_dict, f, indent=2)
+    with _playlists_lock:
+        previous = _get_index()
+        _playlists_index = {name: list(files) for name, files in playlists_dict.items()}
+        changed = [name for name in set(previous) | set(_playlists_index)
+                   if previous.get(name) != _playlists_index.get(name)]
+        for name in set(previous) - set(_playlists_index):
+            _playlist_versions.pop(name, None)
+        if changed:
+            _bump_version(changed)
+        _persist()
+
+def get_playlists_version():
+    """Return the global playlists version and per-playlist versions."""
+    with _playlists_lock:
+        index = _get_index()
+        return {
+            "version": _playlists_version,
+            "playlists": {name: _playlist_versions.get(name, 0) for name in index},
+        }
 
 def list_all_playlists():
     """Returns a list of all playlist names."""
-    playlists_dict = load_playlists()
-    playlist_names = list(playlists_dict.keys())
+    with _playlists_lock:
+        playlist_names = list(_get_index().keys())
     logger.debug(f"Found {len(playlist_names)} playlists")
     return playlist_names
 
 def get_playlist(playlist_name):
     """Get a specific playlist by name."""
-    playlists_dict = load_playlists()
-    if playlist_name not in playlists_dict:
-        logger.warning(f"Playlist not found: {playlist_name}")
-        return None
-    logger.debug(f"Retrieved playlist: {playlist_name}")
-    return {
-        "name": playlist_name,
-        "files": playlists_dict[playlist_name]
-    }
+    with _playlists_lock:
+        index = _get_index()
+        if playlist_name not in index:
+            logger.warning(f"Playlist not found: {playlist_name}")
+            return None
+        logger.debug(f"Retrieved playlist: {playlist_name}")
+        return {
+            "name": playlist_name,
+            "files": list(index[playlist_name]),
+            "version": _playlist_versions.get(playlist_name, 0),
+        }
 
 def create_playlist(playlist_name, files):
     """Create or update a playlist."""
-    playlists_dict = load_playlists()
-    playlists_dict[playlist_name] = files
-    save_playlists(playlists_dict)
+    with _playlists_lock:
+        _get_index()[playlist_name] = list(files)
+        _bump_version([playlist_name])
+        _persist()
     logger.info(f"Created/updated playlist '{playlist_name}' with {len(files)} files")
     return True
 
@@ -77,26 +173,66 @@ def modify_playlist(playlist_name, files):
 
 def delete_playlist(playlist_name):
     """Delete a playlist."""
-    playlists_dict = load_playlists()
-    if playlist_name not in playlists_dict:
-        logger.warning(f"Cannot delete non-existent playlist: {playlist_name}")
-        return False
-    del playlists_dict[playlist_name]
-    save_playlists(playlists_dict)
+    with _playlists_lock:
+        index = _get_index()
+        if playlist_name not in index:
+            logger.warning(f"Cannot delete non-existent playlist: {playlist_name}")
+            return False
+        del index[playlist_name]
+        _bump_version([])
+        _playlist_versions.pop(playlist_name, None)
+        _persist()
     logger.info(f"Deleted playlist: {playlist_name}")
     return True
 
 def add_to_playlist(playlist_name, pattern):
     """Add a pattern to an existing playlist."""
-    playlists_dict = load_playlists()
-    if playlist_name not in playlists_dict:
-        logger.warning(f"Cannot add to non-existent playlist: {playlist_name}")
-        return False
-    playlists_dict[playlist_name].append(pattern)
-    save_playlists(playlists_dict)
+    with _playlists_lock:
+        index = _get_index()
+        if playlist_name not in index:
+            logger.warning(f"Cannot add to non-existent playlist: {playlist_name}")
+            return False
+        index[playlist_name].append(pattern)
+        _bump_version([playlist_name])
+        _persist()
     logger.info(f"Added pattern '{pattern}' to playlist '{playlist_name}'")
     return True
 
+def remove_from_playlist(playlist_name, index):
+    """Remove the pattern at the given position from a playlist."""
+    with _playlists_lock:
+        playlists = _get_index()
+        if playlist_name not in playlists:
+            logger.warning(f"Cannot remove from non-existent playlist: {playlist_name}")
+            return False
+        files = playlists[playlist_name]
+        if not 0 <= index < len(files):
+            logger.warning(f"Cannot remove index {index} from playlist '{playlist_name}' ({len(files)} items)")
+            return False
+        pattern = files.pop(index)
+        _bump_version([playlist_name])
+        _persist()
+    logger.info(f"Removed pattern '{pattern}' from playlist '{playlist_name}'")
+    return True
+
+def move_in_playlist(playlist_name, from_index, to_index):
+    """Move a pattern within a playlist from one position to another."""
+    with _playlists_lock:
+        playlists = _get_index()
+        if playlist_name not in playlists:
+            logger.warning(f"Cannot reorder non-existent playlist: {playlist_name}")
+            return False
+        files = playlists[playlist_name]
+        if not (0 <= from_index < len(files) and 0 <= to_index < len(files)):
+            logger.warning(f"Cannot move {from_index} -> {to_index} in playlist '{playlist_name}' ({len(files)} items)")
+            return False
+        if from_index != to_index:
+            files.insert(to_index, files.pop(from_index))
+            _bump_version([playlist_name])
+            _persist()
+    logger.info(f"Moved item {from_index} -> {to_index} in playlist '{playlist_name}'")
+    return True
+
 def rename_playlist(old_name, new_name):
     """Rename an existing playlist."""
     if not new_name or not new_name.strip():
@@ -105,43 +241,49 @@ def rename_playlist(old_name, new_name):
 
     new_name = new_name.strip()
 
-    playlists_dict = load_playlists()
-    if old_name not in playlists_dict:
-        logger.warning(f"Cannot rename non-existent playlist: {old_name}")
-        return False, "Playlist not found"
+    with _playlists_lock:
+        playlists_dict = _get_index()
+        if old_name not in playlists_dict:
+            logger.warning(f"Cannot rename non-existent playlist: {old_name}")
+            return False, "Playlist not found"
 
-    if old_name == new_name:
-        return True, "Name unchanged"
+        if old_name == new_name:
+            return True, "Name unchanged"
 
-    if new_name in playlists_dict:
-        logger.warning(f"Cannot rename playlist: '{new_name}' already exists")
-        return False, "A playlist with that name already exists"
+        if new_name in playlists_dict:
+            logger.warning(f"Cannot rename playlist: '{new_name}' already exists")
+            return False, "A playlist with that name already exists"
 
-    # Copy files to new key and delete old key
-    playlists_dict[new_name] = playlists_dict[old_name]
-    del playlists_dict[old_name]
-    save_playlists(playlists_dict)
+        # Move files to new key and delete old key
+        playlists_dict[new_name] = playlists_dict.pop(old_name)
+        _playlist_versions.pop(old_name, None)
+        _bump_version([new_name])
+        _persist()
     logger.info(f"Renamed playlist '{old_name}' to '{new_name}'")
     return True, f"Playlist renamed to '{new_name}'"
 
+def current_playlist_task() -> Optional[asyncio.Task]:
+    """The current table's playlist task, tracked so we can cancel it properly."""
+    return tables.current().playlist_task
+
 async def cancel_current_playlist():
     """Cancel the current playlist task if one is running."""
-    global _current_playlist_task
-    if _current_playlist_task and not _current_playlist_task.done():
+    engine = tables.current()
+    task = engine.playlist_task
+    if task and not task.done():
         logger.info("Cancelling existing playlist task...")
-        _current_playlist_task.cancel()
+        task.cancel()
         try:
-            await _current_playlist_task
+            await task
         except asyncio.CancelledError:
             logger.info("Playlist task cancelled successfully")
         except Exception as e:
             logger.warning(f"Error while cancelling playlist task: {e}")
-        _current_playlist_task = None
+        engine.playlist_task = None
 
-async def run_playlist(playlist_name, pause_time=0, clear_pattern=None, run_mode="single", shuffle=False):
+async def run_playlist(playlist_name, pause_time=0, clear_pattern=None, run_mode="single", shuffle=False,
+                       optimize_order=False):
     """Run a playlist with the given options."""
-    global _current_playlist_task
-
     # Cancel any existing playlist task first
     await cancel_current_playlist()
 
@@ -150,12 +292,12 @@ async def run_playlist(playlist_name, pause_time=0, clear_pattern=None, run_mode
         logger.info("Another pattern is running, stopping it first...")
         await pattern_manager.stop_actions()
 
-    playlists = load_playlists()
-    if playlist_name not in playlists:
+    playlist = get_playlist(playlist_name)
+    if playlist is None:
         logger.error(f"Cannot run non-existent playlist: {playlist_name}")
         return False, "Playlist not found"
 
-    file_paths = playlists[playlist_name]
+    file_paths = playlist["files"]
     file_paths = [os.path.join(pattern_manager.THETA_RHO_DIR, file) for file in file_paths]
 
     if not file_paths:
@@ -163,7 +305,7 @@ async def run_playlist(playlist_name, pause_time=0, clear_pattern=None, run_mode
         return False, "Playlist is empty"
 
     try:
-        logger.info(f"Starting playlist '{playlist_name}' with mode={run_mode}, shuffle={shuffle}")
+        logger.info(f"Starting playlist '{playlist_name}' with mode={run_mode}, shuffle={shuffle}, optimize_order={optimize_order}")
         # Set ALL playlist state variables BEFORE creating the async task.
         # This ensures state is correct even if the task doesn't start immediately
         # (important for TestClient which may cancel background tasks).
@@ -171,16 +313,57 @@ async def run_playlist(playlist_name, pause_time=0, clear_pattern=None, run_mode
         state.current_playlist_name = playlist_name
         state.playlist_mode = run_mode
         state.current_playlist_index = 0
-        _current_playlist_task = asyncio.create_task(
+        tables.current().playlist_task = asyncio.create_task(
             pattern_manager.run_theta_rho_files(
                 file_paths,
                 pause_time=pause_time,
                 clear_pattern=clear_pattern,
                 run_mode=run_mode,
                 shuffle=shuffle,
+                optimize_order=optimize_order,
             )
         )
         return True, f"Playlist '{playlist_name}' is now running."
     except Exception as e:
         logger.error(f"Failed to run playlist '{playlist_name}': {str(e)}")
         return False, str(e)
+
+async def resume_interrupted(resume):
+    """Continue a run interrupted by a restart (see checkpoint). The table should be homed first."""
+    await cancel_current_playlist()
+    if pattern_manager.get_pattern_lock().locked():
+        logger.info("Another pattern is running, stopping it first...")
+        await pattern_manager.stop_actions()
+
+    missing = [path for path in resume.files if not os.path.exists(path)]
+    if missing:
+        logger.warning(f"Dropping {len(missing)} patterns of the interrupted run that no longer exist")
+        files = [path for path in resume.files if path not in missing]
+        kept_before = sum(path not in missing for path in resume.files[:resume.playlist_index])
+        if resume.files[resume.playlist_index] in missing:
+            # The interrupted pattern is gone; continue with the one after it
+            resume = resume._replace(completed=True, playlist_index=kept_before - 1)
+        else:
+            resume = resume._replace(playlist_index=kept_before)
+        resume = resume._replace(files=files)
+    if not resume.files:
+        return False, "The interrupted patterns no longer exist"
+
+    logger.info(f"Resuming interrupted run at pattern {resume.playlist_index + 1}/{len(resume.files)}, "
+                f"coordinate {resume.index + 1}")
+    state.current_playlist = list(resume.files)
+    state.current_playlist_name = resume.playlist_name
+    state.playlist_mode = resume.run_mode
+    state.current_playlist_index = resume.playlist_index
+    tables.current().playlist_task = asyncio.create_task(
+        pattern_manager.run_theta_rho_files(
+            list(resume.files),
+            pause_time=resume.pause_time,
+            clear_pattern=resume.clear_pattern,
+            run_mode=resume.run_mode,
+            shuffle=resume.shuffle,
+            optimize_order=resume.optimize_order,
+            resume=resume,
+        )
+    )
+    return True, "Resuming interrupted run."
@@ -0,0 +1,309 @@
+"""
+Transition-aware playlist ordering.
+
+Between two playlist items the table moves the ball from where the previous
+pattern ended to where the next one (or the clear pattern run before it) starts,
+then runs the clear pattern and moves to the pattern's first point. Only the first
+move depends on the order, and the metadata cache already knows every pattern's
+first and last rho, so ordering patterns so that each one starts near where the
+last one ended saves table time on every cycle.
+
+A TransitionModel prices moving from one item to another in seconds: rho travel
+at SECONDS_PER_RHO plus the clear pattern's historical run time (from the
+execution log, DEFAULT_CLEAR_SECONDS when it never completed). The solver is a
+nearest-neighbour tour improved by 2-opt and or-opt moves within TIME_BUDGET,
+vectorized with numpy so thousands of patterns order in a fraction of a second.
+shuffled() is the randomized variant used when a playlist is both shuffled and
+optimized: each step picks among the few next patterns that cost at most
+SHUFFLE_SLACK more than the cheapest, so every cycle is a different order that
+still avoids long moves.
+"""
+import json
+import logging
+import os
+import random
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+# numpy is imported where it is used, keeping it off the server's startup path
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_RHO = 20.0  # Rough time for a centre-to-edge move at typical speeds
+DEFAULT_CLEAR_SECONDS = 300.0
+TIME_BUDGET = 0.25  # Seconds spent improving the greedy tour at most
+SHUFFLE_CHOICES = 3
+SHUFFLE_SLACK = 5.0  # Seconds a shuffled pick may cost over the cheapest one
+IMPROVEMENT_EPSILON = 1e-9
+
+
+def _metadata_rhos(file_path: str, cache_data: Optional[dict]) -> Optional[Tuple[float, float]]:
+    """(first rho, last rho) of a pattern from the metadata cache, parsing the file if it is not cached."""
+    from modules.core import cache_manager, clear_generator
+    from modules.core.cache_jobs import pattern_key
+    from modules.core.pattern_manager import THETA_RHO_DIR, parse_theta_rho_file
+
+    key = pattern_key(file_path)
+    if cache_data is not None:
+        metadata = cache_data.get('data', {}).get(key, {}).get('metadata')
+    else:
+        metadata = cache_manager.get_pattern_metadata(key)
+    if metadata and 'first_coordinate' in metadata and 'last_coordinate' in metadata:
+        return metadata['first_coordinate']['y'], metadata['last_coordinate']['y']
+
+    if clear_generator.is_generated(file_path) or os.path.exists(file_path):
+        full_path = file_path  # Generated clears exist only as a path, parsed as such
+    else:
+        full_path = os.path.join(THETA_RHO_DIR, key)
+    coordinates = parse_theta_rho_file(full_path)
+    if not coordinates:
+        return None
+    return coordinates[0][1], coordinates[-1][1]
+
+
+def load_run_times() -> Dict[str, float]:
+    """Most recent completed run time in seconds per pattern name, from one pass over the execution log."""
+    from modules.core.pattern_manager import EXECUTION_LOG_FILE
+
+    run_times = {}
+    if not os.path.exists(EXECUTION_LOG_FILE):
+        return run_times
+    try:
+        with open(EXECUTION_LOG_FILE, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get('completed') and entry.get('actual_time_seconds'):
+                    run_times[entry.get('pattern_name')] = float(entry['actual_time_seconds'])
+    except Exception as e:
+        logger.warning(f"Failed to read execution time log: {e}")
+    return run_times
+
+
+class TransitionModel:
+    """Seconds to go from the end of one item to the start of another.
+
+    Item 0 is the ball's starting position; items 1..n are the patterns. For each
+    pattern, entry is the rho the ball travels to first (the clear pattern's start,
+    or the pattern's own start without a clear) and fixed is what follows regardless
+    of order: the clear pattern and the move from its end to the pattern's start.
+    """
+
+    def __init__(self, entry: Sequence[float], exit: Sequence[float], fixed: Sequence[float],
+                 seconds_per_rho: float = SECONDS_PER_RHO):
+        import numpy as np
+        self.entry = np.asarray(entry, dtype=np.float64)
+        self.exit = np.asarray(exit, dtype=np.float64)
+        self.fixed = np.asarray(fixed, dtype=np.float64)
+        self.seconds_per_rho = seconds_per_rho
+
+    def __len__(self):
+        return len(self.entry)
+
+    def cost(self, a, b):
+        """Cost from item(s) a to item(s) b; broadcasts over index arrays."""
+        return self.seconds_per_rho * abs(self.exit[a] - self.entry[b]) + self.fixed[b]
+
+    def path_cost(self, order: Sequence[int], cyclic: bool = False) -> float:
+        """Total cost of visiting order from the start position (item 0)."""
+        import numpy as np
+        if not len(order):
+            return 0.0
+        path = np.concatenate(([0], np.asarray(order, dtype=np.intp)))
+        total = float(self.cost(path[:-1], path[1:]).sum())
+        if cyclic and len(order) > 1:
+            # The next cycle starts where this one ended
+            total += float(self.cost(path[-1], path[1]))
+        return total
+
+
+def build_model(file_paths: Sequence[str], clear_pattern: Optional[str] = None, cache_data: Optional[dict] = None,
+                start_rho: float = 0.0, run_times: Optional[Dict[str, float]] = None) -> TransitionModel:
+    """Transition model for file_paths, using the clear pattern each item would get at runtime.
+
+    The smart clear mode has no fixed clear pattern; its clears depend on the order
+    itself, so it is modelled as plain travel, which is what it aims for.
+    """
+    from modules.core.pattern_manager import get_clear_pattern_file
+
+    if run_times is None:
+        run_times = load_run_times()
+    clear_info: Dict[str, Optional[Tuple[float, float, float]]] = {}
+
+    def clear_for(file_path) -> Optional[Tuple[float, float, float]]:
+        """(start rho, end rho, seconds) of the clear pattern run before file_path"""
+        if not clear_pattern or clear_pattern in ('none', 'smart'):
+            return None
+        clear_file = get_clear_pattern_file(clear_pattern, file_path, cache_data)
+        if not clear_file:
+            return None
+        if clear_file not in clear_info:
+            rhos = _metadata_rhos(clear_file, cache_data)
+            seconds = run_times.get(os.path.basename(clear_file), DEFAULT_CLEAR_SECONDS)
+            clear_info[clear_file] = (rhos[0], rhos[1], seconds) if rhos else None
+        return clear_info[clear_file]
+
+    entry, exit, fixed = [0.0], [start_rho], [0.0]
+    for file_path in file_paths:
+        rhos = _metadata_rhos(file_path, cache_data)
+        first_rho, last_rho = rhos if rhos else (0.5, 0.5)  # Unknown patterns sort into the middle
+        clear = clear_for(file_path)
+        if clear:
+            clear_start, clear_end, clear_seconds = clear
+            entry.append(clear_start)
+            fixed.append(clear_seconds + SECONDS_PER_RHO * abs(clear_end - first_rho))
+        else:
+            entry.append(first_rho)
+            fixed.append(0.0)
+        exit.append(last_rho)
+    return TransitionModel(entry, exit, fixed)
+
+
+def greedy_order(model: TransitionModel) -> List[int]:
+    """Nearest-neighbour tour from the start position."""
+    import numpy as np
+    remaining = np.arange(1, len(model))
+    order = []
+    current = 0
+    while len(remaining):
+        pick = int(np.argmin(model.cost(current, remaining)))
+        current = int(remaining[pick])
+        order.append(current)
+        remaining = np.delete(remaining, pick)
+    return order
+
+
+def _reverse_gain(model: TransitionModel, path: "np.ndarray", i: int, sums) -> Optional[int]:
+    """Best j such that reversing path[i..j] shortens the path, or None."""
+    import numpy as np
+    forward, forward_sum, backward_sum = sums
+    m = len(path)
+    js = np.arange(i + 1, m)
+    # path[i-1] now leads to path[j], path[i] to path[j+1], and the edges in between run backwards
+    delta = model.cost(path[i - 1], path[js]) - forward[i - 1]
+    inner = js < m - 1
+    delta[inner] += model.cost(path[i], path[js[inner] + 1]) - forward[js[inner]]
+    delta += (backward_sum[js] - backward_sum[i]) - (forward_sum[js] - forward_sum[i])
+    best = int(np.argmin(delta))
+    return int(js[best]) if delta[best] < -IMPROVEMENT_EPSILON else None
+
+
+def _relocate_gain(model: TransitionModel, path: "np.ndarray", i: int) -> Optional[int]:
+    """Best position k such that moving path[i] to follow rest[k] (path without it) helps, or None."""
+    import numpy as np
+    m = len(path)
+    node, prev = path[i], path[i - 1]
+    removed = -model.cost(prev, node)
+    if i < m - 1:
+        nxt = path[i + 1]
+        removed += model.cost(prev, nxt) - model.cost(node, nxt)
+    rest = np.delete(path, i)
+    delta = removed + model.cost(rest, node)
+    delta[:-1] += model.cost(node, rest[1:]) - model.cost(rest[:-1], rest[1:])
+    delta[i - 1] = 0.0  # Its current position
+    best = int(np.argmin(delta))
+    return best if delta[best] < -IMPROVEMENT_EPSILON else None
+
+
+def two_opt(model: TransitionModel, order: Sequence[int], time_budget: float = TIME_BUDGET) -> List[int]:
+    """Improve an open path until no move helps or time runs out.
+
+    Each position tries a 2-opt segment reversal and moving the pattern elsewhere
+    (or-opt). Costs are asymmetric (a pattern's end differs from its start), so a
+    reversal also flips every edge inside the segment; prefix sums of the forward
+    and backward edge costs price that in O(1) per candidate. Relocation covers
+    what reversals cannot fix without flipping edges.
+    """
+    import numpy as np
+    path = np.concatenate(([0], np.asarray(order, dtype=np.intp)))
+    m = len(path)
+    if m < 3:
+        return [int(item) for item in path[1:]]
+    deadline = time.perf_counter() + time_budget
+
+    def edge_sums():
+        forward = model.cost(path[:-1], path[1:])
+        backward = model.cost(path[1:], path[:-1])
+        return (forward, np.concatenate(([0.0], np.cumsum(forward))),
+                np.concatenate(([0.0], np.cumsum(backward))))
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        sums = edge_sums()
+        for i in range(1, m):
+            if i < m - 1:
+                j = _reverse_gain(model, path, i, sums)
+                if j is not None:
+                    path[i:j + 1] = path[i:j + 1][::-1].copy()
+                    sums = edge_sums()
+                    improved = True
+            k = _relocate_gain(model, path, i)
+            if k is not None:
+                node = path[i]
+                path[:] = np.insert(np.delete(path, i), k + 1, node)
+                sums = edge_sums()
+                improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return [int(item) for item in path[1:]]
+
+
+def optimize(file_paths: Sequence[str], clear_pattern: Optional[str] = None, cache_data: Optional[dict] = None,
+             start_rho: float = 0.0, cyclic: bool = False, time_budget: float = TIME_BUDGET) -> Tuple[List[str], dict]:
+    """Order file_paths to minimize transition time. Returns (ordered paths, report)."""
+    started = time.perf_counter()
+    run_times = load_run_times()
+    model = build_model(file_paths, clear_pattern, cache_data, start_rho, run_times)
+    original = list(range(1, len(model)))
+    order = two_opt(model, greedy_order(model), time_budget)
+    solve_seconds = time.perf_counter() - started
+
+    before = model.path_cost(original, cyclic)
+    after = model.path_cost(order, cyclic)
+    if after > before:  # The heuristic never beat the given order; keep it
+        order, after = original, before
+    ordered = [file_paths[item - 1] for item in order]
+
+    known = [run_times[name] for name in map(os.path.basename, file_paths) if name in run_times]
+    report = {
+        "patterns": len(file_paths),
+        "clear_pattern": clear_pattern or "none",
+        "transition_seconds_before": round(before, 1),
+        "transition_seconds_after": round(after, 1),
+        "saved_seconds_per_cycle": round(before - after, 1),
+        "saved_hours_per_cycle": round((before - after) / 3600.0, 3),
+        "cycle_hours": round((after + sum(known)) / 3600.0, 3),
+        "run_times_known": len(known),
+        "solve_ms": round(solve_seconds * 1000, 1)
+    }
+    logger.info(f"Optimized order of {len(file_paths)} patterns in {report['solve_ms']} ms: "
+                f"saves {report['saved_hours_per_cycle']} h per cycle")
+    return ordered, report
+
+
+def shuffled(file_paths: Sequence[str], clear_pattern: Optional[str] = None, cache_data: Optional[dict] = None,
+             start_rho: float = 0.0, choices: int = SHUFFLE_CHOICES, rng: Optional[random.Random] = None) -> List[str]:
+    """A random order that only continues with one of the `choices` cheapest next patterns,
+    and only with those within SHUFFLE_SLACK seconds of the cheapest."""
+    import numpy as np
+    rng = rng or random
+    model = build_model(file_paths, clear_pattern, cache_data, start_rho)
+    remaining = np.arange(1, len(model))
+    rng_order = rng.sample(range(len(remaining)), len(remaining))
+    remaining = remaining[rng_order]  # Random tie-breaking between equally cheap patterns
+    order = []
+    current = 0
+    while len(remaining):
+        costs = model.cost(current, remaining)
+        cheapest = np.argsort(costs, kind="stable")[:choices]
+        cheapest = cheapest[costs[cheapest] <= costs[cheapest[0]] + SHUFFLE_SLACK]
+        pick = int(cheapest[rng.randrange(len(cheapest))])
+        current = int(remaining[pick])
+        order.append(current)
+        remaining = np.delete(remaining, pick)
+    return [file_paths[item - 1] for item in order]
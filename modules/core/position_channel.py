@@ -0,0 +1,65 @@
+"""
+Lock-free ball position channel.
+
+The motion thread publishes the ball position here as soon as GRBL acknowledges
+a move, and the homing thread once homing ends. Consumers such as the DW LED render loop read the latest sample every
+frame without touching the shared state object or going through asyncio.
+
+Writers take a small lock so sequence numbers stay unique and ordered. Each
+sample is an immutable tuple swapped in with one attribute assignment, so a
+reader never observes a half-written position and never takes the lock.
+"""
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+
+class PositionSample(NamedTuple):
+    """Ball position at the moment a move was acknowledged."""
+    theta: float
+    rho: float
+    timestamp: float  # time.monotonic() of the acknowledgement
+    seq: int
+    index: int = -1  # Coordinate index in the running pattern, -1 outside a pattern
+
+
+class PositionChannel:
+    """Holder for the latest ball position: locked writers, lock-free readers."""
+
+    def __init__(self):
+        self._write_lock = threading.Lock()
+        self._sample: Optional[PositionSample] = None
+        self._seq = 0
+        self._listeners: List[Callable[[PositionSample], None]] = []
+
+    def publish(self, theta: float, rho: float, timestamp: Optional[float] = None,
+                index: Optional[int] = None) -> PositionSample:
+        """Publish a new position (motion or homing thread) and notify listeners."""
+        with self._write_lock:
+            self._seq += 1
+            sample = PositionSample(float(theta), float(rho),
+                                    time.monotonic() if timestamp is None else timestamp,
+                                    self._seq, -1 if index is None else index)
+            self._sample = sample
+        for listener in self._listeners:
+            try:
+                listener(sample)
+            except Exception:
+                pass
+        return sample
+
+    def read(self) -> Optional[PositionSample]:
+        """Latest sample, or None if nothing has been published yet."""
+        return self._sample
+
+    def add_listener(self, listener: Callable[[PositionSample], None]):
+        """Call listener(sample) from the publishing thread on every publish; must not block."""
+        # Copy-on-write so publish() can iterate without a lock
+        self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Callable[[PositionSample], None]):
+        self._listeners = [l for l in self._listeners if l != listener]
+
+
+# Global instance fed by the motion control and homing threads
+position_channel = PositionChannel()
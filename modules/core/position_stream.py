@@ -0,0 +1,101 @@
+"""
+Live ball position stream for playback visualisation (/ws/position).
+
+Each client gets its own sender loop that wakes at the requested rate, reads the
+latest sample from the position channel and sends it only if it changed. Nothing
+is queued: a client that cannot keep up simply sees fewer, newer frames, and a
+client whose send stalls for SEND_TIMEOUT is dropped, so one slow phone never
+holds back the others or the motion thread. The socket is read alongside the
+sender loop, so a disconnect ends it at once, even on a table with nothing to send.
+
+Frames are either binary (FRAME, 24 bytes) or minimal JSON:
+    {"i": index, "t": theta, "r": rho, "ts": unix time of the acknowledgement}
+"""
+import asyncio
+import json
+import struct
+import time
+from typing import Optional
+
+from modules.core.position_channel import PositionChannel, PositionSample, position_channel
+
+# index (int32, -1 outside a pattern), theta, rho (float32), unix timestamp (float64), seq (uint32)
+FRAME = struct.Struct("<iffdI")
+
+DEFAULT_RATE = 15.0
+MIN_RATE = 1.0
+MAX_RATE = 30.0
+SEND_TIMEOUT = 5.0
+KEEPALIVE_INTERVAL = 10.0  # Resend the last sample when idle so clients know the stream is alive
+
+
+def clamp_rate(rate: Optional[float]) -> float:
+    """Frames per second, limited to what is useful for animation"""
+    if rate is None:
+        return DEFAULT_RATE
+    return min(MAX_RATE, max(MIN_RATE, float(rate)))
+
+
+def _unix_time(sample: PositionSample) -> float:
+    # Samples carry monotonic time; convert so clients can compare against their own clock
+    return time.time() - (time.monotonic() - sample.timestamp)
+
+
+def encode_frame(sample: PositionSample, binary: bool = True):
+    """Encode one sample as bytes (binary) or str (JSON)"""
+    timestamp = _unix_time(sample)
+    if binary:
+        return FRAME.pack(sample.index, sample.theta, sample.rho, timestamp, sample.seq & 0xFFFFFFFF)
+    return json.dumps({
+        "i": sample.index,
+        "t": round(sample.theta, 5),
+        "r": round(sample.rho, 5),
+        "ts": round(timestamp, 3)
+    }, separators=(",", ":"))
+
+
+async def _until_disconnect(websocket):
+    """Read (and ignore) client messages until the client goes away"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+async def stream_positions(websocket, rate: float = DEFAULT_RATE, binary: bool = False,
+                           channel: PositionChannel = position_channel):
+    """Send position frames to one accepted websocket until it disconnects or stalls"""
+    sender = asyncio.ensure_future(_send_frames(websocket, rate, binary, channel))
+    receiver = asyncio.ensure_future(_until_disconnect(websocket))
+    try:
+        done, _ = await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Not awaited: when the endpoint itself is being cancelled, waiting again here upsets that
+        sender.cancel()
+        receiver.cancel()
+    for task in done:
+        task.result()  # A WebSocketDisconnect from either side is the endpoint's to handle
+
+
+async def _send_frames(websocket, rate: float, binary: bool, channel: PositionChannel):
+    interval = 1.0 / clamp_rate(rate)
+    send = websocket.send_bytes if binary else websocket.send_text
+    last_seq = None
+    last_sent = 0.0
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+
+    while True:
+        sample = channel.read()
+        now = loop.time()
+        if sample is not None and (sample.seq != last_seq or now - last_sent >= KEEPALIVE_INTERVAL):
+            try:
+                await asyncio.wait_for(send(encode_frame(sample, binary)), timeout=SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                return  # Client stopped reading; let the endpoint close it
+            last_seq = sample.seq
+            last_sent = now
+
+        # Fixed cadence; if a send took longer than a tick, skip ahead instead of bursting
+        next_tick = max(next_tick + interval, loop.time())
+        await asyncio.sleep(next_tick - loop.time())
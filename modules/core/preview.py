@@ -7,15 +7,22 @@ from io import BytesIO
 
 logger = logging.getLogger(__name__)
 
+# Kiosk card size used by the touch app (patterns/cached_thumbnails)
+THUMBNAIL_SIZE = 192
+
 
 def _generate_preview(pattern_file, format='WEBP'):
     """Generate preview for a pattern file, optimized for 300x300 view."""
-    # Import dependencies in the worker process
-    from PIL import Image, ImageDraw
     from modules.core.pattern_manager import parse_theta_rho_file, THETA_RHO_DIR
     
     file_path = os.path.join(THETA_RHO_DIR, pattern_file)
-    coordinates = parse_theta_rho_file(file_path)
+    return render_preview(parse_theta_rho_file(file_path), format)
+
+
+def render_preview(coordinates, format='WEBP'):
+    """Render already-parsed (theta, rho) coordinates to preview image bytes."""
+    # Import dependencies in the worker process
+    from PIL import Image, ImageDraw
     
     # Image generation parameters
     RENDER_SIZE = 2048  # Use 2048x2048 for high quality rendering
@@ -77,6 +84,19 @@ def _generate_preview(pattern_file, format='WEBP'):
     return img_byte_arr.getvalue()
 
 
+def generate_thumbnail(image_content, size=THUMBNAIL_SIZE):
+    """Downscale rendered preview bytes to a size x size PNG for the touch kiosk."""
+    from PIL import Image
+
+    with Image.open(BytesIO(image_content)) as img:
+        img = img.convert('RGBA')
+        img.thumbnail((size, size), Image.Resampling.LANCZOS)
+        img_byte_arr = BytesIO()
+        # Fast compression: the kiosk decodes many of these while scrolling
+        img.save(img_byte_arr, format='PNG', compress_level=1)
+        return img_byte_arr.getvalue()
+
+
 async def generate_preview_image(pattern_file, format='WEBP'):
     """Generate a preview for a pattern file."""
     try:
@@ -0,0 +1,249 @@
+"""
+Opt-in real-time mode for the motion threads (Linux, mostly for Pi boards).
+
+Serial timing on a Pi otherwise competes with Uvicorn, preview rendering, LED
+effects and Python's garbage collector. When state.realtime_enabled is set:
+
+- Each table's motion thread runs under SCHED_FIFO or SCHED_RR (state.realtime_policy)
+  at state.realtime_priority. If that is not permitted (no CAP_SYS_NICE or
+  rtprio limit) it falls back to a raised nice value, and if that is not
+  permitted either it keeps the default.
+- The motion threads and the LED render thread can be pinned to
+  state.realtime_motion_cpu and state.realtime_led_cpu. The event loop thread,
+  and every worker thread it creates afterwards, is then kept off those cores.
+- Long-lived objects are moved out of the collector's reach after startup
+  (gc.freeze). While any table is drawing a pattern, automatic collection is
+  off and the motion threads collect the youngest generation every
+  GC_STEP_MOVES moves, between commands.
+
+Thread settings are applied by native thread id, so they can be changed while
+the threads run. Until the mode is first enabled nothing is touched, so CPU
+affinity set with taskset or systemd's CPUAffinity is kept; switching it off
+restores normal scheduling and that original affinity. send_loop records the
+gap between one move finishing and the next being dequeued, separately for
+normal and real-time mode, so the two can be compared (GET /api/motion/realtime).
+"""
+import gc
+import logging
+import math
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from modules.core import tables
+from modules.core.state import state
+
+logger = logging.getLogger(__name__)
+
+POLICIES = {"fifo": getattr(os, "SCHED_FIFO", None), "rr": getattr(os, "SCHED_RR", None)}
+DEFAULT_PRIORITY = 10  # Low RT priority: above every normal thread, below kernel threads
+FALLBACK_NICE = -10
+GC_STEP_MOVES = 200
+JITTER_SAMPLES = 2000
+JITTER_GAP_LIMIT = 0.5  # Longer gaps are pauses or pattern boundaries, not send-loop latency
+
+_threads: Dict[str, threading.Thread] = {}  # By key: "led", or "motion:<table id>"
+_applied: Dict[str, dict] = {}
+_gc_patterns = 0  # Patterns drawing with automatic GC suspended, across all tables
+_gc_stepping = False
+_gc_moves = 0
+_frozen = False
+_active = False  # Thread settings were changed by the mode and need restoring when it is switched off
+
+# CPUs the process was started with (taskset, systemd CPUAffinity); "all CPUs" from here on
+_BASE_CPUS = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else set(range(os.cpu_count() or 1))
+
+
+def _all_cpus():
+    return set(_BASE_CPUS)
+
+
+def _pinned_cpus() -> set:
+    return {cpu for cpu in (state.realtime_motion_cpu, state.realtime_led_cpu) if cpu is not None}
+
+
+def _apply_scheduling(tid: int, realtime: bool) -> str:
+    """Set one thread's scheduling, returns the policy actually in effect."""
+    if not hasattr(os, "sched_setscheduler"):
+        return "unsupported"
+    if not realtime:
+        try:
+            os.sched_setscheduler(tid, os.SCHED_OTHER, os.sched_param(0))
+            os.setpriority(os.PRIO_PROCESS, tid, 0)
+        except OSError:
+            pass
+        return "normal"
+
+    policy = POLICIES.get(state.realtime_policy)
+    if policy is not None:
+        priority = min(max(int(state.realtime_priority), 1), os.sched_get_priority_max(policy))
+        try:
+            os.sched_setscheduler(tid, policy, os.sched_param(priority))
+            return f"{state.realtime_policy}:{priority}"
+        except OSError as e:
+            logger.info(f"Real-time scheduling not permitted ({e}), falling back to nice {FALLBACK_NICE}")
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, FALLBACK_NICE)
+        return f"nice:{FALLBACK_NICE}"
+    except OSError as e:
+        logger.warning(f"Could not raise motion thread priority: {e}")
+        return "normal"
+
+
+def _apply_affinity(tid: int, cpu: Optional[int]) -> Optional[list]:
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    cpus = {cpu} if cpu is not None and cpu in _all_cpus() else _all_cpus()
+    try:
+        os.sched_setaffinity(tid, cpus)
+    except OSError as e:
+        logger.warning(f"Could not set CPU affinity: {e}")
+        return None
+    return sorted(cpus)
+
+
+def register_thread(role: str, thread: Optional[threading.Thread] = None):
+    """Record a thread ("motion" or "led") and apply the current mode to it.
+    Call from inside the thread, or pass the started thread. Motion threads are
+    recorded per table, as the table the calling code runs as."""
+    thread = thread or threading.current_thread()
+    key = f"{role}:{tables.current().id}" if role == "motion" else role
+    _threads[key] = thread
+    apply_thread(key)
+
+
+def apply_thread(key: str):
+    thread = _threads.get(key)
+    if thread is None or not thread.is_alive() or not thread.native_id:
+        _threads.pop(key, None)
+        _applied.pop(key, None)
+        return
+    enabled = state.realtime_enabled
+    if not enabled and not _active:
+        return  # Never enabled: leave the thread as the system set it up
+    motion = key.partition(":")[0] == "motion"
+    cpu = None
+    if enabled:
+        cpu = state.realtime_motion_cpu if motion else state.realtime_led_cpu
+    _applied[key] = {
+        # Only motion threads get real-time priority; LED frames are allowed to slip
+        "scheduling": _apply_scheduling(thread.native_id, enabled and motion),
+        "cpus": _apply_affinity(thread.native_id, cpu)
+    }
+    logger.info(f"{key} thread: {_applied[key]}")
+
+
+def apply():
+    """Apply the current settings to the registered threads and the calling (event loop) thread."""
+    global _frozen, _active
+    if not state.realtime_enabled and not _active:
+        return  # Opt-in: nothing to apply or restore
+    _active = True
+    for role in list(_threads):
+        apply_thread(role)
+
+    # Keep the event loop and the worker threads it starts later off the pinned cores
+    pinned = _pinned_cpus() if state.realtime_enabled else set()
+    others = _all_cpus() - pinned
+    if hasattr(os, "sched_setaffinity") and others:
+        try:
+            os.sched_setaffinity(0, others)
+        except OSError as e:
+            logger.warning(f"Could not set CPU affinity for the web server: {e}")
+
+    if state.realtime_enabled and not _frozen:
+        gc.collect()
+        gc.freeze()  # Startup objects (modules, routes, settings) are never collected again
+        _frozen = True
+    elif not state.realtime_enabled and _frozen:
+        gc.unfreeze()
+        _frozen = False
+    _active = state.realtime_enabled
+
+
+@contextmanager
+def pattern_gc():
+    """Suspend automatic GC while a pattern is drawing; the motion threads step it instead.
+
+    Patterns on several tables overlap, so collection resumes only when the last
+    of them finishes. Entered and left on the event loop thread."""
+    global _gc_patterns, _gc_stepping, _gc_moves
+    if not state.realtime_enabled or (not _gc_patterns and not gc.isenabled()):
+        yield
+        return
+    if not _gc_patterns:
+        gc.disable()
+        _gc_moves = 0
+        _gc_stepping = True
+    _gc_patterns += 1
+    try:
+        yield
+    finally:
+        _gc_patterns -= 1
+        if not _gc_patterns:
+            _gc_stepping = False
+            gc.enable()
+            gc.collect(1)
+
+
+def step_gc():
+    """Motion threads, after each move: collect the youngest generation every GC_STEP_MOVES moves."""
+    global _gc_moves
+    if _gc_stepping:
+        _gc_moves += 1
+        if _gc_moves % GC_STEP_MOVES == 0:
+            gc.collect(0)
+
+
+class SendLoopStats:
+    """Recent send-loop gaps, kept separately for normal and real-time mode."""
+
+    def __init__(self, samples: int = JITTER_SAMPLES):
+        self._gaps = {"normal": deque(maxlen=samples), "realtime": deque(maxlen=samples)}
+
+    def record(self, gap: float):
+        if 0 <= gap < JITTER_GAP_LIMIT:
+            self._gaps["realtime" if state.realtime_enabled else "normal"].append(gap)
+
+    def clear(self):
+        for gaps in self._gaps.values():
+            gaps.clear()
+
+    @staticmethod
+    def _summary(gaps) -> Optional[dict]:
+        if not gaps:
+            return None
+        values = sorted(gaps)
+        n = len(values)
+        mean = sum(values) / n
+        to_ms = 1000.0
+        return {
+            "samples": n,
+            "mean_ms": round(mean * to_ms, 3),
+            "p50_ms": round(values[n // 2] * to_ms, 3),
+            "p99_ms": round(values[min(n - 1, int(n * 0.99))] * to_ms, 3),
+            "max_ms": round(values[-1] * to_ms, 3),
+            "jitter_ms": round(math.sqrt(sum((v - mean) ** 2 for v in values) / n) * to_ms, 3)
+        }
+
+    def report(self) -> dict:
+        return {mode: self._summary(gaps) for mode, gaps in self._gaps.items()}
+
+
+send_loop = SendLoopStats()
+
+
+def status() -> dict:
+    return {
+        "enabled": state.realtime_enabled,
+        "policy": state.realtime_policy,
+        "priority": state.realtime_priority,
+        "motion_cpu": state.realtime_motion_cpu,
+        "led_cpu": state.realtime_led_cpu,
+        "cpu_count": os.cpu_count(),
+        "threads": dict(_applied),
+        "gc_frozen": gc.get_freeze_count(),
+        "send_loop": send_loop.report()
+    }
@@ -0,0 +1,162 @@
+"""
+Startup profiler: import time per module and wall time per startup phase.
+
+main.py installs the import timer before its other imports, so every module loaded
+while the app starts is timed: self time (excluding the modules it imports in
+turn) and total time. The lifespan hook wraps each step in phase(); steps that run
+in the background after the web server is up (connecting and homing, LED/screen/
+MQTT init, the cache check) are recorded with background=True. mark() records
+milestones: "imported" once main.py's imports are done, "ready" when HTTP is
+served, "complete" when finish() removes the import timer and logs a summary.
+
+GET /api/startup-profile returns report().
+"""
+import importlib.abc
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SLOWEST_IMPORTS = 25  # Modules listed in the report
+LOGGED_IMPORTS = 10  # Modules listed in the log summary
+
+_started = time.perf_counter()  # Imported first by main.py, so this is close to process start
+_imports: Dict[str, Tuple[float, float]] = {}  # module -> (self seconds, total seconds)
+_phases: List[dict] = []
+_milestones: Dict[str, float] = {}
+_local = threading.local()
+
+
+def _elapsed_ms(moment: float) -> float:
+    return round((moment - _started) * 1000, 1)
+
+
+def _timed(exec_module):
+    """Wrap a loader's exec_module so the module body is timed."""
+    def exec_timed(module):
+        stack = _local.__dict__.setdefault("stack", [])
+        stack.append(0.0)  # Time spent in nested imports
+        start = time.perf_counter()
+        try:
+            exec_module(module)
+        finally:
+            total = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += total
+            _imports[module.__name__] = (total - nested, total)
+    exec_timed._startup_timed = True
+    return exec_timed
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Finds specs with the remaining finders and times the loaders they return."""
+
+    def find_spec(self, name, path, target=None):
+        if getattr(_local, "finding", False):
+            return None
+        _local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            _local.finding = False
+
+        loader = spec.loader
+        # Class-level loaders (builtins, frozen) are shared and cheap; leave them alone
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        if not getattr(loader.exec_module, "_startup_timed", False):
+            try:
+                loader.exec_module = _timed(loader.exec_module)
+            except AttributeError:
+                pass
+        return spec
+
+
+_timer = _ImportTimer()
+
+
+def install():
+    """Start timing imports. Call before importing anything heavy."""
+    if _timer not in sys.meta_path:
+        sys.meta_path.insert(0, _timer)
+
+
+@contextmanager
+def phase(name: str, background: bool = False):
+    """Record the wall time of a startup step."""
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        end = time.perf_counter()
+        _phases.append({
+            "name": name,
+            "background": background,
+            "start_ms": _elapsed_ms(start),
+            "duration_ms": round((end - start) * 1000, 1),
+            "status": status
+        })
+        logger.debug(f"Startup phase {name}: {(end - start) * 1000:.0f} ms")
+
+
+def mark(milestone: str):
+    """Record when a startup milestone was reached."""
+    _milestones[milestone] = _elapsed_ms(time.perf_counter())
+
+
+def ready():
+    """The web server is about to answer requests."""
+    mark("ready")
+    logger.info(f"Ready to serve HTTP {_milestones['ready'] / 1000:.2f}s after startup began")
+
+
+def finish():
+    """Background startup work is done: stop timing imports and log the summary."""
+    if _timer in sys.meta_path:
+        sys.meta_path.remove(_timer)
+    mark("complete")
+    log_summary()
+
+
+def report() -> dict:
+    slowest = sorted(_imports.items(), key=lambda item: item[1][0], reverse=True)[:SLOWEST_IMPORTS]
+    return {
+        "milestones_ms": dict(_milestones),
+        "imports": {
+            "count": len(_imports),
+            "total_ms": round(sum(own for own, _ in _imports.values()) * 1000, 1),
+            "slowest": [
+                {"module": name, "self_ms": round(own * 1000, 1), "total_ms": round(total * 1000, 1)}
+                for name, (own, total) in slowest
+            ]
+        },
+        "phases": list(_phases)
+    }
+
+
+def log_summary():
+    profile = report()
+    imports = profile["imports"]
+    milestones = ", ".join(f"{name} at {ms} ms" for name, ms in profile["milestones_ms"].items())
+    logger.info(f"Startup: {milestones}; {imports['count']} modules imported in {imports['total_ms']} ms")
+    for entry in profile["phases"]:
+        where = "background" if entry["background"] else "blocking"
+        logger.info(f"  phase {entry['name']} ({where}): {entry['duration_ms']} ms, {entry['status']}")
+    for entry in imports["slowest"][:LOGGED_IMPORTS]:
+        logger.info(f"  import {entry['module']}: {entry['self_ms']} ms ({entry['total_ms']} ms with dependencies)")
@@ -1,5 +1,6 @@
 # state.py
 import asyncio
+import contextvars
 import threading
 import json
 import os
@@ -10,12 +11,13 @@ from typing import Optional, Literal
 
 logger = logging.getLogger(__name__)
 
-# Debounce timer for state saves (reduces SD card wear on Pi)
-_save_timer = None
+# Guards the debounce timers of state saves (reduces SD card wear on Pi)
 _save_lock = threading.Lock()
 
 class AppState:
-    def __init__(self):
+    def __init__(self, state_file: str = "state.json", settings_file: str = "settings.json"):
+        self.mqtt_handler = None  # Will be set by the MQTT handler
+
         # Private variables for properties
         self._current_playing_file = None
         self._current_coordinates = None  # Cache parsed coordinates for current file (avoids re-parsing large files)
@@ -92,9 +94,16 @@ class AppState:
         # When True, also performs soft reset which clears all position counters
         self.hard_reset_theta = False
 
-        self.STATE_FILE = "state.json"
-        self.SETTINGS_FILE = "settings.json"
-        self.mqtt_handler = None  # Will be set by the MQTT handler
+        # Real-time motion mode (see modules/core/realtime.py), off by default
+        self.realtime_enabled = False
+        self.realtime_policy = "fifo"  # "fifo", "rr" or "nice"
+        self.realtime_priority = 10  # SCHED_FIFO/SCHED_RR priority (1-99)
+        self.realtime_motion_cpu = None  # Core to pin the motion thread to (None = no pinning)
+        self.realtime_led_cpu = None  # Core to pin the LED render thread to
+
+        self.STATE_FILE = state_file
+        self.SETTINGS_FILE = settings_file
+        self._save_timer = None
         self.conn = None
         self.port = None
         self.preferred_port = None  # User's preferred port for auto-connect
@@ -132,6 +141,10 @@ class AppState:
         self._shuffle = False  # Shuffle playlist order
         self.custom_clear_from_in = None  # Custom clear from center pattern
         self.custom_clear_from_out = None  # Custom clear from perimeter pattern
+        self.generated_clears = False  # Generate clear patterns from table geometry instead of shipped files
+        self.clear_ball_diameter_mm = None  # None means the table type's default
+        self.clear_table_radius_mm = None  # None means the table type's default
+        self.clear_ring_overlap = 0.0  # Fraction of the ball width neighbouring clear rings overlap
         
         # Application name setting
         self.app_name = "Dune Weaver"  # Default app name
@@ -144,6 +157,10 @@ class AppState:
         # List of dicts: [{id, name, url, host?, port?, version?}, ...]
         self.known_tables = []
 
+        # Extra tables driven by this process over their own USB controllers (see modules/core/tables.py)
+        # List of dicts: [{id, name, port}, ...]; only used on the default table
+        self.local_tables = []
+
         # Custom branding settings (filenames only, files stored in static/custom/)
         # Favicon is auto-generated from logo as logo-favicon.ico
         self.custom_logo = None  # Custom logo filename (e.g., "logo-abc123.png")
@@ -226,8 +243,8 @@ class AppState:
     @speed.setter
     def speed(self, value):
         self._speed = value
-        if self.mqtt_handler and self.mqtt_handler.is_enabled:
-            self.mqtt_handler.client.publish(f"{self.mqtt_handler.speed_topic}/state", value, retain=True)
+        if self.mqtt_handler:
+            self.mqtt_handler.notify_change()
 
     @property
     def current_playlist(self):
@@ -262,6 +279,8 @@ class AppState:
     @playlist_mode.setter
     def playlist_mode(self, value):
         self._playlist_mode = value
+        if self.mqtt_handler:
+            self.mqtt_handler.notify_change()
 
     @property
     def pause_time(self):
@@ -270,6 +289,8 @@ class AppState:
     @pause_time.setter
     def pause_time(self, value):
         self._pause_time = value
+        if self.mqtt_handler:
+            self.mqtt_handler.notify_change()
 
     @property
     def clear_pattern(self):
@@ -278,6 +299,8 @@ class AppState:
     @clear_pattern.setter
     def clear_pattern(self, value):
         self._clear_pattern = value
+        if self.mqtt_handler:
+            self.mqtt_handler.notify_change()
         
     @property
     def clear_pattern_speed(self):
@@ -460,6 +483,8 @@ class AppState:
     @shuffle.setter
     def shuffle(self, value):
         self._shuffle = value
+        if self.mqtt_handler:
+            self.mqtt_handler.notify_change()
 
     def to_state_dict(self):
         """Return a dictionary of runtime/machine state (transient data)."""
@@ -499,6 +524,11 @@ class AppState:
             "auto_home_enabled": self.auto_home_enabled,
             "auto_home_after_patterns": self.auto_home_after_patterns,
             "hard_reset_theta": self.hard_reset_theta,
+            "realtime_enabled": self.realtime_enabled,
+            "realtime_policy": self.realtime_policy,
+            "realtime_priority": self.realtime_priority,
+            "realtime_motion_cpu": self.realtime_motion_cpu,
+            "realtime_led_cpu": self.realtime_led_cpu,
             "playlist_mode": self._playlist_mode,
             "pause_time": self._pause_time,
             "clear_pattern": self._clear_pattern,
@@ -506,6 +536,10 @@ class AppState:
             "shuffle": self._shuffle,
             "custom_clear_from_in": self.custom_clear_from_in,
             "custom_clear_from_out": self.custom_clear_from_out,
+            "generated_clears": self.generated_clears,
+            "clear_ball_diameter_mm": self.clear_ball_diameter_mm,
+            "clear_table_radius_mm": self.clear_table_radius_mm,
+            "clear_ring_overlap": self.clear_ring_overlap,
             "preferred_port": self.preferred_port,
             "wled_ip": self.wled_ip,
             "led_provider": self.led_provider,
@@ -524,6 +558,7 @@ class AppState:
             "table_id": self.table_id,
             "table_name": self.table_name,
             "known_tables": self.known_tables,
+            "local_tables": self.local_tables,
             "custom_logo": self.custom_logo,
             "auto_play_enabled": self.auto_play_enabled,
             "auto_play_playlist": self.auto_play_playlist,
@@ -605,6 +640,11 @@ class AppState:
         self.auto_home_enabled = data.get('auto_home_enabled', False)
         self.auto_home_after_patterns = data.get('auto_home_after_patterns', 5)
         self.hard_reset_theta = data.get('hard_reset_theta', False)
+        self.realtime_enabled = data.get('realtime_enabled', False)
+        self.realtime_policy = data.get('realtime_policy', "fifo")
+        self.realtime_priority = data.get('realtime_priority', 10)
+        self.realtime_motion_cpu = data.get('realtime_motion_cpu', None)
+        self.realtime_led_cpu = data.get('realtime_led_cpu', None)
         self._playlist_mode = data.get("playlist_mode", "loop")
         self._pause_time = data.get("pause_time", 0)
         self._clear_pattern = data.get("clear_pattern", "none")
@@ -612,6 +652,10 @@ class AppState:
         self._shuffle = data.get("shuffle", False)
         self.custom_clear_from_in = data.get("custom_clear_from_in", None)
         self.custom_clear_from_out = data.get("custom_clear_from_out", None)
+        self.generated_clears = data.get("generated_clears", False)
+        self.clear_ball_diameter_mm = data.get("clear_ball_diameter_mm", None)
+        self.clear_table_radius_mm = data.get("clear_table_radius_mm", None)
+        self.clear_ring_overlap = data.get("clear_ring_overlap", 0.0)
         self.preferred_port = data.get("preferred_port", None)
         self.wled_ip = data.get('wled_ip', None)
         self.led_provider = data.get('led_provider', "none")
@@ -645,6 +689,7 @@ class AppState:
             self.table_id = str(uuid.uuid4())
         self.table_name = data.get("table_name", "Dune Weaver")
         self.known_tables = data.get("known_tables", [])
+        self.local_tables = data.get("local_tables", [])
         self.custom_logo = data.get("custom_logo", None)
         self.auto_play_enabled = data.get("auto_play_enabled", False)
         self.auto_play_playlist = data.get("auto_play_playlist", None)
@@ -703,21 +748,19 @@ class AppState:
         Args:
             delay: Seconds to wait before saving (default 2.0)
         """
-        global _save_timer
         with _save_lock:
             # Cancel any pending save
-            if _save_timer is not None:
-                _save_timer.cancel()
+            if self._save_timer is not None:
+                self._save_timer.cancel()
             # Schedule new save
-            _save_timer = threading.Timer(delay, self._do_debounced_save)
-            _save_timer.daemon = True  # Don't block shutdown
-            _save_timer.start()
+            self._save_timer = threading.Timer(delay, self._do_debounced_save)
+            self._save_timer.daemon = True  # Don't block shutdown
+            self._save_timer.start()
 
     def _do_debounced_save(self):
         """Internal method called by debounce timer."""
-        global _save_timer
         with _save_lock:
-            _save_timer = None
+            self._save_timer = None
         self.save()
         logger.debug("Debounced state save completed")
 
@@ -772,9 +815,34 @@ class AppState:
 
     def reset_state(self):
         """Reset all state variables to their default values."""
-        self.__init__()  # Reinitialize the state
+        self.__init__(self.STATE_FILE, self.SETTINGS_FILE)  # Reinitialize the state
         self.save()
 
 
+# AppState of the table the current request, task or thread belongs to; unset means the
+# default table. Set through modules/core/tables.py, which drives extra tables.
+active_state: contextvars.ContextVar = contextvars.ContextVar("active_state", default=None)
+
+
+class TableStateProxy:
+    """Forwards attribute access to the AppState of the current table."""
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return getattr(active_state.get() or default_state, name)
+
+    def __setattr__(self, name, value):
+        setattr(active_state.get() or default_state, name, value)
+
+    def __delattr__(self, name):
+        delattr(active_state.get() or default_state, name)
+
+    def __repr__(self):
+        return f"<state of table {self.table_id}>"
+
+
+# The default table's state, i.e. the only one on a single-table install
+default_state = AppState()
+
 # Create a singleton instance that you can import elsewhere:
-state = AppState()
\ No newline at end of file
+state = TableStateProxy()
\ No newline at end of file
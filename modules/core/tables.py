@@ -0,0 +1,295 @@
+"""
+Several tables driven from one server process.
+
+A Pi used to drive exactly one table. `state` was a single AppState, and the
+pattern manager had a single motion thread. With more controllers attached over
+USB, each local table now gets a TableEngine holding:
+
+    state            its own AppState, persisted under TABLES_DIR/<id>/
+    connection       state.conn, opened on the table's serial port
+    motion thread    its own MotionControlThread
+    execution loop   its own pattern lock, pause event and progress task
+    playlist runner  its own playlist task
+    position         its own PositionChannel
+    module data      per-table data of other modules, e.g. the checkpoint
+                     journal and the smart clear band (local())
+
+`state` from modules.core.state forwards to the AppState in the active_state
+context variable, or to the default table when it is unset. A request to
+/tables/{table_id}/<route> is served as <route> inside that table's context
+(TableRouteMiddleware), so every existing route works per table. asyncio tasks
+and asyncio.to_thread inherit the context. Threads are started through
+contextvars.copy_context().run. Anything not tied to a table (startup,
+unprefixed routes, LEDs, MQTT) uses the default table, so a single-table
+install behaves as before. The default table answers to DEFAULT_ID as well as
+to its own table ID.
+
+Extra tables are listed in the default table's local_tables setting and start
+from a copy of its settings. LEDs and MQTT stay with the default table.
+
+cpu_report() measures what each table costs: CPU time of its motion thread, the
+process total, and how many tables fit in CPU_BUDGET_PERCENT. All Python code,
+every motion thread included, shares one interpreter lock, so tables share
+about one core however many the Pi has.
+"""
+import asyncio
+import contextlib
+import contextvars
+import logging
+import os
+import shutil
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from modules.core.position_channel import PositionChannel, position_channel
+from modules.core.state import AppState, active_state, default_state
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ID = "default"
+PREFIX = "/tables/"
+TABLES_DIR = os.path.join(os.getcwd(), "tables")
+CPU_BUDGET_PERCENT = 70.0  # Of the one core the interpreter can use; the rest is headroom for the web server
+
+# Settings an extra table does not take over from the default table
+_NOT_COPIED = {"table_id", "table_name", "known_tables", "local_tables", "preferred_port", "led_provider",
+               "wled_ip", "hyperion_ip", "mqtt_enabled", "auto_play_enabled"}
+
+
+class TableEngine:
+    """Everything that drives one table."""
+
+    def __init__(self, table_id: str, app_state: AppState, port: Optional[str] = None,
+                 channel: Optional[PositionChannel] = None):
+        self.id = table_id
+        self.port = port
+        self.state = app_state
+        self.position_channel = channel or PositionChannel()
+        self.motion_controller = None  # Created by pattern_manager.get_motion_controller()
+        self.pattern_lock: Optional[asyncio.Lock] = None
+        self.pause_event: Optional[asyncio.Event] = None
+        self.progress_update_task: Optional[asyncio.Task] = None
+        self.playlist_task: Optional[asyncio.Task] = None
+        self._locals: Dict[str, object] = {}
+
+    @property
+    def name(self) -> str:
+        return self.state.table_name
+
+    @property
+    def is_default(self) -> bool:
+        return self.state is default_state
+
+    def local(self, key: str, factory: Callable[[], object]):
+        """Per-table data of another module, created on first use."""
+        if key not in self._locals:
+            self._locals[key] = factory()
+        return self._locals[key]
+
+    def motion_cpu_seconds(self) -> Optional[float]:
+        """CPU time used by this table's motion thread, where the platform can tell."""
+        thread = self.motion_controller.thread if self.motion_controller else None
+        if thread is None or not thread.is_alive():
+            return None
+        try:
+            return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+        except (AttributeError, OSError):
+            return None
+
+    def summary(self) -> dict:
+        state = self.state
+        return {
+            "id": self.id,
+            "table_id": state.table_id,
+            "name": self.name,
+            "default": self.is_default,
+            "port": state.port if self.is_default else self.port,
+            "connected": state.conn.is_connected() if state.conn else False,
+            "playing": state.current_playing_file,
+            "prefix": f"{PREFIX}{self.id}"
+        }
+
+
+_default = TableEngine(DEFAULT_ID, default_state, channel=position_channel)
+_engines: Dict[str, TableEngine] = {}
+
+
+def current() -> TableEngine:
+    """Engine of the table the running code belongs to."""
+    app_state = active_state.get()
+    if app_state is None or app_state is default_state:
+        return _default
+    for engine in _engines.values():
+        if engine.state is app_state:
+            return engine
+    return _default
+
+
+def local(key: str, factory: Callable[[], object]):
+    """Per-table data for the current table (see TableEngine.local)."""
+    return current().local(key, factory)
+
+
+def get(table_id: str) -> Optional[TableEngine]:
+    if table_id in (DEFAULT_ID, default_state.table_id):
+        return _default
+    return _engines.get(table_id)
+
+
+def all_tables() -> List[TableEngine]:
+    return [_default, *_engines.values()]
+
+
+@contextlib.contextmanager
+def use(engine: TableEngine):
+    """Run the enclosed code as the given table."""
+    token = active_state.set(engine.state)
+    try:
+        yield engine
+    finally:
+        active_state.reset(token)
+
+
+def create_task(engine: TableEngine, coro) -> asyncio.Task:
+    """Start a task that runs as the given table."""
+    context = contextvars.copy_context()
+    context.run(active_state.set, engine.state)
+    return asyncio.create_task(coro, context=context)
+
+
+def usable_ports(ports: List[str]) -> List[str]:
+    """Of the given serial ports, those the current table may connect to on its own.
+
+    An extra table only uses its assigned port; the default table keeps auto-selecting
+    among the ports no extra table is assigned.
+    """
+    engine = current()
+    if not engine.is_default:
+        return [port for port in ports if port == engine.port]
+    claimed = {engine.port for engine in _engines.values()}
+    return [port for port in ports if port not in claimed]
+
+
+def _table_dir(table_id: str) -> str:
+    return os.path.join(TABLES_DIR, table_id)
+
+
+def _open(entry: dict) -> TableEngine:
+    directory = _table_dir(entry["id"])
+    os.makedirs(directory, exist_ok=True)
+    app_state = AppState(os.path.join(directory, "state.json"), os.path.join(directory, "settings.json"))
+    app_state.load()
+    app_state.table_id = entry["id"]
+    app_state.table_name = entry["name"]
+    app_state.preferred_port = entry["port"]
+    return TableEngine(entry["id"], app_state, entry["port"])
+
+
+def load():
+    """Create engines for the extra tables in the default table's settings."""
+    for entry in default_state.local_tables:
+        if entry["id"] not in _engines:
+            try:
+                _engines[entry["id"]] = _open(entry)
+                logger.info(f"Loaded table {entry['name']} on {entry['port']}")
+            except Exception as e:
+                logger.error(f"Could not load table {entry.get('name')} ({entry.get('id')}): {e}")
+
+
+def add(port: str, name: str) -> TableEngine:
+    """Register an extra table on a serial port. Raises ValueError if the port is taken."""
+    port_in_use = [engine.name for engine in _engines.values() if engine.port == port]
+    if default_state.conn and default_state.port == port:
+        port_in_use.append(_default.name)
+    if port_in_use:
+        raise ValueError(f"{port} is already used by {port_in_use[0]}")
+
+    table_id = str(uuid.uuid4())
+    directory = _table_dir(table_id)
+    os.makedirs(directory, exist_ok=True)
+    app_state = AppState(os.path.join(directory, "state.json"), os.path.join(directory, "settings.json"))
+    settings = {key: value for key, value in default_state.to_settings_dict().items() if key not in _NOT_COPIED}
+    app_state.from_settings_dict(settings)
+    app_state.table_id = table_id
+    app_state.table_name = name
+    app_state.preferred_port = port
+    app_state.save()
+
+    entry = {"id": table_id, "name": name, "port": port}
+    _engines[table_id] = TableEngine(table_id, app_state, port)
+    default_state.local_tables = [*default_state.local_tables, entry]
+    default_state.save()
+    logger.info(f"Added table {name} on {port}")
+    return _engines[table_id]
+
+
+def remove(table_id: str):
+    """Forget an extra table; the caller stops it first. Raises KeyError for an unknown table."""
+    engine = _engines.pop(table_id)
+    default_state.local_tables = [entry for entry in default_state.local_tables if entry["id"] != table_id]
+    default_state.save()
+    shutil.rmtree(_table_dir(table_id), ignore_errors=True)
+    logger.info(f"Removed table {engine.name}")
+
+
+async def cpu_report(window: float = 2.0) -> dict:
+    """CPU used per table over the next `window` seconds, and how many tables one process can drive."""
+    tables = all_tables()
+    wall, process = time.monotonic(), time.process_time()
+    motion = {engine.id: engine.motion_cpu_seconds() for engine in tables}
+    await asyncio.sleep(window)
+    elapsed = time.monotonic() - wall
+    process_percent = 100.0 * (time.process_time() - process) / elapsed
+
+    report, active = [], 0
+    for engine in tables:
+        before, after = motion[engine.id], engine.motion_cpu_seconds()
+        playing = bool(engine.state.current_playing_file)
+        active += playing
+        report.append({
+            "id": engine.id,
+            "name": engine.name,
+            "playing": playing,
+            "motion_thread_percent": round(100.0 * (after - before) / elapsed, 2)
+            if before is not None and after is not None else None
+        })
+    per_table = process_percent / active if active else None
+    return {
+        "window": round(elapsed, 2),
+        "cpu_count": os.cpu_count(),
+        "process_percent": round(process_percent, 2),
+        "tables": report,
+        # Conservative: everything the process did is charged to the tables that were drawing
+        "per_active_table_percent": round(per_table, 2) if per_table else None,
+        "estimated_max_tables": int(CPU_BUDGET_PERCENT // per_table) if per_table else None
+    }
+
+
+class TableRouteMiddleware:
+    """Serve /tables/{table_id}/<route> as <route> for that table."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or not scope["path"].startswith(PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        table_id, _, rest = scope["path"][len(PREFIX):].partition("/")
+        engine = get(table_id)
+        if engine is None:
+            if scope["type"] == "http":
+                from starlette.responses import JSONResponse
+                response = JSONResponse({"detail": f"Table '{table_id}' not found"}, status_code=404)
+            else:
+                from starlette.websockets import WebSocketClose
+                response = WebSocketClose(code=1008)
+            await response(scope, receive, send)
+            return
+
+        path = "/" + rest
+        scope = dict(scope, path=path, raw_path=path.encode())
+        with use(engine):
+            await self.app(scope, receive, send)
@@ -0,0 +1,258 @@
+"""
+Streaming upload pipeline for theta-rho patterns.
+
+Uploads are read in chunks and validated line by line as they arrive, the same
+clean-up process_thr does offline: blank and malformed lines, NaN/inf values and
+rho outside the table are dropped (rho within RHO_TOLERANCE of the edge is
+clamped), and consecutive duplicate points are removed. The normalized pattern
+goes to a temporary file next to its destination and is moved into place
+atomically, so a half-uploaded file is never visible to playback or listings.
+
+Parsing happens once: the upload's coordinates feed the metadata cache and the
+binary coordinate cache directly. Preview rendering is queued as a background
+job whose progress is published to subscribers (the /ws/upload-jobs socket).
+"""
+import asyncio
+import codecs
+import logging
+import math
+import os
+import tempfile
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+RHO_TOLERANCE = 0.01  # rho this far outside 0-1 is clamped, beyond it the point is dropped
+COORDINATE_FORMAT = "{:.5f} {:.5f}\n"
+PREVIEW_RETRIES = 3
+MAX_FINISHED_JOBS = 50  # Finished jobs kept for late subscribers and polling
+
+
+class UploadError(ValueError):
+    """The upload was rejected; the message is safe to show to the user."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class PatternValidator:
+    """Incrementally validates and normalizes theta-rho text fed in arbitrary chunks."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._partial = ""
+        self._previous = None
+        self.thetas = array("d")
+        self.rhos = array("d")
+        self.stats = {
+            "lines": 0,
+            "points": 0,
+            "comments": 0,
+            "invalid": 0,
+            "non_finite": 0,
+            "rho_clamped": 0,
+            "rho_out_of_range": 0,
+            "duplicates": 0
+        }
+
+    def feed(self, chunk: bytes, final: bool = False) -> str:
+        """Validate a chunk, returns the normalized text for the complete lines in it."""
+        text = self._partial + self._decoder.decode(chunk, final)
+        lines = text.split("\n")
+        self._partial = "" if final else lines.pop()
+        return "".join(self._normalize(line) for line in lines)
+
+    def _normalize(self, line: str) -> str:
+        line = line.strip()
+        if not line:
+            return ""
+        self.stats["lines"] += 1
+        if line.startswith("#"):
+            self.stats["comments"] += 1
+            return line + "\n"  # Keep credits and other notes
+
+        parts = line.split()
+        try:
+            if len(parts) != 2:
+                raise ValueError
+            theta, rho = float(parts[0]), float(parts[1])
+        except ValueError:
+            self.stats["invalid"] += 1
+            return ""
+        if not (math.isfinite(theta) and math.isfinite(rho)):
+            self.stats["non_finite"] += 1
+            return ""
+        if rho < 0.0 or rho > 1.0:
+            if rho < -RHO_TOLERANCE or rho > 1.0 + RHO_TOLERANCE:
+                self.stats["rho_out_of_range"] += 1
+                return ""
+            rho = min(1.0, max(0.0, rho))
+            self.stats["rho_clamped"] += 1
+
+        normalized = COORDINATE_FORMAT.format(theta, rho)
+        if normalized == self._previous:
+            self.stats["duplicates"] += 1
+            return ""
+        self._previous = normalized
+        self.thetas.append(theta)
+        self.rhos.append(rho)
+        self.stats["points"] += 1
+        return normalized
+
+    @property
+    def coordinates(self) -> List[tuple]:
+        return list(zip(self.thetas, self.rhos))
+
+    @property
+    def metadata(self) -> Optional[dict]:
+        """first/last coordinate and count, in the metadata cache format"""
+        if not self.thetas:
+            return None
+        return {
+            "first_coordinate": {"x": self.thetas[0], "y": self.rhos[0]},
+            "last_coordinate": {"x": self.thetas[-1], "y": self.rhos[-1]},
+            "total_coordinates": len(self.thetas)
+        }
+
+
+def sanitize_filename(filename: Optional[str]) -> str:
+    """Upload name without any directory part; pattern files keep their .thr extension."""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if not name or name in (".", ".."):
+        raise UploadError("Missing file name")
+    return name
+
+
+async def receive_pattern(upload, dest_dir: str, filename: str) -> PatternValidator:
+    """
+    Stream an UploadFile into dest_dir/filename, validating as it goes.
+    Raises UploadError if the file is too large or contains no valid coordinates.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    validator = PatternValidator()
+    fd, temp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-", suffix=".part")
+    received = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as out:
+            def _process(chunk, final):
+                out.write(validator.feed(chunk, final))
+
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                received += len(chunk)
+                if received > MAX_UPLOAD_BYTES:
+                    raise UploadError(f"File is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB", status_code=413)
+                # Parsing a chunk is CPU work; keep it off the event loop
+                await asyncio.to_thread(_process, chunk, not chunk)
+                if not chunk:
+                    break
+
+        if validator.stats["points"] == 0:
+            raise UploadError("No valid theta-rho coordinates found")
+        os.replace(temp_path, os.path.join(dest_dir, filename))
+        return validator
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class UploadJobs:
+    """Background preview jobs for uploads, with progress pushed to subscribers."""
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._subscribers: List[asyncio.Queue] = []
+
+    def create(self, pattern_file: str, stats: Dict[str, int]) -> dict:
+        job = {
+            "id": uuid.uuid4().hex,
+            "file": pattern_file,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0,
+            "error": None,
+            "stats": stats,
+            "created": time.time()
+        }
+        self._jobs[job["id"]] = job
+        self._prune()
+        self._notify(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[dict]:
+        return list(self._jobs.values())
+
+    def update(self, job: dict, **changes):
+        job.update(changes)
+        self._notify(job)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def _notify(self, job: dict):
+        snapshot = dict(job)
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(snapshot)
+            except asyncio.QueueFull:
+                pass  # Subscriber is not reading; it can catch up from the job list
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+upload_jobs = UploadJobs()
+
+
+async def run_preview_job(job: dict, validator: PatternValidator, jobs: UploadJobs = upload_jobs):
+    """Cache metadata and compiled coordinates, then render the preview image."""
+    from modules.core import cache_manager
+    from modules.core.cache_jobs import cache_jobs
+    from modules.core.coordinate_codec import coordinate_cache
+    from modules.core.pattern_manager import THETA_RHO_DIR
+
+    pattern_file = job["file"]
+    try:
+        jobs.update(job, status="running", stage="metadata", progress=10)
+        metadata = validator.metadata
+        await cache_manager.cache_pattern_metadata(
+            pattern_file, metadata["first_coordinate"], metadata["last_coordinate"], metadata["total_coordinates"]
+        )
+
+        jobs.update(job, stage="coordinates", progress=30)
+        coordinates = validator.coordinates
+        await asyncio.to_thread(coordinate_cache.get, os.path.join(THETA_RHO_DIR, pattern_file), lambda: coordinates)
+
+        jobs.update(job, stage="preview", progress=50)
+        for attempt in range(PREVIEW_RETRIES):
+            if await cache_jobs.request(pattern_file):
+                jobs.update(job, status="done", stage="done", progress=100)
+                logger.info(f"Preview generated for uploaded pattern {pattern_file}")
+                return
+            logger.warning(f"Preview generation failed for {pattern_file} (attempt {attempt + 1}/{PREVIEW_RETRIES})")
+            await asyncio.sleep(0.5)
+        jobs.update(job, status="failed", stage="preview", error="Preview generation failed")
+    except Exception as e:
+        logger.error(f"Upload job for {pattern_file} failed: {str(e)}")
+        jobs.update(job, status="failed", error=str(e))
@@ -8,7 +8,6 @@ Testing overrides (environment variables):
 """
 
 import asyncio
-import aiohttp
 import os
 import time
 from pathlib import Path
@@ -67,6 +66,8 @@ class VersionManager:
         # Cache miss or expired - fetch from GitHub
         logger.info("Fetching latest release from GitHub API")
         try:
+            import aiohttp  # Only needed for update checks; slow to import on a Pi
+
             async with aiohttp.ClientSession() as session:
                 async with session.get(
                     f"{self.github_api_url}/releases/latest",
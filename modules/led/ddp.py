@@ -0,0 +1,81 @@
+"""
+DDP (Distributed Display Protocol) realtime output for WLED.
+
+Pushes raw pixel data to a WLED device over UDP port 4048, bypassing the JSON
+API. WLED shows DDP frames in realtime mode until they stop arriving, so this
+path suits per-frame updates (ball-following effects, live previews) that
+would overwhelm HTTP.
+
+Packet layout (10-byte header, big-endian):
+    flags (version 1, push on last packet), sequence (1-15), data type,
+    destination id, data offset (4 bytes), data length (2 bytes), data
+"""
+import socket
+import struct
+from typing import Optional
+
+DDP_PORT = 4048
+DDP_HEADER = struct.Struct(">BBBBIH")
+DDP_MAX_DATA = 1440  # 480 RGB or 360 RGBW pixels per packet, fits a 1500 byte MTU
+DDP_FLAGS_VER1 = 0x40
+DDP_FLAGS_PUSH = 0x01
+DDP_TYPE_RGB24 = 0x0B
+DDP_TYPE_RGBW32 = 0x1B
+DDP_ID_DISPLAY = 1
+
+
+def pixels_to_bytes(pixels) -> bytes:
+    """Flatten pixels (bytes, a NumPy uint8 array or an iterable of tuples) to raw channel bytes"""
+    if isinstance(pixels, (bytes, bytearray, memoryview)):
+        return bytes(pixels)
+    if hasattr(pixels, "tobytes"):
+        return pixels.astype("uint8").tobytes()
+    return bytes(channel for pixel in pixels for channel in pixel)
+
+
+class DDPSender:
+    """Sends frames to one WLED device over DDP."""
+
+    def __init__(self, host: str, port: int = DDP_PORT, rgbw: bool = False):
+        self.host = host
+        self.port = port
+        self.rgbw = rgbw
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sequence = 0
+        self.frames_sent = 0
+        self.packets_sent = 0
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        return 4 if self.rgbw else 3
+
+    def send_frame(self, pixels) -> int:
+        """Send one frame, split into as many packets as needed. Returns packets sent."""
+        data = pixels_to_bytes(pixels)
+        if not data:
+            return 0
+
+        # Sequence numbers cycle 1-15 (0 means "not used" in DDP)
+        self._sequence = self._sequence % 15 + 1
+        data_type = DDP_TYPE_RGBW32 if self.rgbw else DDP_TYPE_RGB24
+        packets = 0
+        for offset in range(0, len(data), DDP_MAX_DATA):
+            chunk = data[offset:offset + DDP_MAX_DATA]
+            flags = DDP_FLAGS_VER1
+            if offset + len(chunk) >= len(data):
+                flags |= DDP_FLAGS_PUSH  # Display the frame once the last packet lands
+            header = DDP_HEADER.pack(flags, self._sequence, data_type, DDP_ID_DISPLAY, offset, len(chunk))
+            self._socket.sendto(header + chunk, (self.host, self.port))
+            packets += 1
+
+        self.frames_sent += 1
+        self.packets_sent += packets
+        return packets
+
+    def send_color(self, r: int, g: int, b: int, count: int, w: Optional[int] = None) -> int:
+        """Fill count pixels with one color"""
+        pixel = (r, g, b, w or 0) if self.rgbw else (r, g, b)
+        return self.send_frame(bytes(pixel) * count)
+
+    def close(self):
+        self._socket.close()
@@ -2,14 +2,19 @@
 Dune Weaver LED Controller - Embedded NeoPixel LED controller for Raspberry Pi
 Provides direct GPIO control of WS2812B LED strips with beautiful effects
 """
+import os
 import threading
 import time
 import logging
-from typing import Optional, Dict, List, Tuple
+from collections import deque
+from typing import Callable, Optional, Dict, List, Tuple
 from .dw_leds.segment import Segment
+from .dw_leds.backends import get_backend
 from .dw_leds.effects.basic_effects import get_effect, get_all_effects
 from .dw_leds.utils.palettes import get_palette_name, PALETTE_NAMES
 from .dw_leds.utils.colors import rgb_to_color
+from modules.core.position_channel import position_channel
+from modules.core import realtime
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +23,8 @@ class DWLEDController:
     """Dune Weaver LED Controller for NeoPixel LED strips"""
 
     def __init__(self, num_leds: int = 60, gpio_pin: int = 18, brightness: float = 0.35,
-                 pixel_order: str = "GRB", speed: int = 128, intensity: int = 128):
+                 pixel_order: str = "GRB", speed: int = 128, intensity: int = 128,
+                 target_fps: int = 60, pixel_factory: Optional[Callable] = None):
         """
         Initialize Dune Weaver LED controller
 
@@ -29,6 +35,10 @@ class DWLEDController:
             pixel_order: Pixel color order (GRB, RGB, RGBW, GRBW)
             speed: Effect speed 0-255 (default: 128)
             intensity: Effect intensity 0-255 (default: 128)
+            target_fps: Render loop frame rate cap (default: 60)
+            pixel_factory: Optional pixel backend factory (num_leds, brightness=, pixel_order=)
+                used instead of the NeoPixel hardware, e.g. backends.create_memory_pixels.
+                Defaults to the backend named by DW_LED_BACKEND, if set.
         """
         self.num_leds = num_leds
         self.gpio_pin = gpio_pin
@@ -52,15 +62,83 @@ class DWLEDController:
         self._segment = None
         self._effect_thread = None
         self._stop_thread = threading.Event()
-        self._lock = threading.Lock()
+        self._wake = threading.Event()  # Set on power on, parameter changes and stop
+        self._lock = threading.Lock()  # Guards the hardware push (commit + show)
+        self._pending = deque()  # Segment updates applied by the render thread between frames
+        self._render_effect_id = self._current_effect_id  # Effect the render thread is running
+        self._render_uses_position = False  # Running effect follows the ball
+        self._position_pending = False  # A new ball position arrived since the last frame
+
+        # Frame pacing
+        self.target_fps = max(1, target_fps)
+        self._frame_interval = 1.0 / self.target_fps
+        self._frame_stats = {
+            "frames": 0,
+            "dropped_frames": 0,
+            "frame_time_ms": 0.0,
+            "max_frame_time_ms": 0.0,
+            "fps": 0.0,
+            "position_latency_ms": 0.0,
+            "max_position_latency_ms": 0.0,
+            "position_updates": 0,
+            "late_position_updates": 0
+        }
         self._initialized = False
         self._init_error = None  # Store initialization error message
+        self._pixel_factory = pixel_factory
+
+    def _create_segment(self):
+        """Create the segment for the entire strip with the current settings"""
+        self._segment = Segment(self._pixels, 0, self.num_leds, is_rgbw=self.is_rgbw)
+        self._segment.speed = self._speed
+        self._segment.intensity = self._intensity
+        self._segment.palette_id = self._current_palette_id
+
+        # Set colors
+        self._segment.colors[0] = rgb_to_color(*self._color1)
+        self._segment.colors[1] = rgb_to_color(*self._color2)
+        self._segment.colors[2] = rgb_to_color(*self._color3)
+        self._render_effect_id = self._current_effect_id
+
+        # Position effects read the motion thread's channel directly
+        self._segment.position = position_channel
+        position_channel.remove_listener(self._on_position)
+        position_channel.add_listener(self._on_position)
+
+    def _initialize_backend(self) -> bool:
+        """Initialize a non-hardware pixel backend (pixel_factory or DW_LED_BACKEND)"""
+        factory = self._pixel_factory
+        if factory is None:
+            backend_name = os.getenv("DW_LED_BACKEND", "").strip()
+            factory = get_backend(backend_name)
+            if factory is None:
+                error_msg = f"Unknown DW_LED_BACKEND '{backend_name}'"
+                self._init_error = error_msg
+                logger.error(error_msg)
+                return False
+
+        try:
+            self._pixels = factory(self.num_leds, brightness=self.brightness, pixel_order=self.pixel_order)
+            self._create_segment()
+        except Exception as e:
+            error_msg = f"Failed to initialize LED backend: {e}"
+            self._init_error = error_msg
+            logger.error(error_msg)
+            return False
+
+        self._initialized = True
+        logger.info(f"DW LEDs initialized: {self.num_leds} LEDs on {type(self._pixels).__name__} backend")
+        return True
 
     def _initialize_hardware(self):
         """Lazy initialization of NeoPixel hardware"""
         if self._initialized:
             return True
 
+        backend_name = os.getenv("DW_LED_BACKEND", "").strip().lower()
+        if self._pixel_factory is not None or backend_name not in ("", "neopixel"):
+            return self._initialize_backend()
+
         # Try standard NeoPixel library first (works on Pi 4 and earlier)
         # If that fails, fall back to Pi 5-specific library
         neopixel_module = None
@@ -118,15 +196,7 @@ class DWLEDController:
             )
 
             # Create segment for the entire strip
-            self._segment = Segment(self._pixels, 0, self.num_leds, is_rgbw=self.is_rgbw)
-            self._segment.speed = self._speed
-            self._segment.intensity = self._intensity
-            self._segment.palette_id = self._current_palette_id
-
-            # Set colors
-            self._segment.colors[0] = rgb_to_color(*self._color1)
-            self._segment.colors[1] = rgb_to_color(*self._color2)
-            self._segment.colors[2] = rgb_to_color(*self._color3)
+            self._create_segment()
 
             self._initialized = True
             library_type = "Pi 5 (PIO)" if using_pi5_library else "standard"
@@ -139,28 +209,134 @@ class DWLEDController:
             logger.error(error_msg)
             return False
 
+    def _queue_update(self, update: Callable[[Segment], None]):
+        """Queue a segment update for the render thread and wake it"""
+        self._pending.append(update)
+        self._wake.set()
+
+    def _apply_pending(self, segment: Segment) -> bool:
+        """Apply queued segment updates (render thread only), returns True if any were applied"""
+        applied = False
+        while self._pending:
+            self._pending.popleft()(segment)
+            applied = True
+        return applied
+
+    def _ensure_effect_thread(self):
+        """Start the render thread if it is not running"""
+        if self._effect_thread is None or not self._effect_thread.is_alive():
+            self._stop_thread.clear()
+            self._effect_thread = threading.Thread(target=self._effect_loop, daemon=True)
+            self._effect_thread.start()
+        self._wake.set()
+
+    def _on_position(self, sample):
+        """Motion thread callback: wake the render thread when a position effect is running"""
+        if self._render_uses_position and self._powered_on:
+            self._position_pending = True
+            self._wake.set()
+
+    def _record_position_latency(self, latency: float):
+        """Update acknowledgement-to-LED latency counters"""
+        stats = self._frame_stats
+        latency_ms = latency * 1000.0
+        stats["position_updates"] += 1
+        if latency > self._frame_interval:
+            stats["late_position_updates"] += 1
+        stats["position_latency_ms"] = (latency_ms if stats["position_updates"] == 1
+                                        else stats["position_latency_ms"] * 0.9 + latency_ms * 0.1)
+        stats["max_position_latency_ms"] = max(stats["max_position_latency_ms"], latency_ms)
+
+    def _record_frame(self, frame_time: float, dropped: int):
+        """Update frame-time and dropped-frame counters"""
+        stats = self._frame_stats
+        frame_ms = frame_time * 1000.0
+        stats["frames"] += 1
+        stats["dropped_frames"] += dropped
+        # Exponential moving average keeps the reading stable between status polls
+        stats["frame_time_ms"] = frame_ms if stats["frames"] == 1 else stats["frame_time_ms"] * 0.9 + frame_ms * 0.1
+        stats["max_frame_time_ms"] = max(stats["max_frame_time_ms"], frame_ms)
+
     def _effect_loop(self):
-        """Background thread that runs the current effect"""
+        """
+        Background render thread
+
+        Frames are scheduled against deadlines: the next frame is due one effect delay
+        (never less than one frame interval) after the previous deadline, so render and
+        show time do not accumulate as drift. Effects render into the segment framebuffer
+        (the back buffer) without holding the lock; only the push to the strip is locked.
+
+        Ball-synchronized effects are also woken by the position channel, so a new
+        position is drawn as soon as the frame rate cap allows rather than on the
+        effect's next scheduled frame.
+        """
+        deadline = time.monotonic()
+        fps_window_start = deadline
+        fps_window_frames = 0
+        last_frame_start = deadline - self._frame_interval
+        last_position_seq = None
+        realtime.register_thread("led")
+
         while not self._stop_thread.is_set():
             try:
+                segment = self._segment
+                if not (self._powered_on and segment and self._pixels):
+                    # Sleep until powered on (or stopped) instead of polling
+                    self._frame_stats["fps"] = 0.0
+                    self._wake.wait()
+                    self._wake.clear()
+                    deadline = fps_window_start = time.monotonic()
+                    fps_window_frames = 0
+                    continue
+
+                now = time.monotonic()
+                if now < deadline:
+                    self._wake.wait(deadline - now)
+                    self._wake.clear()
+                    # Parameter changes render on the next pass instead of after the effect delay
+                    if self._apply_pending(segment):
+                        deadline = time.monotonic()
+                    elif self._position_pending:
+                        # New ball position: render once the frame rate cap allows
+                        self._position_pending = False
+                        deadline = min(deadline, max(last_frame_start + self._frame_interval, time.monotonic()))
+                    continue
+
+                self._apply_pending(segment)
+                self._position_pending = False
+                frame_start = last_frame_start = now
+
+                # Render into the back buffer
+                effect_func = get_effect(self._render_effect_id)
+                self._render_uses_position = getattr(effect_func, "uses_position", False)
+                delay_ms = effect_func(segment)
+                segment.call += 1
+
+                # Push to the strip
                 with self._lock:
-                    if self._pixels and self._segment and self._powered_on:
-                        # Get current effect function (allows dynamic effect switching)
-                        effect_func = get_effect(self._current_effect_id)
-
-                        # Run effect and get delay
-                        delay_ms = effect_func(self._segment)
-
-                        # Update pixels
+                    if self._powered_on and self._pixels:
+                        segment.commit()
                         self._pixels.show()
 
-                        # Increment call counter
-                        self._segment.call += 1
-                    else:
-                        delay_ms = 100  # Idle delay when off
-
-                # Sleep for the effect's requested delay
-                time.sleep(delay_ms / 1000.0)
+                frame_end = time.monotonic()
+                deadline += max(delay_ms / 1000.0, self._frame_interval)
+                dropped = 0
+                if frame_end > deadline:
+                    # Behind schedule: count the missed frames and resync instead of bursting
+                    dropped = int((frame_end - deadline) // self._frame_interval)
+                    deadline = frame_end
+                self._record_frame(frame_end - frame_start, dropped)
+
+                sample = segment.position_sample if self._render_uses_position else None
+                if sample is not None and sample.seq != last_position_seq:
+                    last_position_seq = sample.seq
+                    self._record_position_latency(frame_end - sample.timestamp)
+
+                fps_window_frames += 1
+                if frame_end - fps_window_start >= 1.0:
+                    self._frame_stats["fps"] = fps_window_frames / (frame_end - fps_window_start)
+                    fps_window_start = frame_end
+                    fps_window_frames = 0
 
             except Exception as e:
                 logger.error(f"Error in effect loop: {e}")
@@ -193,11 +369,10 @@ class DWLEDController:
                 self._pixels.fill(self._off_color)
                 self._pixels.show()
 
-            # Start effect thread if not running
-            if self._powered_on and (self._effect_thread is None or not self._effect_thread.is_alive()):
-                self._stop_thread.clear()
-                self._effect_thread = threading.Thread(target=self._effect_loop, daemon=True)
-                self._effect_thread.start()
+        if self._powered_on:
+            self._ensure_effect_thread()
+        else:
+            self._queue_update(lambda segment: segment.clear())
 
         return {
             "connected": True,
@@ -246,23 +421,21 @@ class DWLEDController:
             if not self._initialize_hardware():
                 return {"connected": False, "error": self._init_error or "Hardware not initialized"}
 
-        with self._lock:
-            self._color1 = (r, g, b)
-            if self._segment:
-                self._segment.colors[0] = rgb_to_color(r, g, b)
-                # Switch to static effect
-                self._current_effect_id = 0
-                self._segment.reset()
-
-            # Auto power on when setting color
-            if not self._powered_on:
-                self._powered_on = True
-
-            # Ensure effect thread is running
-            if self._effect_thread is None or not self._effect_thread.is_alive():
-                self._stop_thread.clear()
-                self._effect_thread = threading.Thread(target=self._effect_loop, daemon=True)
-                self._effect_thread.start()
+        self._color1 = (r, g, b)
+        # Switch to static effect
+        self._current_effect_id = 0
+        color = rgb_to_color(r, g, b)
+
+        def update(segment):
+            segment.colors[0] = color
+            self._render_effect_id = 0
+            segment.reset()
+
+        self._queue_update(update)
+
+        # Auto power on when setting color
+        self._powered_on = True
+        self._ensure_effect_thread()
 
         return {
             "connected": True,
@@ -290,28 +463,30 @@ class DWLEDController:
                 return {"connected": False, "error": self._init_error or "Hardware not initialized"}
 
         colors_set = []
-        with self._lock:
-            if color1 is not None:
-                self._color1 = color1
-                if self._segment:
-                    self._segment.colors[0] = rgb_to_color(*color1)
-                colors_set.append(f"color1={color1}")
-
-            if color2 is not None:
-                self._color2 = color2
-                if self._segment:
-                    self._segment.colors[1] = rgb_to_color(*color2)
-                colors_set.append(f"color2={color2}")
-
-            if color3 is not None:
-                self._color3 = color3
-                if self._segment:
-                    self._segment.colors[2] = rgb_to_color(*color3)
-                colors_set.append(f"color3={color3}")
-
-            # Reset effect to apply new colors
-            if self._segment and colors_set:
-                self._segment.reset()
+        slot_colors = {}
+        if color1 is not None:
+            self._color1 = color1
+            slot_colors[0] = rgb_to_color(*color1)
+            colors_set.append(f"color1={color1}")
+
+        if color2 is not None:
+            self._color2 = color2
+            slot_colors[1] = rgb_to_color(*color2)
+            colors_set.append(f"color2={color2}")
+
+        if color3 is not None:
+            self._color3 = color3
+            slot_colors[2] = rgb_to_color(*color3)
+            colors_set.append(f"color3={color3}")
+
+        # Reset effect to apply new colors
+        if slot_colors:
+            def update(segment):
+                for slot, color in slot_colors.items():
+                    segment.colors[slot] = color
+                segment.reset()
+
+            self._queue_update(update)
 
         return {
             "connected": True,
@@ -348,32 +523,25 @@ class DWLEDController:
                 "message": f"Invalid effect ID: {effect_id}"
             }
 
-        with self._lock:
-            self._current_effect_id = effect_id
-
-            if speed is not None:
-                self._speed = max(0, min(255, speed))
-                if self._segment:
-                    self._segment.speed = self._speed
-
-            if intensity is not None:
-                self._intensity = max(0, min(255, intensity))
-                if self._segment:
-                    self._segment.intensity = self._intensity
-
+        self._current_effect_id = effect_id
+        if speed is not None:
+            self._speed = max(0, min(255, speed))
+        if intensity is not None:
+            self._intensity = max(0, min(255, intensity))
+        new_speed, new_intensity = self._speed, self._intensity
+
+        def update(segment):
+            self._render_effect_id = effect_id
+            segment.speed = new_speed
+            segment.intensity = new_intensity
             # Reset effect state
-            if self._segment:
-                self._segment.reset()
+            segment.reset()
 
-            # Auto power on when setting effect
-            if not self._powered_on:
-                self._powered_on = True
+        self._queue_update(update)
 
-            # Ensure effect thread is running
-            if self._effect_thread is None or not self._effect_thread.is_alive():
-                self._stop_thread.clear()
-                self._effect_thread = threading.Thread(target=self._effect_loop, daemon=True)
-                self._effect_thread.start()
+        # Auto power on when setting effect
+        self._powered_on = True
+        self._ensure_effect_thread()
 
         effect_name = next(name for eid, name in effects if eid == effect_id)
         return {
@@ -404,20 +572,12 @@ class DWLEDController:
                 "message": f"Invalid palette ID: {palette_id}"
             }
 
-        with self._lock:
-            self._current_palette_id = palette_id
-            if self._segment:
-                self._segment.palette_id = palette_id
-
-            # Auto power on when setting palette
-            if not self._powered_on:
-                self._powered_on = True
+        self._current_palette_id = palette_id
+        self._queue_update(lambda segment: setattr(segment, "palette_id", palette_id))
 
-            # Ensure effect thread is running
-            if self._effect_thread is None or not self._effect_thread.is_alive():
-                self._stop_thread.clear()
-                self._effect_thread = threading.Thread(target=self._effect_loop, daemon=True)
-                self._effect_thread.start()
+        # Auto power on when setting palette
+        self._powered_on = True
+        self._ensure_effect_thread()
 
         palette_name = get_palette_name(palette_id)
         return {
@@ -436,12 +596,14 @@ class DWLEDController:
 
         speed = max(0, min(255, speed))
 
-        with self._lock:
-            self._speed = speed
-            if self._segment:
-                self._segment.speed = speed
-                # Reset effect state so speed change takes effect immediately
-                self._segment.reset()
+        self._speed = speed
+
+        def update(segment):
+            segment.speed = speed
+            # Reset effect state so speed change takes effect immediately
+            segment.reset()
+
+        self._queue_update(update)
 
         return {
             "connected": True,
@@ -457,12 +619,14 @@ class DWLEDController:
 
         intensity = max(0, min(255, intensity))
 
-        with self._lock:
-            self._intensity = intensity
-            if self._segment:
-                self._segment.intensity = intensity
-                # Reset effect state so intensity change takes effect immediately
-                self._segment.reset()
+        self._intensity = intensity
+
+        def update(segment):
+            segment.intensity = intensity
+            # Reset effect state so intensity change takes effect immediately
+            segment.reset()
+
+        self._queue_update(update)
 
         return {
             "connected": True,
@@ -484,6 +648,10 @@ class DWLEDController:
         if not self._initialized:
             self._initialize_hardware()
 
+        return self.get_cached_status()
+
+    def get_cached_status(self) -> Dict:
+        """Get current controller status from memory, without touching hardware"""
         # Get color slots from segment if available
         colors = []
         if self._segment and hasattr(self._segment, 'colors'):
@@ -507,7 +675,19 @@ class DWLEDController:
             "speed": self._speed,
             "intensity": self._intensity,
             "colors": colors,
-            "effect_running": self._effect_thread is not None and self._effect_thread.is_alive()
+            "effect_running": self._effect_thread is not None and self._effect_thread.is_alive(),
+            "render": {
+                "target_fps": self.target_fps,
+                "fps": round(self._frame_stats["fps"], 1),
+                "frame_time_ms": round(self._frame_stats["frame_time_ms"], 2),
+                "max_frame_time_ms": round(self._frame_stats["max_frame_time_ms"], 2),
+                "frames": self._frame_stats["frames"],
+                "dropped_frames": self._frame_stats["dropped_frames"],
+                "position_latency_ms": round(self._frame_stats["position_latency_ms"], 2),
+                "max_position_latency_ms": round(self._frame_stats["max_position_latency_ms"], 2),
+                "position_updates": self._frame_stats["position_updates"],
+                "late_position_updates": self._frame_stats["late_position_updates"]
+            }
         }
 
         # Include error message if not initialized
@@ -519,6 +699,8 @@ class DWLEDController:
     def stop(self):
         """Stop the effect loop and cleanup"""
         self._stop_thread.set()
+        self._wake.set()
+        position_channel.remove_listener(self._on_position)
         if self._effect_thread and self._effect_thread.is_alive():
             self._effect_thread.join(timeout=1.0)
 
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Pixel backends for the DW LED controller
+
+A backend is a factory that returns an object behaving like neopixel.NeoPixel:
+slice assignment of RGB/RGBW tuples, fill(), show(), deinit() and a brightness
+attribute. The hardware NeoPixel drivers are set up by DWLEDController itself;
+the backends here let effects run and be profiled without GPIO.
+
+Select one with DW_LED_BACKEND=memory or DWLEDController(pixel_factory=...).
+"""
+from typing import Callable, Dict, List, Optional
+
+
+class MemoryPixels(list):
+    """In-memory stand-in for neopixel.NeoPixel that can record every shown frame"""
+
+    def __init__(self, num_leds: int, bpp: int = 3, brightness: float = 1.0,
+                 pixel_order: str = "GRB", record: bool = False, max_frames: Optional[int] = None):
+        """
+        num_leds: number of pixels
+        bpp: bytes per pixel (3 for RGB, 4 for RGBW)
+        record: keep a copy of the pixels each time show() is called
+        max_frames: keep only the most recent frames when recording
+        """
+        super().__init__([(0,) * bpp] * num_leds)
+        self.bpp = bpp
+        self.brightness = brightness
+        self.pixel_order = pixel_order
+        self.record = record
+        self.max_frames = max_frames
+        self.frames: List[List[tuple]] = []
+        self.show_count = 0
+
+    def fill(self, color):
+        self[:] = [tuple(color)] * len(self)
+
+    def show(self):
+        self.show_count += 1
+        if self.record:
+            self.frames.append(list(self))
+            if self.max_frames is not None and len(self.frames) > self.max_frames:
+                del self.frames[0]
+
+    def deinit(self):
+        pass
+
+
+def create_memory_pixels(num_leds: int, brightness: float = 1.0, pixel_order: str = "GRB",
+                         record: bool = False) -> MemoryPixels:
+    """Factory for MemoryPixels matching the NeoPixel constructor arguments"""
+    bpp = 4 if "W" in pixel_order.upper() else 3
+    return MemoryPixels(num_leds, bpp, brightness=brightness, pixel_order=pixel_order, record=record)
+
+
+BACKENDS: Dict[str, Callable] = {
+    "memory": create_memory_pixels,
+}
+
+
+def get_backend(name: str) -> Optional[Callable]:
+    """Get a pixel factory by name, or None if unknown"""
+    return BACKENDS.get(name.strip().lower())
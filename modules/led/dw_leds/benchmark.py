@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the DW LED effects
+
+Runs every effect in EFFECTS against the in-memory pixel backend (no GPIO needed)
+and reports milliseconds per frame, achievable frames per second and the peak
+memory allocated per frame, including the framebuffer commit.
+
+Frames are rendered against a simulated clock that advances by each effect's
+requested delay, with a fixed random seed per effect, so runs are reproducible.
+With --dump the frames are saved as PNG strips (one row per frame); --compare
+checks a new run against an earlier dump to catch visual regressions.
+
+Usage: python -m modules.led.dw_leds.benchmark [--frames N] [--leds 60,300,1000]
+           [--orders GRB,GRBW] [--effects 8,25] [--dump DIR] [--compare DIR]
+"""
+import argparse
+import math
+import os
+import random
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from .backends import MemoryPixels, create_memory_pixels
+from .effects.basic_effects import EFFECTS
+from .segment import Segment
+
+
+class SimulatedClock:
+    """Replacement for Segment.now() that advances by the delay each effect asks for"""
+
+    def __init__(self):
+        self.ms = 0
+
+    def __call__(self) -> int:
+        return self.ms
+
+    def advance(self, delay_ms: int):
+        self.ms += max(1, int(delay_ms))
+
+
+class SimulatedBall:
+    """Position source for ball-synchronized effects: one turn every 8 s, rho in and out every 20 s"""
+
+    def __init__(self, clock: SimulatedClock):
+        self.clock = clock
+
+    def read(self) -> SimpleNamespace:
+        seconds = self.clock.ms / 1000.0
+        return SimpleNamespace(theta=seconds * math.pi / 4,
+                               rho=0.5 - 0.5 * math.cos(seconds * math.pi / 10),
+                               timestamp=seconds, seq=self.clock.ms)
+
+
+def _make_segment(num_leds: int, pixel_order: str, record: bool = False):
+    pixels = create_memory_pixels(num_leds, pixel_order=pixel_order, record=record)
+    segment = Segment(pixels, 0, num_leds, is_rgbw=pixels.bpp == 4)
+    clock = SimulatedClock()
+    segment.now = clock
+    segment.position = SimulatedBall(clock)
+    return pixels, segment, clock
+
+
+def render_frames(effect_id: int, num_leds: int, frames: int, pixel_order: str = "GRB",
+                  record: bool = False) -> MemoryPixels:
+    """Render frames of one effect into a memory backend, returns the pixels"""
+    pixels, segment, clock = _make_segment(num_leds, pixel_order, record)
+    effect_func = EFFECTS[effect_id][1]
+    random.seed(effect_id)
+    for _ in range(frames):
+        delay_ms = effect_func(segment)
+        segment.commit()
+        pixels.show()
+        segment.call += 1
+        clock.advance(delay_ms)
+    return pixels
+
+
+def benchmark_effect(effect_id: int, num_leds: int, frames: int = 200,
+                     pixel_order: str = "GRB", alloc_frames: int = 20) -> Dict[str, float]:
+    """
+    Time one effect and measure its per-frame allocations
+    Returns: {"ms_per_frame", "fps", "alloc_kb"}
+    """
+    start = time.perf_counter()
+    render_frames(effect_id, num_leds, frames, pixel_order)
+    elapsed = time.perf_counter() - start
+    ms_per_frame = elapsed * 1000.0 / frames
+
+    # Allocation pass is separate: tracemalloc slows everything it traces
+    pixels, segment, clock = _make_segment(num_leds, pixel_order)
+    effect_func = EFFECTS[effect_id][1]
+    random.seed(effect_id)
+    peak_total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_frames):
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            delay_ms = effect_func(segment)
+            segment.commit()
+            pixels.show()
+            segment.call += 1
+            clock.advance(delay_ms)
+            peak_total += tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ms_per_frame": ms_per_frame,
+        "fps": 1000.0 / ms_per_frame if ms_per_frame > 0 else float("inf"),
+        "alloc_kb": peak_total / max(1, alloc_frames) / 1024.0
+    }
+
+
+def run_benchmark(led_counts: List[int], frames: int = 200, pixel_orders: Optional[List[str]] = None,
+                  effect_ids: Optional[List[int]] = None) -> Dict[tuple, Dict[str, float]]:
+    """Benchmark effects at each strip length and pixel order, returns {(effect_id, num_leds, order): result}"""
+    results = {}
+    for effect_id in effect_ids or sorted(EFFECTS):
+        for order in pixel_orders or ["GRB"]:
+            for num_leds in led_counts:
+                results[(effect_id, num_leds, order)] = benchmark_effect(effect_id, num_leds, frames, order)
+    return results
+
+
+def frames_to_image(frames: List[List[tuple]]):
+    """Convert recorded frames to a PIL image, one row per frame (white is added onto RGB)"""
+    from PIL import Image
+
+    image = Image.new("RGB", (len(frames[0]), len(frames)))
+    image.putdata([
+        tuple(min(255, c + (px[3] if len(px) == 4 else 0)) for c in px[:3])
+        for frame in frames for px in frame
+    ])
+    return image
+
+
+def _strip_filename(effect_id: int, num_leds: int, pixel_order: str) -> str:
+    return f"effect{effect_id:02d}_{num_leds}_{pixel_order}.png"
+
+
+def dump_strips(directory: str, led_counts: List[int], frames: int, pixel_orders: List[str],
+                effect_ids: Optional[List[int]] = None) -> int:
+    """Save every effect's frames as PNG strips, returns the number of files written"""
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for effect_id in effect_ids or sorted(EFFECTS):
+        for order in pixel_orders:
+            for num_leds in led_counts:
+                pixels = render_frames(effect_id, num_leds, frames, order, record=True)
+                frames_to_image(pixels.frames).save(os.path.join(directory, _strip_filename(effect_id, num_leds, order)))
+                written += 1
+    return written
+
+
+def compare_strips(directory: str, led_counts: List[int], frames: int, pixel_orders: List[str],
+                   effect_ids: Optional[List[int]] = None) -> List[str]:
+    """Re-render effects and compare against strips saved by dump_strips, returns mismatching files"""
+    from PIL import Image
+
+    mismatches = []
+    for effect_id in effect_ids or sorted(EFFECTS):
+        for order in pixel_orders:
+            for num_leds in led_counts:
+                name = _strip_filename(effect_id, num_leds, order)
+                path = os.path.join(directory, name)
+                if not os.path.exists(path):
+                    mismatches.append(f"{name} (missing)")
+                    continue
+                pixels = render_frames(effect_id, num_leds, frames, order, record=True)
+                with Image.open(path) as saved:
+                    if list(saved.convert("RGB").getdata()) != list(frames_to_image(pixels.frames).getdata()):
+                        mismatches.append(name)
+    return mismatches
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DW LED effects")
+    parser.add_argument("--frames", type=int, default=200, help="frames rendered per effect")
+    parser.add_argument("--leds", default="60,300,1000", help="comma-separated strip lengths")
+    parser.add_argument("--orders", default="GRB", help="comma-separated pixel orders, e.g. GRB,GRBW")
+    parser.add_argument("--effects", default="", help="comma-separated effect IDs (default: all)")
+    parser.add_argument("--dump", metavar="DIR", help="save frames as PNG strips instead of timing")
+    parser.add_argument("--compare", metavar="DIR", help="compare frames against strips saved with --dump")
+    args = parser.parse_args()
+
+    led_counts = _int_list(args.leds)
+    orders = [o.strip().upper() for o in args.orders.split(",") if o.strip()]
+    effect_ids = _int_list(args.effects) or None
+
+    if args.dump:
+        written = dump_strips(args.dump, led_counts, args.frames, orders, effect_ids)
+        print(f"Wrote {written} strips to {args.dump}")
+        return
+    if args.compare:
+        mismatches = compare_strips(args.compare, led_counts, args.frames, orders, effect_ids)
+        for name in mismatches:
+            print(f"MISMATCH {name}")
+        print(f"{len(mismatches)} mismatching strips")
+        raise SystemExit(1 if mismatches else 0)
+
+    results = run_benchmark(led_counts, args.frames, orders, effect_ids)
+    header = f"{'ID':>3}  {'Effect':<16} {'Order':<5} {'LEDs':>5} {'ms/frame':>9} {'FPS':>9} {'alloc KB':>9}"
+    print(header)
+    print("-" * len(header))
+    for (effect_id, num_leds, order), result in results.items():
+        print(f"{effect_id:>3}  {EFFECTS[effect_id][0]:<16} {order:<5} {num_leds:>5} "
+              f"{result['ms_per_frame']:>9.3f} {result['fps']:>9.1f} {result['alloc_kb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
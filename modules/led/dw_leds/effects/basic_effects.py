@@ -5,8 +5,10 @@ Effects 0-30: Static, Blink, Rainbow, Scan, etc.
 Ported from WLED FX.cpp
 """
 import random
+import numpy as np
 from ..segment import Segment
 from ..utils.colors import *
+from .position_effects import mode_ball_spotlight, mode_ball_depth, mode_ball_trail
 
 # Effect return value is delay in milliseconds
 FRAMETIME = 24  # ~42 FPS
@@ -55,10 +57,7 @@ def mode_breath(seg: Segment) -> int:
         var = sin16(counter) // 103
 
     lum = 30 + var
-    for i in range(seg.length):
-        seg.set_pixel_color(i, color_blend(seg.get_color(1),
-                                          seg.color_from_palette(i),
-                                          lum & 0xFF))
+    seg.set_colors(blend_colors(seg.get_color(1), seg.colors_from_palette(), lum & 0xFF))
     return FRAMETIME
 
 def mode_fade(seg: Segment) -> int:
@@ -66,10 +65,7 @@ def mode_fade(seg: Segment) -> int:
     counter = seg.now() * ((seg.speed >> 3) + 10)
     lum = triwave16(counter & 0xFFFF) >> 8
 
-    for i in range(seg.length):
-        seg.set_pixel_color(i, color_blend(seg.get_color(1),
-                                          seg.color_from_palette(i),
-                                          lum))
+    seg.set_colors(blend_colors(seg.get_color(1), seg.colors_from_palette(), lum))
     return FRAMETIME
 
 def mode_scan(seg: Segment) -> int:
@@ -139,10 +135,10 @@ def mode_rainbow_cycle(seg: Segment) -> int:
     counter = (seg.now() * ((seg.speed >> 2) + 2)) & 0xFFFF
     counter = counter >> 8
 
-    for i in range(seg.length):
-        # intensity controls density
-        index = (i * (16 << (seg.intensity // 29)) // seg.length) + counter
-        seg.set_pixel_color(i, color_wheel(index & 0xFF))
+    # intensity controls density
+    i = np.arange(seg.length, dtype=np.int64)
+    index = (i * (16 << (seg.intensity // 29)) // seg.length) + counter
+    seg.set_colors(WHEEL_LUT[index & 0xFF])
 
     return FRAMETIME
 
@@ -152,11 +148,8 @@ def mode_theater_chase(seg: Segment) -> int:
     cycle_time = 50 + (255 - seg.speed)
     iteration = seg.now() // cycle_time
 
-    for i in range(seg.length):
-        if (i % width) == seg.aux0:
-            seg.set_pixel_color(i, seg.color_from_palette(i))
-        else:
-            seg.set_pixel_color(i, seg.get_color(1))
+    lit = (np.arange(seg.length) % width) == seg.aux0
+    seg.set_colors(np.where(lit, seg.colors_from_palette(), np.uint32(seg.get_color(1))))
 
     if iteration != seg.step:
         seg.aux0 = (seg.aux0 + 1) % width
@@ -169,12 +162,9 @@ def mode_running_lights(seg: Segment) -> int:
     x_scale = seg.intensity >> 2
     counter = (seg.now() * seg.speed) >> 9
 
-    for i in range(seg.length):
-        a = i * x_scale - counter
-        s = sin8(a & 0xFF)
-        color = color_blend(seg.get_color(1),
-                           seg.color_from_palette(i), s)
-        seg.set_pixel_color(i, color)
+    a = np.arange(seg.length, dtype=np.int64) * x_scale - counter
+    s = SIN8_LUT[a & 0xFF]
+    seg.set_colors(blend_colors(seg.get_color(1), seg.colors_from_palette(), s))
 
     return FRAMETIME
 
@@ -522,14 +512,13 @@ def mode_flow(seg: Segment) -> int:
     """Smooth flowing color movement"""
     counter = seg.now() * ((seg.speed >> 3) + 1)
 
-    for i in range(seg.length):
-        pos = ((i * 256 // seg.length) + counter) & 0xFFFF
-        color = color_wheel((pos >> 8) & 0xFF)
+    i = np.arange(seg.length, dtype=np.int64)
+    pos = ((i * 256 // seg.length) + counter) & 0xFFFF
+    color = WHEEL_LUT[(pos >> 8) & 0xFF]
 
-        # Apply intensity as brightness modulation
-        brightness = 128 + ((sin8((pos >> 7) & 0xFF) - 128) * seg.intensity // 255)
-        color = color_blend(0, color, brightness)
-        seg.set_pixel_color(i, color)
+    # Apply intensity as brightness modulation
+    brightness = 128 + ((SIN8_LUT[(pos >> 7) & 0xFF] - 128) * seg.intensity // 255)
+    seg.set_colors(blend_colors(0, color, brightness))
 
     return FRAMETIME
 
@@ -537,16 +526,16 @@ def mode_colorloop(seg: Segment) -> int:
     """Smooth color loop across entire strip"""
     counter = (seg.now() * ((seg.speed >> 3) + 1)) & 0xFFFF
 
-    for i in range(seg.length):
-        # Create gradient based on position and time
-        hue = ((i * 256 // max(1, seg.length)) + (counter >> 7)) & 0xFF
-        color = color_wheel(hue)
+    # Create gradient based on position and time
+    i = np.arange(seg.length, dtype=np.int64)
+    hue = ((i * 256 // max(1, seg.length)) + (counter >> 7)) & 0xFF
+    color = WHEEL_LUT[hue]
 
-        # Intensity controls saturation
-        if seg.intensity < 255:
-            color = color_blend(color, WHITE, 255 - seg.intensity)
+    # Intensity controls saturation
+    if seg.intensity < 255:
+        color = blend_colors(color, WHITE, 255 - seg.intensity)
 
-        seg.set_pixel_color(i, color)
+    seg.set_colors(color)
 
     return FRAMETIME
 
@@ -554,17 +543,17 @@ def mode_palette_flow(seg: Segment) -> int:
     """Flowing palette colors"""
     counter = seg.now() * ((seg.speed >> 3) + 1)
 
-    for i in range(seg.length):
-        # Get color from palette based on position and time
-        palette_pos = ((i * 255 // max(1, seg.length)) + (counter >> 7)) & 0xFF
-        color = seg.color_from_palette(palette_pos)
+    # Get color from palette based on position and time
+    i = np.arange(seg.length, dtype=np.int64)
+    palette_pos = ((i * 255 // max(1, seg.length)) + (counter >> 7)) & 0xFF
+    color = seg.colors_from_palette(palette_pos)
 
-        # Intensity controls brightness modulation
-        if seg.intensity < 255:
-            brightness = 128 + ((sin8(palette_pos) - 128) * seg.intensity // 255)
-            color = color_blend(0, color, brightness)
+    # Intensity controls brightness modulation
+    if seg.intensity < 255:
+        brightness = 128 + ((SIN8_LUT[palette_pos] - 128) * seg.intensity // 255)
+        color = blend_colors(0, color, brightness)
 
-        seg.set_pixel_color(i, color)
+    seg.set_colors(color)
 
     return FRAMETIME
 
@@ -742,34 +731,26 @@ def mode_pacifica(seg: Segment) -> int:
 
     counter = seg.now() * ((seg.speed >> 4) + 1)
 
-    for i in range(seg.length):
-        # Create multiple layered waves
-        wave1 = sin8(((i * 5) + (counter >> 5)) & 0xFF)
-        wave2 = sin8(((i * 3) + (counter >> 3)) & 0xFF)
-        wave3 = sin8(((i * 7) + (counter >> 6)) & 0xFF)
-
-        # Combine waves
-        brightness = (wave1 + wave2 + wave3) // 3
-
-        # Blue-green ocean colors
-        if brightness < 64:
-            # Deep blue
-            r, g, b = 0, 0, 60 + brightness
-        elif brightness < 128:
-            # Blue-cyan
-            val = brightness - 64
-            r, g, b = 0, val * 2, 100 + val
-        else:
-            # Cyan-white (foam)
-            val = brightness - 128
-            r, g, b = val, 128 + val, 180 + (val // 2)
+    # Create multiple layered waves
+    i = np.arange(seg.length, dtype=np.int64)
+    wave1 = SIN8_LUT[((i * 5) + (counter >> 5)) & 0xFF]
+    wave2 = SIN8_LUT[((i * 3) + (counter >> 3)) & 0xFF]
+    wave3 = SIN8_LUT[((i * 7) + (counter >> 6)) & 0xFF]
 
-        # Apply intensity
-        brightness = 128 + ((brightness - 128) * seg.intensity // 255)
-        color = (r << 16) | (g << 8) | b
-        color = color_blend(0, color, brightness)
+    # Combine waves
+    brightness = (wave1 + wave2 + wave3) // 3
 
-        seg.set_pixel_color(i, color)
+    # Blue-green ocean colors: deep blue, blue-cyan, cyan-white (foam)
+    deep = brightness < 64
+    mid = brightness < 128
+    val = np.where(mid, brightness - 64, brightness - 128)
+    r = np.where(mid, 0, val)
+    g = np.where(deep, 0, np.where(mid, val * 2, 128 + val))
+    b = np.where(deep, 60 + brightness, np.where(mid, 100 + val, 180 + (val // 2)))
+
+    # Apply intensity
+    brightness = 128 + ((brightness - 128) * seg.intensity // 255)
+    seg.set_colors(blend_colors(0, pack_rgb(r, g, b), brightness))
 
     return FRAMETIME
 
@@ -777,21 +758,21 @@ def mode_plasma(seg: Segment) -> int:
     """Plasma effect"""
     counter = seg.now() * ((seg.speed >> 3) + 1)
 
-    for i in range(seg.length):
-        # Create plasma using multiple sine waves
-        phase1 = sin8(((i * 16) + (counter >> 5)) & 0xFF)
-        phase2 = sin8(((i * 8) + (counter >> 6)) & 0xFF)
-        phase3 = sin8((counter >> 4) & 0xFF)
+    # Create plasma using multiple sine waves
+    i = np.arange(seg.length, dtype=np.int64)
+    phase1 = SIN8_LUT[((i * 16) + (counter >> 5)) & 0xFF]
+    phase2 = SIN8_LUT[((i * 8) + (counter >> 6)) & 0xFF]
+    phase3 = sin8((counter >> 4) & 0xFF)
 
-        # Combine phases
-        hue = (phase1 + phase2 + phase3) & 0xFF
-        color = color_wheel(hue)
+    # Combine phases
+    hue = (phase1 + phase2 + phase3) & 0xFF
+    color = WHEEL_LUT[hue]
 
-        # Intensity controls saturation
-        if seg.intensity < 255:
-            color = color_blend(color, WHITE, 255 - seg.intensity)
+    # Intensity controls saturation
+    if seg.intensity < 255:
+        color = blend_colors(color, WHITE, 255 - seg.intensity)
 
-        seg.set_pixel_color(i, color)
+    seg.set_colors(color)
 
     return FRAMETIME
 
@@ -915,33 +896,24 @@ def mode_aurora(seg: Segment) -> int:
 
     counter = seg.now() * ((seg.speed >> 4) + 1)
 
-    for i in range(seg.length):
-        # Multiple slow-moving waves
-        wave1 = sin8(((i * 3) + (counter >> 6)) & 0xFF)
-        wave2 = sin8(((i * 5) + (counter >> 7) + 85) & 0xFF)
-        wave3 = sin8(((i * 2) + (counter >> 5) + 170) & 0xFF)
-
-        # Aurora colors: green, blue, purple
-        brightness = (wave1 + wave2 + wave3) // 3
-
-        if brightness < 85:
-            # Green
-            r, g, b = 0, brightness * 2, brightness // 2
-        elif brightness < 170:
-            # Blue-green
-            val = brightness - 85
-            r, g, b = 0, 100 + val, 100 + val
-        else:
-            # Purple-pink
-            val = brightness - 170
-            r, g, b = val * 2, val, 150 + val
-
-        # Apply intensity for brightness variation
-        brightness_mod = 128 + ((brightness - 128) * seg.intensity // 255)
-        color = (r << 16) | (g << 8) | b
-        color = color_blend(0, color, brightness_mod)
-
-        seg.set_pixel_color(i, color)
+    # Multiple slow-moving waves
+    i = np.arange(seg.length, dtype=np.int64)
+    wave1 = SIN8_LUT[((i * 3) + (counter >> 6)) & 0xFF]
+    wave2 = SIN8_LUT[((i * 5) + (counter >> 7) + 85) & 0xFF]
+    wave3 = SIN8_LUT[((i * 2) + (counter >> 5) + 170) & 0xFF]
+
+    # Aurora colors: green, blue-green, purple-pink
+    brightness = (wave1 + wave2 + wave3) // 3
+    green = brightness < 85
+    teal = brightness < 170
+    val = np.where(teal, brightness - 85, brightness - 170)
+    r = np.where(teal, 0, val * 2)
+    g = np.where(green, brightness * 2, np.where(teal, 100 + val, val))
+    b = np.where(green, brightness // 2, np.where(teal, 100 + val, 150 + val))
+
+    # Apply intensity for brightness variation
+    brightness_mod = 128 + ((brightness - 128) * seg.intensity // 255)
+    seg.set_colors(blend_colors(0, pack_rgb(r, g, b), brightness_mod))
 
     return FRAMETIME
 
@@ -1112,6 +1084,9 @@ EFFECTS = {
     42: ("Halloween", mode_halloween),
     43: ("Noise", mode_noise),
     44: ("Funky Plank", mode_funky_plank),
+    45: ("Ball Spotlight", mode_ball_spotlight),
+    46: ("Ball Depth", mode_ball_depth),
+    47: ("Ball Trail", mode_ball_trail),
 }
 
 def get_effect(effect_id: int):
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Ball-synchronized effects for Dune Weaver
+Effects 45-47: Ball Spotlight, Ball Depth, Ball Trail
+
+These follow the sand table ball through the position source attached to the
+segment (seg.position, normally the motion thread's position channel). The source
+is read once per frame; the sample used is left in seg.position_sample so the
+controller can measure acknowledgement-to-LED latency. Without a source the ball
+is treated as parked at theta=0, rho=0.
+
+The strip is assumed to run once around the table; custom1 rotates the origin
+(0-255 = one full turn) to line LED 0 up with theta=0.
+"""
+import math
+import numpy as np
+from ..segment import Segment
+from ..utils.colors import *
+
+# Position effects are redrawn when the ball moves; this is only the idle refresh
+POSITION_FRAMETIME = 100
+TRAIL_FRAMETIME = 24
+
+
+def _ball_position(seg: Segment):
+    """Read the ball position (theta, rho clamped to 0-1) for this frame"""
+    source = seg.position
+    sample = source.read() if source is not None else None
+    seg.position_sample = sample
+    if sample is None:
+        return 0.0, 0.0
+    return sample.theta, min(1.0, max(0.0, sample.rho))
+
+
+def _ball_index(seg: Segment, theta: float) -> float:
+    """Fractional LED index under the ball"""
+    turn = (theta / (2 * math.pi) + seg.custom1 / 256.0) % 1.0
+    return turn * seg.length
+
+
+def _ring_distance(seg: Segment, center: float) -> np.ndarray:
+    """Distance in LEDs from every pixel to center, wrapping around the ring"""
+    d = np.abs(np.arange(seg.length, dtype=np.float64) - center) % seg.length
+    return np.minimum(d, seg.length - d)
+
+
+def _spot_levels(seg: Segment, center: float, width: float) -> np.ndarray:
+    """0-255 spot brightness with a linear falloff over width LEDs"""
+    level = np.clip(1.0 - _ring_distance(seg, center) / width, 0.0, 1.0)
+    return np.rint(level * 255).astype(np.int64)
+
+
+def mode_ball_spotlight(seg: Segment) -> int:
+    """Spotlight that follows the ball around the table (intensity = spot width)"""
+    if seg.length == 0:
+        return POSITION_FRAMETIME
+    theta, _ = _ball_position(seg)
+    width = 1.0 + (seg.intensity * seg.length) / 512.0
+    levels = _spot_levels(seg, _ball_index(seg, theta), width)
+    seg.set_colors(blend_colors(seg.get_color(1), seg.get_color(0), levels))
+    return POSITION_FRAMETIME
+
+
+def mode_ball_depth(seg: Segment) -> int:
+    """Palette color picked by the ball's distance from center, brightest at the ball"""
+    if seg.length == 0:
+        return POSITION_FRAMETIME
+    theta, rho = _ball_position(seg)
+    color = seg.color_from_palette(int(rho * 255), use_index=False)
+    # Higher intensity dims the rest of the strip more for a stronger highlight
+    background = color_blend(color, 0, (seg.intensity * 3) >> 2)
+    levels = _spot_levels(seg, _ball_index(seg, theta), 1.0 + seg.length / 12.0)
+    seg.set_colors(blend_colors(background, color, levels))
+    return POSITION_FRAMETIME
+
+
+def mode_ball_trail(seg: Segment) -> int:
+    """Fading trail behind the ball, colored by rho (speed = how fast the trail fades)"""
+    if seg.length == 0:
+        return TRAIL_FRAMETIME
+    if seg.call == 0:
+        seg.clear()
+        seg.aux0 = -1
+
+    seg.fade_out(254 - (seg.speed >> 3))
+
+    theta, rho = _ball_position(seg)
+    color = seg.color_from_palette(int(rho * 255), use_index=False)
+    current = int(_ball_index(seg, theta)) % seg.length
+
+    # Fill the gap from the last drawn LED along the shortest way round
+    previous = seg.aux0 if seg.aux0 >= 0 else current
+    step = (current - previous) % seg.length
+    if step > seg.length // 2:
+        step -= seg.length
+    direction = 1 if step >= 0 else -1
+    for k in range(abs(step) + 1):
+        seg.set_pixel_color((previous + k * direction) % seg.length, color)
+    seg.aux0 = current
+    return TRAIL_FRAMETIME
+
+
+# Lets the controller redraw these as soon as the ball moves
+for _effect in (mode_ball_spotlight, mode_ball_depth, mode_ball_trail):
+    _effect.uses_position = True
@@ -2,11 +2,23 @@
 """
 WLED Segment class for Raspberry Pi
 Manages LED strip segments and their effects
+
+Pixel data lives in a NumPy framebuffer of shape (length, 3) for RGB strips or
+(length, 4) for RGBW strips, in the same channel order the neopixel driver
+expects for tuples. Effects write into the framebuffer and the controller
+pushes it to the strip once per frame with commit().
 """
 import time
 from typing import List, Callable, Optional
+import numpy as np
 from .utils.colors import *
-from .utils.palettes import color_from_palette, get_palette
+from .utils.palettes import color_from_palette, colors_from_palette, get_palette
+
+
+def _mix(a: np.ndarray, b, amount: int) -> np.ndarray:
+    """Vectorized color_blend on a single channel (0 = all a, 255 = all b)"""
+    return (a * (255 - amount) + b * amount) // 255
+
 
 class Segment:
     """LED segment with effect support"""
@@ -25,6 +37,9 @@ class Segment:
         self.is_rgbw = is_rgbw
         self.length = stop - start
 
+        # Framebuffer: one row per LED, channels (r, g, b[, w])
+        self.buffer = np.zeros((self.length, 4 if is_rgbw else 3), dtype=np.uint8)
+
         # Colors (up to 3 colors like WLED)
         self.colors = [0x00FF0000, 0x000000FF, 0x0000FF00]  # Red, Blue, Green defaults
 
@@ -44,28 +59,30 @@ class Segment:
         self.next_time = 0      # Next time to run effect (ms)
         self.data = []          # Effect data storage
 
+        # Ball position source with a read() method (set by the controller) and
+        # the sample the last position effect rendered
+        self.position = None
+        self.position_sample = None
+
         # Timing
         self._start_time = time.time() * 1000  # Convert to milliseconds
 
+    # Per-pixel access
+
     def get_pixel_color(self, i: int) -> int:
         """Get color of pixel at index i (segment-relative)"""
         if i < 0 or i >= self.length:
             return 0
-        actual_idx = self.start + i
-        color = self.pixels[actual_idx]
-        # Convert from neopixel (R,G,B) or (G,R,B) to 32-bit
-        if isinstance(color, tuple):
-            if len(color) == 3:
-                return (color[0] << 16) | (color[1] << 8) | color[2]
-            elif len(color) == 4:
-                return (color[3] << 24) | (color[0] << 16) | (color[1] << 8) | color[2]
-        return 0
+        if self.is_rgbw:
+            r, g, b, w = self.buffer[i].tolist()
+            return (w << 24) | (r << 16) | (g << 8) | b
+        r, g, b = self.buffer[i].tolist()
+        return (r << 16) | (g << 8) | b
 
     def set_pixel_color(self, i: int, color: int):
         """Set color of pixel at index i (segment-relative)"""
         if i < 0 or i >= self.length:
             return
-        actual_idx = self.start + i
         r = get_r(color)
         g = get_g(color)
         b = get_b(color)
@@ -78,43 +95,102 @@ class Segment:
                 r -= w
                 g -= w
                 b -= w
-            self.pixels[actual_idx] = (r, g, b, w)
+            self.buffer[i] = (r, g, b, w)
         else:
-            self.pixels[actual_idx] = (r, g, b)
+            self.buffer[i] = (r, g, b)
+
+    # Whole-segment access
+
+    def _read_channels(self):
+        """Return (r, g, b, w) as int32 arrays; w is zeros on RGB strips"""
+        buf = self.buffer.astype(np.int32)
+        w = buf[:, 3] if self.is_rgbw else np.zeros(self.length, dtype=np.int32)
+        return buf[:, 0], buf[:, 1], buf[:, 2], w
+
+    def _write_channels(self, r, g, b, w=None):
+        """Store channel arrays, applying the same auto-white rule as set_pixel_color"""
+        if self.is_rgbw:
+            if w is None:
+                w = np.zeros(self.length, dtype=np.int32)
+            extract = (w == 0) & (r > 0) & (g > 0) & (b > 0)
+            if extract.any():
+                white = np.where(extract, np.minimum(np.minimum(r, g), b), 0)
+                r = r - white
+                g = g - white
+                b = b - white
+                w = w + white
+            self.buffer[:, 3] = w
+        self.buffer[:, 0] = r
+        self.buffer[:, 1] = g
+        self.buffer[:, 2] = b
+
+    def get_colors(self) -> np.ndarray:
+        """Get all pixels as packed 32-bit WRGB colors"""
+        r, g, b, w = self._read_channels()
+        return ((w << 24) | (r << 16) | (g << 8) | b).astype(np.uint32)
+
+    def set_colors(self, colors):
+        """Set all pixels from an array of packed 32-bit WRGB colors"""
+        c = np.asarray(colors, dtype=np.uint32).astype(np.int64)
+        self._write_channels(((c >> 16) & 0xFF).astype(np.int32),
+                             ((c >> 8) & 0xFF).astype(np.int32),
+                             (c & 0xFF).astype(np.int32),
+                             ((c >> 24) & 0xFF).astype(np.int32))
 
     def fill(self, color: int):
         """Fill entire segment with color"""
-        for i in range(self.length):
-            self.set_pixel_color(i, color)
+        if self.length == 0:
+            return
+        # Convert once via the per-pixel path, then broadcast
+        self.set_pixel_color(0, color)
+        self.buffer[:] = self.buffer[0]
+
+    def clear(self):
+        """Set every pixel to black"""
+        self.buffer.fill(0)
 
     def fade_out(self, amount: int):
         """Fade all pixels in segment toward black"""
-        for i in range(self.length):
-            current = self.get_pixel_color(i)
-            faded = color_fade(current, amount)
-            self.set_pixel_color(i, faded)
+        if amount == 255:
+            return
+        if amount == 0:
+            self.buffer.fill(0)
+            return
+        r, g, b, w = self._read_channels()
+        scale = amount + 1
+        self._write_channels((r * scale) >> 8, (g * scale) >> 8, (b * scale) >> 8, (w * scale) >> 8)
 
     def blur(self, amount: int):
         """Blur/blend pixels with neighbors"""
         if amount == 0 or self.length < 3:
             return
 
-        # Simple blur: blend each pixel with neighbors
-        temp = [self.get_pixel_color(i) for i in range(self.length)]
-
-        for i in range(self.length):
-            if i == 0:
-                # First pixel: blend with next
-                blended = color_blend(temp[i], temp[i + 1], amount)
-            elif i == self.length - 1:
-                # Last pixel: blend with previous
-                blended = color_blend(temp[i], temp[i - 1], amount)
-            else:
-                # Middle pixels: blend with both neighbors
-                left = color_blend(temp[i], temp[i - 1], amount // 2)
-                blended = color_blend(left, temp[i + 1], amount // 2)
+        channels = []
+        half = amount // 2
+        for ch in self._read_channels():
+            out = np.empty_like(ch)
+            # First pixel: blend with next; last pixel: blend with previous
+            out[0] = _mix(ch[0], ch[1], amount)
+            out[-1] = _mix(ch[-1], ch[-2], amount)
+            # Middle pixels: blend with both neighbors
+            left = _mix(ch[1:-1], ch[:-2], half)
+            out[1:-1] = _mix(left, ch[2:], half)
+            channels.append(out)
+        self._write_channels(*channels)
+
+    def blend(self, color: int, amount: int):
+        """Blend every pixel toward color (0 = unchanged, 255 = color)"""
+        if amount == 0:
+            return
+        r, g, b, w = self._read_channels()
+        self._write_channels(_mix(r, get_r(color), amount), _mix(g, get_g(color), amount),
+                             _mix(b, get_b(color), amount), _mix(w, get_w(color), amount))
 
-            self.set_pixel_color(i, blended)
+    def commit(self):
+        """Write the framebuffer to the strip in one slice assignment"""
+        if self.length == 0:
+            return
+        self.pixels[self.start:self.stop] = [tuple(px) for px in self.buffer.tolist()]
 
     def now(self) -> int:
         """Get current time in milliseconds since segment start"""
@@ -138,6 +214,25 @@ class Segment:
 
         return color_from_palette(palette, palette_pos, brightness)
 
+    def colors_from_palette(self, indices=None, use_index: bool = True,
+                            brightness: int = 255) -> np.ndarray:
+        """
+        Vectorized color_from_palette for many indices at once
+        indices: array of LED indices or palette positions (default: every LED)
+        Returns packed 32-bit RGB colors, identical to calling color_from_palette per index
+        """
+        if indices is None:
+            indices = np.arange(self.length, dtype=np.int64)
+        else:
+            indices = np.asarray(indices, dtype=np.int64)
+
+        if use_index and self.length > 1:
+            positions = ((indices * 255) // (self.length - 1)) & 0xFF
+        else:
+            positions = indices & 0xFF
+
+        return colors_from_palette(self.palette_id, positions, brightness)
+
     def get_color(self, index: int) -> int:
         """Get segment color by index (0-2)"""
         if 0 <= index < len(self.colors):
@@ -5,6 +5,7 @@ Ported from WLED colors.cpp
 """
 import math
 from typing import Tuple
+import numpy as np
 
 # Color manipulation functions
 
@@ -232,3 +233,29 @@ WHITE = 0x00FFFFFF
 RED = 0x00FF0000
 GREEN = 0x0000FF00
 BLUE = 0x000000FF
+
+# Lookup tables for vectorized effects (identical to the scalar functions above)
+SIN8_LUT = np.array([sin8(i) for i in range(256)], dtype=np.int32)
+WHEEL_LUT = np.array([color_wheel(i) for i in range(256)], dtype=np.uint32)
+
+def blend_colors(colors1, colors2, blend) -> np.ndarray:
+    """
+    Vectorized color_blend over arrays of packed 32-bit WRGB colors
+    blend: scalar or array, 0-255 (0 = full colors1, 255 = full colors2)
+    """
+    c1 = np.asarray(colors1, dtype=np.uint32).astype(np.int64)
+    c2 = np.asarray(colors2, dtype=np.uint32).astype(np.int64)
+    blend = np.asarray(blend, dtype=np.int64)
+    inv = 255 - blend
+    out = np.zeros(np.broadcast(c1, c2, blend).shape, dtype=np.int64)
+    for shift in (24, 16, 8, 0):
+        ch = (((c1 >> shift) & 0xFF) * inv + ((c2 >> shift) & 0xFF) * blend) // 255
+        out |= ch << shift
+    return out.astype(np.uint32)
+
+def pack_rgb(r, g, b) -> np.ndarray:
+    """Pack channel arrays into 32-bit RGB colors"""
+    r = np.asarray(r, dtype=np.int64)
+    g = np.asarray(g, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    return ((r << 16) | (g << 8) | b).astype(np.uint32)
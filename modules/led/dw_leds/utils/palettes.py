@@ -5,7 +5,8 @@ Ported from WLED palettes.cpp
 All 59 gradient palettes from WLED
 """
 from typing import List, Tuple
-from .colors import color_blend, rgb_to_color
+import numpy as np
+from .colors import color_blend, rgb_to_color, pack_rgb
 
 # Gradient palette format: [(index, r, g, b), ...]
 # Index is 0-255 position in the palette
@@ -707,17 +708,11 @@ PALETTE_NAMES = [
 ]
 
 
-def color_from_palette(palette: List[Tuple[int, int, int, int]],
-                       index: int,
-                       brightness: int = 255) -> int:
+def _gradient_rgb(palette: List[Tuple[int, int, int, int]], index: int) -> Tuple[int, int, int]:
     """
-    Get color from gradient palette at given index
-    index: 0-255 position in palette
-    brightness: 0-255 brightness scaling
-    Returns: 32-bit RGB color
+    Interpolate a gradient palette at index (0-255) at full brightness
+    Returns: (r, g, b)
     """
-    index = index & 0xFF
-
     # Find the two palette entries to blend between
     for i in range(len(palette) - 1):
         if index <= palette[i + 1][0]:
@@ -734,24 +729,73 @@ def color_from_palette(palette: List[Tuple[int, int, int, int]],
             r = ((r1 * (255 - blend)) + (r2 * blend)) // 255
             g = ((g1 * (255 - blend)) + (g2 * blend)) // 255
             b = ((b1 * (255 - blend)) + (b2 * blend)) // 255
-
-            # Apply brightness
-            if brightness < 255:
-                r = (r * brightness) // 255
-                g = (g * brightness) // 255
-                b = (b * brightness) // 255
-
-            return rgb_to_color(r, g, b)
+            return r, g, b
 
     # If we're past the last entry, use the last color
     idx, r, g, b = palette[-1]
+    return r, g, b
+
+
+def _build_lut(palette: List[Tuple[int, int, int, int]]) -> np.ndarray:
+    """Expand a gradient palette into a (256, 3) uint8 RGB lookup table"""
+    return np.array([_gradient_rgb(palette, i) for i in range(256)], dtype=np.uint8)
+
+
+# 256-entry lookup tables for every palette, built once at import
+PALETTE_LUTS = [_build_lut(palette) for palette in ALL_PALETTES]
+PALETTE_LUTS_PACKED = [pack_rgb(lut[:, 0], lut[:, 1], lut[:, 2]) for lut in PALETTE_LUTS]
+
+# Packed colors as plain ints for the scalar path, keyed by palette identity
+_PACKED_BY_PALETTE = {id(palette): lut.tolist() for palette, lut in zip(ALL_PALETTES, PALETTE_LUTS_PACKED)}
+
+
+def color_from_palette(palette: List[Tuple[int, int, int, int]],
+                       index: int,
+                       brightness: int = 255) -> int:
+    """
+    Get color from gradient palette at given index
+    index: 0-255 position in palette
+    brightness: 0-255 brightness scaling
+    Returns: 32-bit RGB color
+    """
+    index = index & 0xFF
+
+    packed = _PACKED_BY_PALETTE.get(id(palette))
+    if packed is not None:
+        color = packed[index]
+        if brightness >= 255:
+            return color
+        r = (color >> 16) & 0xFF
+        g = (color >> 8) & 0xFF
+        b = color & 0xFF
+    else:
+        # Palette not in ALL_PALETTES (e.g. built at runtime): interpolate directly
+        r, g, b = _gradient_rgb(palette, index)
+
+    # Apply brightness
     if brightness < 255:
         r = (r * brightness) // 255
         g = (g * brightness) // 255
         b = (b * brightness) // 255
+
     return rgb_to_color(r, g, b)
 
 
+def colors_from_palette(palette_id: int, positions, brightness: int = 255) -> np.ndarray:
+    """
+    Vectorized color_from_palette: one indexed gather over the palette LUT
+    positions: array of 0-255 palette positions (wrapped like color_from_palette)
+    Returns: packed 32-bit RGB colors
+    """
+    positions = np.asarray(positions, dtype=np.int64) & 0xFF
+    if brightness >= 255:
+        return get_palette_lut(palette_id, packed=True)[positions]
+
+    rgb = get_palette_lut(palette_id)[positions].astype(np.int32)
+    rgb = (rgb * brightness) // 255
+    return pack_rgb(rgb[..., 0], rgb[..., 1], rgb[..., 2])
+
+
 def get_palette(palette_id: int) -> List[Tuple[int, int, int, int]]:
     """Get palette by ID (0-58)"""
     if 0 <= palette_id < len(ALL_PALETTES):
@@ -759,6 +803,16 @@ def get_palette(palette_id: int) -> List[Tuple[int, int, int, int]]:
     return ALL_PALETTES[0]  # Default to Sunset
 
 
+def get_palette_lut(palette_id: int, packed: bool = False) -> np.ndarray:
+    """
+    Get the 256-entry lookup table for a palette ID (0-58)
+    packed: False for a (256, 3) uint8 RGB array, True for 32-bit RGB colors
+    """
+    if not 0 <= palette_id < len(ALL_PALETTES):
+        palette_id = 0  # Default to Sunset
+    return PALETTE_LUTS_PACKED[palette_id] if packed else PALETTE_LUTS[palette_id]
+
+
 def get_palette_name(palette_id: int) -> str:
     """Get palette name by ID"""
     if 0 <= palette_id < len(PALETTE_NAMES):
@@ -1,74 +1,197 @@
 import requests
 import json
+import threading
 from typing import Dict, Optional
 import time
 import logging
+from requests.adapters import HTTPAdapter
+from modules.led.ddp import DDPSender, DDP_PORT
 logger = logging.getLogger(__name__)
 
+REQUEST_TIMEOUT = 2  # Seconds per HTTP request
+STATE_CACHE_TTL = 5.0  # Seconds a cached WLED state is trusted before commands re-read it
+STATUS_CACHE_TTL = 1.0  # Seconds status checks reuse the cached state
+
+
+def _merge_state(target: Dict, params: Dict) -> None:
+    """Merge WLED state params into target, later values winning (segments merged by index)"""
+    for key, value in params.items():
+        if key == "seg" and isinstance(target.get("seg"), list):
+            for i, seg in enumerate(value):
+                if i < len(target["seg"]):
+                    target["seg"][i] = {**target["seg"][i], **seg}
+                else:
+                    target["seg"].append(dict(seg))
+        elif key == "on" and value == "t" and target.get("on") == "t":
+            del target["on"]  # Two toggles cancel out
+        elif key == "seg":
+            target["seg"] = [dict(seg) for seg in value]
+        else:
+            target[key] = value
+
 
 class LEDController:
     def __init__(self, ip_address: Optional[str] = None):
         self.ip_address = ip_address
 
+        # One pooled keep-alive session instead of a new connection per request
+        self._session = None
+
+        # Optimistic copy of the WLED state, refreshed from POST responses
+        self._state_cache: Optional[Dict] = None
+        self._state_time = 0.0
+
+        # Updates arriving while a request is in flight are merged and sent together
+        self._pending: Dict = {}
+        self._pending_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._last_result: Dict = {"connected": False, "message": "No command sent yet"}
+
+        self._realtime: Optional[DDPSender] = None
+        self.request_count = 0  # HTTP requests made, for diagnostics
+
     def _get_base_url(self) -> str:
         """Get base URL for WLED JSON API"""
         if not self.ip_address:
             raise ValueError("No WLED IP configured")
         return f"http://{self.ip_address}/json"
 
+    def _get_session(self) -> requests.Session:
+        """Get the pooled HTTP session, creating it on first use"""
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
     def set_ip(self, ip_address: str) -> None:
         """Update the WLED IP address"""
         self.ip_address = ip_address
+        self._invalidate_cache()
+        if self._realtime:
+            self.disable_realtime()
+
+    def _invalidate_cache(self) -> None:
+        self._state_cache = None
+        self._state_time = 0.0
+
+    def _get_state(self, max_age: float) -> Dict:
+        """Return the WLED state, only issuing a GET if the cache is older than max_age"""
+        if self._state_cache is not None and time.monotonic() - self._state_time < max_age:
+            return self._state_cache
+
+        self.request_count += 1
+        response = self._get_session().get(f"{self._get_base_url()}/state", timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        self._state_cache = response.json()
+        self._state_time = time.monotonic()
+        return self._state_cache
+
+    def _post_state(self, params: Dict) -> Dict:
+        """POST params and return the new state ("v": true makes WLED reply with it)"""
+        self.request_count += 1
+        response = self._get_session().post(f"{self._get_base_url()}/state",
+                                            json={**params, "v": True}, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        body = response.json()
+
+        if isinstance(body, dict) and "on" in body:
+            self._state_cache = body
+        else:
+            # Older firmware only answers {"success": true}: apply the change locally
+            cached = dict(self._state_cache or {})
+            if params.get("on") == "t":
+                params = {**params, "on": not cached.get("on", False)}
+            _merge_state(cached, params)
+            self._state_cache = cached
+        self._state_time = time.monotonic()
+        return self._state_cache
+
+    @staticmethod
+    def _status_from_state(current_state: Dict) -> Dict:
+        """Build the status dict returned by every command"""
+        preset_id = current_state.get('ps', -1)
+        playlist_id = current_state.get('pl', -1)
+
+        # Use True as default since WLED is typically on when responding
+        is_on = current_state.get('on', True)
+
+        return {
+            "connected": True,
+            "is_on": is_on,
+            "preset_id": preset_id,
+            "playlist_id": playlist_id,
+            "brightness": current_state.get('bri', 0),
+            "message": "WLED is ON" if is_on else "WLED is OFF"
+        }
 
     def _send_command(self, state_params: Dict = None) -> Dict:
         """Send command to WLED and return status"""
-        try:
-            url = self._get_base_url()
-            
-            # First check current state
-            response = requests.get(f"{url}/state", timeout=2)
-            response.raise_for_status()
-            current_state = response.json()
-            
-            # If WLED is off and we're trying to set something, turn it on first
-            if not current_state.get('on', False) and state_params and 'on' not in state_params:
-                # Turn on power first
-                requests.post(f"{url}/state", json={"on": True}, timeout=2)
-            
-            # Now send the actual command if there are parameters
-            if state_params:
-                response = requests.post(f"{url}/state", json=state_params, timeout=2)
-                response.raise_for_status()
-                response = requests.get(f"{url}/state", timeout=2)
-                response.raise_for_status()
-                current_state = response.json()
-                
-            preset_id = current_state.get('ps', -1)
-            playlist_id = current_state.get('pl', -1)
-
-            # Use True as default since WLED is typically on when responding
-            is_on = current_state.get('on', True)
-            
-            return {
-                "connected": True,
-                "is_on": is_on,
-                "preset_id": preset_id,
-                "playlist_id": playlist_id,
-                "brightness": current_state.get('bri', 0),
-                "message": "WLED is ON" if is_on else "WLED is OFF"
-            }
+        if not state_params:
+            return self._request(lambda: self._get_state(STATUS_CACHE_TTL))
+
+        with self._pending_lock:
+            _merge_state(self._pending, state_params)
+
+        with self._send_lock:
+            with self._pending_lock:
+                params, self._pending = self._pending, {}
+            if not params:
+                # Another caller already sent this update merged into its own request
+                return self._last_result
+
+            def send():
+                # If WLED is off and we're trying to set something, turn it on in the same request
+                current_state = self._get_state(STATE_CACHE_TTL)
+                if not current_state.get('on', False) and 'on' not in params:
+                    params['on'] = True
+                return self._post_state(params)
+
+            self._last_result = self._request(send)
+            return self._last_result
 
+    def _request(self, action) -> Dict:
+        """Run an HTTP action and turn its state (or error) into a status dict"""
+        try:
+            return self._status_from_state(action())
         except ValueError as e:
+            # json.JSONDecodeError is a ValueError too
+            self._invalidate_cache()
+            if isinstance(e, json.JSONDecodeError):
+                return {"connected": False, "message": f"Error parsing WLED response: {str(e)}"}
             return {"connected": False, "message": str(e)}
         except requests.RequestException as e:
+            self._invalidate_cache()
             return {"connected": False, "message": f"Cannot connect to WLED: {str(e)}"}
-        except json.JSONDecodeError as e:
-            return {"connected": False, "message": f"Error parsing WLED response: {str(e)}"}
 
     def check_wled_status(self) -> Dict:
         """Check WLED connection status and brightness"""
         return self._send_command()
 
+    def enable_realtime(self, rgbw: bool = False, port: int = DDP_PORT) -> DDPSender:
+        """Open a DDP/UDP realtime channel to the WLED device for pushing frames"""
+        if not self.ip_address:
+            raise ValueError("No WLED IP configured")
+        if self._realtime is None or self._realtime.rgbw != rgbw or self._realtime.port != port:
+            self.disable_realtime()
+            self._realtime = DDPSender(self.ip_address, port=port, rgbw=rgbw)
+        return self._realtime
+
+    def disable_realtime(self) -> None:
+        """Close the realtime channel; WLED returns to its effect after its realtime timeout"""
+        if self._realtime:
+            self._realtime.close()
+            self._realtime = None
+
+    def send_frame(self, pixels) -> int:
+        """Push one frame of pixels over DDP (enables realtime mode if needed), returns packets sent"""
+        return (self._realtime or self.enable_realtime()).send_frame(pixels)
+
+    def send_realtime_color(self, r: int, g: int, b: int, count: int, w: Optional[int] = None) -> int:
+        """Push a solid color to count LEDs over DDP, returns packets sent"""
+        return (self._realtime or self.enable_realtime()).send_color(r, g, b, count, w)
+
     def set_brightness(self, value: int) -> Dict:
         """Set WLED brightness (0-255)"""
         if not 0 <= value <= 255:
@@ -4,20 +4,22 @@ Provides a common abstraction layer for pattern manager integration.
 """
 import asyncio
 from typing import Optional, Literal
-from modules.led.led_controller import LEDController, effect_loading as wled_loading, effect_idle as wled_idle, effect_connected as wled_connected, effect_playing as wled_playing
-
-# Try to import DW LED controller - it requires RPi-specific dependencies
-try:
-    from modules.led.dw_led_controller import DWLEDController, effect_loading as dw_led_loading, effect_idle as dw_led_idle, effect_connected as dw_led_connected, effect_playing as dw_led_playing
-    DW_LEDS_AVAILABLE = True
-except ImportError:
-    # Running on non-RPi platform - DW LEDs not available
-    DWLEDController = None
-    dw_led_loading = None
-    dw_led_idle = None
-    dw_led_connected = None
-    dw_led_playing = None
-    DW_LEDS_AVAILABLE = False
+
+
+# Controllers are imported on first use: the WLED client pulls in requests, and DW LEDs
+# pull in numpy, the effect library and (when the strip is initialized) the GPIO stack
+def _wled():
+    from modules.led import led_controller
+    return led_controller
+
+
+def _dw_leds():
+    try:
+        from modules.led import dw_led_controller
+    except ImportError as e:
+        # Running on non-RPi platform - DW LEDs not available
+        raise ImportError("DW LED controller requires Raspberry Pi GPIO libraries. Install with: pip install -r requirements.txt") from e
+    return dw_led_controller
 
 
 LEDProviderType = Literal["wled", "dw_leds", "none"]
@@ -36,10 +38,8 @@ class LEDInterface:
         self._controller = None
 
         if provider == "wled" and ip_address:
-            self._controller = LEDController(ip_address)
+            self._controller = _wled().LEDController(ip_address)
         elif provider == "dw_leds":
-            if not DW_LEDS_AVAILABLE:
-                raise ImportError("DW LED controller requires Raspberry Pi GPIO libraries. Install with: pip install -r requirements.txt")
             # DW LEDs uses local GPIO, no IP needed
             num_leds = num_leds or 60
             gpio_pin = gpio_pin or 12
@@ -47,7 +47,7 @@ class LEDInterface:
             brightness = brightness if brightness is not None else 0.35
             speed = speed if speed is not None else 128
             intensity = intensity if intensity is not None else 128
-            self._controller = DWLEDController(num_leds, gpio_pin, brightness, pixel_order=pixel_order, speed=speed, intensity=intensity)
+            self._controller = _dw_leds().DWLEDController(num_leds, gpio_pin, brightness, pixel_order=pixel_order, speed=speed, intensity=intensity)
 
     @property
     def is_configured(self) -> bool:
@@ -68,17 +68,15 @@ class LEDInterface:
                 pass
 
         if provider == "wled" and ip_address:
-            self._controller = LEDController(ip_address)
+            self._controller = _wled().LEDController(ip_address)
         elif provider == "dw_leds":
-            if not DW_LEDS_AVAILABLE:
-                raise ImportError("DW LED controller requires Raspberry Pi GPIO libraries. Install with: pip install -r requirements.txt")
             num_leds = num_leds or 60
             gpio_pin = gpio_pin or 12
             pixel_order = pixel_order or "GRB"
             brightness = brightness if brightness is not None else 0.35
             speed = speed if speed is not None else 128
             intensity = intensity if intensity is not None else 128
-            self._controller = DWLEDController(num_leds, gpio_pin, brightness, pixel_order=pixel_order, speed=speed, intensity=intensity)
+            self._controller = _dw_leds().DWLEDController(num_leds, gpio_pin, brightness, pixel_order=pixel_order, speed=speed, intensity=intensity)
         else:
             self._controller = None
 
@@ -88,9 +86,9 @@ class LEDInterface:
             return False
 
         if self.provider == "wled":
-            return wled_loading(self._controller)
+            return _wled().effect_loading(self._controller)
         elif self.provider == "dw_leds":
-            return dw_led_loading(self._controller)
+            return _dw_leds().effect_loading(self._controller)
         return False
 
     def effect_idle(self, effect_name: Optional[str] = None) -> bool:
@@ -99,9 +97,9 @@ class LEDInterface:
             return False
 
         if self.provider == "wled":
-            return wled_idle(self._controller)
+            return _wled().effect_idle(self._controller)
         elif self.provider == "dw_leds":
-            return dw_led_idle(self._controller, effect_name)
+            return _dw_leds().effect_idle(self._controller, effect_name)
         return False
 
     def effect_connected(self) -> bool:
@@ -110,9 +108,9 @@ class LEDInterface:
             return False
 
         if self.provider == "wled":
-            return wled_connected(self._controller)
+            return _wled().effect_connected(self._controller)
         elif self.provider == "dw_leds":
-            return dw_led_connected(self._controller)
+            return _dw_leds().effect_connected(self._controller)
         return False
 
     def effect_playing(self, effect_name: Optional[str] = None) -> bool:
@@ -121,9 +119,9 @@ class LEDInterface:
             return False
 
         if self.provider == "wled":
-            return wled_playing(self._controller)
+            return _wled().effect_playing(self._controller)
         elif self.provider == "dw_leds":
-            return dw_led_playing(self._controller, effect_name)
+            return _dw_leds().effect_playing(self._controller, effect_name)
         return False
 
     def set_power(self, state: int) -> dict:
@@ -145,6 +143,12 @@ class LEDInterface:
 
         return {"connected": False, "message": "Unknown provider"}
 
+    def get_cached_status(self) -> Optional[dict]:
+        """Return the last known status from memory without querying the device"""
+        if self.provider == "dw_leds" and self._controller:
+            return self._controller.get_cached_status()
+        return None
+
     def get_controller(self):
         """Get the underlying controller instance (for advanced usage)"""
         return self._controller
@@ -32,6 +32,10 @@ class BaseMQTTHandler(ABC):
         """
         pass
     
+    def notify_change(self) -> None:
+        """Signal that published state may have changed. No-op by default."""
+        pass
+
     @property
     @abstractmethod
     def is_enabled(self) -> bool:
@@ -4,9 +4,7 @@ from typing import Dict, Callable
 from dotenv import load_dotenv
 from pathlib import Path
 from .base import BaseMQTTHandler
-from .handler import MQTTHandler
 from .mock import MockMQTTHandler
-from .utils import create_mqtt_callbacks
 from modules.core.state import state
 
 import logging
@@ -18,6 +16,12 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent  # Go up to project roo
 env_path = os.path.join(BASE_DIR, '.env')
 load_dotenv(env_path)
 
+def _create_real_handler() -> BaseMQTTHandler:
+    # paho-mqtt is only imported when MQTT is actually configured
+    from .handler import MQTTHandler
+    from .utils import create_mqtt_callbacks
+    return MQTTHandler(create_mqtt_callbacks())
+
 def create_mqtt_handler() -> BaseMQTTHandler:
     """Create and return an appropriate MQTT handler based on configuration.
 
@@ -31,13 +35,13 @@ def create_mqtt_handler() -> BaseMQTTHandler:
     # Check state-based configuration first (from UI settings)
     if state.mqtt_enabled and state.mqtt_broker:
         logger.info(f"Got MQTT configuration from state for broker: {state.mqtt_broker}, instantiating MQTTHandler")
-        return MQTTHandler(create_mqtt_callbacks())
+        return _create_real_handler()
 
     # Fallback to environment variable for legacy support
     mqtt_broker = os.getenv('MQTT_BROKER')
     if mqtt_broker:
         logger.info(f"Got MQTT configuration from env for broker: {mqtt_broker}, instantiating MQTTHandler")
-        return MQTTHandler(create_mqtt_callbacks())
+        return _create_real_handler()
 
     logger.info("MQTT not enabled or not configured, instantiating MockMQTTHandler")
     return MockMQTTHandler() 
\ No newline at end of file
@@ -3,16 +3,17 @@ import os
 import threading
 import time
 import json
+import hashlib
 import uuid
-from typing import Dict, Callable
+from typing import Dict, Callable, Optional
 import paho.mqtt.client as mqtt
 import logging
 import asyncio
 
 from .base import BaseMQTTHandler
 from modules.core.state import state
-from modules.core.pattern_manager import list_theta_rho_files
-from modules.core.playlist_manager import list_all_playlists
+from modules.core.pattern_manager import list_theta_rho_files, get_catalog_version
+from modules.core.playlist_manager import list_all_playlists, get_playlists_version
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,10 @@ class MQTTHandler(BaseMQTTHandler):
         self.status_topic = os.getenv('MQTT_STATUS_TOPIC', 'dune_weaver/status')
         self.command_topic = os.getenv('MQTT_COMMAND_TOPIC', 'dune_weaver/command')
         self.status_interval = int(os.getenv('MQTT_STATUS_INTERVAL', '30'))
+        self.progress_interval = float(os.getenv('MQTT_PROGRESS_INTERVAL', '5'))
+        # Upper bound for a single retained discovery payload. The pattern select
+        # is split per folder (and paged) to stay under it.
+        self.discovery_max_bytes = int(os.getenv('MQTT_DISCOVERY_MAX_BYTES', '16384'))
 
         # Store callback registry
         self.callback_registry = callback_registry
@@ -36,6 +41,14 @@ class MQTTHandler(BaseMQTTHandler):
         # Threading control
         self.running = False
         self.status_thread = None
+        self._state_changed = threading.Event()
+
+        # Last payload published per topic, used to suppress identical republishes
+        self._last_published: Dict[str, Optional[str]] = {}
+        self._publish_lock = threading.Lock()
+        self._last_progress_publish = 0.0
+        self.published_count = 0
+        self.suppressed_count = 0
 
         # Home Assistant MQTT Discovery settings - prioritize state config
         self.discovery_prefix = state.mqtt_discovery_prefix if state.mqtt_discovery_prefix else os.getenv('MQTT_DISCOVERY_PREFIX', 'homeassistant')
@@ -78,7 +91,15 @@ class MQTTHandler(BaseMQTTHandler):
         self.is_running_state = False
         self.serial_state = ""
         self.patterns = []
+        self.pattern_set = set()
+        self.catalog_version = None
         self.playlists = []
+        self.playlists_version = None
+
+        # Discovery bookkeeping: payload size per config topic, and the pattern
+        # select entities currently published (so stale ones can be removed)
+        self.discovery_sizes: Dict[str, int] = {}
+        self._pattern_select_ids = set()
 
         # Track connection state
         self._connected = False
@@ -99,18 +120,123 @@ class MQTTHandler(BaseMQTTHandler):
         # Store the main event loop during initialization
         self.main_loop = asyncio.get_event_loop()
 
-    def setup_ha_discovery(self):
-        """Publish Home Assistant MQTT discovery configurations."""
-        if not self.is_enabled:
-            return
-
-        base_device = {
+    def _base_device(self) -> dict:
+        """Device block shared by all discovery configs."""
+        return {
             "identifiers": [self.device_id],
             "name": self.device_name,
             "model": "Dune Weaver",
             "manufacturer": "DIY"
         }
-        
+
+    def _pattern_select_groups(self) -> Dict[str, tuple]:
+        """Split the pattern catalog into select entities that fit the payload budget.
+
+        Returns a mapping of config_type -> (entity name suffix, options). A
+        library small enough for one payload keeps the single "pattern" select.
+        Otherwise patterns are grouped by top-level folder, and folders that
+        are still too large are paged. Each group keeps a config_type of its
+        own: folder names that reduce to the same key get a short hash of the
+        name appended, and top-level files use a key no folder name produces.
+        """
+        # Leave room for the non-option fields of the config payload
+        budget = max(1024, self.discovery_max_bytes - 1024)
+        if len(json.dumps(self.patterns)) <= budget:
+            return {"pattern": ("", self.patterns)}
+
+        folders: Dict[Optional[str], list] = {}
+        for pattern in self.patterns:
+            folder = pattern.split("/", 1)[0] if "/" in pattern else None
+            folders.setdefault(folder, []).append(pattern)
+
+        groups = {}
+        for folder, options in sorted(folders.items(), key=lambda item: (item[0] is not None, item[0] or "")):
+            if folder is None:
+                base = "pattern-root"  # Folder slugs never contain "-"
+            else:
+                base = "pattern_" + "".join(c if c.isalnum() else "_" for c in folder.lower())
+            pages = [[]]
+            size = 2
+            for option in options:
+                option_size = len(json.dumps(option)) + 2
+                if pages[-1] and size + option_size > budget:
+                    pages.append([])
+                    size = 2
+                pages[-1].append(option)
+                size += option_size
+            config_types = [base if n == 1 else f"{base}_{n}" for n in range(1, len(pages) + 1)]
+            if any(config_type in groups for config_type in config_types):
+                base += "_" + hashlib.sha1(folder.encode("utf-8")).hexdigest()[:6]
+                config_types = [base if n == 1 else f"{base}_{n}" for n in range(1, len(pages) + 1)]
+            label = folder if folder is not None else "top level"
+            for page_number, (config_type, page) in enumerate(zip(config_types, pages), start=1):
+                suffix = label if len(pages) == 1 else f"{label} {page_number}"
+                groups[config_type] = (suffix, page)
+        return groups
+
+    def _publish_pattern_discovery(self, base_device: dict):
+        """Publish pattern select entities, removing ones that no longer exist."""
+        groups = self._pattern_select_groups()
+        for config_type, (suffix, options) in groups.items():
+            config = {
+                "name": f"{self.device_name} Pattern" + (f" ({suffix})" if suffix else ""),
+                "unique_id": f"{self.device_id}_{config_type}",
+                "command_topic": self.pattern_select_topic,
+                "options": options,
+                "device": base_device,
+                "icon": "mdi:draw"
+            }
+            # Only the single select can mirror the shared state topic; a
+            # folder select would reject patterns from other folders.
+            if config_type == "pattern":
+                config["state_topic"] = f"{self.pattern_select_topic}/state"
+            self._publish_discovery("select", config_type, config)
+
+        for config_type in self._pattern_select_ids - set(groups):
+            self._remove_discovery("select", config_type)
+        self._pattern_select_ids = set(groups)
+
+        # Free-text entry accepts any pattern path, regardless of library size
+        pattern_text_config = {
+            "name": f"{self.device_name} Pattern Path",
+            "unique_id": f"{self.device_id}_pattern_path",
+            "command_topic": self.pattern_select_topic,
+            "state_topic": f"{self.pattern_select_topic}/state",
+            "device": base_device,
+            "icon": "mdi:form-textbox",
+            "max": 255
+        }
+        self._publish_discovery("text", "pattern_path", pattern_text_config)
+
+    def _refresh_patterns(self):
+        """Re-read the pattern catalog and update discovery if it changed."""
+        version = get_catalog_version()
+        if version == self.catalog_version:
+            return
+        self.catalog_version = version
+        patterns = sorted(list_theta_rho_files())
+        if patterns != self.patterns:
+            self.patterns = patterns
+            self.pattern_set = set(patterns)
+            self._publish_pattern_discovery(self._base_device())
+
+    def get_discovery_stats(self) -> dict:
+        """Return discovery payload sizes and the configured budget."""
+        return {
+            "max_bytes": self.discovery_max_bytes,
+            "total_bytes": sum(self.discovery_sizes.values()),
+            "patterns": len(self.patterns),
+            "pattern_selects": len(self._pattern_select_ids),
+            "payloads": dict(self.discovery_sizes),
+        }
+
+    def setup_ha_discovery(self):
+        """Publish Home Assistant MQTT discovery configurations."""
+        if not self.is_enabled:
+            return
+
+        base_device = self._base_device()
+
         # Serial State Sensor
         serial_config = {
             "name": f"{self.device_name} Serial State",
@@ -212,17 +338,8 @@ class MQTTHandler(BaseMQTTHandler):
         }
         self._publish_discovery("number", "speed", speed_config)
 
-        # Pattern Select
-        pattern_config = {
-            "name": f"{self.device_name} Pattern",
-            "unique_id": f"{self.device_id}_pattern",
-            "command_topic": self.pattern_select_topic,
-            "state_topic": f"{self.pattern_select_topic}/state",
-            "options": self.patterns,
-            "device": base_device,
-            "icon": "mdi:draw"
-        }
-        self._publish_discovery("select", "pattern", pattern_config)
+        # Pattern Select (split per folder for large libraries) and free-text entry
+        self._publish_pattern_discovery(base_device)
 
         # Playlist Select
         playlist_config = {
@@ -271,7 +388,7 @@ class MQTTHandler(BaseMQTTHandler):
             "unique_id": f"{self.device_id}_clear_pattern",
             "command_topic": f"{self.device_id}/playlist/clear_pattern/set",
             "state_topic": f"{self.device_id}/playlist/clear_pattern/state",
-            "options": ["none", "random", "adaptive", "clear_from_in", "clear_from_out", "clear_sideway"],
+            "options": ["none", "random", "adaptive", "smart", "clear_from_in", "clear_from_out", "clear_sideway"],
             "device": base_device,
             "icon": "mdi:eraser",
             "entity_category": "config"
@@ -358,7 +475,7 @@ class MQTTHandler(BaseMQTTHandler):
                 "Colorloop", "Palette Flow", "Gradient", "Multi Strobe", "Waves", "BPM",
                 "Juggle", "Meteor", "Pride", "Pacifica", "Plasma", "Dissolve", "Glitter",
                 "Confetti", "Sinelon", "Candle", "Aurora", "Rain", "Halloween", "Noise",
-                "Funky Plank"
+                "Funky Plank", "Ball Spotlight", "Ball Depth", "Ball Trail"
             ]
             led_effect_config = {
                 "name": f"{self.device_name} LED Effect",
@@ -446,13 +563,61 @@ class MQTTHandler(BaseMQTTHandler):
             }
             self._publish_discovery("number", "screen_brightness", screen_brightness_config)
 
+    def _refresh_playlists(self):
+        """Re-read playlist names and republish discovery if playlists changed."""
+        version = get_playlists_version()["version"]
+        if version == self.playlists_version:
+            return
+        self.playlists_version = version
+        playlists = list_all_playlists()
+        if playlists != self.playlists:
+            self.playlists = playlists
+            self.setup_ha_discovery()
+
+    def _publish(self, topic: str, payload, retain: bool = False, force: bool = False) -> bool:
+        """Publish a payload unless it matches the last value sent on this topic.
+
+        Payloads are normalised to strings the same way paho does, so an int
+        and its string form compare equal. Returns True if the message was
+        handed to the client.
+        """
+        if payload is not None and not isinstance(payload, (str, bytes)):
+            payload = str(payload)
+        with self._publish_lock:
+            if not force and topic in self._last_published and self._last_published[topic] == payload:
+                self.suppressed_count += 1
+                return False
+            self._last_published[topic] = payload
+            self.published_count += 1
+        self.client.publish(topic, payload, retain=retain)
+        return True
+
+    def notify_change(self):
+        """Wake the status thread so changed state is published promptly."""
+        self._state_changed.set()
+
     def _publish_discovery(self, component: str, config_type: str, config: dict):
         """Helper method to publish HA discovery configs."""
         if not self.is_enabled:
             return
             
         discovery_topic = f"{self.discovery_prefix}/{component}/{self.device_id}/{config_type}/config"
-        self.client.publish(discovery_topic, json.dumps(config), retain=True)
+        payload = json.dumps(config, separators=(",", ":"))
+        size = len(payload.encode("utf-8"))
+        self.discovery_sizes[f"{component}/{config_type}"] = size
+        if size > self.discovery_max_bytes:
+            logger.warning(f"MQTT discovery payload {component}/{config_type} is {size} bytes "
+                           f"(budget {self.discovery_max_bytes})")
+        self._publish(discovery_topic, payload, retain=True)
+
+    def _remove_discovery(self, component: str, config_type: str):
+        """Remove a previously published HA entity (empty retained config)."""
+        if not self.is_enabled:
+            return
+
+        discovery_topic = f"{self.discovery_prefix}/{component}/{self.device_id}/{config_type}/config"
+        self.discovery_sizes.pop(f"{component}/{config_type}", None)
+        self._publish(discovery_topic, "", retain=True)
 
     def _publish_running_state(self, running_state=None):
         """Helper to publish running state and button availability."""
@@ -464,17 +629,17 @@ class MQTTHandler(BaseMQTTHandler):
             else:
                 running_state = "running"
                 
-        self.client.publish(self.running_state_topic, running_state, retain=True)
+        self._publish(self.running_state_topic, running_state, retain=True)
         
         # Update button availability based on state
-        self.client.publish(f"{self.device_id}/command/pause/available", 
+        self._publish(f"{self.device_id}/command/pause/available", 
                           "true" if running_state == "running" else "false", 
                           retain=True)
-        self.client.publish(f"{self.device_id}/command/play/available",
+        self._publish(f"{self.device_id}/command/play/available",
                           "true" if running_state == "paused" else "false",
                           retain=True)
         # Skip is available when running and a playlist is active
-        self.client.publish(f"{self.device_id}/command/skip/available",
+        self._publish(f"{self.device_id}/command/skip/available",
                           "true" if running_state in ("running", "paused") and bool(self.state.current_playlist) else "false",
                           retain=True)
                           
@@ -488,10 +653,10 @@ class MQTTHandler(BaseMQTTHandler):
                 current_file = current_file[len('./patterns/'):]
             else:
                 current_file = current_file.split("/")[-1].split("\\")[-1]
-            self.client.publish(f"{self.pattern_select_topic}/state", current_file, retain=True)
+            self._publish(f"{self.pattern_select_topic}/state", current_file, retain=True)
         else:
             # Clear the pattern selection
-            self.client.publish(f"{self.pattern_select_topic}/state", "None", retain=True)
+            self._publish(f"{self.pattern_select_topic}/state", "None", retain=True)
             
     def _publish_playlist_state(self, playlist_name=None):
         """Helper to publish playlist state."""
@@ -499,42 +664,49 @@ class MQTTHandler(BaseMQTTHandler):
             playlist_name = self.state.current_playlist_name
             
         if playlist_name:
-            self.client.publish(f"{self.playlist_select_topic}/state", playlist_name, retain=True)
+            self._publish(f"{self.playlist_select_topic}/state", playlist_name, retain=True)
         else:
             # Clear the playlist selection
-            self.client.publish(f"{self.playlist_select_topic}/state", "None", retain=True)
+            self._publish(f"{self.playlist_select_topic}/state", "None", retain=True)
             
     def _publish_serial_state(self):
         """Helper to publish serial state."""
         serial_connected = (state.conn.is_connected() if state.conn else False)
         serial_port = state.port if serial_connected else None
         serial_status = f"connected to {serial_port}" if serial_connected else "disconnected"
-        self.client.publish(self.serial_state_topic, serial_status, retain=True)
+        self._publish(self.serial_state_topic, serial_status, retain=True)
         
-    def _publish_progress_state(self):
-        """Helper to publish completion percentage and time remaining."""
+    def _publish_progress_state(self, force: bool = False):
+        """Helper to publish completion percentage and time remaining.
+
+        While a pattern runs, updates are rate-limited to progress_interval.
+        """
+        now = time.time()
+        if state.execution_progress and not force and now - self._last_progress_publish < self.progress_interval:
+            return
+        self._last_progress_publish = now
         if state.execution_progress:
             current, total, remaining_time, elapsed_time = state.execution_progress
             completion_percentage = (current / total * 100) if total > 0 else 0
             
             # Publish completion percentage (rounded to 1 decimal place)
-            self.client.publish(self.completion_topic, round(completion_percentage, 1), retain=True)
+            self._publish(self.completion_topic, round(completion_percentage, 1), retain=True)
             
             # Publish time remaining (rounded to nearest second, defaulting to 0 if None)
             time_remaining_seconds = round(remaining_time) if remaining_time is not None else 0
-            self.client.publish(self.time_remaining_topic, max(0, time_remaining_seconds), retain=True)
+            self._publish(self.time_remaining_topic, max(0, time_remaining_seconds), retain=True)
         else:
             # No pattern running, publish zeros
-            self.client.publish(self.completion_topic, 0, retain=True)
-            self.client.publish(self.time_remaining_topic, 0, retain=True)
+            self._publish(self.completion_topic, 0, retain=True)
+            self._publish(self.time_remaining_topic, 0, retain=True)
 
     def _publish_playlist_settings_state(self):
         """Helper to publish playlist settings state (mode, pause_time, clear_pattern, shuffle)."""
-        self.client.publish(f"{self.device_id}/playlist/mode/state", state.playlist_mode, retain=True)
-        self.client.publish(f"{self.device_id}/playlist/pause_time/state", state.pause_time, retain=True)
-        self.client.publish(f"{self.device_id}/playlist/clear_pattern/state", state.clear_pattern, retain=True)
+        self._publish(f"{self.device_id}/playlist/mode/state", state.playlist_mode, retain=True)
+        self._publish(f"{self.device_id}/playlist/pause_time/state", state.pause_time, retain=True)
+        self._publish(f"{self.device_id}/playlist/clear_pattern/state", state.clear_pattern, retain=True)
         shuffle_state = "ON" if state.shuffle else "OFF"
-        self.client.publish(f"{self.device_id}/playlist/shuffle/state", shuffle_state, retain=True)
+        self._publish(f"{self.device_id}/playlist/shuffle/state", shuffle_state, retain=True)
 
     def _publish_led_state(self):
         """Helper to publish LED state to MQTT (DW LEDs only - WLED has its own MQTT)."""
@@ -542,22 +714,22 @@ class MQTTHandler(BaseMQTTHandler):
             return
 
         try:
-            status = state.led_controller.check_status()
-            if not status.get("connected", False):
+            # Read the controller's in-memory status; never trigger hardware init from here
+            status = state.led_controller.get_cached_status()
+            if not status or not status.get("connected", False):
                 return
 
             # Publish power state (check both "power" for WLED compatibility and "power_on" for DW LEDs)
             is_powered = status.get("power_on", status.get("power", False))
             power_state = "ON" if is_powered else "OFF"
-            self.client.publish(f"{self.device_id}/led/power/state", power_state, retain=True)
+            self._publish(f"{self.device_id}/led/power/state", power_state, retain=True)
 
-            # Publish brightness (convert from 0-1 to 0-100)
+            # Publish brightness (already 0-100 in DW LED status)
             if "brightness" in status:
-                brightness = int(status["brightness"] * 100)
-                self.client.publish(f"{self.device_id}/led/brightness/state", brightness, retain=True)
+                self._publish(f"{self.device_id}/led/brightness/state", int(status["brightness"]), retain=True)
 
             # Publish effect
-            if "effect_id" in status:
+            if "current_effect" in status:
                 effect_map = {
                     0: "Static", 1: "Blink", 2: "Breathe", 3: "Wipe", 4: "Fade",
                     5: "Scan", 6: "Dual Scan", 7: "Rainbow Cycle", 8: "Rainbow",
@@ -569,18 +741,19 @@ class MQTTHandler(BaseMQTTHandler):
                     29: "BPM", 30: "Juggle", 31: "Meteor", 32: "Pride", 33: "Pacifica",
                     34: "Plasma", 35: "Dissolve", 36: "Glitter", 37: "Confetti",
                     38: "Sinelon", 39: "Candle", 40: "Aurora", 41: "Rain",
-                    42: "Halloween", 43: "Noise", 44: "Funky Plank"
+                    42: "Halloween", 43: "Noise", 44: "Funky Plank",
+                    45: "Ball Spotlight", 46: "Ball Depth", 47: "Ball Trail"
                 }
-                effect_name = effect_map.get(status["effect_id"], "Static")
-                self.client.publish(f"{self.device_id}/led/effect/state", effect_name, retain=True)
+                effect_name = effect_map.get(status["current_effect"], "Static")
+                self._publish(f"{self.device_id}/led/effect/state", effect_name, retain=True)
 
             # Publish speed
             if "speed" in status:
-                self.client.publish(f"{self.device_id}/led/speed/state", status["speed"], retain=True)
+                self._publish(f"{self.device_id}/led/speed/state", status["speed"], retain=True)
 
             # Publish intensity
             if "intensity" in status:
-                self.client.publish(f"{self.device_id}/led/intensity/state", status["intensity"], retain=True)
+                self._publish(f"{self.device_id}/led/intensity/state", status["intensity"], retain=True)
 
             # Publish color (RGB)
             if "colors" in status and len(status["colors"]) > 0:
@@ -591,7 +764,7 @@ class MQTTHandler(BaseMQTTHandler):
                     r = int(color_hex[1:3], 16)
                     g = int(color_hex[3:5], 16)
                     b = int(color_hex[5:7], 16)
-                    self.client.publish(f"{self.device_id}/led/color/state",
+                    self._publish(f"{self.device_id}/led/color/state",
                                       json.dumps({"r": r, "g": g, "b": b}), retain=True)
 
         except Exception as e:
@@ -605,8 +778,8 @@ class MQTTHandler(BaseMQTTHandler):
         try:
             status = state.screen_controller.get_status()
             power_state = "ON" if status["power_on"] else "OFF"
-            self.client.publish(f"{self.device_id}/screen/power/state", power_state, retain=True)
-            self.client.publish(f"{self.device_id}/screen/brightness/state", status["brightness"], retain=True)
+            self._publish(f"{self.device_id}/screen/power/state", power_state, retain=True)
+            self._publish(f"{self.device_id}/screen/brightness/state", status["brightness"], retain=True)
         except Exception as e:
             logger.error(f"Error publishing screen state: {e}")
 
@@ -628,6 +801,8 @@ class MQTTHandler(BaseMQTTHandler):
         if playlist_name is not None:
             self._publish_playlist_state(playlist_name)
 
+        self.notify_change()
+
     def on_connect(self, client, userdata, flags, rc):
         """Callback when connected to MQTT broker."""
         if rc == 0:
@@ -656,8 +831,12 @@ class MQTTHandler(BaseMQTTHandler):
                 (self.screen_power_topic, 0),
                 (self.screen_brightness_topic, 0),
             ])
+            # The broker may have lost retained messages; republish everything
+            with self._publish_lock:
+                self._last_published.clear()
             # Publish discovery configurations
             self.setup_ha_discovery()
+            self.notify_change()
         else:
             self._connected = False
             error_messages = {
@@ -696,7 +875,7 @@ class MQTTHandler(BaseMQTTHandler):
                 from modules.core.pattern_manager import THETA_RHO_DIR
                 # Handle pattern selection
                 pattern_name = msg.payload.decode()
-                if pattern_name in self.patterns:
+                if pattern_name in self.pattern_set:
                     # Schedule the coroutine to run in the main event loop
                     asyncio.run_coroutine_threadsafe(
                         self.callback_registry['run_pattern'](
@@ -707,7 +886,7 @@ class MQTTHandler(BaseMQTTHandler):
                     ).add_done_callback(
                         lambda _: self._publish_pattern_state(None)  # Clear pattern after execution
                     )
-                    self.client.publish(f"{self.pattern_select_topic}/state", pattern_name, retain=True)
+                    self._publish(f"{self.pattern_select_topic}/state", pattern_name, retain=True)
             elif msg.topic == self.playlist_select_topic:
                 # Handle playlist selection
                 playlist_name = msg.payload.decode()
@@ -725,7 +904,7 @@ class MQTTHandler(BaseMQTTHandler):
                     ).add_done_callback(
                         lambda _: self._publish_playlist_state(None)  # Clear playlist after execution
                     )
-                    self.client.publish(f"{self.playlist_select_topic}/state", playlist_name, retain=True)
+                    self._publish(f"{self.playlist_select_topic}/state", playlist_name, retain=True)
             elif msg.topic == self.speed_topic:
                 speed = int(msg.payload.decode())
                 self.callback_registry['set_speed'](speed)
@@ -769,22 +948,22 @@ class MQTTHandler(BaseMQTTHandler):
                 mode = msg.payload.decode()
                 if mode in ["single", "loop"]:
                     state.playlist_mode = mode
-                    self.client.publish(f"{self.device_id}/playlist/mode/state", mode, retain=True)
+                    self._publish(f"{self.device_id}/playlist/mode/state", mode, retain=True)
             elif msg.topic == f"{self.device_id}/playlist/pause_time/set":
                 pause_time = float(msg.payload.decode())
                 if 0 <= pause_time <= 60:
                     state.pause_time = pause_time
-                    self.client.publish(f"{self.device_id}/playlist/pause_time/state", pause_time, retain=True)
+                    self._publish(f"{self.device_id}/playlist/pause_time/state", pause_time, retain=True)
             elif msg.topic == f"{self.device_id}/playlist/clear_pattern/set":
                 clear_pattern = msg.payload.decode()
-                if clear_pattern in ["none", "random", "adaptive", "clear_from_in", "clear_from_out", "clear_sideway"]:
+                if clear_pattern in ["none", "random", "adaptive", "smart", "clear_from_in", "clear_from_out", "clear_sideway"]:
                     state.clear_pattern = clear_pattern
-                    self.client.publish(f"{self.device_id}/playlist/clear_pattern/state", clear_pattern, retain=True)
+                    self._publish(f"{self.device_id}/playlist/clear_pattern/state", clear_pattern, retain=True)
             elif msg.topic == f"{self.device_id}/playlist/shuffle/set":
                 payload = msg.payload.decode()
                 shuffle_value = payload == "ON"
                 state.shuffle = shuffle_value
-                self.client.publish(f"{self.device_id}/playlist/shuffle/state", payload, retain=True)
+                self._publish(f"{self.device_id}/playlist/shuffle/state", payload, retain=True)
             elif msg.topic == self.led_power_topic:
                 # Handle LED power command (DW LEDs only)
                 payload = msg.payload.decode()
@@ -795,7 +974,7 @@ class MQTTHandler(BaseMQTTHandler):
                     if payload == "ON" and state.dw_led_idle_timeout_enabled:
                         state.dw_led_last_activity_time = time.time()
                         logger.debug("LED activity time reset due to MQTT power on")
-                    self.client.publish(f"{self.device_id}/led/power/state", payload, retain=True)
+                    self._publish(f"{self.device_id}/led/power/state", payload, retain=True)
             elif msg.topic == self.led_brightness_topic:
                 # Handle LED brightness command (DW LEDs only)
                 brightness = int(msg.payload.decode())
@@ -804,7 +983,7 @@ class MQTTHandler(BaseMQTTHandler):
                     if controller and hasattr(controller, 'set_brightness'):
                         # DW LED controller expects 0-100, converts internally to 0.0-1.0
                         controller.set_brightness(brightness)
-                        self.client.publish(f"{self.device_id}/led/brightness/state", brightness, retain=True)
+                        self._publish(f"{self.device_id}/led/brightness/state", brightness, retain=True)
             elif msg.topic == self.led_effect_topic:
                 # Handle LED effect command (DW LEDs only)
                 effect_name = msg.payload.decode()
@@ -821,14 +1000,15 @@ class MQTTHandler(BaseMQTTHandler):
                         "BPM": 29, "Juggle": 30, "Meteor": 31, "Pride": 32, "Pacifica": 33,
                         "Plasma": 34, "Dissolve": 35, "Glitter": 36, "Confetti": 37,
                         "Sinelon": 38, "Candle": 39, "Aurora": 40, "Rain": 41,
-                        "Halloween": 42, "Noise": 43, "Funky Plank": 44
+                        "Halloween": 42, "Noise": 43, "Funky Plank": 44,
+                        "Ball Spotlight": 45, "Ball Depth": 46, "Ball Trail": 47
                     }
                     effect_id = effect_map.get(effect_name)
                     if effect_id is not None:
                         controller = state.led_controller.get_controller()
                         if controller and hasattr(controller, 'set_effect'):
                             controller.set_effect(effect_id)
-                            self.client.publish(f"{self.device_id}/led/effect/state", effect_name, retain=True)
+                            self._publish(f"{self.device_id}/led/effect/state", effect_name, retain=True)
             elif msg.topic == self.led_speed_topic:
                 # Handle LED speed command (DW LEDs only)
                 speed = int(msg.payload.decode())
@@ -836,7 +1016,7 @@ class MQTTHandler(BaseMQTTHandler):
                     controller = state.led_controller.get_controller()
                     if controller and hasattr(controller, 'set_speed'):
                         controller.set_speed(speed)
-                        self.client.publish(f"{self.device_id}/led/speed/state", speed, retain=True)
+                        self._publish(f"{self.device_id}/led/speed/state", speed, retain=True)
             elif msg.topic == self.led_intensity_topic:
                 # Handle LED intensity command (DW LEDs only)
                 intensity = int(msg.payload.decode())
@@ -844,7 +1024,7 @@ class MQTTHandler(BaseMQTTHandler):
                     controller = state.led_controller.get_controller()
                     if controller and hasattr(controller, 'set_intensity'):
                         controller.set_intensity(intensity)
-                        self.client.publish(f"{self.device_id}/led/intensity/state", intensity, retain=True)
+                        self._publish(f"{self.device_id}/led/intensity/state", intensity, retain=True)
             elif msg.topic == self.led_color_topic:
                 # Handle LED color command (RGB) (DW LEDs only)
                 try:
@@ -854,7 +1034,7 @@ class MQTTHandler(BaseMQTTHandler):
                         if controller and hasattr(controller, 'set_color'):
                             r, g, b = color_data['r'], color_data['g'], color_data['b']
                             controller.set_color(r, g, b)
-                            self.client.publish(f"{self.device_id}/led/color/state",
+                            self._publish(f"{self.device_id}/led/color/state",
                                               json.dumps({"r": r, "g": g, "b": b}), retain=True)
                 except json.JSONDecodeError:
                     logger.error(f"Invalid JSON for color command: {msg.payload}")
@@ -886,35 +1066,47 @@ class MQTTHandler(BaseMQTTHandler):
         except Exception as e:
             logger.error(f"Error processing MQTT message: {e}")
 
+    def _publish_all_states(self):
+        """Publish every state topic; unchanged payloads are suppressed by the cache."""
+        self._publish_running_state()
+        self._publish_pattern_state()
+        self._publish_playlist_state()
+        self._publish_serial_state()
+        self._publish_progress_state()
+        self._publish(f"{self.speed_topic}/state", self.state.speed, retain=True)
+        self._publish_playlist_settings_state()
+        self._publish_led_state()
+        self._publish_screen_state()
+
     def publish_status(self):
-        """Publish status updates periodically."""
+        """Publish state changes as they are signalled, plus a periodic keepalive.
+
+        The thread sleeps until notify_change() is called or the interval
+        elapses. While a pattern is running it also wakes every
+        progress_interval so completion and time remaining stay current.
+        """
+        last_keepalive = 0.0
         while self.running:
             try:
-                # Update all states
-                self._publish_running_state()
-                self._publish_pattern_state()
-                self._publish_playlist_state()
-                self._publish_serial_state()
-                self._publish_progress_state()
-                
-                # Update speed state
-                self.client.publish(f"{self.speed_topic}/state", self.state.speed, retain=True)
+                self._publish_all_states()
 
-                # Update LED state
-                self._publish_led_state()
+                # Pick up patterns and playlists changed since the last pass
+                self._refresh_patterns()
+                self._refresh_playlists()
 
-                # Update screen state
-                self._publish_screen_state()
+                now = time.time()
+                if now - last_keepalive >= self.status_interval:
+                    status = {
+                        "timestamp": now,
+                        "client_id": self.client_id
+                    }
+                    self.client.publish(self.status_topic, json.dumps(status))
+                    last_keepalive = now
+                    logger.debug(f"MQTT publish stats: {self.published_count} sent, {self.suppressed_count} suppressed")
 
-                # Publish keepalive status
-                status = {
-                    "timestamp": time.time(),
-                    "client_id": self.client_id
-                }
-                self.client.publish(self.status_topic, json.dumps(status))
-                
-                # Wait for next interval
-                time.sleep(self.status_interval)
+                timeout = self.progress_interval if self.state.current_playing_file else self.status_interval
+                self._state_changed.wait(timeout)
+                self._state_changed.clear()
             except Exception as e:
                 logger.error(f"Error publishing status: {e}")
                 time.sleep(5)  # Wait before retry
@@ -934,21 +1126,17 @@ class MQTTHandler(BaseMQTTHandler):
             self.status_thread.start()
             
             # Get initial pattern and playlist lists
-            self.patterns = list_theta_rho_files()
+            self.catalog_version = get_catalog_version()
+            self.patterns = sorted(list_theta_rho_files())
+            self.pattern_set = set(self.patterns)
             self.playlists = list_all_playlists()
+            self.playlists_version = get_playlists_version()["version"]
 
             # Wait a bit for MQTT connection to establish
             time.sleep(1)
             
             # Publish initial states
-            self._publish_running_state()
-            self._publish_pattern_state()
-            self._publish_playlist_state()
-            self._publish_serial_state()
-            self._publish_progress_state()
-            self._publish_playlist_settings_state()
-            self._publish_led_state()
-            self._publish_screen_state()
+            self._publish_all_states()
 
             # Setup Home Assistant discovery
             self.setup_ha_discovery()
@@ -964,6 +1152,7 @@ class MQTTHandler(BaseMQTTHandler):
 
         # First stop the running flag to prevent new iterations
         self.running = False
+        self._state_changed.set()
         
         # Clean up status thread
         local_status_thread = self.status_thread  # Keep a local reference
@@ -9,16 +9,22 @@ import shutil
 import os
 import logging
 import asyncio
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 HOTSPOT_CON_NAME = "DuneWeaver-Hotspot"
-NMCLI = shutil.which("nmcli") or "/usr/bin/nmcli"
+
+
+@lru_cache(maxsize=None)
+def nmcli_path() -> str:
+    """Locate nmcli on first use rather than at import."""
+    return shutil.which("nmcli") or "/usr/bin/nmcli"
 
 
 def run_nmcli(*args: str, timeout: int = 30) -> str:
     """Run nmcli and return stdout."""
-    cmd = [NMCLI] + list(args)
+    cmd = [nmcli_path()] + list(args)
     logger.debug(f"Running nmcli: {' '.join(cmd)}")
     result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
 
@@ -32,7 +38,7 @@ def run_nmcli(*args: str, timeout: int = 30) -> str:
 
 def run_nmcli_check(*args: str, timeout: int = 30) -> subprocess.CompletedProcess:
     """Run nmcli and return the full CompletedProcess (for checking returncode)."""
-    cmd = [NMCLI] + list(args)
+    cmd = [nmcli_path()] + list(args)
     logger.debug(f"Running nmcli: {' '.join(cmd)}")
     result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
 
@@ -231,7 +237,7 @@ async def connect_to_network(ssid: str, password: str) -> dict:
     try:
         # Delete any stale connection profile for this SSID (ignore if not found)
         subprocess.run(
-            [NMCLI, "con", "delete", ssid],
+            [nmcli_path(), "con", "delete", ssid],
             capture_output=True, text=True, timeout=10,
         )
 
@@ -294,7 +300,7 @@ def save_network(ssid: str, password: str) -> dict:
     try:
         # Delete any stale connection profile for this SSID (ignore if not found)
         subprocess.run(
-            [NMCLI, "con", "delete", ssid],
+            [nmcli_path(), "con", "delete", ssid],
             capture_output=True, text=True, timeout=10,
         )
 
@@ -108,12 +108,13 @@ def reset_asyncio_events(run_hardware):
         yield
         return
 
-    import modules.core.pattern_manager as pm
+    from modules.core import tables
     from modules.core.state import state
 
-    # Reset pattern_manager's global async primitives
-    pm.pause_event = None
-    pm.pattern_lock = None  # Will be recreated via get_pattern_lock()
+    # Reset the table's async primitives
+    engine = tables.current()
+    engine.pause_event = None
+    engine.pattern_lock = None  # Will be recreated via get_pattern_lock()
 
     # Reset state's event loop tracking so events get recreated in new loop
     state._event_loop = None
@@ -134,8 +135,8 @@ def reset_asyncio_events(run_hardware):
     yield
 
     # Clean up after test
-    pm.pause_event = None
-    pm.pattern_lock = None
+    engine.pause_event = None
+    engine.pattern_lock = None
     state._event_loop = None
     state._stop_event = None
     state._skip_event = None
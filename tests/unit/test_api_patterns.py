@@ -5,11 +5,17 @@ Tests the following endpoints:
 - GET /list_theta_rho_files
 - GET /list_theta_rho_files_with_metadata
 - POST /get_theta_rho_coordinates
+- GET /api/coordinates/{pattern} (binary, levels of detail)
 - POST /run_theta_rho (when disconnected)
 """
+import math
+
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 
+from modules.core import coordinate_codec
+
 
 class TestListThetaRhoFiles:
     """Tests for /list_theta_rho_files endpoint."""
@@ -128,6 +134,74 @@ class TestGetThetaRhoCoordinates:
         assert "not found" in data["detail"].lower()
 
 
+class TestBinaryCoordinates:
+    """Tests for the /api/coordinates binary endpoint."""
+
+    @pytest.fixture
+    def spiral(self, tmp_path):
+        """A 50k point spiral pattern on disk; parsing is mocked to return it."""
+        patterns_dir = tmp_path / "patterns"
+        patterns_dir.mkdir()
+        (patterns_dir / "spiral.thr").write_text("0 0\n")
+        coordinates = [(i * 0.01, (i % 5000) / 5000.0) for i in range(50000)]
+        with patch("main.THETA_RHO_DIR", str(patterns_dir)), \
+             patch("main.parse_theta_rho_file", return_value=coordinates) as parse:
+            yield coordinates, parse
+
+    async def test_levels_of_detail(self, async_client, spiral):
+        coordinates, parse = spiral
+        response = await async_client.get("/api/coordinates/spiral.thr", params={"lod": 0})
+        assert response.status_code == 200
+        assert response.headers["x-lod-levels"] == "2000,20000,50000"
+        level, total, points = coordinate_codec.decode(response.content)
+        assert (level, total, len(points)) == (0, 50000, 2000)
+        assert points[0] == pytest.approx(coordinates[0], abs=1e-4)
+        assert points[-1] == pytest.approx(coordinates[-1], abs=1e-4)
+
+        response = await async_client.get("/api/coordinates/spiral.thr")
+        level, total, points = coordinate_codec.decode(response.content)
+        assert len(points) == 50000
+        assert points[12345] == pytest.approx(coordinates[12345], abs=1e-4)
+        assert parse.call_count == 1  # Both levels come from one parse
+
+    async def test_gzip_and_size(self, async_client, spiral):
+        response = await async_client.get("/api/coordinates/spiral.thr", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < 50000 * 4  # Smaller than raw delta16
+        assert len(coordinate_codec.decode(response.content)[2]) == 50000
+
+    async def test_byte_range(self, async_client, spiral):
+        full = (await async_client.get("/api/coordinates/spiral.thr",
+                                       params={"encoding": "float32"},
+                                       headers={"Accept-Encoding": "identity"})).content
+        response = await async_client.get("/api/coordinates/spiral.thr", params={"encoding": "float32"},
+                                          headers={"Range": "bytes=28-1027"})
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes 28-1027/{len(full)}"
+        assert response.content == full[28:1028]
+
+        response = await async_client.get("/api/coordinates/spiral.thr", headers={"Range": "bytes=99999999-"})
+        assert response.status_code == 416
+
+    async def test_missing_file_and_bad_params(self, async_client, spiral):
+        assert (await async_client.get("/api/coordinates/missing.thr")).status_code == 404
+        assert (await async_client.get("/api/coordinates/spiral.thr", params={"lod": 7})).status_code == 400
+        assert (await async_client.get("/api/coordinates/spiral.thr", params={"encoding": "json"})).status_code == 400
+        assert (await async_client.get("/api/coordinates/..%2F..%2Fetc%2Fpasswd")).status_code in (400, 404)
+
+    def test_delta16_falls_back_to_float32_for_large_steps(self):
+        points = np.array([[0.0, 0.0], [100.0, 1.0]])
+        data = coordinate_codec.encode(points, coordinate_codec.ENCODING_DELTA16, 2, 2)
+        assert data[5] == coordinate_codec.ENCODING_FLOAT32
+        assert coordinate_codec.decode(data)[2][1] == pytest.approx([100.0, 1.0])
+
+    def test_delta16_does_not_drift(self):
+        points = np.array([[i * 0.00123, 0.5 + 0.5 * math.sin(i / 50)] for i in range(100000)])
+        data = coordinate_codec.encode(points, coordinate_codec.ENCODING_DELTA16, 2, len(points))
+        decoded = coordinate_codec.decode(data)[2]
+        assert abs(decoded - points).max() < 1e-4
+
+
 class TestRunThetaRho:
     """Tests for /run_theta_rho endpoint."""
 
@@ -9,6 +9,8 @@ Tests the following endpoints:
 - DELETE /delete_playlist
 - POST /rename_playlist
 - POST /add_to_playlist
+- POST /remove_from_playlist
+- POST /move_in_playlist
 - POST /run_playlist (when disconnected)
 """
 import pytest
@@ -217,6 +219,33 @@ class TestAddToPlaylist:
         assert response.status_code == 404
 
 
+class TestIncrementalPlaylistEdits:
+    """Tests for /remove_from_playlist and /move_in_playlist endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_remove_from_playlist(self, async_client):
+        """Test remove_from_playlist removes an item by index."""
+        with patch("main.playlist_manager.remove_from_playlist", return_value=True) as mock_remove:
+            response = await async_client.post(
+                "/remove_from_playlist",
+                json={"playlist_name": "favorites", "index": 2}
+            )
+
+        assert response.status_code == 200
+        mock_remove.assert_called_once_with("favorites", 2)
+
+    @pytest.mark.asyncio
+    async def test_move_in_playlist_not_found(self, async_client):
+        """Test move_in_playlist returns 404 for a bad playlist or index."""
+        with patch("main.playlist_manager.move_in_playlist", return_value=False):
+            response = await async_client.post(
+                "/move_in_playlist",
+                json={"playlist_name": "favorites", "from_index": 0, "to_index": 9}
+            )
+
+        assert response.status_code == 404
+
+
 class TestRunPlaylist:
     """Tests for /run_playlist endpoint."""
 
@@ -0,0 +1,103 @@
+"""
+Unit tests for the prioritized cache job queue.
+"""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from modules.core import cache_jobs, cache_manager
+from modules.core.cache_jobs import PRIORITY_LIBRARY, PRIORITY_PLAYLIST, PRIORITY_VISIBLE, CacheJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """A fresh queue with generation recorded instead of performed."""
+    done = []
+
+    async def fake_generate(pattern_file):
+        await asyncio.sleep(0.01)
+        done.append(pattern_file)
+        return not pattern_file.startswith("bad")
+
+    jobs = CacheJobQueue(queue_file=str(tmp_path / "cache_jobs.json"))
+    with patch.object(cache_manager, "generate_image_preview", fake_generate), \
+         patch.object(cache_jobs, "WORKERS", 1), \
+         patch.object(cache_jobs, "IDLE_POLL", 0.02), \
+         patch.object(cache_jobs, "MOTION_THROTTLE", 0.01), \
+         patch.object(cache_jobs, "motion_busy", return_value=False):
+        jobs.done = done
+        yield jobs
+
+
+class TestCacheJobQueue:
+    """Tests for ordering, deduplication and motion awareness."""
+
+    async def test_priority_order_and_dedupe(self, queue):
+        queue.enqueue(["a.thr", "b.thr", "c.thr"], PRIORITY_LIBRARY)
+        queue.enqueue(["c.thr", "./patterns/d.thr"], PRIORITY_PLAYLIST)
+        queue.enqueue(["b.thr"], PRIORITY_VISIBLE)
+        assert queue.enqueue(["a.thr"], PRIORITY_LIBRARY) == 0  # Already queued
+        await queue.join()
+
+        assert queue.done == ["b.thr", "c.thr", "d.thr", "a.thr"]
+        assert cache_manager.cache_progress["queue"]["processed"] == 4
+        assert await queue.request("e.thr") is True
+
+    async def test_waits_for_motion_but_serves_visible_requests(self, queue):
+        queue.enqueue(["library.thr"], PRIORITY_LIBRARY)
+        with patch.object(cache_jobs, "motion_busy", return_value=True):
+            assert await asyncio.wait_for(queue.request("visible.thr"), timeout=1.0) is True
+            await asyncio.sleep(0.1)
+            assert queue.done == ["visible.thr"]
+            assert queue.stats()["paused"] is True
+        await queue.join()
+        assert queue.done == ["visible.thr", "library.thr"]
+
+    async def test_failed_job_reported(self, queue):
+        assert await queue.request("bad.thr") is False
+        assert queue.stats()["failed"] == 1
+
+    async def test_pending_jobs_survive_restart(self, queue, tmp_path):
+        with patch.object(cache_jobs, "motion_busy", return_value=True):
+            queue.enqueue(["one.thr", "two.thr"], PRIORITY_LIBRARY)
+            queue.enqueue(["three.thr"], PRIORITY_PLAYLIST)
+            await queue.stop()
+        with open(queue.queue_file) as f:
+            assert json.load(f)["pending"] == {"one.thr": 2, "two.thr": 2, "three.thr": 1}
+
+        patterns_dir = tmp_path / "patterns"
+        patterns_dir.mkdir()
+        (patterns_dir / "one.thr").write_text("0 0\n")
+        (patterns_dir / "three.thr").write_text("0 0\n")
+        restarted = CacheJobQueue(queue_file=queue.queue_file)
+        restarted.done = queue.done
+        with patch("modules.core.pattern_manager.THETA_RHO_DIR", str(patterns_dir)):
+            assert await restarted.restore() == 2  # two.thr was deleted meanwhile
+        await restarted.join()
+        assert queue.done == ["three.thr", "one.thr"]
+
+    async def test_job_in_flight_survives_restart(self, queue):
+        started = asyncio.Event()
+
+        async def slow_generate(pattern_file):
+            started.set()
+            await asyncio.sleep(10)
+
+        with patch.object(cache_manager, "generate_image_preview", slow_generate):
+            queue.enqueue(["slow.thr"], PRIORITY_VISIBLE)
+            await asyncio.wait_for(started.wait(), timeout=1.0)
+            await queue.stop()
+        with open(queue.queue_file) as f:
+            assert json.load(f)["pending"] == {"slow.thr": PRIORITY_LIBRARY}
+
+    def test_motion_thread_busy_window(self):
+        from modules.core.pattern_manager import MotionControlThread
+
+        motion = MotionControlThread()
+        assert motion.is_busy() is False
+        motion.running = True
+        motion.last_move_time = cache_jobs.time.monotonic()
+        assert motion.is_busy() is True
+        assert motion.is_busy(window=0.0) is False
@@ -0,0 +1,83 @@
+"""
+Unit tests for the preview cache: kiosk thumbnails written alongside previews.
+"""
+import asyncio
+import os
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from PIL import Image
+
+from modules.core import cache_jobs, cache_manager
+from modules.core.preview import THUMBNAIL_SIZE
+
+
+def _webp_bytes(size=512):
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    img.putpixel((size // 2, size // 2), (0, 0, 0, 255))
+    buffer = BytesIO()
+    img.save(buffer, format="WEBP")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def cache_dirs(tmp_path):
+    with patch.object(cache_manager, "CACHE_DIR", str(tmp_path / "cached_images")), \
+         patch.object(cache_manager, "THUMBNAIL_DIR", str(tmp_path / "cached_thumbnails")), \
+         patch.object(cache_manager, "get_pattern_metadata", return_value={"total_coordinates": 1}), \
+         patch.object(cache_manager, "ensure_cache_dir"):
+        yield tmp_path
+
+
+class TestThumbnails:
+    """Tests for kiosk thumbnail generation."""
+
+    def test_thumbnail_path_mirrors_subdirectories(self, cache_dirs):
+        path = cache_manager.get_thumbnail_path("custom_patterns\\spiral.thr")
+        assert path == os.path.join(str(cache_dirs / "cached_thumbnails"), "custom_patterns", "spiral.thr.png")
+
+    async def test_preview_generation_writes_thumbnail(self, cache_dirs):
+        with patch("modules.core.preview.generate_preview_image", AsyncMock(return_value=_webp_bytes())):
+            assert await cache_manager.generate_image_preview("sub/star.thr") is True
+
+        with Image.open(cache_manager.get_thumbnail_path("sub/star.thr")) as thumb:
+            assert thumb.format == "PNG"
+            assert thumb.size == (THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+
+    async def test_missing_thumbnail_backfilled_from_cached_preview(self, cache_dirs):
+        with open(cache_manager.get_cache_path("star.thr"), "wb") as f:
+            f.write(_webp_bytes())
+        render = AsyncMock()
+        with patch("modules.core.preview.generate_preview_image", render):
+            assert await cache_manager.generate_image_preview("star.thr") is True
+
+        render.assert_not_called()
+        assert os.path.exists(cache_manager.get_thumbnail_path("star.thr"))
+
+    async def test_rebuild_goes_through_the_job_queue(self, cache_dirs):
+        done = []
+        busy = [True]
+
+        async def fake_generate(pattern_file):
+            done.append(pattern_file)
+            return True
+
+        queue = cache_jobs.CacheJobQueue(queue_file=str(cache_dirs / "cache_jobs.json"))
+        with patch.object(cache_jobs, "cache_jobs", queue), \
+             patch.object(cache_jobs, "IDLE_POLL", 0.02), \
+             patch.object(cache_jobs, "motion_busy", lambda: busy[0]), \
+             patch.object(cache_manager, "list_theta_rho_files", return_value=["a.thr", "b.thr", "a.thr"]), \
+             patch.object(cache_manager, "generate_image_preview", fake_generate):
+            rebuild = asyncio.create_task(cache_manager.rebuild_cache())
+            await asyncio.sleep(0.1)
+            assert done == []  # Held back while a pattern is drawing
+            busy[0] = False
+            await asyncio.wait_for(rebuild, timeout=5.0)
+        assert sorted(done) == ["a.thr", "b.thr"]
+
+    def test_delete_removes_thumbnail(self, cache_dirs):
+        cache_manager.write_thumbnail("star.thr", _webp_bytes())
+        with patch.object(cache_manager, "load_metadata_cache", return_value={"data": {}}):
+            assert cache_manager.delete_pattern_cache("star.thr") is True
+        assert not os.path.exists(cache_manager.get_thumbnail_path("star.thr"))
@@ -0,0 +1,229 @@
+"""
+Unit tests for execution checkpoints and resume after restart.
+"""
+from math import pi
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from modules.core import checkpoint, pattern_manager, playlist_manager, tables
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Isolated journal file and checkpoint state."""
+    path = tmp_path / "checkpoint.jsonl"
+    with patch.object(checkpoint, "CHECKPOINT_FILE", str(path)), \
+         patch.dict(tables.current()._locals, {"checkpoint": checkpoint._Journal()}):
+        yield path
+
+
+def _pattern(tmp_path, name="spiral.thr", count=50):
+    path = tmp_path / name
+    path.write_text("\n".join(f"{i * 0.5 + 20 * pi:.3f} {i / count:.3f}" for i in range(count)) + "\n")
+    return str(path)
+
+
+def _interrupt(files, playlist_index, pattern, index, clearing=False, completed=False):
+    """Journal left behind by a run that stopped at the given point."""
+    checkpoint.begin_run(files, pause_time=5, clear_pattern="adaptive", run_mode="loop")
+    checkpoint.set_position(files, playlist_index)
+    checkpoint.begin(pattern, clearing, 50)
+    checkpoint.progress(index, 1.0, 0.5)
+    checkpoint.flush()
+    if completed:
+        checkpoint.complete()
+    return checkpoint.load()
+
+
+class TestJournal:
+    """Tests for writing and reading the journal."""
+
+    def test_round_trip(self, journal, tmp_path):
+        pattern = _pattern(tmp_path)
+        with patch.object(checkpoint.state, "machine_x", 12.5), patch.object(checkpoint.state, "machine_y", -3.0):
+            interrupted = _interrupt(["a.thr", pattern], 1, pattern, 31)
+
+        assert interrupted.pattern == pattern
+        assert (interrupted.index, interrupted.total, interrupted.rho) == (31, 50, 0.5)
+        assert (interrupted.machine_x, interrupted.machine_y) == (12.5, -3.0)
+        assert (interrupted.playlist_index, interrupted.files, interrupted.run_mode) == (1, ["a.thr", pattern], "loop")
+        assert checkpoint.summary()["progress"] == 64.0
+        assert checkpoint.start_index(interrupted, pattern) == 31
+
+    def test_progress_rate_limited(self, journal, tmp_path):
+        checkpoint.begin(_pattern(tmp_path), False, 50)
+        assert not checkpoint.progress(1, 0.0, 0.0)
+        with patch.object(checkpoint, "CHECKPOINT_INTERVAL", 0.0):
+            assert checkpoint.progress(2, 0.0, 0.0)
+
+    def test_compacts_and_survives_torn_line(self, journal, tmp_path):
+        checkpoint.begin(_pattern(tmp_path), False, 50)
+        with patch.object(checkpoint, "COMPACT_AFTER", 3):
+            for index in range(10):
+                checkpoint.progress(index, 0.0, 0.0)
+                checkpoint.flush()
+        assert len(journal.read_text().splitlines()) <= 4
+        with open(journal, "a") as f:
+            f.write('{"type": "progress", "ind')
+        assert checkpoint.load().index == 9
+
+    def test_finish_and_changed_pattern(self, journal, tmp_path):
+        pattern = _pattern(tmp_path)
+        interrupted = _interrupt([pattern], 0, pattern, 20)
+        _pattern(tmp_path, count=60)
+        assert checkpoint.start_index(interrupted, pattern) == 0
+
+        checkpoint.finish()
+        assert not journal.exists()
+        assert checkpoint.load() is None
+
+
+class TestResume:
+    """Tests for continuing an interrupted run."""
+
+    async def test_executor_resumes_at_segment(self, journal, tmp_path, mock_state):
+        pattern = _pattern(tmp_path)
+        mock_state.led_controller = None
+        mock_state.scheduled_pause_enabled = False
+        mock_state.clear_pattern_speed = None
+        moves = []
+
+        async def fake_move(theta, rho, speed=None, index=None):
+            moves.append((index, theta, rho))
+
+        with patch("modules.core.pattern_manager.state", mock_state), \
+             patch.object(checkpoint, "state", mock_state), \
+             patch("modules.core.pattern_manager.move_polar", AsyncMock(side_effect=fake_move)), \
+             patch("modules.core.pattern_manager.reset_theta", AsyncMock()), \
+             patch("modules.core.pattern_manager.stop_actions", AsyncMock()), \
+             patch("modules.core.pattern_manager.start_idle_led_timeout", AsyncMock()), \
+             patch("modules.core.pattern_manager.connection_manager.check_idle_async", AsyncMock()), \
+             patch("modules.core.pattern_manager.log_execution_time") as log_time:
+            assert await pattern_manager._execute_pattern_internal(pattern, start_index=30)
+
+        assert [index for index, _, _ in moves] == list(range(30, 50))
+        # Travel to the resume point without unwinding the revolutions drawn before it
+        assert 0 <= moves[0][1] < 2 * pi
+        assert moves[1][1] - moves[0][1] == pytest.approx(0.5)
+        assert log_time.call_args.kwargs["was_completed"] is False
+        assert checkpoint.load().pattern == pattern
+
+    async def test_interrupted_clear_then_pattern(self, journal, tmp_path, mock_state):
+        clear, pattern = _pattern(tmp_path, "clear.thr"), _pattern(tmp_path)
+        interrupted = _interrupt([pattern], 0, clear, 12, clearing=True)
+        executed = []
+
+        async def fake_execute(file_path, start_index=0):
+            executed.append((file_path, start_index))
+            return True
+
+        with patch("modules.core.pattern_manager.state", mock_state), \
+             patch("modules.core.pattern_manager._execute_pattern_internal", AsyncMock(side_effect=fake_execute)), \
+             patch("modules.core.pattern_manager.clear_policy.record_pattern"):
+            await pattern_manager.run_theta_rho_file(pattern, is_playlist=True, clear_pattern="adaptive", resume=interrupted)
+
+        assert executed == [(clear, 12), (pattern, 0)]
+
+    async def test_single_pattern_leaves_nothing_to_resume(self, journal, tmp_path, mock_state):
+        pattern = _pattern(tmp_path)
+        _interrupt([_pattern(tmp_path, "a.thr"), pattern], 1, pattern, 20)
+        starts = []
+
+        async def fake_execute(file_path, start_index=0):
+            checkpoint.begin(file_path, False, 50)
+            starts.append(checkpoint._journal().start)
+            return True
+
+        with patch("modules.core.pattern_manager.state", mock_state), \
+             patch("modules.core.pattern_manager._execute_pattern_internal", AsyncMock(side_effect=fake_execute)), \
+             patch("modules.core.pattern_manager.broadcast_progress", AsyncMock()), \
+             patch("modules.core.pattern_manager.clear_policy.record_pattern"):
+            await pattern_manager.run_theta_rho_file(pattern)
+
+        # Drawn as a run of its own, not with the interrupted playlist's options
+        assert (starts[0]["files"], starts[0]["run_mode"], starts[0]["pause_time"]) == ([pattern], "single", 0)
+        assert checkpoint._journal().run == {}
+        assert not journal.exists()
+        assert checkpoint.load() is None
+
+    async def test_single_pattern_interrupted_during_clear(self, journal, tmp_path, mock_state):
+        clear, pattern = _pattern(tmp_path, "clear_from_in.thr"), _pattern(tmp_path)
+        crashed = []
+
+        async def fake_execute(file_path, start_index=0):
+            checkpoint.begin(file_path, mock_state.is_clearing, 50)
+            checkpoint.progress(12, 1.0, 0.5)
+            checkpoint.flush()
+            crashed.append(checkpoint.load())  # What the next boot would find
+            return True
+
+        with patch("modules.core.pattern_manager.state", mock_state), \
+             patch("modules.core.pattern_manager._execute_pattern_internal", AsyncMock(side_effect=fake_execute)), \
+             patch("modules.core.pattern_manager.get_clear_pattern_file", return_value=clear), \
+             patch("modules.core.pattern_manager.broadcast_progress", AsyncMock()), \
+             patch("modules.core.pattern_manager.clear_policy.record_clear"), \
+             patch("modules.core.pattern_manager.clear_policy.record_pattern"):
+            mock_state.is_clearing = False
+            await pattern_manager.run_theta_rho_file(pattern, clear_pattern="clear_from_in")
+
+        interrupted = crashed[0]
+        assert (interrupted.pattern, interrupted.clearing, interrupted.index) == (clear, True, 12)
+        # The resume finishes the clear and then draws the pattern that was asked for
+        assert interrupted.files == [pattern]
+        assert interrupted.clear_pattern == "clear_from_in"
+
+    @pytest.mark.parametrize("completed, expected", [(False, ["b.thr", "c.thr"]), (True, ["c.thr"])])
+    async def test_playlist_continues_in_recorded_order(self, journal, tmp_path, mock_state, completed, expected):
+        files = [str(tmp_path / name) for name in ("a.thr", "b.thr", "c.thr")]
+        interrupted = _interrupt(files, 1, files[1], 7, completed=completed)._replace(run_mode="single")
+        mock_state.current_playlist = None
+        mock_state.current_playlist_index = None
+        mock_state.playlist_mode = None
+        runs = []
+
+        async def fake_run(file_path, resume=None, **kwargs):
+            runs.append((file_path.split("/")[-1], resume))
+
+        with patch("modules.core.pattern_manager.state", mock_state), \
+             patch("modules.core.pattern_manager.run_theta_rho_file", AsyncMock(side_effect=fake_run)), \
+             patch("modules.core.pattern_manager.broadcast_progress", AsyncMock()), \
+             patch("modules.core.pattern_manager.start_idle_led_timeout", AsyncMock()), \
+             patch("modules.core.cache_manager.load_metadata_cache", return_value={"data": {}}):
+            await pattern_manager.run_theta_rho_files(files, clear_pattern="adaptive", shuffle=True, resume=interrupted)
+
+        assert [name for name, _ in runs] == expected
+        assert runs[0][1] is (None if completed else interrupted)
+        assert all(resume is None for _, resume in runs[1:])
+        assert not journal.exists()
+
+    async def test_resume_endpoint(self, async_client, journal, tmp_path):
+        pattern = _pattern(tmp_path)
+        _interrupt([pattern], 0, pattern, 20)
+        conn = MagicMock()
+        conn.is_connected.return_value = True
+        with patch("main.state.conn", conn), \
+             patch("main.connection_manager.home", return_value=True) as home, \
+             patch("main.playlist_manager.resume_interrupted", AsyncMock(return_value=(True, "ok"))) as resume:
+            status = await async_client.get("/api/checkpoint")
+            response = await async_client.post("/api/checkpoint/resume", json={})
+
+        assert status.json()["pending"]["index"] == 20
+        assert response.status_code == 200
+        home.assert_called_once()
+        assert resume.call_args.args[0].pattern == pattern
+
+        await async_client.delete("/api/checkpoint")
+        assert (await async_client.post("/api/checkpoint/resume", json={})).status_code == 404
+
+    async def test_missing_patterns_dropped(self, journal, tmp_path):
+        files = [_pattern(tmp_path, "a.thr"), str(tmp_path / "gone.thr"), _pattern(tmp_path, "c.thr")]
+        interrupted = _interrupt(files, 1, files[1], 7)
+        with patch("modules.core.playlist_manager.pattern_manager.run_theta_rho_files", AsyncMock()) as run, \
+             patch.object(playlist_manager, "state", MagicMock()):
+            assert (await playlist_manager.resume_interrupted(interrupted))[0]
+            await playlist_manager.current_playlist_task()
+
+        resume = run.call_args.kwargs["resume"]
+        assert resume.files == [files[0], files[2]]
+        assert (resume.playlist_index, resume.completed) == (0, True)
@@ -0,0 +1,106 @@
+"""
+Unit tests for procedural clear patterns.
+"""
+import os
+from math import pi
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from modules.core import clear_generator, pattern_manager
+from modules.core.clear_generator import SIDEWAYS, SPIRAL
+from modules.core.state import state
+
+
+@pytest.fixture
+def geometry():
+    """Default geometry on a standard table, generated clears enabled."""
+    with patch.multiple(state, table_type="dune_weaver", table_type_override=None, generated_clears=True,
+                        clear_ball_diameter_mm=None, clear_table_radius_mm=None, clear_ring_overlap=0.0,
+                        custom_clear_from_in=None, custom_clear_from_out=None):
+        yield state
+
+
+class TestGeometry:
+    """Tests for ring spacing from ball and table size."""
+
+    @pytest.mark.parametrize("table_type, shipped_file", [
+        ("dune_weaver", "clear_from_out.thr"),
+        ("dune_weaver_mini", "clear_from_out_mini.thr"),
+        ("dune_weaver_pro", "clear_from_out_pro.thr"),
+    ])
+    def test_defaults_match_shipped_clears(self, geometry, table_type, shipped_file):
+        geometry.table_type = table_type
+        coordinates = pattern_manager.parse_theta_rho_file(os.path.join("./patterns", shipped_file))
+        turns = abs(coordinates[-1][0] - coordinates[0][0]) / (2 * pi)
+        assert clear_generator.ring_spacing() == pytest.approx(1.0 / turns, rel=0.05)
+
+    def test_settings_override_table_defaults(self, geometry):
+        geometry.clear_ball_diameter_mm = 20.0
+        geometry.clear_table_radius_mm = 400.0
+        assert clear_generator.ring_spacing() == pytest.approx(0.05)
+        geometry.clear_ring_overlap = 0.5
+        assert clear_generator.ring_spacing() == pytest.approx(0.025)
+
+
+class TestGeneration:
+    """Tests for generated coordinates."""
+
+    def test_spiral_over_band(self):
+        path = clear_generator.path_for(clear_generator.spec(SPIRAL, 0.2, 0.6, 0.02))
+        coordinates = pattern_manager.parse_theta_rho_file(path)
+        assert coordinates[0] == (0.0, 0.2)
+        assert coordinates[-1][1] == pytest.approx(0.6)
+        assert coordinates[-1][0] == pytest.approx(20 * 2 * pi)
+
+    def test_sideways_covers_table(self):
+        coordinates = np.array(clear_generator.coordinates(clear_generator.path_for(clear_generator.spec(SIDEWAYS, spacing=0.05))))
+        theta, rho = coordinates[:, 0], coordinates[:, 1]
+        assert rho.max() <= 1.0
+        x, y = rho * np.cos(theta), rho * np.sin(theta)
+        # One stroke per ring spacing from edge to edge
+        assert np.unique(np.round(y, 3)).size >= 40
+        assert x.min() < -0.99 and x.max() > 0.99
+
+    def test_memoized_without_file_io(self):
+        path = clear_generator.path_for(clear_generator.spec(SPIRAL, 1.0, 0.0, 0.0303))
+        with patch("builtins.open", side_effect=AssertionError("generated clears must not touch files")):
+            first = pattern_manager.parse_theta_rho_file(path)
+            hits = clear_generator._generate.cache_info().hits
+            assert pattern_manager.parse_theta_rho_file(path) == first
+        assert clear_generator._generate.cache_info().hits == hits + 1
+
+    def test_paths_round_trip(self):
+        clear = clear_generator.spec(SPIRAL, 0.123456, 1.5, 0.0213)
+        assert clear == clear_generator.ClearSpec(SPIRAL, 0.1235, 1.0, 0.0213)
+        assert clear_generator.spec_from_path(clear_generator.path_for(clear)) == clear
+        assert clear_generator.spec_from_path("./patterns/spiral_0.1235_1.0000_0.0213.thr") is None
+
+
+class TestClearSelection:
+    """Tests for generated clears in clear pattern selection."""
+
+    def test_generated_clears_replace_shipped_files(self, geometry):
+        clear = pattern_manager.get_clear_pattern_file("clear_from_out")
+        assert clear == clear_generator.path_for(clear_generator.spec(SPIRAL, 1.0, 0.0, 0.0303))
+        assert pattern_manager.is_clear_pattern(clear)
+        assert clear_generator.spec_from_path(pattern_manager.get_clear_pattern_file("clear_sideway")).kind == SIDEWAYS
+
+        geometry.generated_clears = False
+        assert pattern_manager.get_clear_pattern_file("clear_from_out") == "./patterns/clear_from_out.thr"
+
+    def test_custom_clears_take_precedence(self, geometry):
+        geometry.custom_clear_from_in = "clear_from_in.thr"
+        assert pattern_manager.get_clear_pattern_file("clear_from_in") == os.path.join("./patterns", "clear_from_in.thr")
+
+    async def test_settings_validate_overlap(self, async_client, geometry):
+        with patch.object(state, "save"):
+            response = await async_client.patch("/api/settings", json={"patterns": {"clear_ring_overlap": 1.0}})
+            assert response.status_code == 400
+            response = await async_client.patch("/api/settings", json={"patterns": {
+                "clear_ring_overlap": 0.25, "clear_ball_diameter_mm": 0
+            }})
+        assert response.status_code == 200
+        assert geometry.clear_ring_overlap == 0.25
+        assert geometry.clear_ball_diameter_mm is None
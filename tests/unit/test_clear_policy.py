@@ -0,0 +1,121 @@
+"""
+Unit tests for smart clear selection.
+"""
+import os
+from math import pi
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from modules.core import clear_generator, clear_policy, pattern_manager
+from modules.core.clear_policy import CLEAR_FULL, CLEAR_NONE, CLEAR_PARTIAL, CLEAR_REPOSITION
+
+
+def _write_pattern(path, rhos, turns=1.0):
+    """Pattern file visiting rhos in order over the given number of turns."""
+    steps = len(rhos) - 1
+    path.write_text("\n".join(f"{2 * pi * turns * i / steps:.5f} {rho}" for i, rho in enumerate(rhos)) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def table(tmp_path):
+    """Isolated table state and run history; a 50-turn full clear."""
+    full_clear = _write_pattern(tmp_path / "clear_from_out.thr", [1.0, 0.0], turns=50)
+    with patch.dict(clear_policy._table(), {"known": False, "band": None}), \
+         patch.object(pattern_manager, "EXECUTION_LOG_FILE", str(tmp_path / "execution_times.jsonl")), \
+         patch("modules.core.pattern_manager.get_clear_pattern_file", return_value=full_clear):
+        yield tmp_path
+
+
+class TestDecide:
+    """Tests for choosing a clear from what is on the table."""
+
+    def test_unknown_table_gets_full_clear(self, table):
+        pattern = _write_pattern(table / "a.thr", [0.0, 0.5])
+        decision = clear_policy.decide(pattern, ball_rho=0.0)
+        assert decision.action == CLEAR_FULL
+        assert decision.clear_file.endswith("clear_from_out.thr")
+        assert decision.saved_seconds == 0
+
+    def test_clean_table_needs_no_clear(self, table):
+        pattern = _write_pattern(table / "a.thr", [0.0, 0.5])
+        clear_policy.record_clear()
+        assert clear_policy.decide(pattern, ball_rho=0.01).action == CLEAR_NONE
+        decision = clear_policy.decide(pattern, ball_rho=1.0)
+        assert decision.action == CLEAR_REPOSITION
+        assert decision.clear_file is None
+        assert decision.estimated_seconds == pytest.approx(clear_policy.SECONDS_PER_RHO)
+
+    def test_full_range_pattern_still_clears_drawn_table(self, table):
+        clear_policy.record_pattern(_write_pattern(table / "inner.thr", [0.0, 0.2, 0.4]))
+        outer = _write_pattern(table / "full.thr", [0.4, 0.0, 1.0])
+        assert clear_policy.decide(outer, ball_rho=0.4).action == CLEAR_PARTIAL
+
+        clear_policy.record_pattern(_write_pattern(table / "wide.thr", [0.0, 1.0]))
+        assert clear_policy.decide(outer, ball_rho=0.4).action == CLEAR_FULL
+
+    def test_thin_ring_redrawn_from_ball_position(self, table):
+        clear_policy.record_pattern(_write_pattern(table / "ring.thr", [0.45, 0.5]))
+        outer = _write_pattern(table / "full.thr", [0.5, 0.0, 1.0])
+        decision = clear_policy.decide(outer, ball_rho=0.5)
+        assert decision.action == CLEAR_NONE
+        assert decision.saved_seconds == decision.full_seconds
+        # The same ring elsewhere than the next start is swept first
+        assert clear_policy.decide(outer, ball_rho=0.9).action == CLEAR_PARTIAL
+
+    def test_narrow_band_gets_partial_sweep(self, table):
+        clear_policy.record_pattern(_write_pattern(table / "inner.thr", [0.0, 0.3]))
+        ring = _write_pattern(table / "ring.thr", [0.6, 0.9])
+        decision = clear_policy.decide(ring, ball_rho=0.3)
+
+        assert decision.action == CLEAR_PARTIAL
+        assert decision.estimated_seconds < decision.full_seconds
+        assert pattern_manager.is_clear_pattern(decision.clear_file)
+        sweep = pattern_manager.parse_theta_rho_file(decision.clear_file)
+        # Sweeps the old band and ends at the edge nearest the next start
+        assert (sweep[0][1], sweep[-1][1]) == (0.0, 0.3)
+        # At the full clear's spacing: 50 turns over the table, so 15 over 0.3
+        assert sweep[-1][0] == pytest.approx(15 * 2 * pi)
+        # Generated in memory, nothing is written
+        assert not os.path.exists(decision.clear_file)
+
+    def test_wide_band_gets_full_clear(self, table):
+        clear_policy.record_pattern(_write_pattern(table / "wide.thr", [0.1, 0.9]))
+        narrow = _write_pattern(table / "narrow.thr", [0.4, 0.5])
+        assert clear_policy.decide(narrow, ball_rho=0.9).action == CLEAR_FULL
+
+    def test_bands_accumulate_until_cleared(self, table):
+        clear_policy.record_pattern(_write_pattern(table / "a.thr", [0.0, 0.2]))
+        clear_policy.record_pattern(_write_pattern(table / "b.thr", [0.7, 0.9]))
+        assert clear_policy.table_band() == (True, (0.0, 0.9))
+        clear_policy.record_clear()
+        assert clear_policy.table_band() == (True, None)
+        clear_policy.forget()
+        assert clear_policy.table_band() == (False, None)
+
+
+class TestSmartMode:
+    """Tests for the smart clear mode during playback."""
+
+    async def test_runs_chosen_clear_and_tracks_table(self, table, mock_state):
+        pattern = _write_pattern(table / "a.thr", [0.0, 0.5])
+        executed = []
+
+        async def fake_execute(file_path, start_index=0):
+            executed.append(file_path)
+            return True
+
+        with patch("modules.core.pattern_manager.state", mock_state), \
+             patch("modules.core.pattern_manager._execute_pattern_internal", AsyncMock(side_effect=fake_execute)), \
+             patch("modules.core.pattern_manager.broadcast_progress", AsyncMock()):
+            await pattern_manager.run_theta_rho_file(pattern, is_playlist=True, clear_pattern="smart")
+            # Unknown table: full clear first
+            assert [path.split("/")[-1] for path in executed] == ["clear_from_out.thr", "a.thr"]
+            assert clear_policy.table_band() == (True, (0.0, 0.5))
+
+            executed.clear()
+            await pattern_manager.run_theta_rho_file(pattern, is_playlist=True, clear_pattern="smart")
+            # Drawing over the same band still needs it erased, by a sweep of just that band
+            assert len(executed) == 2 and executed[1] == pattern
+            assert clear_generator.is_generated(executed[0])
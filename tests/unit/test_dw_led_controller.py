@@ -0,0 +1,198 @@
+"""
+Unit tests for the DWLEDController render loop and pixel backends.
+
+Runs the controller against the in-memory pixel backend instead of GPIO:
+- Frames are rendered and pushed while powered on
+- The render thread sleeps while powered off
+- Parameter changes do not wait on the hardware lock
+- Frame counters are exposed through check_status()
+- The benchmark harness renders reproducible frames
+- Ball-synchronized effects follow the position channel
+"""
+import time
+
+import pytest
+
+from modules.core.position_channel import PositionChannel, position_channel
+from modules.led.dw_led_controller import DWLEDController
+from modules.led.dw_leds import benchmark
+from modules.led.dw_leds.backends import MemoryPixels, create_memory_pixels
+from modules.led.dw_leds.effects.basic_effects import get_effect
+from modules.led.dw_leds.segment import Segment
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def controller():
+    """Controller wired to an in-memory strip."""
+    ctrl = DWLEDController(num_leds=30, target_fps=100, pixel_factory=create_memory_pixels)
+    assert ctrl.check_status()["connected"]
+    yield ctrl
+    ctrl.stop()
+
+
+class TestRenderLoop:
+    """Tests for the frame-paced render loop."""
+
+    def test_renders_frames_when_on(self, controller):
+        controller.set_color(0, 255, 0)
+        assert wait_for(lambda: controller._pixels.show_count > 3)
+        assert controller._pixels[0] == (0, 255, 0)
+
+    def test_sleeps_when_off(self, controller):
+        controller.set_effect(8)
+        assert wait_for(lambda: controller._frame_stats["frames"] > 3)
+        controller.set_power(0)
+        time.sleep(0.05)
+        frames = controller._frame_stats["frames"]
+        time.sleep(0.2)
+        assert controller._frame_stats["frames"] == frames
+        assert controller._pixels[0] == (0, 0, 0)
+        assert controller._effect_thread.is_alive()
+
+    def test_frame_rate_is_capped(self, controller):
+        controller.target_fps = 20
+        controller._frame_interval = 1.0 / 20
+        controller.set_effect(8)  # Rainbow asks for ~42 FPS
+        time.sleep(0.5)
+        assert 5 <= controller._frame_stats["frames"] <= 12
+
+    def test_parameter_changes_do_not_take_hardware_lock(self, controller):
+        controller.set_effect(8)
+        with controller._lock:
+            start = time.monotonic()
+            controller.set_speed(10)
+            controller.set_intensity(20)
+            controller.set_palette(3)
+            assert time.monotonic() - start < 0.1
+        assert wait_for(lambda: controller._segment.speed == 10 and controller._segment.palette_id == 3)
+        assert controller._segment.intensity == 20
+
+    def test_effect_change_applied_between_frames(self, controller):
+        controller.set_effect(8)
+        controller.set_effect(0)
+        assert wait_for(lambda: controller._render_effect_id == 0)
+
+    def test_status_includes_render_counters(self, controller):
+        controller.set_effect(8)
+        assert wait_for(lambda: controller._frame_stats["frames"] > 3)
+        render = controller.check_status()["render"]
+        assert render["target_fps"] == 100
+        assert render["frames"] > 3
+        assert render["dropped_frames"] >= 0
+        assert render["frame_time_ms"] > 0
+
+
+class TestPixelBackends:
+    """Tests for backend selection and the memory backend."""
+
+    def test_env_selects_memory_backend(self, monkeypatch):
+        monkeypatch.setenv("DW_LED_BACKEND", "memory")
+        ctrl = DWLEDController(num_leds=8, pixel_order="GRBW")
+        try:
+            assert ctrl.check_status()["connected"]
+            assert isinstance(ctrl._pixels, MemoryPixels)
+            assert ctrl._pixels.bpp == 4
+        finally:
+            ctrl.stop()
+
+    def test_unknown_backend_reports_error(self, monkeypatch):
+        monkeypatch.setenv("DW_LED_BACKEND", "bogus")
+        status = DWLEDController(num_leds=8).check_status()
+        assert not status["connected"]
+        assert "bogus" in status["error"]
+
+    def test_memory_pixels_record_frames(self):
+        pixels = MemoryPixels(3, record=True, max_frames=2)
+        for value in (1, 2, 3):
+            pixels.fill((value, 0, 0))
+            pixels.show()
+        assert pixels.show_count == 3
+        assert pixels.frames == [[(2, 0, 0)] * 3, [(3, 0, 0)] * 3]
+
+
+class TestBenchmarkHarness:
+    """Tests for the effect benchmark harness."""
+
+    def test_render_frames_is_reproducible(self):
+        first = benchmark.render_frames(14, 20, 10, record=True).frames
+        second = benchmark.render_frames(14, 20, 10, record=True).frames
+        assert len(first) == 10
+        assert first == second
+
+    def test_benchmark_effect_reports_metrics(self):
+        result = benchmark.benchmark_effect(8, 30, frames=5, pixel_order="GRBW", alloc_frames=2)
+        assert result["ms_per_frame"] > 0
+        assert result["fps"] > 0
+        assert result["alloc_kb"] >= 0
+
+    def test_dump_and_compare_strips(self, tmp_path):
+        written = benchmark.dump_strips(str(tmp_path), [10], 4, ["GRB", "GRBW"], [8, 25])
+        assert written == 4
+        assert benchmark.compare_strips(str(tmp_path), [10], 4, ["GRB", "GRBW"], [8, 25]) == []
+        assert benchmark.compare_strips(str(tmp_path), [12], 4, ["GRB"], [8]) == ["effect08_12_GRB.png (missing)"]
+
+
+class TestPositionSync:
+    """Tests for the position channel and ball-synchronized effects."""
+
+    def test_channel_publish_and_listeners(self):
+        channel = PositionChannel()
+        assert channel.read() is None
+        seen = []
+        channel.add_listener(seen.append)
+        first = channel.publish(1.0, 0.5)
+        second = channel.publish(2.0, 0.25)
+        assert channel.read() == second
+        assert (second.theta, second.rho, second.seq) == (2.0, 0.25, first.seq + 1)
+        channel.remove_listener(seen.append)
+        channel.publish(3.0, 0.0)
+        assert seen == [first, second]
+
+    def test_spotlight_follows_theta(self):
+        channel = PositionChannel()
+        segment = Segment(MemoryPixels(40), 0, 40)
+        segment.position = channel
+        segment.colors = [0x00FF0000, 0x00000000, 0]
+        segment.intensity = 0
+        channel.publish(3.14159265, 0.0)  # Half a turn: LED 20
+        get_effect(45)(segment)
+        assert segment.get_pixel_color(20) == 0x00FF0000
+        assert segment.get_pixel_color(0) == 0
+        assert segment.position_sample.seq == 1
+
+    def test_trail_fills_gap_between_positions(self):
+        channel = PositionChannel()
+        segment = Segment(MemoryPixels(40), 0, 40)
+        segment.position = channel
+        segment.speed = 0
+        trail = get_effect(47)
+        channel.publish(0.0, 1.0)
+        trail(segment)
+        segment.call += 1
+        channel.publish(2 * 3.14159265 * 5 / 40 + 0.01, 1.0)  # Jump to LED 5
+        trail(segment)
+        assert all(segment.get_pixel_color(i) for i in range(6))
+        assert not segment.get_pixel_color(6)
+
+    def test_position_latency_under_one_frame(self):
+        ctrl = DWLEDController(num_leds=30, target_fps=30, pixel_factory=create_memory_pixels)
+        try:
+            ctrl.set_effect(45)
+            assert wait_for(lambda: ctrl._render_uses_position)
+            for i in range(10):
+                position_channel.publish(i * 0.3, 0.5)
+                time.sleep(0.05)
+            render = ctrl.check_status()["render"]
+            assert render["position_updates"] >= 5
+            assert render["position_latency_ms"] < 1000 / 30
+        finally:
+            ctrl.stop()
@@ -0,0 +1,170 @@
+"""
+Unit tests for the NumPy framebuffer-backed LED Segment.
+
+The vectorized whole-strip operations must produce exactly what the
+per-pixel color helpers produce:
+- Auto-white extraction on RGBW strips
+- fade_out / blur / blend against color_fade / color_blend
+- colors_from_palette against color_from_palette
+- Palette lookup tables against gradient interpolation
+- commit() writes the framebuffer to the pixel buffer in one go
+"""
+import random
+
+import pytest
+
+from modules.led.dw_leds.backends import MemoryPixels
+from modules.led.dw_leds.effects.basic_effects import EFFECTS
+from modules.led.dw_leds.segment import Segment
+from modules.led.dw_leds.utils.colors import color_blend, color_fade
+from modules.led.dw_leds.utils import palettes
+from modules.led.dw_leds.utils.palettes import color_from_palette, get_palette
+
+
+def make_segment(length, is_rgbw=False):
+    pixels = MemoryPixels(length, 4 if is_rgbw else 3)
+    return pixels, Segment(pixels, 0, length, is_rgbw=is_rgbw)
+
+
+def random_fill(segment, seed=1):
+    rng = random.Random(seed)
+    for i in range(segment.length):
+        segment.set_pixel_color(i, rng.randrange(1 << 24))
+    return [segment.get_pixel_color(i) for i in range(segment.length)]
+
+
+class TestSegmentFramebuffer:
+    """Tests for per-pixel access and commit."""
+
+    def test_buffer_shape(self):
+        _, rgb = make_segment(10)
+        _, rgbw = make_segment(10, is_rgbw=True)
+        assert rgb.buffer.shape == (10, 3)
+        assert rgbw.buffer.shape == (10, 4)
+
+    def test_set_get_roundtrip_rgb(self):
+        _, segment = make_segment(4)
+        segment.set_pixel_color(2, 0x00123456)
+        assert segment.get_pixel_color(2) == 0x00123456
+        assert segment.get_pixel_color(99) == 0
+
+    def test_auto_white_rgbw(self):
+        _, segment = make_segment(4, is_rgbw=True)
+        segment.set_pixel_color(0, 0x00FF8040)
+        assert tuple(segment.buffer[0]) == (0xFF - 0x40, 0x80 - 0x40, 0, 0x40)
+
+    def test_commit_writes_pixels(self):
+        pixels, segment = make_segment(3)
+        segment.fill(0x00010203)
+        assert pixels[0] == (0, 0, 0)
+        segment.commit()
+        assert list(pixels) == [(1, 2, 3)] * 3
+
+    def test_set_colors_matches_set_pixel_color(self):
+        _, vectorized = make_segment(50, is_rgbw=True)
+        _, scalar = make_segment(50, is_rgbw=True)
+        colors = [random.Random(i).randrange(1 << 32) for i in range(50)]
+        vectorized.set_colors(colors)
+        for i, c in enumerate(colors):
+            scalar.set_pixel_color(i, c)
+        assert (vectorized.buffer == scalar.buffer).all()
+
+
+class TestVectorizedOperations:
+    """Vectorized operations must match the scalar color helpers."""
+
+    @pytest.mark.parametrize("is_rgbw", [False, True])
+    @pytest.mark.parametrize("amount", [0, 1, 100, 200, 254, 255])
+    def test_fade_out(self, is_rgbw, amount):
+        _, segment = make_segment(40, is_rgbw)
+        before = random_fill(segment)
+        _, expected = make_segment(40, is_rgbw)
+        for i, c in enumerate(before):
+            expected.set_pixel_color(i, color_fade(c, amount))
+        segment.fade_out(amount)
+        assert (segment.buffer == expected.buffer).all()
+
+    @pytest.mark.parametrize("is_rgbw", [False, True])
+    @pytest.mark.parametrize("amount", [1, 64, 128, 255])
+    def test_blur(self, is_rgbw, amount):
+        _, segment = make_segment(40, is_rgbw)
+        before = random_fill(segment, seed=2)
+        _, expected = make_segment(40, is_rgbw)
+        last = len(before) - 1
+        for i in range(len(before)):
+            if i == 0:
+                blended = color_blend(before[i], before[i + 1], amount)
+            elif i == last:
+                blended = color_blend(before[i], before[i - 1], amount)
+            else:
+                left = color_blend(before[i], before[i - 1], amount // 2)
+                blended = color_blend(left, before[i + 1], amount // 2)
+            expected.set_pixel_color(i, blended)
+        segment.blur(amount)
+        assert (segment.buffer == expected.buffer).all()
+
+    def test_blend(self):
+        _, segment = make_segment(20)
+        before = random_fill(segment, seed=3)
+        segment.blend(0x00FF0000, 100)
+        assert [segment.get_pixel_color(i) for i in range(20)] == [
+            color_blend(c, 0x00FF0000, 100) for c in before
+        ]
+
+    @pytest.mark.parametrize("palette_id", [0, 6, 11, 40, 58])
+    @pytest.mark.parametrize("brightness", [255, 128, 3])
+    def test_colors_from_palette(self, palette_id, brightness):
+        _, segment = make_segment(77)
+        segment.palette_id = palette_id
+        for use_index in (True, False):
+            indices = list(range(0, 600, 7))
+            expected = [segment.color_from_palette(i, use_index, brightness) for i in indices]
+            assert segment.colors_from_palette(indices, use_index, brightness).tolist() == expected
+
+    def test_colors_from_palette_defaults_to_every_led(self):
+        _, segment = make_segment(10)
+        palette = get_palette(0)
+        expected = [color_from_palette(palette, (i * 255) // 9) for i in range(10)]
+        assert segment.colors_from_palette().tolist() == expected
+
+
+class TestPaletteLUT:
+    """Palette lookup tables must match gradient interpolation exactly."""
+
+    def test_lut_for_every_palette(self):
+        assert len(palettes.PALETTE_LUTS) == len(palettes.ALL_PALETTES)
+        for palette_id, palette in enumerate(palettes.ALL_PALETTES):
+            lut = palettes.get_palette_lut(palette_id)
+            assert lut.shape == (256, 3)
+            assert [tuple(rgb) for rgb in lut.tolist()] == [
+                palettes._gradient_rgb(palette, i) for i in range(256)
+            ]
+
+    @pytest.mark.parametrize("brightness", [255, 200, 77, 0])
+    def test_scalar_matches_unregistered_palette(self, brightness):
+        """A copy of a palette takes the interpolation path and gives the same colors."""
+        for palette in palettes.ALL_PALETTES[::7]:
+            copy = list(palette)
+            for i in range(0, 300, 3):
+                assert color_from_palette(palette, i, brightness) == color_from_palette(copy, i, brightness)
+
+    @pytest.mark.parametrize("brightness", [255, 128, 1])
+    def test_gather_matches_scalar(self, brightness):
+        positions = list(range(-5, 300))
+        for palette_id in (0, 13, 37, 58, 999):
+            palette = get_palette(palette_id)
+            expected = [color_from_palette(palette, p, brightness) for p in positions]
+            assert palettes.colors_from_palette(palette_id, positions, brightness).tolist() == expected
+
+
+@pytest.mark.parametrize("is_rgbw", [False, True])
+def test_every_effect_renders(is_rgbw):
+    """Each effect runs a few frames and commits without error."""
+    for effect_id, (name, effect_func) in EFFECTS.items():
+        pixels, segment = make_segment(30, is_rgbw)
+        for _ in range(3):
+            delay = effect_func(segment)
+            segment.commit()
+            segment.call += 1
+            assert delay >= 0, name
+        assert len(pixels) == 30
@@ -0,0 +1,163 @@
+"""
+Unit tests for fleet control, run against local instances of the app standing in for remote tables.
+"""
+import asyncio
+import socket
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import uvicorn
+
+from modules.core import fleet
+from modules.core.state import state
+
+
+class Instance:
+    """The app served on an ephemeral localhost port, as another table would be."""
+
+    def __init__(self):
+        from main import app
+
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        self.server = uvicorn.Server(uvicorn.Config(app, lifespan="off", log_level="warning",
+                                                    timeout_graceful_shutdown=1))
+        self.thread = threading.Thread(target=self.server.run, kwargs={"sockets": [self.sock]}, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            assert time.monotonic() < deadline, "app instance did not start"
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def _closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture(scope="module")
+def instances():
+    started = [Instance().start() for _ in range(3)]
+    yield started
+    for instance in started:
+        instance.stop()
+
+
+@pytest.fixture
+async def fleet_of(instances):
+    """Known tables pointing at the given instances (plus any extra URLs)."""
+    def use(*urls):
+        state.known_tables = [{"id": f"table-{i}", "name": f"Table {i}", "url": url} for i, url in enumerate(urls)]
+
+    connected = MagicMock()
+    connected.is_connected.return_value = True
+    speed = state.speed
+    with patch.object(state, "known_tables", []), patch.object(state, "conn", connected), \
+         patch.object(state, "table_id", "host"):
+        yield use
+    await fleet.close()
+    state.speed = speed
+
+
+async def _next(queue, predicate, timeout=8.0):
+    """Next message from the fleet stream matching predicate."""
+    deadline = time.monotonic() + timeout
+    while True:
+        message = await asyncio.wait_for(queue.get(), timeout=max(0.01, deadline - time.monotonic()))
+        if predicate(message):
+            return message
+
+
+class TestCommands:
+    """Tests for building and fanning out commands."""
+
+    def test_led_scene_order(self):
+        requests = fleet.requests_for("led_scene", {"effect_id": 8, "speed": 120, "brightness": 40, "power": 1})
+        assert requests == [
+            ("/api/dw_leds/power", {"state": 1}),
+            ("/api/dw_leds/brightness", {"value": 40}),
+            ("/api/dw_leds/effect", {"effect_id": 8, "speed": 120}),
+        ]
+        with pytest.raises(ValueError):
+            fleet.requests_for("led_scene", {})
+        with pytest.raises(ValueError):
+            fleet.requests_for("reboot")
+
+    async def test_fan_out_with_per_table_results(self, fleet_of, instances):
+        dead = _closed_port_url()
+        fleet_of(*(instance.url for instance in instances), dead)
+
+        result = await fleet.command("speed", {"speed": 321}, timeout=2)
+
+        assert (result["succeeded"], result["failed"]) == (3, 1)
+        assert all(result["results"][f"table-{i}"]["data"] == {"success": True, "speed": 321} for i in range(3))
+        assert not result["results"]["table-3"]["ok"] and result["results"]["table-3"]["error"]
+        assert state.speed == 321
+
+    async def test_remote_errors_reported(self, fleet_of, instances):
+        fleet_of(instances[0].url)
+        result = await fleet.command("resume", table_ids=["table-0"])
+        table = result["results"]["table-0"]
+        assert (table["ok"], table["status"], table["error"]) == (False, 400, "Execution is not paused")
+
+    async def test_command_endpoint(self, async_client, fleet_of, instances):
+        fleet_of(instances[0].url, instances[1].url)
+        response = await async_client.post("/api/fleet/command", json={
+            "command": "speed", "params": {"speed": 150}, "tables": ["table-1"], "include_self": False
+        })
+        assert response.status_code == 200
+        assert list(response.json()["results"]) == ["table-1"]
+
+        for body in ({"command": "reboot"}, {"command": "stop", "tables": ["nope"], "include_self": False}):
+            assert (await async_client.post("/api/fleet/command", json=body)).status_code == 400
+
+
+class TestAggregatedStatus:
+    """Tests for the merged status stream."""
+
+    async def test_snapshot_then_deltas(self, fleet_of, instances):
+        fleet_of(instances[0].url, instances[1].url)
+        queue = fleet.subscribe()
+        assert set((await queue.get())["tables"]) == {"host", "table-0", "table-1"}
+
+        online = set()
+        while online != {"host", "table-0", "table-1"}:
+            message = await _next(queue, lambda m: m["type"] == "fleet_delta" and m["online"])
+            online.add(message["table_id"])
+            assert "speed" in message["data"]  # Full status on first contact
+
+        state.speed = 222
+        updated = set()
+        while updated != {"host", "table-0", "table-1"}:
+            message = await _next(queue, lambda m: m["type"] == "fleet_delta" and "speed" in m["data"])
+            assert message["data"] == {"speed": 222}
+            updated.add(message["table_id"])
+        fleet.unsubscribe(queue)
+
+    async def test_table_going_offline(self, fleet_of):
+        instance = Instance().start()
+        fleet_of(instance.url)
+        queue = fleet.subscribe()
+        await _next(queue, lambda m: m["type"] == "fleet_delta" and m["table_id"] == "table-0" and m["online"])
+
+        instance.stop()
+        await _next(queue, lambda m: m["type"] == "fleet_delta" and m["table_id"] == "table-0" and not m["online"])
+        assert fleet.snapshot()["tables"]["table-0"]["online"] is False
+
+    async def test_follows_known_table_changes(self, fleet_of, instances):
+        fleet_of(instances[0].url)
+        fleet.sync_watchers()
+        state.known_tables = []
+        fleet.tables_changed()
+        assert set(fleet.snapshot()["tables"]) == {"host"}
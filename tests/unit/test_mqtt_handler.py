@@ -0,0 +1,205 @@
+"""
+Unit tests for the MQTT handler publishing logic.
+
+Tests:
+- Per-topic last-value cache suppresses identical payloads
+- Progress publishing is rate-limited
+- LED state is read from the cached controller status
+- Pattern discovery is split to stay under the payload budget
+"""
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture
+def handler():
+    """Create an MQTTHandler with a mocked paho client."""
+    from modules.mqtt.handler import MQTTHandler
+
+    # The handler captures the current event loop on construction
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    h = MQTTHandler(callback_registry={})
+    h.client = MagicMock()
+    yield h
+    h.state.mqtt_handler = None
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+class TestPublishCache:
+    """Tests for the last-value publish cache."""
+
+    def test_identical_payload_suppressed(self, handler):
+        """Test publishing the same payload twice only sends once."""
+        assert handler._publish("t/state", "idle", retain=True) is True
+        assert handler._publish("t/state", "idle", retain=True) is False
+
+        handler.client.publish.assert_called_once_with("t/state", "idle", retain=True)
+        assert handler.suppressed_count == 1
+
+    def test_changed_payload_published(self, handler):
+        """Test a changed payload is published."""
+        handler._publish("t/state", "idle", retain=True)
+        handler._publish("t/state", "running", retain=True)
+
+        assert handler.client.publish.call_count == 2
+
+    def test_numeric_payload_normalised(self, handler):
+        """Test an int and its string form are treated as the same payload."""
+        handler._publish("speed/state", 100, retain=True)
+        handler._publish("speed/state", "100", retain=True)
+
+        handler.client.publish.assert_called_once_with("speed/state", "100", retain=True)
+
+    def test_force_bypasses_cache(self, handler):
+        """Test force=True republishes an unchanged payload."""
+        handler._publish("t/state", "idle", retain=True)
+        handler._publish("t/state", "idle", retain=True, force=True)
+
+        assert handler.client.publish.call_count == 2
+
+    def test_reconnect_clears_cache(self, handler):
+        """Test a successful (re)connect republishes retained state."""
+        handler._publish("t/state", "idle", retain=True)
+        handler.setup_ha_discovery = MagicMock()
+
+        handler.on_connect(handler.client, None, None, 0)
+        handler._publish("t/state", "idle", retain=True)
+
+        assert handler.client.publish.call_count == 2
+
+
+class TestProgressRateLimit:
+    """Tests for rate-limited progress publishing."""
+
+    def test_progress_rate_limited(self, handler):
+        """Test progress is not republished within progress_interval."""
+        handler.progress_interval = 60
+        with patch("modules.mqtt.handler.state") as mock_state:
+            mock_state.execution_progress = (10, 100, 50.0, 5.0)
+            handler._publish_progress_state()
+            sent = handler.client.publish.call_count
+
+            mock_state.execution_progress = (20, 100, 40.0, 10.0)
+            handler._publish_progress_state()
+
+        assert sent == 2
+        assert handler.client.publish.call_count == sent
+
+    def test_progress_force(self, handler):
+        """Test force=True publishes progress immediately."""
+        handler.progress_interval = 60
+        with patch("modules.mqtt.handler.state") as mock_state:
+            mock_state.execution_progress = (10, 100, 50.0, 5.0)
+            handler._publish_progress_state()
+            mock_state.execution_progress = (20, 100, 40.0, 10.0)
+            handler._publish_progress_state(force=True)
+
+        handler.client.publish.assert_any_call(handler.completion_topic, "20.0", retain=True)
+
+
+class TestLedState:
+    """Tests for LED state publishing from cached status."""
+
+    def test_led_state_uses_cached_status(self, handler):
+        """Test LED state never triggers a live status query."""
+        controller = MagicMock()
+        controller.get_cached_status.return_value = {
+            "connected": True,
+            "power_on": True,
+            "brightness": 35,
+            "current_effect": 8,
+            "speed": 128,
+            "intensity": 100,
+            "colors": ["#ff0000"],
+        }
+        with patch("modules.mqtt.handler.state") as mock_state:
+            mock_state.led_controller = controller
+            mock_state.led_provider = "dw_leds"
+            handler._publish_led_state()
+
+        controller.check_status.assert_not_called()
+        handler.client.publish.assert_any_call(f"{handler.device_id}/led/brightness/state", "35", retain=True)
+        handler.client.publish.assert_any_call(f"{handler.device_id}/led/effect/state", "Rainbow", retain=True)
+
+
+class TestPatternDiscovery:
+    """Tests for scalable Home Assistant pattern discovery."""
+
+    @pytest.fixture
+    def enabled_handler(self, handler):
+        """Handler that reports MQTT as enabled."""
+        with patch.object(type(handler), "is_enabled", new_callable=lambda: property(lambda self: True)):
+            yield handler
+
+    def _published_configs(self, handler):
+        return {
+            c.args[0]: c.args[1]
+            for c in handler.client.publish.call_args_list
+            if c.args[0].endswith("/config")
+        }
+
+    def test_small_library_uses_single_select(self, enabled_handler):
+        """Test a small catalog keeps the single pattern select."""
+        enabled_handler.patterns = ["a.thr", "custom_patterns/b.thr"]
+        enabled_handler._publish_pattern_discovery(enabled_handler._base_device())
+
+        configs = self._published_configs(enabled_handler)
+        topic = f"homeassistant/select/{enabled_handler.device_id}/pattern/config"
+        assert topic in configs
+        assert '"a.thr"' in configs[topic]
+
+    def test_large_library_split_under_budget(self, enabled_handler):
+        """Test a large catalog is split into folder selects under the budget."""
+        enabled_handler.discovery_max_bytes = 4096
+        enabled_handler.patterns = (
+            [f"folder_a/pattern_{i:04d}.thr" for i in range(300)]
+            + [f"folder_b/pattern_{i:04d}.thr" for i in range(20)]
+        )
+        enabled_handler._publish_pattern_discovery(enabled_handler._base_device())
+
+        stats = enabled_handler.get_discovery_stats()
+        select_sizes = {k: v for k, v in stats["payloads"].items() if k.startswith("select/pattern")}
+        assert "select/pattern" not in select_sizes
+        assert "select/pattern_folder_b" in select_sizes
+        assert stats["pattern_selects"] > 2
+        assert all(size <= 4096 for size in select_sizes.values())
+
+    def test_folder_keys_never_collide(self, enabled_handler):
+        """Test folders whose names reduce to the same key all keep their select."""
+        enabled_handler.discovery_max_bytes = 2048
+        enabled_handler.patterns = (
+            [f"a/pattern_{i:04d}.thr" for i in range(60)]  # Paged: a, a 2, ...
+            + ["a 2/x.thr", "My Patterns/x.thr", "my-patterns/y.thr", "root/x.thr"]
+            + [f"top_{i:04d}.thr" for i in range(60)]
+        )
+        groups = enabled_handler._pattern_select_groups()
+
+        assert sorted(p for _, options in groups.values() for p in options) == sorted(enabled_handler.patterns)
+        assert "pattern-root" in groups and "pattern_root" in groups
+        assert groups["pattern_a_2"][1][0].startswith("a/")
+
+    def test_stale_selects_removed(self, enabled_handler):
+        """Test selects that disappear are removed with an empty retained config."""
+        enabled_handler.discovery_max_bytes = 2048
+        enabled_handler.patterns = [f"old/pattern_{i:04d}.thr" for i in range(200)]
+        enabled_handler._publish_pattern_discovery(enabled_handler._base_device())
+
+        enabled_handler.patterns = ["a.thr"]
+        enabled_handler._publish_pattern_discovery(enabled_handler._base_device())
+
+        topic = f"homeassistant/select/{enabled_handler.device_id}/pattern_old/config"
+        enabled_handler.client.publish.assert_any_call(topic, "", retain=True)
+
+    def test_catalog_change_refreshes_patterns(self, enabled_handler):
+        """Test discovery refreshes only when the catalog version changes."""
+        with patch("modules.mqtt.handler.get_catalog_version", return_value=1), \
+             patch("modules.mqtt.handler.list_theta_rho_files", return_value=["b.thr", "a.thr"]) as mock_list:
+            enabled_handler._refresh_patterns()
+            enabled_handler._refresh_patterns()
+
+        assert mock_list.call_count == 1
+        assert enabled_handler.patterns == ["a.thr", "b.thr"]
+        assert "a.thr" in enabled_handler.pattern_set
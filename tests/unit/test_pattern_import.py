@@ -0,0 +1,152 @@
+"""
+Unit tests for bulk pattern-pack import (zip/tar archives and directories).
+"""
+import io
+import json
+import os
+import tarfile
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from modules.core import cache_manager, pattern_import, upload_pipeline
+from modules.core.cache_jobs import PRIORITY_LIBRARY
+from modules.core.pattern_import import entry_path, import_pack, pack_name, run_import
+
+SPIRAL = b"0 0\n1 0.25\n2 0.5\n3 1\n"
+
+
+def _zip(path, entries):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return str(path)
+
+
+@pytest.fixture
+def library(tmp_path):
+    """An empty pattern library with one bundled pattern."""
+    patterns_dir = tmp_path / "patterns"
+    patterns_dir.mkdir()
+    (patterns_dir / "bundled.thr").write_bytes(SPIRAL)
+    with patch("modules.core.pattern_manager.THETA_RHO_DIR", str(patterns_dir)), \
+         patch.object(cache_manager, "THETA_RHO_DIR", str(patterns_dir)), \
+         patch.object(cache_manager, "CACHE_DIR", str(patterns_dir / "cached_images")), \
+         patch.object(cache_manager, "THUMBNAIL_DIR", str(patterns_dir / "cached_thumbnails")), \
+         patch.object(cache_manager, "METADATA_CACHE_FILE", str(tmp_path / "metadata_cache.json")):
+        yield patterns_dir
+
+
+class TestPackEntries:
+    """Tests for reading pack members."""
+
+    def test_entry_path(self):
+        assert entry_path("pack/./stars/a.THR") == "pack/stars/a.THR"
+        assert entry_path("../../etc/a.thr") is None
+        assert entry_path("__MACOSX/pack/._a.thr") is None
+        assert entry_path("pack/readme.txt") is None
+
+    def test_pack_name(self):
+        assert pack_name("/tmp/Community Pack.tar.gz") == "Community Pack"
+        assert pack_name("/tmp/spirals/") == "spirals"
+
+
+class TestImportPack:
+    """Tests for the import pipeline."""
+
+    def test_imports_zip_and_dedupes(self, library, tmp_path):
+        source = _zip(tmp_path / "pack.zip", {
+            "pack/one.thr": b"0 0\n0 0\n1 0.5\n",
+            "pack/sub/two.thr": b"0 1\n1 1\n",
+            "pack/copy-of-one.thr": b"0 0\n1 0.5\n",  # Same content once normalized
+            "pack/bundled.thr": SPIRAL,
+            "pack/broken.thr": b"not a pattern\n",
+            "pack/notes.txt": b"ignored",
+        })
+        report = import_pack(source, workers=2)
+        statuses = {result["file"]: result["status"] for result in report["results"]}
+
+        assert report["folder"] == "custom_patterns/pack"
+        assert statuses["pack/bundled.thr"] == "duplicate"
+        assert statuses["pack/broken.thr"] == "invalid"
+        assert sorted(statuses.values()).count("duplicate") == 2
+        assert report["summary"] == {"imported": 2, "duplicate": 2, "invalid": 1}
+        assert (library / "custom_patterns" / "pack" / "pack" / "sub" / "two.thr").read_text() == "0.00000 1.00000\n1.00000 1.00000\n"
+        assert set(report["metadata"]) <= {f"custom_patterns/pack/pack/{name}" for name in ("one.thr", "copy-of-one.thr", "sub/two.thr")}
+        assert not os.path.exists(cache_manager.get_cache_path("custom_patterns/pack/pack/sub/two.thr"))  # Queued later
+        assert not [name for name in os.listdir(library / "custom_patterns" / "pack") if name.endswith(".part")]
+
+        # Importing the same pack again only finds duplicates
+        again = import_pack(source)
+        assert again["summary"] == {"duplicate": 4, "invalid": 1}
+
+    def test_imports_tar_stream_and_renames_conflicts(self, library, tmp_path):
+        (library / "custom_patterns" / "stars").mkdir(parents=True)
+        (library / "custom_patterns" / "stars" / "a.thr").write_text("0 0.1\n")
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            info = tarfile.TarInfo("a.thr")
+            info.size = len(SPIRAL + b"4 1\n")
+            archive.addfile(info, io.BytesIO(SPIRAL + b"4 1\n"))
+        (tmp_path / "stars.tgz").write_bytes(buffer.getvalue())
+
+        report = import_pack(str(tmp_path / "stars.tgz"))
+        assert report["results"][0]["pattern"] == "custom_patterns/stars/a-2.thr"
+
+    def test_rejects_non_archive(self, library, tmp_path):
+        (tmp_path / "pack.zip").write_bytes(b"definitely not an archive")
+        with pytest.raises(upload_pipeline.UploadError):
+            import_pack(str(tmp_path / "pack.zip"))
+        assert not (library / "custom_patterns" / "pack").exists()
+
+    def test_nothing_imported_leaves_no_folder(self, library, tmp_path):
+        source = _zip(tmp_path / "empty.zip", {"readme.txt": b"no patterns", "bundled.thr": SPIRAL})
+        report = import_pack(source)
+        assert report["summary"] == {"duplicate": 1}
+        assert not (library / "custom_patterns" / "empty").exists()
+
+    async def test_metadata_written_in_one_batch(self, library, tmp_path):
+        pack = tmp_path / "dir-pack"
+        (pack / "nested").mkdir(parents=True)
+        (pack / "a.thr").write_bytes(b"0 0\n1 1\n")
+        (pack / "nested" / "b.thr").write_bytes(b"0 0.5\n2 0.5\n")
+
+        with patch.object(cache_manager, "save_metadata_cache", wraps=cache_manager.save_metadata_cache) as save, \
+             patch.object(pattern_import.cache_jobs, "enqueue") as enqueue:
+            report = await run_import(str(pack))
+        assert report["summary"] == {"imported": 2}
+        save.assert_called_once()
+        # Previews wait their turn in the cache job queue
+        queued, priority = enqueue.call_args.args
+        assert sorted(queued) == ["custom_patterns/dir-pack/a.thr", "custom_patterns/dir-pack/nested/b.thr"]
+        assert priority == PRIORITY_LIBRARY
+        with open(cache_manager.METADATA_CACHE_FILE) as f:
+            cached = json.load(f)["data"]
+        assert cached["custom_patterns/dir-pack/nested/b.thr"]["metadata"]["total_coordinates"] == 2
+
+
+class TestImportEndpoint:
+    """Tests for /api/import_patterns."""
+
+    async def test_upload_pack_runs_job(self, async_client, library, tmp_path):
+        source = _zip(tmp_path / "upload.zip", {"one.thr": b"0 0\n1 0.5\n", "two.thr": SPIRAL})
+        jobs = upload_pipeline.UploadJobs()
+        with patch("main.pattern_manager.THETA_RHO_DIR", str(library)), \
+             patch("main.upload_jobs", jobs), \
+             patch.object(pattern_import, "upload_jobs", jobs), \
+             patch.object(pattern_import.cache_jobs, "enqueue"):
+            with open(source, "rb") as f:
+                response = await async_client.post(
+                    "/api/import_patterns",
+                    files={"file": ("Community.zip", f, "application/zip")}
+                )
+            assert response.status_code == 200
+            data = response.json()
+            assert data["folder"] == "custom_patterns/Community"
+
+            job = (await async_client.get(f"/api/upload-jobs/{data['job_id']}")).json()
+        assert job["status"] == "done"
+        assert job["stats"] == {"imported": 1, "duplicate": 1}
+        assert {result["file"] for result in job["results"]} == {"one.thr", "two.thr"}
+        assert [name for name in os.listdir(library / "custom_patterns") if name.endswith(".part")] == []
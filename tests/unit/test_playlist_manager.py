@@ -9,8 +9,10 @@ Tests the core playlist management functions:
 - Deleting playlists
 - Listing playlists
 - Renaming playlists
+- Incremental edits, version counters and atomic persistence
 """
 import json
+import os
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -257,3 +259,97 @@ class TestPlaylistRename:
         # Verify trimmed name is used
         assert playlist_manager_patched.get_playlist("new_name") is not None
         assert playlist_manager_patched.get_playlist("  new_name  ") is None
+
+
+class TestPlaylistStore:
+    """Tests for the in-memory playlist index, incremental edits and versions."""
+
+    @pytest.fixture
+    def playlists_file(self, tmp_path):
+        """Create a temporary playlists.json file."""
+        file_path = tmp_path / "playlists.json"
+        file_path.write_text("{}")
+        return str(file_path)
+
+    @pytest.fixture
+    def playlist_manager_patched(self, playlists_file):
+        """Patch PLAYLISTS_FILE to use temporary file."""
+        with patch("modules.core.playlist_manager.PLAYLISTS_FILE", playlists_file):
+            from modules.core import playlist_manager
+            yield playlist_manager
+
+    def test_remove_from_playlist(self, playlists_file, playlist_manager_patched):
+        """Test removing a pattern by index."""
+        playlist_manager_patched.create_playlist("p", ["a.thr", "b.thr", "c.thr"])
+
+        assert playlist_manager_patched.remove_from_playlist("p", 1) is True
+
+        assert playlist_manager_patched.get_playlist("p")["files"] == ["a.thr", "c.thr"]
+        with open(playlists_file) as f:
+            assert json.load(f)["p"] == ["a.thr", "c.thr"]
+
+    def test_remove_from_playlist_bad_index(self, playlists_file, playlist_manager_patched):
+        """Test removing an out-of-range index fails without changes."""
+        playlist_manager_patched.create_playlist("p", ["a.thr"])
+
+        assert playlist_manager_patched.remove_from_playlist("p", 5) is False
+        assert playlist_manager_patched.remove_from_playlist("missing", 0) is False
+        assert playlist_manager_patched.get_playlist("p")["files"] == ["a.thr"]
+
+    def test_move_in_playlist(self, playlists_file, playlist_manager_patched):
+        """Test moving a pattern to a new position."""
+        playlist_manager_patched.create_playlist("p", ["a.thr", "b.thr", "c.thr"])
+
+        assert playlist_manager_patched.move_in_playlist("p", 0, 2) is True
+
+        assert playlist_manager_patched.get_playlist("p")["files"] == ["b.thr", "c.thr", "a.thr"]
+
+    def test_versions_track_changes(self, playlists_file, playlist_manager_patched):
+        """Test only the edited playlist gets a new version."""
+        playlist_manager_patched.create_playlist("one", ["a.thr"])
+        playlist_manager_patched.create_playlist("two", ["b.thr"])
+        before = playlist_manager_patched.get_playlists_version()
+
+        playlist_manager_patched.add_to_playlist("two", "c.thr")
+        after = playlist_manager_patched.get_playlists_version()
+
+        assert after["version"] > before["version"]
+        assert after["playlists"]["one"] == before["playlists"]["one"]
+        assert after["playlists"]["two"] > before["playlists"]["two"]
+        assert playlist_manager_patched.get_playlist("two")["version"] == after["playlists"]["two"]
+
+    def test_reads_do_not_change_version(self, playlists_file, playlist_manager_patched):
+        """Test repeated reads are served from memory without bumping versions."""
+        playlist_manager_patched.create_playlist("p", ["a.thr"])
+        before = playlist_manager_patched.get_playlists_version()["version"]
+
+        playlist_manager_patched.get_playlist("p")
+        playlist_manager_patched.list_all_playlists()
+
+        assert playlist_manager_patched.get_playlists_version()["version"] == before
+
+    def test_external_edit_is_reloaded(self, playlists_file, playlist_manager_patched):
+        """Test changes written by another process are picked up."""
+        playlist_manager_patched.create_playlist("p", ["a.thr"])
+
+        with open(playlists_file, "w") as f:
+            json.dump({"p": ["a.thr"], "external": ["x.thr", "y.thr"]}, f)
+
+        assert playlist_manager_patched.get_playlist("external")["files"] == ["x.thr", "y.thr"]
+
+    def test_write_is_atomic(self, playlists_file, playlist_manager_patched):
+        """Test saving leaves no temp file behind and valid JSON on disk."""
+        playlist_manager_patched.create_playlist("p", ["a.thr"])
+
+        assert not os.path.exists(playlists_file + ".tmp")
+        with open(playlists_file) as f:
+            assert json.load(f) == {"p": ["a.thr"]}
+
+    def test_load_playlists_returns_copy(self, playlists_file, playlist_manager_patched):
+        """Test mutating the result of load_playlists does not affect the store."""
+        playlist_manager_patched.create_playlist("p", ["a.thr"])
+
+        playlists = playlist_manager_patched.load_playlists()
+        playlists["p"].append("b.thr")
+
+        assert playlist_manager_patched.get_playlist("p")["files"] == ["a.thr"]
@@ -0,0 +1,159 @@
+"""
+Unit tests for transition-aware playlist ordering.
+"""
+import json
+import random
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from modules.core import clear_generator, pattern_manager, playlist_optimizer
+from modules.core.playlist_optimizer import TransitionModel, greedy_order, optimize, shuffled, two_opt
+from modules.core.state import state
+
+
+def _cache(patterns):
+    """Metadata cache data for {name: (first rho, last rho)}."""
+    return {"data": {
+        name: {"metadata": {
+            "first_coordinate": {"x": 0.0, "y": first},
+            "last_coordinate": {"x": 0.0, "y": last},
+            "total_coordinates": 100
+        }} for name, (first, last) in patterns.items()
+    }}
+
+
+@pytest.fixture
+def no_history(tmp_path):
+    with patch.object(pattern_manager, "EXECUTION_LOG_FILE", str(tmp_path / "execution_times.jsonl")):
+        yield tmp_path / "execution_times.jsonl"
+
+
+class TestSolver:
+    """Tests for the ordering heuristics."""
+
+    def test_improves_on_random_instances(self):
+        rng = np.random.default_rng(7)
+        for _ in range(20):
+            n = 40
+            model = TransitionModel(rng.random(n + 1), rng.random(n + 1), np.zeros(n + 1))
+            greedy = greedy_order(model)
+            improved = two_opt(model, greedy)
+            assert sorted(improved) == list(range(1, n + 1))
+            assert model.path_cost(improved) <= model.path_cost(greedy) + 1e-9
+            assert model.path_cost(improved) < model.path_cost(list(range(1, n + 1)))
+
+    def test_chains_matching_ends_and_starts(self):
+        # a ends at the edge where c starts, c ends at the centre where b starts
+        model = TransitionModel(entry=[0, 0.0, 0.0, 1.0], exit=[0, 1.0, 0.5, 0.0], fixed=[0, 0, 0, 0])
+        order = two_opt(model, greedy_order(model))
+        assert order == [1, 3, 2]
+        assert model.path_cost(order) == 0.0
+
+    def test_thousands_of_patterns_quickly(self):
+        rng = np.random.default_rng(1)
+        n = 2000
+        model = TransitionModel(rng.random(n + 1), rng.random(n + 1), np.zeros(n + 1))
+        order = two_opt(model, greedy_order(model), time_budget=0.1)
+        assert len(order) == n
+
+
+class TestOptimize:
+    """Tests for ordering playlists from metadata and history."""
+
+    def test_reports_time_saved(self, no_history):
+        patterns = {"in-out.thr": (0.0, 1.0), "out-in.thr": (1.0, 0.0), "in-out-2.thr": (0.0, 1.0), "out-in-2.thr": (1.0, 0.0)}
+        files = ["in-out.thr", "in-out-2.thr", "out-in.thr", "out-in-2.thr"]
+        ordered, report = optimize(files, cache_data=_cache(patterns), start_rho=0.0)
+
+        assert sorted(ordered) == sorted(files)
+        assert report["transition_seconds_after"] == 0.0
+        assert report["saved_seconds_per_cycle"] == 2 * playlist_optimizer.SECONDS_PER_RHO
+        assert report["saved_hours_per_cycle"] > 0
+
+    def test_clear_pattern_history_and_run_times(self, no_history):
+        patterns = {"a.thr": (0.2, 0.9), "b.thr": (0.8, 0.1), "clear_from_out.thr": (1.0, 0.0), "clear_from_in.thr": (0.0, 1.0)}
+        no_history.write_text("\n".join(json.dumps(entry) for entry in [
+            {"pattern_name": "clear_from_out.thr", "actual_time_seconds": 120.0, "completed": True},
+            {"pattern_name": "a.thr", "actual_time_seconds": 1800.0, "completed": True},
+        ]) + "\n")
+        with patch("modules.core.pattern_manager.THETA_RHO_DIR", "./patterns"):
+            model = playlist_optimizer.build_model(
+                ["./patterns/a.thr", "./patterns/b.thr"], "adaptive", _cache(patterns)
+            )
+            _, report = optimize(["./patterns/a.thr", "./patterns/b.thr"], "adaptive", _cache(patterns))
+        # a starts inside, so it gets clear_from_out (120 s) and moves 0.2 from its end at the centre
+        assert model.entry[1] == 1.0
+        assert model.fixed[1] == pytest.approx(120.0 + 0.2 * playlist_optimizer.SECONDS_PER_RHO)
+        assert model.fixed[2] == pytest.approx(playlist_optimizer.DEFAULT_CLEAR_SECONDS + 0.2 * playlist_optimizer.SECONDS_PER_RHO)
+        assert report["run_times_known"] == 1
+
+    def test_generated_clears_are_priced(self, no_history):
+        assert playlist_optimizer._metadata_rhos(clear_generator.clear_path("clear_from_out"), {}) == (1.0, 0.0)
+
+        patterns = {"a.thr": (0.2, 0.9)}
+        generated_clears = state.generated_clears
+        state.generated_clears = True
+        try:
+            with patch("modules.core.pattern_manager.THETA_RHO_DIR", "./patterns"):
+                model = playlist_optimizer.build_model(["./patterns/a.thr"], "adaptive", _cache(patterns))
+        finally:
+            state.generated_clears = generated_clears
+        # a starts inside, so it gets the generated spiral in from the edge
+        assert model.entry[1] == 1.0
+        assert model.fixed[1] == pytest.approx(playlist_optimizer.DEFAULT_CLEAR_SECONDS + 0.2 * playlist_optimizer.SECONDS_PER_RHO)
+
+    def test_shuffled_avoids_long_moves(self, no_history):
+        patterns = {f"in{i}.thr": (0.0, 0.0) for i in range(5)}
+        patterns.update({f"out{i}.thr": (1.0, 1.0) for i in range(5)})
+        orders = set()
+        for seed in range(10):
+            order = shuffled(list(patterns), cache_data=_cache(patterns), start_rho=0.0, rng=random.Random(seed))
+            assert sorted(order) == sorted(patterns)
+            # Only one move from the centre to the edge is ever needed
+            moves = sum(a[:2] != b[:2] for a, b in zip(order, order[1:]))
+            assert moves == 1
+            orders.add(tuple(order))
+        assert len(orders) > 1
+
+
+class TestPlaylistIntegration:
+    """Tests for optimize_order in playlists and the API."""
+
+    async def test_run_theta_rho_files_optimizes_each_cycle(self, mock_state):
+        executed = []
+
+        async def fake_run_pattern(file_path, **kwargs):
+            executed.append(file_path)
+
+        optimizer = patch.object(playlist_optimizer, "optimize",
+                                 side_effect=lambda files, *args: (list(reversed(files)), {}))
+        with patch("modules.core.pattern_manager.state", mock_state), \
+             patch("modules.core.pattern_manager.run_theta_rho_file", AsyncMock(side_effect=fake_run_pattern)), \
+             patch("modules.core.pattern_manager.broadcast_progress", AsyncMock()), \
+             patch("modules.core.pattern_manager.start_idle_led_timeout", AsyncMock()), \
+             patch("modules.core.cache_manager.load_metadata_cache", return_value={"data": {}}), \
+             optimizer as optimize_mock:
+            await pattern_manager.run_theta_rho_files(["a.thr", "b.thr"], run_mode="single", optimize_order=True)
+
+        assert executed == ["b.thr", "a.thr"]
+        optimize_mock.assert_called_once()
+
+    async def test_optimize_endpoint(self, async_client, no_history):
+        patterns = {"in-out.thr": (0.0, 1.0), "out-in.thr": (1.0, 0.0), "in-out-2.thr": (0.0, 1.0)}
+        playlist = {"name": "evening", "files": ["in-out.thr", "in-out-2.thr", "out-in.thr"]}
+        with patch("main.playlist_manager.get_playlist", return_value=playlist), \
+             patch("main.playlist_manager.modify_playlist") as modify, \
+             patch("modules.core.cache_manager.load_metadata_cache", return_value=_cache(patterns)), \
+             patch("modules.core.pattern_manager.THETA_RHO_DIR", "./patterns"), \
+             patch("main.state.current_rho", 0.0):
+            response = await async_client.post("/api/playlists/optimize", json={
+                "playlist_name": "evening", "apply": True
+            })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["files"] == ["in-out.thr", "out-in.thr", "in-out-2.thr"]
+        assert data["report"]["saved_seconds_per_cycle"] > 0
+        modify.assert_called_once_with("evening", data["files"])
@@ -0,0 +1,125 @@
+"""
+Unit tests for the live position stream (/ws/position).
+"""
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from modules.core import position_stream
+from modules.core.position_channel import PositionChannel, position_channel
+from modules.core.position_stream import FRAME, clamp_rate, encode_frame, stream_positions
+
+
+class FakeWebSocket:
+    """Collects frames; optionally stalls on send."""
+
+    def __init__(self, send_delay=0.0):
+        self.frames = []
+        self.send_delay = send_delay
+        self.incoming = asyncio.Queue()
+
+    def disconnect(self):
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.send_delay)
+        self.frames.append(data)
+
+    async def send_bytes(self, data):
+        await asyncio.sleep(self.send_delay)
+        self.frames.append(data)
+
+
+class TestFrames:
+    """Tests for frame encoding."""
+
+    def test_binary_frame(self):
+        channel = PositionChannel()
+        sample = channel.publish(1.5, 0.25, index=42)
+        index, theta, rho, timestamp, seq = FRAME.unpack(encode_frame(sample, binary=True))
+        assert (index, seq) == (42, 1)
+        assert theta == pytest.approx(1.5)
+        assert rho == pytest.approx(0.25)
+        assert timestamp == pytest.approx(time.time(), abs=1.0)
+
+    def test_json_frame(self):
+        sample = PositionChannel().publish(3.14159265, 0.5)
+        frame = json.loads(encode_frame(sample, binary=False))
+        assert frame["i"] == -1  # Not part of a pattern
+        assert frame["t"] == 3.14159
+        assert frame["r"] == 0.5
+
+    def test_concurrent_writers_get_unique_sequence(self):
+        channel = PositionChannel()
+        seen = []
+        channel.add_listener(lambda sample: seen.append(sample.seq))
+        writers = [threading.Thread(target=lambda: [channel.publish(0.0, 0.0) for _ in range(2000)]) for _ in range(4)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        assert sorted(seen) == list(range(1, 8001))
+        assert channel.read().seq == 8000
+
+    def test_rate_is_clamped(self):
+        assert clamp_rate(None) == position_stream.DEFAULT_RATE
+        assert clamp_rate(1000) == position_stream.MAX_RATE
+        assert clamp_rate(0) == position_stream.MIN_RATE
+
+
+class TestStream:
+    """Tests for the per-client sender loop."""
+
+    async def test_sends_only_new_samples_at_capped_rate(self):
+        channel = PositionChannel()
+        websocket = FakeWebSocket()
+        task = asyncio.create_task(stream_positions(websocket, rate=20, binary=True, channel=channel))
+
+        # Motion thread publishing far faster than the stream rate
+        for i in range(100):
+            channel.publish(i * 0.01, 0.5, index=i)
+            await asyncio.sleep(0.003)
+        await asyncio.sleep(0.1)
+        sent = len(websocket.frames)
+        await asyncio.sleep(0.2)  # Nothing new published: nothing more sent
+        task.cancel()
+
+        assert 3 <= sent <= 12  # ~0.4 s at 20 Hz, not 100 frames
+        assert len(websocket.frames) == sent
+        assert FRAME.unpack(websocket.frames[-1])[0] == 99  # Latest sample wins
+
+    async def test_stalled_client_is_dropped(self):
+        channel = PositionChannel()
+        channel.publish(0.0, 0.0)
+        with patch.object(position_stream, "SEND_TIMEOUT", 0.05):
+            await asyncio.wait_for(stream_positions(FakeWebSocket(send_delay=1.0), channel=channel), timeout=1.0)
+
+    async def test_disconnect_before_any_sample(self):
+        websocket = FakeWebSocket()
+        task = asyncio.create_task(stream_positions(websocket, channel=PositionChannel()))
+        await asyncio.sleep(0.05)
+        websocket.disconnect()
+        await asyncio.wait_for(task, timeout=1.0)
+        assert websocket.frames == []
+
+
+class TestPositionEndpoint:
+    """Tests for the /ws/position websocket."""
+
+    def test_streams_published_position(self):
+        from fastapi.testclient import TestClient
+        from main import app
+
+        position_channel.publish(2.0, 0.75, index=7)
+        with TestClient(app).websocket_connect("/ws/position?format=binary&rate=30") as websocket:
+            index, theta, rho, _, _ = FRAME.unpack(websocket.receive_bytes())
+        assert index == 7
+        assert theta == pytest.approx(2.0)
+        assert rho == pytest.approx(0.75)
@@ -0,0 +1,173 @@
+"""
+Unit tests for the real-time motion mode (scheduling, GC control, send-loop timings).
+"""
+import gc
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from modules.core import realtime, tables
+from modules.core.state import state
+
+
+@pytest.fixture
+def realtime_state():
+    """Restore the real-time settings and GC state after each test."""
+    saved = (state.realtime_enabled, state.realtime_policy, state.realtime_priority,
+             state.realtime_motion_cpu, state.realtime_led_cpu)
+    with patch.object(realtime, "_active", False), patch.object(realtime, "_frozen", False):
+        yield state
+    (state.realtime_enabled, state.realtime_policy, state.realtime_priority,
+     state.realtime_motion_cpu, state.realtime_led_cpu) = saved
+    realtime.send_loop.clear()
+    gc.enable()
+
+
+class TestPatternGC:
+    """Tests for collector control while a pattern draws."""
+
+    def test_disabled_mode_leaves_gc_alone(self, realtime_state):
+        realtime_state.realtime_enabled = False
+        with realtime.pattern_gc():
+            assert gc.isenabled()
+
+    def test_gc_suspended_and_stepped(self, realtime_state):
+        realtime_state.realtime_enabled = True
+        with patch.object(realtime.gc, "collect") as collect:
+            with realtime.pattern_gc():
+                assert not gc.isenabled()
+                for _ in range(realtime.GC_STEP_MOVES * 2):
+                    realtime.step_gc()
+                assert collect.call_count == 2
+            assert gc.isenabled()
+        realtime.step_gc()  # No stepping outside a pattern
+        assert collect.call_count == 3  # Two steps and one collection at the end
+
+    def test_overlapping_patterns_resume_gc_after_the_last(self, realtime_state):
+        realtime_state.realtime_enabled = True
+        with patch.object(realtime.gc, "collect"):
+            first, second = realtime.pattern_gc(), realtime.pattern_gc()
+            first.__enter__()
+            second.__enter__()
+            first.__exit__(None, None, None)  # One table finishes while the other still draws
+            assert not gc.isenabled()
+            assert realtime._gc_stepping
+            second.__exit__(None, None, None)
+        assert gc.isenabled()
+        assert not realtime._gc_stepping
+
+
+class TestSendLoopStats:
+    """Tests for the send-loop timing report."""
+
+    def test_modes_recorded_separately(self, realtime_state):
+        stats = realtime.SendLoopStats()
+        realtime_state.realtime_enabled = False
+        for gap in (0.010, 0.020, 0.030):
+            stats.record(gap)
+        stats.record(5.0)  # A pause, not send-loop latency
+        realtime_state.realtime_enabled = True
+        stats.record(0.002)
+
+        report = stats.report()
+        assert report["normal"]["samples"] == 3
+        assert report["normal"]["mean_ms"] == 20.0
+        assert report["normal"]["max_ms"] == 30.0
+        assert report["realtime"]["samples"] == 1
+        assert report["realtime"]["jitter_ms"] == 0.0
+
+        stats.clear()
+        assert stats.report() == {"normal": None, "realtime": None}
+
+
+class TestScheduling:
+    """Tests for applying the mode to threads."""
+
+    def test_falls_back_to_nice_without_permission(self, realtime_state):
+        if not hasattr(realtime.os, "sched_setscheduler"):
+            pytest.skip("No POSIX scheduling on this platform")
+        realtime_state.realtime_policy = "fifo"
+        with patch.object(realtime.os, "sched_setscheduler", side_effect=PermissionError("not permitted")), \
+             patch.object(realtime.os, "setpriority") as setpriority:
+            assert realtime._apply_scheduling(1234, True) == f"nice:{realtime.FALLBACK_NICE}"
+        setpriority.assert_called_once_with(realtime.os.PRIO_PROCESS, 1234, realtime.FALLBACK_NICE)
+
+    def test_register_thread_pins_cpu(self, realtime_state):
+        if not hasattr(realtime.os, "sched_setaffinity"):
+            pytest.skip("No CPU affinity on this platform")
+        realtime_state.realtime_enabled = True
+        realtime_state.realtime_motion_cpu = 0
+        with patch.object(realtime, "_apply_scheduling", return_value="fifo:10"), \
+             patch.object(realtime.os, "sched_setaffinity") as setaffinity:
+            realtime.register_thread("test", threading.current_thread())
+        assert realtime.status()["threads"]["test"]["scheduling"] == "fifo:10"
+        setaffinity.assert_called_once()
+        realtime._threads.pop("test")
+        realtime._applied.pop("test")
+
+    def test_motion_threads_registered_per_table(self, realtime_state):
+        realtime_state.realtime_enabled = False
+        engine = tables.TableEngine("coffee", realtime_state)
+        threads = [threading.Thread(target=threading.Event().wait, args=(0.5,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        with patch.object(tables, "current", return_value=tables.get(tables.DEFAULT_ID)):
+            realtime.register_thread("motion", threads[0])
+        with patch.object(tables, "current", return_value=engine):
+            realtime.register_thread("motion", threads[1])
+        assert realtime._threads["motion:default"] is threads[0]
+        assert realtime._threads["motion:coffee"] is threads[1]
+        for thread in threads:
+            thread.join()
+        realtime.apply_thread("motion:default")
+        realtime.apply_thread("motion:coffee")
+        assert "motion:coffee" not in realtime._threads  # Dropped once its thread is gone
+
+    def test_never_enabled_changes_nothing(self, realtime_state):
+        if not hasattr(realtime.os, "sched_setaffinity"):
+            pytest.skip("No CPU affinity on this platform")
+        realtime_state.realtime_enabled = False
+        with patch.object(realtime.os, "sched_setaffinity") as setaffinity, \
+             patch.object(realtime.os, "sched_setscheduler") as setscheduler:
+            realtime.register_thread("test", threading.current_thread())
+            realtime.apply()
+        setaffinity.assert_not_called()
+        setscheduler.assert_not_called()
+        realtime._threads.pop("test")
+
+    def test_switching_off_restores_original_affinity(self, realtime_state):
+        if not hasattr(realtime.os, "sched_setaffinity"):
+            pytest.skip("No CPU affinity on this platform")
+        realtime_state.realtime_enabled = True
+        with patch.object(realtime, "_BASE_CPUS", {0, 1}), \
+             patch.object(realtime.os, "sched_setaffinity") as setaffinity, \
+             patch.object(realtime.gc, "freeze"), patch.object(realtime.gc, "unfreeze"):
+            realtime.apply()
+            realtime_state.realtime_enabled = False
+            realtime.apply()
+            assert setaffinity.call_args.args == (0, {0, 1})
+            setaffinity.reset_mock()
+            realtime.apply()  # Already restored
+        setaffinity.assert_not_called()
+
+
+class TestRealtimeEndpoint:
+    """Tests for /api/motion/realtime."""
+
+    async def test_update_and_report(self, async_client, realtime_state):
+        with patch.object(realtime, "apply") as apply, patch.object(state, "save"):
+            response = await async_client.post("/api/motion/realtime", json={
+                "enabled": True, "policy": "rr", "priority": 20, "motion_cpu": 0, "reset_stats": True
+            })
+            assert response.status_code == 200
+            assert response.json()["policy"] == "rr"
+            assert state.realtime_motion_cpu == 0
+            apply.assert_called_once()
+
+            response = await async_client.post("/api/motion/realtime", json={"policy": "deadline"})
+            assert response.status_code == 400
+
+        response = await async_client.get("/api/motion/realtime")
+        assert response.json()["enabled"] is True
+        assert set(response.json()["send_loop"]) == {"normal", "realtime"}
@@ -0,0 +1,142 @@
+"""
+Unit tests for transparent reconnect and in-flight move replay.
+"""
+from collections import deque
+from math import pi
+from unittest.mock import MagicMock, patch
+
+import pytest
+import serial
+
+from modules.connection import connection_manager, reconnect
+from modules.core import pattern_manager
+
+
+class FakeController:
+    """Connection that answers status queries and acknowledges moves."""
+
+    def __init__(self, statuses):
+        self.statuses = deque(statuses)
+        self.replies = deque()
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data.strip())
+        if data.startswith("?"):
+            self.replies.append(self.statuses.popleft() if len(self.statuses) > 1 else self.statuses[0])
+        elif data.startswith("G1"):
+            self.replies.append("ok")
+
+    def readline(self):
+        return self.replies.popleft() if self.replies else ""
+
+    def is_connected(self):
+        return True
+
+
+def _dropped(port="/dev/ttyUSB0"):
+    conn = MagicMock(spec=connection_manager.SerialConnection)
+    conn.port, conn.baudrate, conn.timeout = port, 115200, 2
+    conn.send.side_effect = serial.SerialException("[Errno 6] Device not configured")
+    return conn
+
+
+@pytest.fixture
+def table(mock_state):
+    """Connected table with fast backoff and a clean outage log."""
+    mock_state.conn = _dropped()
+    mock_state.x_steps_per_mm = 200
+    mock_state.y_steps_per_mm = 287
+    mock_state.gear_ratio = 10
+    with patch.object(reconnect, "state", mock_state), \
+         patch.object(pattern_manager, "state", mock_state), \
+         patch.object(reconnect, "BACKOFF_BASE", 0.0), \
+         patch.object(reconnect, "_outages", deque(maxlen=reconnect.OUTAGE_HISTORY)):
+        yield mock_state
+
+
+class TestClassification:
+    """Tests for telling a lost link from a bad reply."""
+
+    @pytest.mark.parametrize("error, lost", [
+        (serial.SerialException("device reports readiness to read but returned no data"), True),
+        (OSError(6, "Device not configured"), True),
+        (ConnectionResetError(), True),
+        (OSError("[Errno 5] Input/output error"), True),
+        (ValueError("could not convert string to float"), False),
+    ])
+    def test_is_connection_lost(self, error, lost):
+        assert reconnect.is_connection_lost(error) is lost
+
+
+class TestRecover:
+    """Tests for reconnecting and re-syncing position."""
+
+    def test_move_finished_during_outage(self, table):
+        controller = FakeController(["<Run|MPos:10.00,4.00,0.000>", "<Idle|MPos:12.50,-3.00,0.000>"])
+        with patch.object(reconnect, "_open", return_value=controller):
+            assert reconnect.recover(serial.SerialException("gone"), (12.5, -3.0)) == reconnect.ACKNOWLEDGED
+        assert table.conn is controller
+        assert table.is_connected is True
+        assert reconnect.outages()[-1]["outcome"] == reconnect.ACKNOWLEDGED
+
+    def test_alarm_unlocked_and_position_adopted(self, table):
+        table.machine_x, table.machine_y = 40.0, 7.0
+        controller = FakeController(["<Alarm|MPos:0.00,0.00,0.000>", "<Idle|MPos:0.00,0.00,0.000>"])
+        with patch.object(reconnect, "_open", return_value=controller), patch.object(reconnect.time, "sleep"):
+            assert reconnect.recover(serial.SerialException("gone"), (42.0, 7.5)) == reconnect.RESYNCED
+        assert "$X" in controller.sent
+        assert (table.machine_x, table.machine_y) == (0.0, 0.0)
+
+    def test_backoff_until_port_returns(self, table):
+        controller = FakeController(["<Idle|MPos:1.00,1.00,0.000>"])
+        attempts = [serial.SerialException("not present")] * 3 + [controller]
+        with patch.object(reconnect, "_open", side_effect=attempts):
+            assert reconnect.recover(serial.SerialException("gone"), (1.0, 1.0)) == reconnect.ACKNOWLEDGED
+        assert reconnect.outages()[-1]["attempts"] == 4
+
+    def test_gives_up(self, table):
+        with patch.object(reconnect, "_open", side_effect=serial.SerialException("not present")), \
+             patch.object(reconnect, "MAX_ATTEMPTS", 3):
+            assert reconnect.recover(serial.SerialException("gone"), (1.0, 1.0)) is None
+        assert table.conn is None
+        outage = reconnect.outages()[-1]
+        assert (outage["recovered"], outage["attempts"]) == (False, 3)
+
+    def test_reopens_same_port(self, table):
+        with patch.object(connection_manager, "list_serial_ports", return_value=[]):
+            with pytest.raises(serial.SerialException):
+                reconnect._open(table.conn)
+
+
+class TestReplay:
+    """Tests for the motion thread resuming the interrupted move."""
+
+    def test_move_resent_from_controller_position(self, table):
+        table.machine_x, table.machine_y = 100.0, 20.0
+        controller = FakeController(["<Idle|MPos:5.00,6.00,0.000>"])
+        with patch.object(reconnect, "_open", return_value=controller):
+            pattern_manager.MotionControlThread()._move_polar_sync(1.0, 0.5)
+
+        moves = [command for command in controller.sent if command.startswith("G1")]
+        assert len(moves) == 1
+        x, y = (float(part[1:]) for part in moves[0].split()[1:3])
+        # The intended increment, applied to where the controller says it is
+        assert table.machine_x == pytest.approx(5.0 + 100 / (4 * pi))
+        assert (x, y) == (round(table.machine_x, 2), round(table.machine_y, 2))
+        assert (table.current_theta, table.current_rho) == (1.0, 0.5)
+        assert not table.stop_requested
+
+    def test_unrecoverable_stops_pattern(self, table):
+        with patch.object(reconnect, "_open", side_effect=serial.SerialException("not present")), \
+             patch.object(reconnect, "MAX_ATTEMPTS", 2):
+            assert pattern_manager.MotionControlThread()._send_grbl_coordinates_sync(1.0, 1.0) is False
+        assert table.stop_requested
+        assert table.conn is None
+
+    async def test_outages_endpoint(self, async_client, table):
+        with patch.object(reconnect, "_open", return_value=FakeController(["<Idle|MPos:1.00,1.00,0.000>"])):
+            reconnect.recover(serial.SerialException("gone"), (1.0, 1.0))
+        response = await async_client.get("/api/connection/outages")
+        assert response.json()["current"] is None
+        assert response.json()["outages"][-1]["link"] == "/dev/ttyUSB0"
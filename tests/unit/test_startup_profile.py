@@ -0,0 +1,75 @@
+"""
+Unit tests for the startup profiler.
+"""
+import importlib
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from modules.core import startup_profile
+
+
+@pytest.fixture
+def profile():
+    """Isolated profiler records; the import timer is removed afterwards."""
+    with patch.object(startup_profile, "_imports", {}), \
+         patch.object(startup_profile, "_phases", []), \
+         patch.object(startup_profile, "_milestones", {}):
+        installed = startup_profile._timer in sys.meta_path
+        yield startup_profile
+        if not installed and startup_profile._timer in sys.meta_path:
+            sys.meta_path.remove(startup_profile._timer)
+
+
+class TestImportTimer:
+    """Tests for per-module import timing."""
+
+    def test_nested_imports_timed_separately(self, profile, tmp_path, monkeypatch):
+        (tmp_path / "slow_outer.py").write_text("import time\nimport slow_inner\ntime.sleep(0.02)\n")
+        (tmp_path / "slow_inner.py").write_text("import time\ntime.sleep(0.05)\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        profile.install()
+        try:
+            importlib.import_module("slow_outer")
+        finally:
+            sys.modules.pop("slow_outer", None)
+            sys.modules.pop("slow_inner", None)
+
+        own, total = profile._imports["slow_outer"]
+        assert profile._imports["slow_inner"][0] >= 0.05
+        assert 0.02 <= own < 0.05  # Excludes slow_inner
+        assert total >= 0.07
+        slowest = profile.report()["imports"]["slowest"]
+        assert slowest[0]["module"] == "slow_inner"
+
+    def test_finish_removes_timer(self, profile):
+        profile.install()
+        profile.finish()
+        assert profile._timer not in sys.meta_path
+        assert "complete" in profile.report()["milestones_ms"]
+
+
+class TestPhases:
+    """Tests for startup phase timing."""
+
+    def test_phases_and_milestones(self, profile):
+        with profile.phase("led", background=True):
+            pass
+        with pytest.raises(RuntimeError):
+            with profile.phase("mqtt"):
+                raise RuntimeError("broker unreachable")
+        profile.ready()
+
+        report = profile.report()
+        assert [(p["name"], p["background"], p["status"]) for p in report["phases"]] == [
+            ("led", True, "ok"), ("mqtt", False, "error")
+        ]
+        assert report["milestones_ms"]["ready"] >= report["phases"][0]["start_ms"]
+
+    async def test_endpoint(self, async_client, profile):
+        with profile.phase("connect", background=True):
+            pass
+        response = await async_client.get("/api/startup-profile")
+        assert response.status_code == 200
+        assert response.json()["phases"][0]["name"] == "connect"
@@ -0,0 +1,189 @@
+"""
+Unit tests for driving several tables from one server process.
+"""
+import contextvars
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from modules.connection import connection_manager
+from modules.core import cache_jobs, cache_manager, checkpoint, pattern_manager, tables
+from modules.core.state import default_state, state
+
+
+@pytest.fixture
+def local_tables(tmp_path):
+    """No extra tables to start with; table directories under tmp_path."""
+    with patch.object(tables, "TABLES_DIR", str(tmp_path)), \
+         patch.object(tables, "_engines", {}), \
+         patch.object(default_state, "local_tables", []), \
+         patch.object(default_state, "save"):
+        yield tmp_path
+    for engine in tables.all_tables():
+        if engine.motion_controller:
+            engine.motion_controller.stop()
+
+
+class TestState:
+    """Tests for each table having its own state."""
+
+    def test_state_follows_the_table(self, local_tables):
+        engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+        speed = default_state.speed
+        with patch.object(default_state, "table_name", "Main"):
+            with tables.use(engine):
+                state.speed = speed + 100
+                assert tables.current() is engine
+                assert state.table_name == "Coffee Table"
+            assert state.speed == speed
+            assert state.table_name == "Main"
+            assert engine.state.speed == speed + 100
+            assert tables.current().is_default
+
+    async def test_tasks_and_threads_inherit_the_table(self, local_tables):
+        engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+
+        async def name():
+            return state.table_name
+
+        assert await tables.create_task(engine, name()) == "Coffee Table"
+
+        seen = []
+        with tables.use(engine):
+            thread = threading.Thread(target=contextvars.copy_context().run,
+                                      args=(lambda: seen.append(state.table_name),))
+        thread.start()
+        thread.join()
+        assert seen == ["Coffee Table"]
+
+    def test_add_copies_settings_and_persists(self, local_tables):
+        clear_speed = default_state.clear_pattern_speed
+        default_state.clear_pattern_speed = 150
+        try:
+            engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+        finally:
+            default_state.clear_pattern_speed = clear_speed
+        assert engine.state.clear_pattern_speed == 150
+        assert engine.state.preferred_port == "/dev/ttyUSB1"
+        assert engine.state.table_id != default_state.table_id
+        assert default_state.local_tables == [{"id": engine.id, "name": "Coffee Table", "port": "/dev/ttyUSB1"}]
+
+        # Loaded again on the next start
+        with patch.object(tables, "_engines", {}):
+            tables.load()
+            assert tables.get(engine.id).name == "Coffee Table"
+
+    def test_port_taken(self, local_tables):
+        tables.add("/dev/ttyUSB1", "Coffee Table")
+        with pytest.raises(ValueError):
+            tables.add("/dev/ttyUSB1", "Side Table")
+
+    def test_usable_ports(self, local_tables):
+        engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+        ports = ["/dev/ttyUSB0", "/dev/ttyUSB1", "/dev/ttyACM0"]
+        assert tables.usable_ports(ports) == ["/dev/ttyUSB0", "/dev/ttyACM0"]
+        with tables.use(engine):
+            assert tables.usable_ports(ports) == ["/dev/ttyUSB1"]
+
+    def test_per_table_checkpoint_and_clear_band(self, local_tables):
+        engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+        with tables.use(engine):
+            assert checkpoint._path() == os.path.join(str(local_tables), engine.id, "checkpoint.jsonl")
+            assert checkpoint._journal() is not tables._default.local("checkpoint", checkpoint._Journal)
+
+
+class TestEngines:
+    """Tests for each table having its own motion thread and execution loop."""
+
+    async def test_separate_motion_and_locks(self, local_tables):
+        first = tables.add("/dev/ttyUSB1", "Coffee Table")
+        second = tables.add("/dev/ttyUSB2", "Side Table")
+        parts = []
+        for engine in (first, second):
+            with tables.use(engine):
+                parts.append((pattern_manager.get_motion_controller(), pattern_manager.get_pattern_lock(),
+                              pattern_manager.get_pause_event()))
+                assert pattern_manager.get_motion_controller() is parts[-1][0]
+        assert all(a is not b for a, b in zip(*parts))
+
+        # One table drawing does not hold up another
+        async with parts[0][1]:
+            with tables.use(second):
+                assert not pattern_manager.get_pattern_lock().locked()
+
+    def test_motion_thread_runs_as_its_table(self, local_tables):
+        engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+        seen = []
+        with tables.use(engine):
+            controller = pattern_manager.get_motion_controller()
+            with patch.object(controller, "_motion_loop", lambda: seen.append(state.table_name)):
+                controller.start()
+                controller.thread.join()
+        assert seen == ["Coffee Table"]
+
+    def test_cache_work_waits_for_any_table(self, local_tables):
+        engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+        with tables.use(engine):
+            controller = pattern_manager.get_motion_controller()
+        assert not cache_jobs.motion_busy()
+        with patch.object(controller, "is_busy", return_value=True):
+            assert cache_jobs.motion_busy()
+
+    async def test_cache_workers_run_as_default_table(self, local_tables):
+        engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+        seen = []
+
+        async def fake_generate(pattern_file):
+            seen.append(tables.current())
+            return True
+
+        jobs = cache_jobs.CacheJobQueue(queue_file=str(local_tables / "cache_jobs.json"))
+        with patch.object(cache_manager, "generate_image_preview", fake_generate), \
+             patch.object(cache_jobs, "motion_busy", return_value=False):
+            with tables.use(engine):
+                assert await jobs.request("a.thr") is True
+            await jobs.stop()
+        assert seen == [tables.get(tables.DEFAULT_ID)]
+
+    async def test_cpu_report(self, local_tables):
+        engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+        with tables.use(engine):
+            pattern_manager.get_motion_controller().start()
+        report = await tables.cpu_report(window=0.2)
+        assert report["window"] >= 0.2
+        assert [table["id"] for table in report["tables"]] == [tables.DEFAULT_ID, engine.id]
+        assert report["process_percent"] >= 0
+        assert report["tables"][1]["motion_thread_percent"] is not None
+        assert report["estimated_max_tables"] is None  # Nothing drawing, nothing to estimate from
+
+
+class TestRoutes:
+    """Tests for table-scoped routes and the table endpoints."""
+
+    async def test_prefixed_routes(self, async_client, local_tables):
+        engine = tables.add("/dev/ttyUSB1", "Coffee Table")
+        with patch.object(default_state, "table_name", "Main"):
+            assert (await async_client.get("/api/table-info")).json()["name"] == "Main"
+            assert (await async_client.get(f"/tables/{engine.id}/api/table-info")).json()["name"] == "Coffee Table"
+            assert (await async_client.get("/tables/default/api/table-info")).json()["name"] == "Main"
+            assert (await async_client.get("/tables/nope/api/table-info")).status_code == 404
+
+    async def test_add_list_remove(self, async_client, local_tables):
+        with patch.object(connection_manager, "connect_device"):
+            response = await async_client.post("/api/tables", json={"port": "/dev/ttyUSB1", "name": "Coffee Table"})
+            assert response.status_code == 200
+            table_id = response.json()["table"]["id"]
+            taken = await async_client.post("/api/tables", json={"port": "/dev/ttyUSB1", "name": "Side Table"})
+            assert taken.status_code == 400
+
+        listed = (await async_client.get("/api/tables")).json()["tables"]
+        assert [table["default"] for table in listed] == [True, False]
+        assert listed[1]["prefix"] == f"/tables/{table_id}"
+
+        assert (await async_client.delete("/api/tables/default")).status_code == 404
+        assert (await async_client.delete(f"/api/tables/{table_id}")).status_code == 200
+        assert tables.get(table_id) is None
+        assert not os.path.exists(os.path.join(str(local_tables), table_id))
+        assert default_state.local_tables == []
@@ -0,0 +1,153 @@
+"""
+Unit tests for the streaming upload pipeline (/upload_theta_rho and upload jobs).
+"""
+import asyncio
+import math
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from modules.core import upload_pipeline
+from modules.core.upload_pipeline import PatternValidator, UploadError, UploadJobs, receive_pattern, sanitize_filename
+
+
+class FakeUpload:
+    """Minimal UploadFile: serves data in reads of at most read_size bytes."""
+
+    def __init__(self, data: bytes, read_size: int = 7):
+        self.data = data
+        self.read_size = read_size
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk, self.data = self.data[:min(size, self.read_size)], self.data[min(size, self.read_size):]
+        return chunk
+
+
+class TestPatternValidator:
+    """Tests for line validation and normalization."""
+
+    def test_cleans_like_process_thr(self):
+        validator = PatternValidator()
+        text = validator.feed(
+            b"# by someone\n0 0\n\nnot a line\n1 2 3\n0.5 nan\ninf 0.5\n"
+            b"1 1.005\n1 1.0\n2 1.5\n3 -0.001\n",
+            final=True
+        )
+        assert text == "# by someone\n0.00000 0.00000\n1.00000 1.00000\n3.00000 0.00000\n"
+        assert validator.stats["points"] == 3
+        assert validator.stats["invalid"] == 2
+        assert validator.stats["non_finite"] == 2
+        assert validator.stats["rho_clamped"] == 2
+        assert validator.stats["rho_out_of_range"] == 1
+        assert validator.stats["duplicates"] == 1
+
+    def test_lines_split_across_chunks(self):
+        data = "# café\n" + "".join(f"{i * 0.1:.4f} {(i % 10) / 10:.4f}\r\n" for i in range(200))
+        validator = PatternValidator()
+        raw = data.encode("utf-8")
+        text = "".join(validator.feed(raw[i:i + 5]) for i in range(0, len(raw), 5)) + validator.feed(b"", True)
+        assert text.startswith("# café\n")
+        assert validator.stats["points"] == 200
+        assert validator.metadata["last_coordinate"] == {"x": pytest.approx(19.9), "y": 0.9}
+        assert all(math.isfinite(theta) for theta, _ in validator.coordinates)
+
+    def test_sanitize_filename(self):
+        assert sanitize_filename("../../etc/spiral.thr") == "spiral.thr"
+        assert sanitize_filename("C:\\patterns\\star.thr") == "star.thr"
+        with pytest.raises(UploadError):
+            sanitize_filename("../")
+
+
+class TestReceivePattern:
+    """Tests for streaming an upload to disk."""
+
+    async def test_moves_normalized_file_into_place(self, tmp_path):
+        validator = await receive_pattern(FakeUpload(b"0 0\n1 0.5"), str(tmp_path), "a.thr")
+        assert (tmp_path / "a.thr").read_text() == "0.00000 0.00000\n1.00000 0.50000\n"
+        assert validator.stats["points"] == 2
+        assert [p.name for p in tmp_path.iterdir()] == ["a.thr"]
+
+    async def test_rejected_upload_leaves_nothing_behind(self, tmp_path):
+        with pytest.raises(UploadError) as error:
+            await receive_pattern(FakeUpload(b"hello\nworld\n"), str(tmp_path), "a.thr")
+        assert error.value.status_code == 400
+
+        with patch.object(upload_pipeline, "MAX_UPLOAD_BYTES", 10):
+            with pytest.raises(UploadError) as error:
+                await receive_pattern(FakeUpload(b"0 0\n" * 10), str(tmp_path), "a.thr")
+        assert error.value.status_code == 413
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestUploadEndpoint:
+    """Tests for /upload_theta_rho and the upload job API."""
+
+    async def test_upload_returns_job_and_renders_preview(self, async_client, tmp_path):
+        patterns_dir = tmp_path / "patterns"
+        patterns_dir.mkdir()
+        preview = AsyncMock(side_effect=[False, True])
+        with patch("main.pattern_manager.THETA_RHO_DIR", str(patterns_dir)), \
+             patch("modules.core.cache_manager.generate_image_preview", preview), \
+             patch("modules.core.cache_manager.cache_pattern_metadata", AsyncMock()) as metadata, \
+             patch.object(upload_pipeline, "upload_jobs", UploadJobs()), \
+             patch("main.upload_jobs", upload_pipeline.upload_jobs), \
+             patch("asyncio.sleep", AsyncMock()):
+            response = await async_client.post(
+                "/upload_theta_rho",
+                files={"file": ("wave.thr", b"0 0\n0 0\n1 0.5\n2 1\n", "text/plain")}
+            )
+            assert response.status_code == 200
+            data = response.json()
+            assert data["file"] == "custom_patterns/wave.thr"
+            assert data["stats"]["points"] == 3
+            assert data["stats"]["duplicates"] == 1
+
+            # Background tasks have run by the time the test client returns
+            job = (await async_client.get(f"/api/upload-jobs/{data['job_id']}")).json()
+            assert (job["status"], job["progress"]) == ("done", 100)
+            assert preview.await_count == 2
+            metadata.assert_awaited_once_with("custom_patterns/wave.thr", {"x": 0.0, "y": 0.0}, {"x": 2.0, "y": 1.0}, 3)
+            assert (await async_client.get("/api/upload-jobs/unknown")).status_code == 404
+
+        assert (patterns_dir / "custom_patterns" / "wave.thr").exists()
+
+    async def test_invalid_upload_is_rejected(self, async_client, tmp_path):
+        with patch("main.pattern_manager.THETA_RHO_DIR", str(tmp_path)):
+            response = await async_client.post(
+                "/upload_theta_rho",
+                files={"file": ("bad.thr", b"<html></html>", "text/plain")}
+            )
+        assert response.status_code == 400
+        assert not (tmp_path / "custom_patterns" / "bad.thr").exists()
+
+    def test_websocket_streams_job_updates(self):
+        from fastapi.testclient import TestClient
+        from main import app
+
+        jobs = UploadJobs()
+        with patch("main.upload_jobs", jobs):
+            job = jobs.create("custom_patterns/a.thr", {"points": 1})
+            with TestClient(app).websocket_connect(f"/ws/upload-jobs?job_id={job['id']}") as websocket:
+                snapshot = websocket.receive_json()
+                assert snapshot["type"] == "upload_job"
+                assert snapshot["data"]["status"] == "queued"
+
+    async def test_websocket_disconnect_noticed_between_updates(self):
+        from main import websocket_upload_jobs_endpoint
+
+        class IdleClient:
+            """Accepts, then leaves without any job update having been sent."""
+            async def accept(self):
+                pass
+
+            async def receive(self):
+                await asyncio.sleep(0.05)
+                return {"type": "websocket.disconnect", "code": 1000}
+
+            async def close(self):
+                pass
+
+        jobs = UploadJobs()
+        with patch("main.upload_jobs", jobs):
+            await asyncio.wait_for(websocket_upload_jobs_endpoint(IdleClient()), timeout=1.0)
+        assert jobs._subscribers == []
@@ -0,0 +1,186 @@
+"""
+Unit tests for the WLED client (LEDController) and DDP realtime output.
+
+Runs against a local fake WLED device:
+- HTTP JSON API on a loopback port, counting requests and connections
+- UDP socket capturing DDP packets
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from modules.led import led_controller
+from modules.led.ddp import DDP_HEADER, DDP_MAX_DATA, DDP_TYPE_RGB24, DDP_TYPE_RGBW32
+from modules.led.led_controller import LEDController
+
+
+class FakeWLED(ThreadingHTTPServer):
+    """Minimal WLED JSON API: GET/POST /json/state."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeWLEDHandler)
+        self.wled_state = {"on": False, "bri": 128, "ps": -1, "pl": -1, "seg": [{"fx": 0}]}
+        self.gets = 0
+        self.posts = []
+        self.connections = 0
+        self.post_delay = 0.0
+        self.reply_with_state = True
+
+    @property
+    def address(self):
+        return f"127.0.0.1:{self.server_address[1]}"
+
+
+class FakeWLEDHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is observable
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.server.gets += 1
+        self._reply(self.server.wled_state)
+
+    def do_POST(self):
+        params = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.server.post_delay)
+        self.server.posts.append(dict(params))
+        params.pop("v", None)
+        if params.get("on") == "t":
+            params["on"] = not self.server.wled_state["on"]
+        led_controller._merge_state(self.server.wled_state, params)
+        self._reply(self.server.wled_state if self.server.reply_with_state else {"success": True})
+
+
+@pytest.fixture
+def wled():
+    server = FakeWLED()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def udp_receiver():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1.0)
+    yield sock
+    sock.close()
+
+
+class TestWLEDClient:
+    """Tests for pooling, caching and coalescing."""
+
+    def test_status_uses_one_get(self, wled):
+        controller = LEDController(wled.address)
+        status = controller.check_wled_status()
+        assert status["connected"] is True
+        assert status["is_on"] is False
+        controller.check_wled_status()
+        assert wled.gets == 1  # Second check is served from the cache
+
+    def test_power_on_folded_into_command(self, wled):
+        controller = LEDController(wled.address)
+        status = controller.set_brightness(42)
+        assert status["is_on"] is True
+        assert status["brightness"] == 42
+        assert wled.gets == 1
+        assert len(wled.posts) == 1
+        assert wled.posts[0] == {"bri": 42, "on": True, "v": True}
+
+    def test_repeated_commands_skip_gets_and_reuse_connection(self, wled):
+        controller = LEDController(wled.address)
+        for value in range(10):
+            controller.set_brightness(value + 1)
+        assert wled.gets == 1
+        assert len(wled.posts) == 10
+        assert wled.connections == 1
+        assert wled.wled_state["bri"] == 10
+
+    def test_optimistic_cache_without_state_reply(self, wled):
+        wled.reply_with_state = False
+        controller = LEDController(wled.address)
+        status = controller.set_power(2)
+        assert status["is_on"] is True
+        status = controller.set_brightness(7)
+        assert status["brightness"] == 7
+        assert wled.gets == 1
+
+    def test_rapid_updates_are_coalesced(self, wled):
+        wled.post_delay = 0.05
+        controller = LEDController(wled.address)
+        controller.check_wled_status()
+
+        threads = [threading.Thread(target=controller.set_brightness, args=(v,)) for v in range(1, 21)]
+        for t in threads:
+            t.start()
+            time.sleep(0.005)
+        for t in threads:
+            t.join()
+
+        assert len(wled.posts) < 20
+        assert wled.wled_state["bri"] == 20
+
+    def test_merge_state_segments_and_toggles(self):
+        target = {}
+        led_controller._merge_state(target, {"seg": [{"fx": 1, "sx": 10}], "on": "t"})
+        led_controller._merge_state(target, {"seg": [{"sx": 20}], "on": "t", "bri": 5})
+        assert target == {"seg": [{"fx": 1, "sx": 20}], "bri": 5}
+
+    def test_connection_error_reported(self):
+        controller = LEDController("127.0.0.1:1")
+        status = controller.set_brightness(10)
+        assert status["connected"] is False
+        assert "Cannot connect" in status["message"]
+
+
+class TestDDPRealtime:
+    """Tests for the DDP/UDP realtime path."""
+
+    def test_frame_split_into_packets(self, udp_receiver):
+        controller = LEDController("127.0.0.1")
+        port = udp_receiver.getsockname()[1]
+        controller.enable_realtime(port=port)
+        pixels = [(i % 256, 1, 2) for i in range(600)]  # 1800 bytes -> 2 packets
+        assert controller.send_frame(pixels) == 2
+
+        packets = [udp_receiver.recvfrom(2048)[0] for _ in range(2)]
+        headers = [DDP_HEADER.unpack(p[:DDP_HEADER.size]) for p in packets]
+        assert [h[4] for h in headers] == [0, DDP_MAX_DATA]
+        assert [h[5] for h in headers] == [DDP_MAX_DATA, 1800 - DDP_MAX_DATA]
+        assert headers[0][0] & 0x01 == 0  # Push only on the last packet
+        assert headers[1][0] & 0x01 == 1
+        assert headers[0][2] == DDP_TYPE_RGB24
+        assert b"".join(p[DDP_HEADER.size:] for p in packets) == bytes(c for px in pixels for c in px)
+        controller.disable_realtime()
+
+    def test_rgbw_solid_color(self, udp_receiver):
+        controller = LEDController("127.0.0.1")
+        controller.enable_realtime(rgbw=True, port=udp_receiver.getsockname()[1])
+        controller.send_realtime_color(1, 2, 3, 10, w=4)
+        packet = udp_receiver.recvfrom(2048)[0]
+        header = DDP_HEADER.unpack(packet[:DDP_HEADER.size])
+        assert header[2] == DDP_TYPE_RGBW32
+        assert packet[DDP_HEADER.size:] == bytes((1, 2, 3, 4)) * 10
+        controller.disable_realtime()